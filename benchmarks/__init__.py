@@ -0,0 +1 @@
+"""Microbenchmarks for the non-inference hot paths (run with ``python -m benchmarks``)."""
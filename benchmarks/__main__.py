@@ -0,0 +1,159 @@
+"""Run the microbenchmarks and compare against stored JSON baselines.
+
+Usage:
+  # Run everything and store a baseline
+  uv run python -m benchmarks run --save benchmarks/baselines/main.json
+
+  # Run and fail (exit 1) if any case is >10% slower than the baseline
+  uv run python -m benchmarks run --compare benchmarks/baselines/main.json
+
+  # Compare two stored result files, with a looser gate for one case
+  uv run python -m benchmarks compare base.json new.json \\
+    --threshold 0.05 --case-threshold wtf_conversion/hour_long=0.2
+
+  # Peak and retained Python memory of the transcript representations
+  uv run python -m benchmarks memory
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from . import cases  # noqa: F401  (registers the cases)
+from .harness import (
+    CASES,
+    MEMORY_CASES,
+    compare,
+    format_bytes,
+    format_comparison,
+    format_seconds,
+    run_cases,
+    run_memory_cases,
+)
+
+
+def _parse_case_thresholds(values: list[str]) -> dict[str, float]:
+    thresholds = {}
+    for value in values:
+        name, _, limit = value.rpartition("=")
+        if not name:
+            raise argparse.ArgumentTypeError(f"Expected NAME=FRACTION, got {value!r}")
+        thresholds[name] = float(limit)
+    return thresholds
+
+
+def _report(rows, threshold: float) -> int:
+    for line in format_comparison(rows):
+        print(line)
+    regressions = [r for r in rows if r.status == "REGRESSION"]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond threshold", file=sys.stderr)
+        return 1
+    print(f"\nNo regressions (default threshold {threshold:.0%})")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Microbenchmarks for vcon-mac-wtf hot paths",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    gate = argparse.ArgumentParser(add_help=False)
+    gate.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Allowed slowdown as a fraction of the baseline (default: 0.10)",
+    )
+    gate.add_argument(
+        "--case-threshold",
+        action="append",
+        default=[],
+        metavar="NAME=FRACTION",
+        help="Per-case threshold override (repeatable)",
+    )
+    gate.add_argument(
+        "--statistic",
+        choices=["min", "median", "mean"],
+        default="median",
+        help="Statistic to compare (default: median)",
+    )
+
+    run = sub.add_parser("run", parents=[gate], help="Run benchmarks")
+    run.add_argument("-k", "--filter", help="Only run cases whose name contains this")
+    run.add_argument("--min-time", type=float, default=0.2, help="Seconds per round")
+    run.add_argument("--repeats", type=int, default=5, help="Rounds per case")
+    run.add_argument("--save", type=Path, help="Write results JSON here")
+    run.add_argument("--compare", type=Path, help="Baseline JSON to gate against")
+
+    cmp_ = sub.add_parser("compare", parents=[gate], help="Compare two results files")
+    cmp_.add_argument("baseline", type=Path)
+    cmp_.add_argument("current", type=Path)
+
+    memory = sub.add_parser("memory", help="Measure peak and retained memory of memory cases")
+    memory.add_argument("-k", "--filter", help="Only run cases whose name contains this")
+    memory.add_argument("--save", type=Path, help="Write results JSON here")
+
+    sub.add_parser("list", help="List benchmark cases")
+
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for name, case in {**CASES, **MEMORY_CASES}.items():
+            print(f"{name:<44} {case.description}")
+        return 0
+
+    if args.command == "memory":
+
+        def report_memory(name, stats):
+            print(
+                f"{name:<44} peak {format_bytes(stats['peak_bytes']):>10}  "
+                f"retained {format_bytes(stats['retained_bytes']):>10}"
+            )
+
+        current = run_memory_cases(args.filter, report_memory)
+        if args.save:
+            args.save.parent.mkdir(parents=True, exist_ok=True)
+            args.save.write_text(json.dumps(current, indent=2) + "\n")
+            print(f"\nSaved results to {args.save}")
+        return 0
+
+    case_thresholds = _parse_case_thresholds(args.case_threshold)
+
+    if args.command == "compare":
+        baseline = json.loads(args.baseline.read_text())
+        current = json.loads(args.current.read_text())
+        rows = compare(baseline, current, args.threshold, case_thresholds, args.statistic)
+        return _report(rows, args.threshold)
+
+    def progress(name, stats):
+        print(
+            f"{name:<44} median {format_seconds(stats['median']):>10}  "
+            f"min {format_seconds(stats['min']):>10}  "
+            f"(x{stats['number']}, {stats['repeats']} rounds)"
+        )
+
+    current = run_cases(args.filter, args.min_time, args.repeats, progress)
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps(current, indent=2) + "\n")
+        print(f"\nSaved results to {args.save}")
+    if args.compare:
+        print()
+        baseline = json.loads(args.compare.read_text())
+        if args.filter:
+            baseline["results"] = {
+                k: v for k, v in baseline.get("results", {}).items() if args.filter in k
+            }
+        rows = compare(baseline, current, args.threshold, case_thresholds, args.statistic)
+        return _report(rows, args.threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,343 @@
+"""Benchmark cases for the non-inference hot paths.
+
+Inference is replaced by SimulatedWhisperEngine with a zero real-time factor,
+so these measure only the code this repo owns: decoding, result reshaping, WTF
+conversion, vCon enrichment and the HTTP layer. Memory cases compare the
+columnar Transcript with the mlx_whisper dict lists it replaced.
+"""
+
+import asyncio
+import base64
+import io
+import os
+import struct
+from unittest.mock import patch
+
+from vcon_mac_wtf.engine.simulated_engine import SimulatedWhisperEngine, synthetic_result
+from vcon_mac_wtf.engine.transcript import Transcript
+
+from .harness import benchmark, memory_benchmark
+
+HOUR = 3600.0
+MODEL = "mlx-community/whisper-turbo"
+
+
+def make_wav(duration: float, sample_rate: int = 16000) -> bytes:
+    """16-bit mono PCM WAV of pseudo-random noise (incompressible, like real audio)."""
+    data_size = int(duration * sample_rate) * 2
+    header = struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF",
+        36 + data_size,
+        b"WAVE",
+        b"fmt ",
+        16,
+        1,
+        1,
+        sample_rate,
+        sample_rate * 2,
+        2,
+        16,
+        b"data",
+        data_size,
+    )
+    return header + os.urandom(data_size)
+
+
+def make_vcon(dialogs: int, duration: float) -> dict:
+    body = base64.urlsafe_b64encode(make_wav(duration)).decode("ascii")
+    return {
+        "vcon": "0.0.1",
+        "uuid": "bench-vcon",
+        "parties": [{"name": "Agent"}, {"name": "Customer"}],
+        "dialog": [
+            {
+                "type": "recording",
+                "start": "2024-01-15T10:00:00Z",
+                "parties": [0, 1],
+                "mediatype": "audio/wav",
+                "body": body,
+                "encoding": "base64url",
+            }
+            for _ in range(dialogs)
+        ],
+        "analysis": [],
+    }
+
+
+def _simulated_engine():
+    """Patch the transcription service onto a zero-latency simulated engine."""
+    return patch(
+        "vcon_mac_wtf.services.transcription.mlx_engine",
+        SimulatedWhisperEngine(real_time_factor=0.0),
+    )
+
+
+# --- base64 decode -----------------------------------------------------------
+
+
+@benchmark("decode_audio_body/base64url_32mb")
+def bench_decode_base64url():
+    """_decode_audio_body on a 32 MB base64url payload."""
+    from vcon_mac_wtf.services.vcon_processor import _decode_audio_body
+
+    body = base64.urlsafe_b64encode(os.urandom(32 * 1024 * 1024)).decode("ascii").rstrip("=")
+    yield lambda: _decode_audio_body(body, "base64url")
+
+
+@benchmark("decode_audio_body/base64_32mb")
+def bench_decode_base64():
+    """_decode_audio_body on a 32 MB standard base64 payload."""
+    from vcon_mac_wtf.services.vcon_processor import _decode_audio_body
+
+    body = base64.b64encode(os.urandom(32 * 1024 * 1024)).decode("ascii")
+    yield lambda: _decode_audio_body(body, "base64")
+
+
+# --- result reshaping --------------------------------------------------------
+
+
+@benchmark("transcript/from_result_hour_long")
+def bench_transcript_columns():
+    """Transcript.from_result on a one-hour result (9000 words), as the engine does."""
+    result = synthetic_result(HOUR)
+    yield lambda: Transcript.from_result(result)
+
+
+@benchmark("verbose_json/hour_long")
+def bench_verbose_json():
+    """verbose_json body (segments and words) rendered from a one-hour Transcript."""
+    from vcon_mac_wtf.routes.openai_compat import render_json, verbose_json
+
+    transcript = Transcript.from_result(synthetic_result(HOUR))
+    yield lambda: render_json(verbose_json(transcript, segments=True, words=True))
+
+
+@benchmark("wtf_conversion/hour_long", threshold=0.15)
+def bench_wtf_conversion():
+    """convert_result_to_wtf for a one-hour Transcript."""
+    from vcon_mac_wtf.services.wtf_converter import convert_result_to_wtf
+
+    transcript = Transcript.from_result(synthetic_result(HOUR))
+    yield lambda: convert_result_to_wtf(transcript, MODEL, 12.0)
+
+
+# --- vCon enrichment ---------------------------------------------------------
+
+
+@benchmark("process_vcon/8_dialogs_60s", threshold=0.15)
+def bench_process_vcon():
+    """process_vcon enrichment of a vCon with eight 60-second dialogs."""
+    from vcon_mac_wtf.models.vcon import Vcon
+    from vcon_mac_wtf.services.vcon_processor import process_vcon
+
+    vcon = Vcon.model_validate(make_vcon(dialogs=8, duration=60.0))
+    loop = asyncio.new_event_loop()
+    with _simulated_engine():
+        yield lambda: loop.run_until_complete(process_vcon(vcon))
+    loop.close()
+
+
+# --- HTTP round trips --------------------------------------------------------
+
+
+def _asgi_client(loop):
+    import httpx
+
+    from vcon_mac_wtf.main import app
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+
+@benchmark("asgi/openai_verbose_json_60s", threshold=0.15)
+def bench_asgi_openai():
+    """POST /v1/audio/transcriptions (verbose_json) with a 60-second WAV."""
+    wav = make_wav(60.0)
+    loop = asyncio.new_event_loop()
+    client = _asgi_client(loop)
+
+    async def request():
+        resp = await client.post(
+            "/v1/audio/transcriptions",
+            files={"file": ("bench.wav", io.BytesIO(wav), "audio/wav")},
+            data={"response_format": "verbose_json"},
+        )
+        resp.raise_for_status()
+
+    with _simulated_engine():
+        yield lambda: loop.run_until_complete(request())
+    loop.run_until_complete(client.aclose())
+    loop.close()
+
+
+@benchmark("asgi/transcribe_vcon_2x60s", threshold=0.15)
+def bench_asgi_transcribe():
+    """POST /transcribe with a vCon of two 60-second dialogs."""
+    vcon = make_vcon(dialogs=2, duration=60.0)
+    loop = asyncio.new_event_loop()
+    client = _asgi_client(loop)
+
+    async def request():
+        resp = await client.post("/transcribe", json=vcon)
+        resp.raise_for_status()
+
+    with _simulated_engine():
+        yield lambda: loop.run_until_complete(request())
+    loop.run_until_complete(client.aclose())
+    loop.close()
+
+
+UPLOAD_CHUNK = 64 * 1024  # what uvicorn hands the app per receive()
+
+
+def _upload_request(client, wav: bytes, raw: bool):
+    """One 10-minute WAV upload as multipart form or raw body, both sent in chunks."""
+
+    async def chunks():
+        for i in range(0, len(wav), UPLOAD_CHUNK):
+            yield wav[i : i + UPLOAD_CHUNK]
+
+    async def request():
+        if raw:
+            resp = await client.post(
+                "/v1/audio/transcriptions/raw",
+                params={"response_format": "json"},
+                content=chunks(),
+                headers={"Content-Type": "audio/wav", "Content-Length": str(len(wav))},
+            )
+        else:
+            resp = await client.post(
+                "/v1/audio/transcriptions",
+                files={"file": ("bench.wav", io.BytesIO(wav), "audio/wav")},
+                data={"response_format": "json"},
+            )
+        resp.raise_for_status()
+
+    return request
+
+
+def _upload_case(raw: bool):
+    wav = make_wav(600.0)
+    loop = asyncio.new_event_loop()
+    client = _asgi_client(loop)
+    request = _upload_request(client, wav, raw)
+    with _simulated_engine():
+        yield lambda: loop.run_until_complete(request())
+    loop.run_until_complete(client.aclose())
+    loop.close()
+
+
+@benchmark("asgi/upload_10min/multipart", threshold=0.15)
+def bench_upload_multipart():
+    """POST /v1/audio/transcriptions (json) with a 10-minute (19 MB) WAV as a form upload."""
+    yield from _upload_case(raw=False)
+
+
+@benchmark("asgi/upload_10min/raw", threshold=0.15)
+def bench_upload_raw():
+    """POST /v1/audio/transcriptions/raw (json) with the same WAV as the request body."""
+    yield from _upload_case(raw=True)
+
+
+# --- instrumentation ---------------------------------------------------------
+
+
+@benchmark("instrumentation/stage_timer", threshold=0.25)
+def bench_stage_timer():
+    """One tracing.stage() block inside a request trace (metrics + Server-Timing)."""
+    from vcon_mac_wtf.tracing import RequestTrace, current_trace, stage
+
+    token = current_trace.set(RequestTrace("bench", "/bench", collect_spans=False))
+
+    def timed():
+        with stage("bench", "mlx-community/whisper-turbo"):
+            pass
+
+    yield timed
+    current_trace.reset(token)
+
+
+# --- memory: columnar Transcript vs mlx_whisper dict lists ---------------------
+# Each output case builds the result first, as inference does, so the peak
+# covers a whole request: the dict result alive while it is reshaped, or only
+# while it is converted to columns.
+
+
+def _verbose_json_from_dicts(result: dict) -> bytes:
+    """verbose_json as rendered before Transcript: flattened word dicts, one JSONResponse."""
+    from fastapi.responses import JSONResponse
+
+    words = [
+        {"word": w["word"], "start": w["start"], "end": w["end"]}
+        for segment in result["segments"]
+        for w in segment.get("words", [])
+    ]
+    body = {
+        "task": "transcribe",
+        "language": result["language"],
+        "duration": 0.0,
+        "text": result["text"],
+        "segments": result["segments"],
+        "words": words,
+    }
+    return JSONResponse(body).body
+
+
+@memory_benchmark("result/three_hours/dicts")
+def mem_result_dicts():
+    """A three-hour result (27000 words) as mlx_whisper returns it."""
+    yield lambda: synthetic_result(3 * HOUR)
+
+
+@memory_benchmark("result/three_hours/columns")
+def mem_result_columns():
+    """The same result converted to a Transcript (peak includes the dicts)."""
+    yield lambda: Transcript.from_result(synthetic_result(3 * HOUR))
+
+
+@memory_benchmark("verbose_json/three_hours/dicts")
+def mem_verbose_json_dicts():
+    """Three-hour result, then verbose_json rendered from the dicts."""
+    yield lambda: _verbose_json_from_dicts(synthetic_result(3 * HOUR))
+
+
+@memory_benchmark("verbose_json/three_hours/columns")
+def mem_verbose_json_columns():
+    """Three-hour result, Transcript, then verbose_json rendered from the columns."""
+    from vcon_mac_wtf.routes.openai_compat import render_json, verbose_json
+
+    def request():
+        transcript = Transcript.from_result(synthetic_result(3 * HOUR))
+        return render_json(verbose_json(transcript, segments=True, words=True))
+
+    yield request
+
+
+@memory_benchmark("wtf_conversion/three_hours/dicts")
+def mem_wtf_dicts():
+    """Three-hour result, then the WTF document from the dicts (WhisperConverter models)."""
+    from vcon_mac_wtf.services.wtf_converter import convert_result_to_wtf
+
+    yield lambda: convert_result_to_wtf(synthetic_result(3 * HOUR), MODEL, 12.0)
+
+
+@memory_benchmark("wtf_conversion/three_hours/columns")
+def mem_wtf_columns():
+    """Three-hour result, Transcript, then the WTF document written from the columns."""
+    from vcon_mac_wtf.services.wtf_converter import convert_result_to_wtf
+
+    yield lambda: convert_result_to_wtf(
+        Transcript.from_result(synthetic_result(3 * HOUR)), MODEL, 12.0
+    )
+
+
+@memory_benchmark("upload_10min/multipart")
+def mem_upload_multipart():
+    """A 10-minute (19 MB) WAV through /v1/audio/transcriptions as a form upload."""
+    yield from _upload_case(raw=False)
+
+
+@memory_benchmark("upload_10min/raw")
+def mem_upload_raw():
+    """The same WAV through /v1/audio/transcriptions/raw as the request body."""
+    yield from _upload_case(raw=True)
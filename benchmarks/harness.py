@@ -0,0 +1,244 @@
+"""Benchmark registry, timing loop and baseline comparison."""
+
+import gc
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterator
+
+
+@dataclass
+class Case:
+    name: str
+    setup: Callable[[], Any]  # context manager factory yielding the callable to time
+    threshold: float | None = None  # overrides the global allowed regression
+    description: str = ""
+
+
+CASES: dict[str, Case] = {}
+MEMORY_CASES: dict[str, Case] = {}
+
+
+def benchmark(name: str, threshold: float | None = None):
+    """Register a generator function that sets up a case and yields the callable to time."""
+    return _register(CASES, name, threshold)
+
+
+def memory_benchmark(name: str):
+    """Register a case like ``benchmark`` whose callable's memory is measured instead."""
+    return _register(MEMORY_CASES, name, None)
+
+
+def _register(registry: dict[str, Case], name: str, threshold: float | None):
+    def decorator(fn):
+        registry[name] = Case(
+            name=name,
+            setup=contextmanager(fn),
+            threshold=threshold,
+            description=(fn.__doc__ or "").strip().splitlines()[0] if fn.__doc__ else "",
+        )
+        return fn
+
+    return decorator
+
+
+def measure(fn: Callable[[], Any], min_time: float = 0.2, repeats: int = 5) -> dict[str, Any]:
+    """Time ``fn`` like timeit: calibrate a loop count, then take ``repeats`` rounds.
+
+    Returns per-call seconds (min, median, mean, stdev) with GC disabled while timing.
+    """
+    fn()  # warm up
+    start = time.perf_counter()
+    fn()
+    single = max(time.perf_counter() - start, 1e-9)
+    number = max(1, int(min_time / single))
+
+    rounds = []
+    gc_was_enabled = gc.isenabled()
+    try:
+        for _ in range(repeats):
+            gc.collect()
+            gc.disable()
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            rounds.append((time.perf_counter() - start) / number)
+            if gc_was_enabled:
+                gc.enable()
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    return {
+        "min": min(rounds),
+        "median": statistics.median(rounds),
+        "mean": statistics.fmean(rounds),
+        "stdev": statistics.stdev(rounds) if len(rounds) > 1 else 0.0,
+        "number": number,
+        "repeats": repeats,
+    }
+
+
+def measure_memory(fn: Callable[[], Any]) -> dict[str, Any]:
+    """Peak and retained Python allocation of one call of ``fn`` (tracemalloc).
+
+    Retained is what the return value still holds. Setup, and a warm-up
+    call (lazy imports, caches), are not counted.
+    """
+    fn()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        value = fn()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del value
+    return {"peak_bytes": peak - before, "retained_bytes": current - before}
+
+
+def run_memory_cases(
+    name_filter: str | None = None,
+    progress: Callable[[str, dict[str, Any]], None] | None = None,
+) -> dict[str, Any]:
+    """Run registered memory cases (optionally filtered by substring); a results document."""
+    results: dict[str, Any] = {}
+    for name, case in MEMORY_CASES.items():
+        if name_filter and name_filter not in name:
+            continue
+        with case.setup() as fn:
+            stats = measure_memory(fn)
+        results[name] = stats
+        if progress:
+            progress(name, stats)
+    return {"meta": environment(), "results": results}
+
+
+def run_cases(
+    name_filter: str | None = None,
+    min_time: float = 0.2,
+    repeats: int = 5,
+    progress: Callable[[str, dict[str, Any]], None] | None = None,
+) -> dict[str, Any]:
+    """Run registered cases (optionally filtered by substring) and return a results document."""
+    results: dict[str, Any] = {}
+    for name, case in CASES.items():
+        if name_filter and name_filter not in name:
+            continue
+        with case.setup() as fn:
+            stats = measure(fn, min_time=min_time, repeats=repeats)
+        results[name] = stats
+        if progress:
+            progress(name, stats)
+    return {"meta": environment(), "results": results}
+
+
+def environment() -> dict[str, Any]:
+    """Describe where the results were produced, so baselines are compared like for like."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            timeout=5,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "commit": commit,
+    }
+
+
+@dataclass
+class Comparison:
+    name: str
+    baseline: float | None
+    current: float | None
+    threshold: float
+
+    @property
+    def ratio(self) -> float | None:
+        if not self.baseline or self.current is None:
+            return None
+        return self.current / self.baseline
+
+    @property
+    def status(self) -> str:
+        if self.baseline is None:
+            return "new"
+        if self.current is None:
+            return "missing"
+        if self.ratio > 1 + self.threshold:
+            return "REGRESSION"
+        if self.ratio < 1 - self.threshold:
+            return "improved"
+        return "ok"
+
+
+def compare(
+    baseline: dict[str, Any],
+    current: dict[str, Any],
+    threshold: float = 0.10,
+    case_thresholds: dict[str, float] | None = None,
+    statistic: str = "median",
+) -> list[Comparison]:
+    """Compare two results documents case by case on ``statistic``.
+
+    A case regresses when it is slower than the baseline by more than its
+    threshold: an explicit ``case_thresholds`` entry, else the case's registered
+    threshold, else the global ``threshold``.
+    """
+    case_thresholds = case_thresholds or {}
+    base = baseline.get("results", {})
+    cur = current.get("results", {})
+    rows = []
+    for name in list(base) + [n for n in cur if n not in base]:
+        registered = CASES[name].threshold if name in CASES else None
+        limit = case_thresholds.get(name, registered if registered is not None else threshold)
+        rows.append(
+            Comparison(
+                name=name,
+                baseline=base[name][statistic] if name in base else None,
+                current=cur[name][statistic] if name in cur else None,
+                threshold=limit,
+            )
+        )
+    return rows
+
+
+def format_seconds(value: float | None) -> str:
+    if value is None:
+        return "-"
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if value >= scale:
+            return f"{value / scale:.2f} {unit}"
+    return f"{value / 1e-9:.0f} ns"
+
+
+def format_bytes(value: float) -> str:
+    for unit, scale in (("GB", 2**30), ("MB", 2**20), ("KB", 2**10)):
+        if value >= scale:
+            return f"{value / scale:.1f} {unit}"
+    return f"{value:.0f} B"
+
+
+def format_comparison(rows: list[Comparison]) -> Iterator[str]:
+    yield f"{'case':<44} {'baseline':>12} {'current':>12} {'change':>9}  status"
+    for row in rows:
+        change = f"{(row.ratio - 1) * 100:+.1f}%" if row.ratio is not None else "-"
+        yield (
+            f"{row.name:<44} {format_seconds(row.baseline):>12} "
+            f"{format_seconds(row.current):>12} {change:>9}  {row.status}"
+        )
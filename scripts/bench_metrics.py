@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Measure the hot-path overhead of the in-process Prometheus metrics and tracing.
+
+Times the primitives a transcription request touches (stage timers, counter
+increments, histogram observations, label lookups) and projects the per-request
+cost against a typical inference time. Stage timers are measured both outside a
+request and inside a request trace without a span exporter (the default).
+
+Usage:
+  uv run python scripts/bench_metrics.py
+  uv run python scripts/bench_metrics.py --iterations 500000 --inference-ms 250
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+
+from vcon_mac_wtf.metrics import (
+    AUDIO_SECONDS,
+    MODEL_CACHE,
+    REAL_TIME_FACTOR,
+    REQUESTS,
+    REQUESTS_IN_FLIGHT,
+)
+from vcon_mac_wtf.tracing import RequestTrace, current_trace, record_stage, stage
+
+MODEL = "mlx-community/whisper-turbo"
+ENDPOINT = "/v1/audio/transcriptions"
+
+# Instrumentation calls made by one /v1/audio/transcriptions request
+OPS_PER_REQUEST = {
+    "stage (traced)": 3,  # upload_read, wtf_conversion, serialization
+    "record_stage (traced)": 3,  # parse, queue_wait, inference
+    "counter_inc": 3,  # requests, audio seconds, cache
+    "gauge_inc_dec": 2,  # in-flight
+    "histogram_observe": 1,  # real-time factor
+}
+
+
+def bench(fn, iterations: int) -> float:
+    """Return nanoseconds per call of ``fn``."""
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter_ns() - start) / iterations
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=200_000)
+    parser.add_argument(
+        "--inference-ms",
+        type=float,
+        default=500.0,
+        help="Typical inference time to compare overhead against (default: 500)",
+    )
+    args = parser.parse_args()
+    n = args.iterations
+
+    def stage_timer():
+        with stage("upload_read", MODEL):
+            pass
+
+    in_flight = REQUESTS_IN_FLIGHT.labels(ENDPOINT)
+
+    def gauge_inc_dec():
+        in_flight.inc()
+        in_flight.dec()
+
+    results = {"baseline (empty call)": bench(lambda: None, n)}
+    token = current_trace.set(RequestTrace("bench", ENDPOINT, collect_spans=False))
+    results["stage (traced)"] = bench(stage_timer, n)
+    results["record_stage (traced)"] = bench(lambda: record_stage("inference", 0.42, MODEL), n)
+    current_trace.reset(token)
+
+    results |= {
+        "stage (untraced)": bench(stage_timer, n),
+        "record_stage (untraced)": bench(lambda: record_stage("inference", 0.42, MODEL), n),
+        "counter_inc": bench(lambda: REQUESTS.labels(ENDPOINT, "200").inc(), n),
+        "counter_inc (audio seconds)": bench(
+            lambda: AUDIO_SECONDS.labels(MODEL, ENDPOINT).inc(12.5), n
+        ),
+        "counter_inc (cache)": bench(lambda: MODEL_CACHE.labels(MODEL, "hit").inc(), n),
+        "gauge_inc_dec": bench(gauge_inc_dec, n) / 2,
+        "histogram_observe": bench(
+            lambda: REAL_TIME_FACTOR.labels(MODEL, ENDPOINT).observe(0.08), n
+        ),
+    }
+
+    print(f"{'operation':<32} {'ns/op':>10}")
+    for name, ns in results.items():
+        print(f"{name:<32} {ns:>10.0f}")
+
+    per_request_ns = sum(results[op] * count for op, count in OPS_PER_REQUEST.items())
+    overhead_pct = per_request_ns / (args.inference_ms * 1e6) * 100
+    print()
+    print(f"Per-request instrumentation: {per_request_ns / 1000:.1f} us")
+    print(f"Overhead vs {args.inference_ms:.0f} ms inference: {overhead_pct:.4f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Start a local fleet: N simulated-engine servers plus the router in front of them.
+
+Each backend runs with ENGINE_BACKEND=simulated, so no MLX or model download is
+needed; backends alternate between the given models to exercise model-aware
+routing. Ctrl-C stops everything.
+
+Usage:
+  uv run python scripts/local_fleet.py --backends 3 --port 8000
+  uv run python scripts/stress_test.py --mlx http://localhost:8000 --concurrency 8
+"""
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--backends", type=int, default=3, help="Number of backend servers")
+    parser.add_argument("--port", type=int, default=8000, help="Router port")
+    parser.add_argument(
+        "--backend-port", type=int, default=8101, help="First backend port (then +1, +2, ...)"
+    )
+    parser.add_argument(
+        "--models",
+        nargs="+",
+        default=["turbo", "large-v3"],
+        help="Models preloaded by the backends, assigned round-robin",
+    )
+    parser.add_argument("--rtf", type=float, default=0.05, help="Simulated real-time factor")
+    args = parser.parse_args()
+
+    procs: list[subprocess.Popen] = []
+    urls = []
+    for i in range(args.backends):
+        port = args.backend_port + i
+        env = {
+            **os.environ,
+            "ENGINE_BACKEND": "simulated",
+            "SIMULATED_RTF": str(args.rtf),
+            "MLX_MODEL": args.models[i % len(args.models)],
+            "PORT": str(port),
+        }
+        procs.append(
+            subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "vcon_mac_wtf.main:app", "--port", str(port)],
+                env=env,
+            )
+        )
+        urls.append(f"http://127.0.0.1:{port}")
+
+    time.sleep(1.0)  # let backends bind before the router's first poll
+    router_cmd = [sys.executable, "-m", "vcon_mac_wtf.main", "router", "--port", str(args.port)]
+    for url in urls:
+        router_cmd += ["--backend", url]
+    procs.append(subprocess.Popen(router_cmd))
+    print(f"Router on http://127.0.0.1:{args.port} -> {', '.join(urls)}", flush=True)
+
+    try:
+        procs[-1].wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for proc in procs:
+            proc.send_signal(signal.SIGINT)
+        for proc in procs:
+            proc.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,53 @@
 #!/usr/bin/env python3
 """
-Stress test script for WTF transcription servers.
+Load generator for WTF transcription servers.
 
-Compares processing times between local Whisper and MLX Whisper backends.
-Targets the OpenAI-compatible endpoint: POST /v1/audio/transcriptions
+Drives POST /v1/audio/transcriptions and/or POST /transcribe with either a
+closed-loop workload (N concurrent clients, each sending its next request when
+the previous one finishes) or an open-loop workload (Poisson arrivals at a
+fixed rate, independent of how fast the server answers). Both modes accept a
+ramp schedule. Latencies go into HDR-style histograms (bounded relative error),
+and open-loop latencies are measured from the scheduled arrival time, so
+queueing delay is not hidden by coordinated omission.
 
 Usage:
-  # Compare local whisper (port 9001) vs MLX (port 8000)
-  uv run python scripts/stress_test.py \
-    --local-whisper http://localhost:9001 \
-    --mlx http://localhost:8000 \
+  # Compare local whisper (port 9001) vs MLX (port 8000), sequential
+  uv run python scripts/stress_test.py \\
+    --local-whisper http://localhost:9001 \\
+    --mlx http://localhost:8000 \\
     --iterations 10
 
-  # Test MLX only with different models
-  uv run python scripts/stress_test.py \
-    --mlx http://localhost:8000 \
-    --models mlx-community/whisper-tiny mlx-community/whisper-turbo \
-    --iterations 5
-
-  # Use a real audio file
-  uv run python scripts/stress_test.py \
-    --local-whisper http://localhost:9001 \
-    --mlx http://localhost:8000 \
-    --audio recording.wav
+  # 4 concurrent clients, 40 requests, mixed clip lengths
+  uv run python scripts/stress_test.py --mlx http://localhost:8000 \\
+    --concurrency 4 --iterations 40 --durations 5 30 120
+
+  # Open loop: Poisson arrivals, ramping 0.5 -> 1 -> 2 req/s for 60s each,
+  # 70% OpenAI route / 30% vCon route, real recordings, JSON output
+  uv run python scripts/stress_test.py --mlx http://localhost:8000 \\
+    --mode open --ramp 60:0.5,60:1,60:2 --mix openai=7,vcon=3 \\
+    --corpus ./recordings --json-out run-a.json
+
+  # Diff two runs
+  uv run python scripts/stress_test.py --diff run-a.json run-b.json
 """
 
 from __future__ import annotations
 
 import argparse
-import io
+import asyncio
+import base64
+import json
+import math
+import random
+import shutil
 import struct
+import subprocess
 import sys
 import time
+import wave
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
@@ -41,6 +57,13 @@ except ImportError:
     print("Install httpx: uv add httpx (or use dev deps: uv sync --all-extras)", file=sys.stderr)
     sys.exit(1)
 
+AUDIO_EXTENSIONS = {".wav", ".mp3", ".m4a", ".mp4", ".flac", ".ogg", ".webm"}
+ENDPOINTS = {"openai": "/v1/audio/transcriptions", "vcon": "/transcribe"}
+PERCENTILES = (50, 90, 95, 99, 99.9)
+
+
+# --- audio corpus ------------------------------------------------------------
+
 
 def make_sample_wav(duration_sec: float = 5.0) -> bytes:
     """Generate a minimal valid WAV file (silence at 16kHz, mono, 16-bit)."""
@@ -73,6 +96,7 @@ def get_content_type(filename: str) -> str:
         ".wav": "audio/wav",
         ".mp3": "audio/mpeg",
         ".m4a": "audio/m4a",
+        ".mp4": "audio/mp4",
         ".flac": "audio/flac",
         ".ogg": "audio/ogg",
         ".webm": "audio/webm",
@@ -80,48 +104,501 @@ def get_content_type(filename: str) -> str:
     return mime.get(ext, "audio/wav")
 
 
-def transcribe(
-    base_url: str,
-    audio_bytes: bytes,
-    filename: str = "audio.wav",
-    model: str | None = None,
-    timeout: int = 600,
-) -> tuple[float, dict[str, Any] | None, str | None]:
-    """
-    POST audio to /v1/audio/transcriptions. Returns (elapsed_sec, response_json, error).
+def audio_duration(path: Path) -> float | None:
+    """Duration of an audio file from its WAV header, else via ffprobe if available."""
+    try:
+        with wave.open(str(path), "rb") as wav:
+            return wav.getnframes() / float(wav.getframerate())
+    except (wave.Error, EOFError):
+        pass
+    if shutil.which("ffprobe"):
+        proc = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0",
+             str(path)],
+            capture_output=True,
+            text=True,
+        )  # fmt: skip
+        try:
+            return float(proc.stdout.strip())
+        except ValueError:
+            return None
+    return None
+
+
+@dataclass
+class AudioItem:
+    filename: str
+    data: bytes
+    duration: float | None  # seconds of audio, if known
+
+    @property
+    def content_type(self) -> str:
+        return get_content_type(self.filename)
+
+    def vcon(self) -> dict[str, Any]:
+        """Wrap the audio in a single-dialog vCon for the /transcribe route."""
+        return {
+            "vcon": "0.0.1",
+            "uuid": f"stress-{self.filename}",
+            "parties": [{"name": "Agent"}, {"name": "Customer"}],
+            "dialog": [
+                {
+                    "type": "recording",
+                    "start": "2024-01-15T10:00:00Z",
+                    "parties": [0, 1],
+                    "mediatype": self.content_type,
+                    "body": base64.urlsafe_b64encode(self.data).decode("ascii").rstrip("="),
+                    "encoding": "base64url",
+                }
+            ],
+            "analysis": [],
+        }
+
+
+def load_corpus(args: argparse.Namespace) -> list[AudioItem]:
+    """Audio corpus from --audio, --corpus or generated --durations."""
+    if args.audio:
+        if not args.audio.exists():
+            raise SystemExit(f"Error: audio file not found: {args.audio}")
+        return [AudioItem(args.audio.name, args.audio.read_bytes(), audio_duration(args.audio))]
+    if args.corpus:
+        files = sorted(
+            p for p in args.corpus.rglob("*") if p.suffix.lower() in AUDIO_EXTENSIONS
+        )
+        if not files:
+            raise SystemExit(f"Error: no audio files found in {args.corpus}")
+        return [AudioItem(p.name, p.read_bytes(), audio_duration(p)) for p in files]
+    durations = args.durations or [args.duration]
+    return [AudioItem(f"audio-{d:g}s.wav", make_sample_wav(d), d) for d in durations]
+
+
+# --- latency histogram -------------------------------------------------------
+
+
+class LatencyHistogram:
+    """HDR-style histogram: values bucketed to N significant figures.
+
+    Relative error per recorded value is at most 0.5 * 10^(1-N), independent of
+    magnitude, so sub-second and multi-minute latencies share one structure.
+    Histograms merge by adding bucket counts.
     """
-    url = base_url.rstrip("/") + "/v1/audio/transcriptions"
-    content_type = get_content_type(filename)
-    files = {"file": (filename, io.BytesIO(audio_bytes), content_type)}
-    data: dict[str, Any] = {"response_format": "verbose_json"}
-    if model:
-        data["model"] = model
 
-    start = time.monotonic()
+    def __init__(self, significant_figures: int = 3):
+        self.significant_figures = significant_figures
+        self.counts: Counter[float] = Counter()
+        self.total = 0
+        self.max = 0.0
+        self.min = math.inf
+
+    def _bucket(self, value: float) -> float:
+        if value <= 0:
+            return 0.0
+        digits = self.significant_figures - 1 - math.floor(math.log10(value))
+        return round(value, digits)
+
+    def record(self, value: float) -> None:
+        self.counts[self._bucket(value)] += 1
+        self.total += 1
+        self.max = max(self.max, value)
+        self.min = min(self.min, value)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        self.counts.update(other.counts)
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        self.min = min(self.min, other.min)
+
+    def percentile(self, p: float) -> float:
+        if not self.total:
+            return 0.0
+        rank = max(1, math.ceil(self.total * p / 100))
+        seen = 0
+        for value in sorted(self.counts):
+            seen += self.counts[value]
+            if seen >= rank:
+                return value
+        return self.max
+
+    def mean(self) -> float:
+        if not self.total:
+            return 0.0
+        return sum(v * c for v, c in self.counts.items()) / self.total
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "significant_figures": self.significant_figures,
+            "count": self.total,
+            "min": self.min if self.total else 0.0,
+            "max": self.max,
+            "mean": self.mean(),
+            "percentiles": {f"p{p:g}": self.percentile(p) for p in PERCENTILES},
+            "buckets": {f"{v:g}": c for v, c in sorted(self.counts.items())},
+        }
+
+
+# --- load generation ---------------------------------------------------------
+
+
+@dataclass
+class Target:
+    label: str
+    base_url: str
+    model: str | None
+
+
+@dataclass
+class Stage:
+    duration: float | None  # seconds; None means "until --iterations requests"
+    level: float  # concurrency (closed loop) or arrivals/second (open loop)
+
+
+@dataclass
+class RequestRecord:
+    endpoint: str
+    stage: int
+    latency: float
+    ok: bool
+    audio_seconds: float | None
+    error: str | None = None
+
+
+@dataclass
+class TargetRun:
+    target: Target
+    records: list[RequestRecord] = field(default_factory=list)
+    wall_time: float = 0.0
+    stage_walls: list[float] = field(default_factory=list)
+
+
+class Workload:
+    """Picks (endpoint, audio) pairs according to the endpoint mix."""
+
+    def __init__(self, corpus: list[AudioItem], mix: dict[str, float], rng: random.Random):
+        self.corpus = corpus
+        self.endpoints = list(mix)
+        self.weights = [mix[e] for e in self.endpoints]
+        self.rng = rng
+        self._vcons: dict[int, bytes] = {}
+
+    def next(self) -> tuple[str, AudioItem, int]:
+        endpoint = self.rng.choices(self.endpoints, self.weights)[0]
+        index = self.rng.randrange(len(self.corpus))
+        return endpoint, self.corpus[index], index
+
+    def vcon_body(self, index: int) -> bytes:
+        if index not in self._vcons:
+            self._vcons[index] = json.dumps(self.corpus[index].vcon()).encode()
+        return self._vcons[index]
+
+
+def classify_error(exc: BaseException) -> str:
+    if isinstance(exc, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(exc, httpx.ConnectError):
+        return "connect error"
+    return type(exc).__name__
+
+
+async def send_request(
+    client: httpx.AsyncClient,
+    target: Target,
+    workload: Workload,
+    stage: int,
+    scheduled: float | None = None,
+) -> RequestRecord:
+    """Send one request; latency runs from ``scheduled`` (open loop) or send time."""
+    endpoint, item, index = workload.next()
+    start = scheduled if scheduled is not None else time.monotonic()
     try:
-        resp = httpx.post(url, files=files, data=data, timeout=timeout)
-        elapsed = time.monotonic() - start
+        if endpoint == "openai":
+            data: dict[str, Any] = {"response_format": "verbose_json"}
+            if target.model:
+                data["model"] = target.model
+            resp = await client.post(
+                target.base_url.rstrip("/") + ENDPOINTS["openai"],
+                files={"file": (item.filename, item.data, item.content_type)},
+                data=data,
+            )
+        else:
+            params = {"model": target.model} if target.model else None
+            resp = await client.post(
+                target.base_url.rstrip("/") + ENDPOINTS["vcon"],
+                content=workload.vcon_body(index),
+                params=params,
+                headers={"Content-Type": "application/json"},
+            )
+        latency = time.monotonic() - start
         if resp.status_code != 200:
-            return elapsed, None, f"HTTP {resp.status_code}: {resp.text[:200]}"
-        return elapsed, resp.json(), None
-    except httpx.HTTPError as e:
-        elapsed = time.monotonic() - start
-        return elapsed, None, str(e)
+            return RequestRecord(
+                endpoint, stage, latency, False, item.duration, f"HTTP {resp.status_code}"
+            )
+        if endpoint == "vcon" and resp.headers.get("X-Dialogs-Failed", "0") != "0":
+            return RequestRecord(endpoint, stage, latency, False, item.duration, "dialog failed")
+        return RequestRecord(endpoint, stage, latency, True, item.duration)
+    except httpx.HTTPError as exc:
+        return RequestRecord(
+            endpoint, stage, time.monotonic() - start, False, item.duration, classify_error(exc)
+        )
+
+
+async def closed_loop_stage(
+    client: httpx.AsyncClient,
+    target: Target,
+    workload: Workload,
+    stage_index: int,
+    stage: Stage,
+    iterations: int,
+    records: list[RequestRecord],
+) -> None:
+    """Run ``stage.level`` clients back to back until the stage ends."""
+    deadline = time.monotonic() + stage.duration if stage.duration else None
+    remaining = [iterations]
+
+    async def client_loop() -> None:
+        while True:
+            if deadline is not None:
+                if time.monotonic() >= deadline:
+                    return
+            else:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            records.append(await send_request(client, target, workload, stage_index))
+
+    await asyncio.gather(*(client_loop() for _ in range(max(1, int(stage.level)))))
+
+
+async def open_loop_stage(
+    client: httpx.AsyncClient,
+    target: Target,
+    workload: Workload,
+    stage_index: int,
+    stage: Stage,
+    iterations: int,
+    records: list[RequestRecord],
+    rng: random.Random,
+) -> None:
+    """Fire Poisson arrivals at ``stage.level`` per second without waiting for responses."""
+    if stage.level <= 0:
+        if stage.duration:
+            await asyncio.sleep(stage.duration)
+        return
+    start = time.monotonic()
+    deadline = start + stage.duration if stage.duration else None
+    tasks: list[asyncio.Task] = []
+    next_arrival = start
+    sent = 0
+    while True:
+        next_arrival += rng.expovariate(stage.level)
+        if deadline is not None and next_arrival >= deadline:
+            break
+        if deadline is None and sent >= iterations:
+            break
+        delay = next_arrival - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.create_task(
+            send_request(client, target, workload, stage_index, scheduled=next_arrival)
+        )
+        task.add_done_callback(lambda t: records.append(t.result()))
+        tasks.append(task)
+        sent += 1
+    if deadline is not None and deadline > time.monotonic():
+        await asyncio.sleep(deadline - time.monotonic())
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+async def run_target(
+    target: Target,
+    workload: Workload,
+    stages: list[Stage],
+    args: argparse.Namespace,
+    rng: random.Random,
+) -> TargetRun:
+    run = TargetRun(target)
+    max_level = max(s.level for s in stages)
+    connections = int(max_level) if args.mode == "closed" else None
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        for i in range(args.warmup):
+            record = await send_request(client, target, workload, stage=-1)
+            if not record.ok:
+                print(f"  [{target.label}] warmup {i}: {record.error}", file=sys.stderr)
+
+        start = time.monotonic()
+        for index, stage in enumerate(stages):
+            stage_start = time.monotonic()
+            if args.mode == "closed":
+                await closed_loop_stage(
+                    client, target, workload, index, stage, args.iterations, run.records
+                )
+            else:
+                await open_loop_stage(
+                    client, target, workload, index, stage, args.iterations, run.records, rng
+                )
+            run.stage_walls.append(time.monotonic() - stage_start)
+        run.wall_time = time.monotonic() - start
+    return run
 
 
-def percentile(sorted_values: list[float], p: float) -> float:
-    """Compute percentile (0-100) of sorted list."""
-    if not sorted_values:
-        return 0.0
-    k = (len(sorted_values) - 1) * (p / 100)
-    f = int(k)
-    c = f + 1 if f + 1 < len(sorted_values) else f
-    return sorted_values[f] + (k - f) * (sorted_values[c] - sorted_values[f])
+# --- reporting ---------------------------------------------------------------
+
+
+def summarize(records: list[RequestRecord], wall_time: float) -> dict[str, Any]:
+    hist = LatencyHistogram()
+    errors: Counter[str] = Counter()
+    audio_seconds = 0.0
+    ok = 0
+    for r in records:
+        if r.ok:
+            ok += 1
+            hist.record(r.latency)
+            audio_seconds += r.audio_seconds or 0.0
+        else:
+            errors[r.error or "unknown"] += 1
+    wall = max(wall_time, 1e-9)
+    return {
+        "requests": len(records),
+        "successful": ok,
+        "failed": len(records) - ok,
+        "errors": dict(errors.most_common()),
+        "wall_time_s": wall_time,
+        "throughput_rps": ok / wall,
+        "audio_seconds": audio_seconds,
+        "audio_seconds_per_wall_second": audio_seconds / wall,
+        "latency_s": hist.to_dict(),
+    }
+
+
+def build_report(
+    runs: list[TargetRun], stages: list[Stage], args: argparse.Namespace, corpus: list[AudioItem]
+) -> dict[str, Any]:
+    report: dict[str, Any] = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "mode": args.mode,
+            "stages": [{"duration_s": s.duration, "level": s.level} for s in stages],
+            "iterations": args.iterations,
+            "mix": args.mix,
+            "corpus": [
+                {"file": a.filename, "bytes": len(a.data), "duration_s": a.duration}
+                for a in corpus
+            ],
+        },
+        "targets": {},
+    }
+    for run in runs:
+        by_endpoint: dict[str, list[RequestRecord]] = defaultdict(list)
+        by_stage: dict[int, list[RequestRecord]] = defaultdict(list)
+        for r in run.records:
+            by_endpoint[r.endpoint].append(r)
+            by_stage[r.stage].append(r)
+        report["targets"][run.target.label] = {
+            "base_url": run.target.base_url,
+            "model": run.target.model,
+            **summarize(run.records, run.wall_time),
+            "endpoints": {
+                ENDPOINTS[e]: summarize(recs, run.wall_time) for e, recs in by_endpoint.items()
+            },
+            "stages": [
+                {
+                    "level": stages[i].level,
+                    **summarize(by_stage.get(i, []), run.stage_walls[i]),
+                }
+                for i in range(len(stages))
+            ],
+        }
+    return report
+
+
+def print_summary(name: str, summary: dict[str, Any], indent: str = "") -> None:
+    lat = summary["latency_s"]
+    print(f"{indent}{name}")
+    print(
+        f"{indent}  Requests:   {summary['successful']}/{summary['requests']} successful"
+        f" in {summary['wall_time_s']:.1f}s"
+    )
+    print(f"{indent}  Throughput: {summary['throughput_rps']:.2f} req/s")
+    print(f"{indent}  Audio rate: {summary['audio_seconds_per_wall_second']:.2f} audio-s/wall-s")
+    if lat["count"]:
+        pct = "  ".join(f"{k.upper()} {v:.2f}s" for k, v in lat["percentiles"].items())
+        print(f"{indent}  Latency:    min {lat['min']:.2f}s  mean {lat['mean']:.2f}s  {pct}")
+        print(f"{indent}              max {lat['max']:.2f}s")
+    for error, count in summary["errors"].items():
+        print(f"{indent}  Error:      {error} x{count}")
+
+
+def print_report(report: dict[str, Any]) -> None:
+    meta = report["meta"]
+    print("\n" + "=" * 60)
+    print("STRESS TEST RESULTS")
+    print("=" * 60)
+    print(f"Mode: {meta['mode']}-loop  Mix: {meta['mix']}")
+    print(f"Corpus: {len(meta['corpus'])} file(s)")
+    print()
+    for label, target in report["targets"].items():
+        print_summary(label, target)
+        if len(target["endpoints"]) > 1:
+            for endpoint, summary in target["endpoints"].items():
+                print_summary(endpoint, summary, indent="    ")
+        if len(target["stages"]) > 1:
+            unit = "clients" if meta["mode"] == "closed" else "req/s"
+            for i, summary in enumerate(target["stages"]):
+                print_summary(f"stage {i} ({summary['level']:g} {unit})", summary, indent="    ")
+        print()
+
+
+def diff_reports(base: dict[str, Any], new: dict[str, Any]) -> None:
+    """Print key metric changes per target between two --json-out files."""
+    keys = [("throughput_rps", "req/s"), ("audio_seconds_per_wall_second", "audio-s/s")]
+    print(f"{'target':<24} {'metric':<12} {'base':>10} {'new':>10} {'change':>9}")
+    for label in sorted(set(base["targets"]) | set(new["targets"])):
+        b, n = base["targets"].get(label), new["targets"].get(label)
+        if not b or not n:
+            print(f"{label:<24} only in {'new' if n else 'base'}")
+            continue
+        rows = [(name, b[key], n[key]) for key, name in keys]
+        for p in ("p50", "p95", "p99"):
+            rows.append(
+                (f"{p} (s)", b["latency_s"]["percentiles"][p], n["latency_s"]["percentiles"][p])
+            )
+        rows.append(("errors", b["failed"], n["failed"]))
+        for name, bv, nv in rows:
+            change = f"{(nv / bv - 1) * 100:+.1f}%" if bv else "-"
+            print(f"{label:<24} {name:<12} {bv:>10.3g} {nv:>10.3g} {change:>9}")
+
+
+# --- CLI ---------------------------------------------------------------------
+
+
+def parse_ramp(value: str) -> list[Stage]:
+    """Parse 'SECONDS:LEVEL,SECONDS:LEVEL,...' into stages."""
+    stages = []
+    for part in value.split(","):
+        duration, _, level = part.partition(":")
+        if not level:
+            raise argparse.ArgumentTypeError(f"Expected SECONDS:LEVEL, got {part!r}")
+        stages.append(Stage(float(duration), float(level)))
+    return stages
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    """Parse 'openai=3,vcon=1' into endpoint weights."""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(
+                f"Unknown endpoint {name!r} (choose from {', '.join(ENDPOINTS)})"
+            )
+        mix[name] = float(weight or 1)
+    return mix
 
 
 def main() -> int:
     parser = argparse.ArgumentParser(
-        description="Stress test WTF transcription servers (local Whisper vs MLX)",
+        description="Load test WTF transcription servers (closed- or open-loop)",
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog=__doc__,
     )
@@ -146,7 +623,13 @@ def main() -> int:
         "--audio",
         metavar="FILE",
         type=Path,
-        help="Path to audio file (WAV, MP3, etc). If omitted, generates 5s silence.",
+        help="Path to a single audio file (WAV, MP3, etc).",
+    )
+    parser.add_argument(
+        "--corpus",
+        metavar="DIR",
+        type=Path,
+        help="Directory of audio files; each request picks one at random.",
     )
     parser.add_argument(
         "--duration",
@@ -154,11 +637,18 @@ def main() -> int:
         default=5.0,
         help="Duration in seconds for generated sample audio (default: 5)",
     )
+    parser.add_argument(
+        "--durations",
+        type=float,
+        nargs="+",
+        metavar="SECONDS",
+        help="Generate a corpus of silent WAVs with these durations (e.g. 5 30 120)",
+    )
     parser.add_argument(
         "--iterations",
         type=int,
         default=10,
-        help="Number of iterations per target (default: 10)",
+        help="Requests per target when no --ramp is given (default: 10)",
     )
     parser.add_argument(
         "--warmup",
@@ -166,11 +656,36 @@ def main() -> int:
         default=1,
         help="Warmup requests before timing (default: 1)",
     )
+    parser.add_argument(
+        "--mode",
+        choices=["closed", "open"],
+        default="closed",
+        help="closed: fixed number of concurrent clients; open: Poisson arrivals at --rate",
+    )
     parser.add_argument(
         "--concurrency",
         type=int,
         default=1,
-        help="Concurrent requests (default: 1). Use 1 for stable per-request timing.",
+        help="Concurrent clients in closed-loop mode (default: 1)",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=1.0,
+        help="Arrivals per second in open-loop mode (default: 1)",
+    )
+    parser.add_argument(
+        "--ramp",
+        type=parse_ramp,
+        metavar="SECONDS:LEVEL,...",
+        help="Time-based stages; LEVEL is clients (closed) or req/s (open), e.g. 60:1,60:4",
+    )
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default={"openai": 1.0},
+        metavar="openai=W,vcon=W",
+        help="Endpoint weights (default: openai=1)",
     )
     parser.add_argument(
         "--timeout",
@@ -178,87 +693,56 @@ def main() -> int:
         default=600,
         help="Request timeout in seconds (default: 600)",
     )
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for repeatable runs")
+    parser.add_argument("--json-out", type=Path, help="Write the machine-readable report here")
+    parser.add_argument(
+        "--diff",
+        nargs=2,
+        type=Path,
+        metavar=("BASE", "NEW"),
+        help="Compare two --json-out reports and exit",
+    )
     args = parser.parse_args()
 
+    if args.diff:
+        base, new = (json.loads(p.read_text()) for p in args.diff)
+        diff_reports(base, new)
+        return 0
+
     if not args.local_whisper and not args.mlx:
         parser.error("Specify at least one of --local-whisper or --mlx")
 
-    targets: list[tuple[str, str, str | None]] = []
+    targets: list[Target] = []
     if args.local_whisper:
-        targets.append(("Local Whisper", args.local_whisper, None))
+        targets.append(Target("Local Whisper", args.local_whisper, None))
     if args.mlx:
         if args.models:
             for m in args.models:
                 short = m.split("/")[-1] if "/" in m else m
-                targets.append((f"MLX ({short})", args.mlx, m))
+                targets.append(Target(f"MLX ({short})", args.mlx, m))
         else:
-            targets.append(("MLX", args.mlx, "mlx-community/whisper-turbo"))
+            targets.append(Target("MLX", args.mlx, "mlx-community/whisper-turbo"))
 
-    # Load or generate audio
-    if args.audio:
-        if not args.audio.exists():
-            print(f"Error: audio file not found: {args.audio}", file=sys.stderr)
-            return 1
-        audio_bytes = args.audio.read_bytes()
-        filename = args.audio.name
+    if args.ramp:
+        stages = args.ramp
     else:
-        audio_bytes = make_sample_wav(args.duration)
-        filename = "audio.wav"
+        level = args.concurrency if args.mode == "closed" else args.rate
+        stages = [Stage(None, level)]
 
-    run_stress_test_v2(targets, audio_bytes, filename, args.iterations, args.warmup, args.timeout)
-    return 0
+    corpus = load_corpus(args)
+    rng = random.Random(args.seed)
 
+    runs = []
+    for target in targets:
+        workload = Workload(corpus, args.mix, rng)
+        runs.append(asyncio.run(run_target(target, workload, stages, args, rng)))
 
-def run_stress_test_v2(
-    targets: list[tuple[str, str, str | None]],
-    audio_bytes: bytes,
-    filename: str,
-    iterations: int,
-    warmup: int,
-    timeout: int,
-) -> None:
-    """Run stress test with (label, base_url, model) per target."""
-    results: dict[str, list[float]] = {label: [] for label, _, _ in targets}
-
-    for label, base_url, model in targets:
-        for i in range(warmup + iterations):
-            elapsed, data, err = transcribe(base_url, audio_bytes, filename, model, timeout)
-            if err:
-                print(f"  [{label}] iter {i}: {err}", file=sys.stderr)
-                continue
-            if i >= warmup:
-                results[label].append(elapsed)
-
-    # Report
-    print("\n" + "=" * 60)
-    print("STRESS TEST RESULTS")
-    print("=" * 60)
-    print(f"Audio size: {len(audio_bytes):,} bytes")
-    print(f"Iterations: {iterations} (warmup: {warmup})")
-    print()
-
-    for label, base_url, model in targets:
-        times = results[label]
-        if not times:
-            print(f"{label}: NO SUCCESSFUL REQUESTS")
-            continue
-
-        times_sorted = sorted(times)
-        n = len(times_sorted)
-        avg = sum(times_sorted) / n
-        p50 = percentile(times_sorted, 50)
-        p95 = percentile(times_sorted, 95)
-        p99 = percentile(times_sorted, 99)
-
-        print(f"{label}")
-        print(f"  Requests: {n} successful")
-        print(f"  Min:      {min(times_sorted):.2f}s")
-        print(f"  Max:      {max(times_sorted):.2f}s")
-        print(f"  Avg:      {avg:.2f}s")
-        print(f"  P50:      {p50:.2f}s")
-        print(f"  P95:      {p95:.2f}s")
-        print(f"  P99:      {p99:.2f}s")
-        print()
+    report = build_report(runs, stages, args, corpus)
+    print_report(report)
+    if args.json_out:
+        args.json_out.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Wrote {args.json_out}")
+    return 0
 
 
 if __name__ == "__main__":
@@ -0,0 +1,196 @@
+"""Request deadlines and cancellation on client disconnect.
+
+Transcription requests get a CancelToken carried in a context variable, so it
+is visible in the engine's worker thread (``asyncio.to_thread`` copies the
+context). CancellationMiddleware runs the request in its own task and cancels
+it when the deadline passes or the client disconnects: waits for an inference
+slot or memory admission end immediately, which removes the request from the
+queue before it starts. Inference already running in a thread cannot be
+interrupted, so the engine checks the token at every 30-second window and
+aborts there.
+
+Deadlines come from the ``X-Request-Timeout`` header or the ``timeout`` query
+parameter (seconds), else ``REQUEST_TIMEOUT_SECONDS``.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Iterable
+from urllib.parse import parse_qs
+
+from .metrics import CANCELLED
+
+logger = logging.getLogger(__name__)
+
+TIMEOUT_HEADER = b"x-request-timeout"
+
+# Status codes for aborted requests; 499 follows nginx's "client closed request"
+DEADLINE_STATUS = 504
+DISCONNECT_STATUS = 499
+
+
+class RequestCancelledError(Exception):
+    """Raised inside request processing once its deadline passed or the client left."""
+
+    def __init__(self, reason: str):
+        super().__init__(f"Request cancelled: {reason}")
+        self.reason = reason
+
+
+class CancelToken:
+    """Thread-safe cancellation flag with an optional monotonic deadline."""
+
+    __slots__ = ("deadline", "reason", "_lock")
+
+    def __init__(self, deadline: float | None = None):
+        self.deadline = deadline
+        self.reason: str | None = None
+        self._lock = threading.Lock()
+
+    def cancel(self, reason: str) -> None:
+        with self._lock:
+            if self.reason is None:
+                self.reason = reason
+
+    @property
+    def cancelled(self) -> bool:
+        if self.reason is None and self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel("deadline")
+        return self.reason is not None
+
+    def remaining(self) -> float | None:
+        """Seconds until the deadline (None without one)."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled:
+            raise RequestCancelledError(self.reason)
+
+
+current_cancel_token: ContextVar[CancelToken | None] = ContextVar(
+    "current_cancel_token", default=None
+)
+
+
+def raise_if_cancelled() -> None:
+    """Abort the current request's work if it has been cancelled (no-op outside requests)."""
+    token = current_cancel_token.get()
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+def _requested_timeout(scope) -> float | None:
+    raw = None
+    for key, value in scope.get("headers", []):
+        if key == TIMEOUT_HEADER:
+            raw = value.decode("latin-1")
+            break
+    if raw is None:
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        raw = query.get("timeout", [None])[0]
+    if raw is None:
+        return None
+    try:
+        timeout = float(raw)
+    except ValueError:
+        return None
+    return timeout if timeout > 0 else None
+
+
+class CancellationMiddleware:
+    """ASGI middleware enforcing request deadlines and stopping work for departed clients.
+
+    Responds ``504`` when the deadline passes before the response starts, and
+    ``499`` (never seen by the departed client, but logged and counted) on
+    disconnect.
+    """
+
+    def __init__(self, app, endpoints: Iterable[str], default_timeout: float = 0.0):
+        self.app = app
+        self.endpoints = frozenset(endpoints)
+        self.default_timeout = default_timeout
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "")
+        if scope["type"] != "http" or path not in self.endpoints:
+            await self.app(scope, receive, send)
+            return
+
+        timeout = _requested_timeout(scope) or self.default_timeout or None
+        token = CancelToken(time.monotonic() + timeout if timeout else None)
+        ctx_token = current_cancel_token.set(token)
+        body_received = asyncio.Event()
+        forwarded: asyncio.Queue = asyncio.Queue()
+        response_started = False
+
+        async def app_receive():
+            if body_received.is_set():
+                return await forwarded.get()
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                token.cancel("disconnect")
+            elif not message.get("more_body", False):
+                body_received.set()
+            return message
+
+        async def app_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        app_task = asyncio.ensure_future(self.app(scope, app_receive, app_send))
+
+        async def watch_disconnect():
+            # Once the body is in, the next message is the disconnect
+            await body_received.wait()
+            message = await receive()
+            await forwarded.put(message)
+            if message["type"] == "http.disconnect" and not app_task.done():
+                token.cancel("disconnect")
+                app_task.cancel()
+
+        watcher = asyncio.ensure_future(watch_disconnect())
+        try:
+            done, _ = await asyncio.wait({app_task}, timeout=timeout)
+            if not done:
+                token.cancel("deadline")
+                app_task.cancel()
+            try:
+                await app_task
+            except (asyncio.CancelledError, RequestCancelledError):
+                if token.reason is None:
+                    raise  # cancelled from outside (e.g. server shutdown)
+                CANCELLED.labels(path, token.reason).inc()
+                logger.info("Request to %s cancelled: %s", path, token.reason)
+                if not response_started:
+                    await self._send_cancelled(send, token.reason)
+        finally:
+            watcher.cancel()
+            if not app_task.done():
+                app_task.cancel()
+            current_cancel_token.reset(ctx_token)
+
+    async def _send_cancelled(self, send, reason: str) -> None:
+        if reason == "deadline":
+            status, detail = DEADLINE_STATUS, "Request deadline exceeded"
+        else:
+            status, detail = DISCONNECT_STATUS, "Client closed request"
+        body = json.dumps({"detail": detail}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
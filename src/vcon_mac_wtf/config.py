@@ -1,10 +1,16 @@
 """Configuration management using Pydantic Settings."""
 
+import os
+from typing import Any
+
+from dotenv import dotenv_values
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+ENV_FILE = ".env"
+
 
 class Settings(BaseSettings):
-    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
+    model_config = SettingsConfigDict(env_file=ENV_FILE, env_file_encoding="utf-8")
 
     # Server
     host: str = "0.0.0.0"
@@ -14,9 +20,102 @@ class Settings(BaseSettings):
     # MLX Whisper
     mlx_model: str = "mlx-community/whisper-turbo"
     preload_model: bool = True
+    decode_profile: str = "accurate"  # fast, balanced or accurate (mlx_whisper defaults)
+    prefetch_models: str = ""  # comma-separated models downloaded in the background at startup
+    engine_backend: str = "mlx"  # mlx, or simulated (no MLX; synthetic transcripts)
+    simulated_rtf: float = 0.05  # processing seconds per audio second for the simulated engine
+    on_existing_analysis: str = "skip"  # skip, replace or append for already-transcribed dialogs
+    channel_split: bool = True  # transcribe each channel separately when parties map to channels
 
     # Limits
     max_audio_size_mb: int = 100
+    max_audio_duration_seconds: float = 0  # probed duration limit; 0 disables
+    request_timeout_seconds: float = 0  # default transcription deadline; 0 disables
+
+    # Scheduling
+    inference_slots: int = 1  # concurrent transcriptions
+    scheduler_policy: str = "sjf"  # sjf (shortest expected job first) or fifo
+    scheduler_aging_rate: float = 1.0  # priority seconds gained per second waited
+    decode_workers: int = 2  # CPU threads decoding audio ahead of inference
+    decode_queue_depth: int = 2  # decoded recordings waiting for a slot; 0 decodes in inference
+    # Learned processing time per model/profile/machine; "" keeps it in memory only
+    latency_model_file: str = "~/.cache/vcon-mac-wtf/latency.json"
+    load_shedding: bool = True  # reject (503 + Retry-After) work predicted to miss its deadline
+
+    # Language identification (/v1/audio/language, detect_language on /transcribe)
+    language_id_model: str = ""  # model for language ID; "" uses MLX_MODEL
+    language_id_seconds: float = 30  # speech window examined (30 s at most)
+
+    # Quality tiers (model=quality|balanced|fast): step down to smaller models under load
+    model_policy_target_seconds: float = 0  # estimated time to result above which to step down
+    model_policy_openai_target_seconds: float | None = None  # per-endpoint overrides
+    model_policy_vcon_target_seconds: float | None = None
+    model_policy_recover_fraction: float = 0.5  # step back up below this fraction of the target
+
+    # Memory
+    memory_budget_mb: int = 0  # projected-peak budget for admission; 0 disables waiting
+    metal_cache_limit_mb: int = 0  # Metal buffer cache limit; 0 keeps the MLX default
+    metal_memory_limit_mb: int = 0  # Metal memory limit; 0 keeps the MLX default
+    memory_watch: bool = False  # trace Python allocations (tracemalloc) and watch for growth
+    memory_watch_interval_seconds: float = 300  # between snapshots
+    memory_watch_threshold_mb: float = 100  # traced growth over the baseline that alerts
+    memory_watch_frames: int = 5  # traceback depth recorded per allocation
+
+    # Transcript store (/transcripts/*): SQLite database path; "" disables it
+    transcript_store: str = ""
+    transcript_store_flush_seconds: float = 1.0  # batch writes over this long
+
+    # Admin API (/admin/*); disabled while no token is set
+    admin_token: str = ""
+    swap_drain_timeout_seconds: float = 300  # wait for old-model requests before unloading
+    profiling_enabled: bool = False  # allow on-demand sampling via /admin/profile
+    profiling_interval_ms: float = 10  # default sampling period
+    profiling_max_seconds: float = 300  # longest profiling session
+
+    # Router mode (vcon-mac-wtf router)
+    router_backends: str = ""  # comma-separated backend base URLs
+    router_poll_interval: float = 1.0  # seconds between /health/ready polls
+    router_retries: int = 2  # extra attempts on 503 or refused connections
+
+    # Observability
+    metrics_enabled: bool = True
+    tracing_exporter: str = "none"  # none, memory, file, otel
+    tracing_file: str = "traces.jsonl"
 
 
 settings = Settings()
+
+# .env values as last applied to os.environ (by load_dotenv at startup or a reload)
+_dotenv_applied: dict[str, str | None] = dotenv_values(ENV_FILE)
+
+
+def reload_settings() -> dict[str, Any]:
+    """Re-read the environment and ``.env`` into ``settings`` in place.
+
+    Variables set in the real environment keep precedence over ``.env``, as
+    at startup. Returns the fields that changed. ``mlx_model`` is reported
+    but not assigned: switching the default model goes through the hot swap
+    (engine.hot_swap). Settings only read at startup (slots, limits applied
+    to singletons, host/port) still need a restart.
+    """
+    global _dotenv_applied
+    current = dotenv_values(ENV_FILE)
+    for key in set(_dotenv_applied) | set(current):
+        # Only touch variables whose value came from .env
+        if os.environ.get(key) != _dotenv_applied.get(key):
+            continue
+        if current.get(key) is None:
+            os.environ.pop(key, None)
+        else:
+            os.environ[key] = current[key]
+    _dotenv_applied = current
+
+    fresh = Settings()
+    changed = {}
+    for name in Settings.model_fields:
+        value = getattr(fresh, name)
+        if value != getattr(settings, name):
+            changed[name] = value
+            if name != "mlx_model":
+                setattr(settings, name, value)
+    return changed
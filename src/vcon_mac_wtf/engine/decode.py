@@ -0,0 +1,146 @@
+"""Decode profiles: named mlx_whisper decoding settings and fallback accounting.
+
+Whisper decodes each 30-second window greedily at temperature 0; if the output
+looks repetitive (gzip compression ratio above ``compression_ratio_threshold``)
+or unlikely (average log-probability below ``logprob_threshold``), it decodes
+the window again at the next temperature in the ladder. On noisy audio every
+window can go through the whole ladder, so the ladder length decides whether a
+call costs 1x or several times real time. Conditioning on the previous window's
+text helps consistency but lets one bad window poison the next.
+
+Profiles trade these off; requests pick one and may override single settings.
+Beam search is not offered: mlx_whisper does not implement it.
+"""
+
+from typing import Any, NamedTuple
+
+from .transcript import Transcript
+
+# mlx_whisper's default fallback ladder
+FALLBACK_TEMPERATURES: tuple[float, ...] = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+
+_THRESHOLDS: dict[str, Any] = {
+    "compression_ratio_threshold": 2.4,
+    "logprob_threshold": -1.0,
+    "no_speech_threshold": 0.6,
+}
+
+DECODE_PROFILES: dict[str, dict[str, Any]] = {
+    # One greedy pass per window, windows decoded independently
+    "fast": {
+        **_THRESHOLDS,
+        "temperature": (0.0,),
+        "condition_on_previous_text": False,
+    },
+    # At most two retries; no conditioning, which also stops repetition loops spreading
+    "balanced": {
+        **_THRESHOLDS,
+        "temperature": (0.0, 0.4, 0.8),
+        "condition_on_previous_text": False,
+    },
+    # mlx_whisper's defaults: the full ladder, conditioned on previous text
+    "accurate": {
+        **_THRESHOLDS,
+        "temperature": FALLBACK_TEMPERATURES,
+        "condition_on_previous_text": True,
+    },
+}
+
+# Settings a request may override, with their types
+OVERRIDABLE: dict[str, type] = {
+    "temperature": float,
+    "temperature_fallback": bool,
+    "condition_on_previous_text": bool,
+    "compression_ratio_threshold": float,
+    "logprob_threshold": float,
+    "no_speech_threshold": float,
+    "best_of": int,
+}
+
+
+class DecodeOptions(NamedTuple):
+    profile: str
+    options: dict[str, Any]  # keyword arguments for mlx_whisper.transcribe
+
+    @property
+    def temperatures(self) -> tuple[float, ...]:
+        return tuple(self.options["temperature"])
+
+    def describe(self, result: Transcript | dict[str, Any] | None = None) -> dict[str, Any]:
+        """Profile, effective settings and (given a result) the fallback retries it took."""
+        summary: dict[str, Any] = {
+            "profile": self.profile,
+            **{k: v for k, v in self.options.items() if k != "temperature"},
+            "temperature": list(self.temperatures),
+        }
+        if result is not None:
+            summary.update(fallback_stats(result, self.temperatures))
+        return summary
+
+
+def resolve_decode_options(profile: str | None = None, **overrides: Any) -> DecodeOptions:
+    """Profile settings with per-request overrides applied (None means "keep").
+
+    ``temperature`` 0 keeps the profile's fallback ladder and a positive value
+    samples every window at that temperature only (the OpenAI API's meaning).
+    ``temperature_fallback=False`` keeps just the first temperature.
+    """
+    from ..config import settings
+
+    name = profile or settings.decode_profile
+    if name not in DECODE_PROFILES:
+        raise ValueError(
+            f"Unknown decode profile {name!r}; choose from {', '.join(DECODE_PROFILES)}"
+        )
+    unknown = set(overrides) - set(OVERRIDABLE)
+    if unknown:
+        raise ValueError(f"Unknown decode options: {', '.join(sorted(unknown))}")
+
+    options = dict(DECODE_PROFILES[name])
+    for key, value in overrides.items():
+        if value is None:
+            continue
+        if key == "temperature":
+            if value < 0:
+                raise ValueError("temperature must be >= 0")
+            if value > 0:
+                options["temperature"] = (float(value),)
+        elif key == "temperature_fallback":
+            if not value:
+                options["temperature"] = tuple(options["temperature"])[:1]
+        elif key == "best_of":
+            if value < 1:
+                raise ValueError("best_of must be >= 1")
+            options["best_of"] = value  # sampled candidates per window when temperature > 0
+        else:
+            options[key] = OVERRIDABLE[key](value)
+    return DecodeOptions(name, options)
+
+
+def fallback_stats(
+    result: Transcript | dict[str, Any], temperatures: tuple[float, ...]
+) -> dict[str, int]:
+    """Count windows that needed temperature fallback, from segment temperatures.
+
+    Segments carry the ``seek`` of the window that produced them and the
+    temperature its accepted decode used; that temperature's position in the
+    ladder is the number of retries the window took. Windows that produced no
+    segments (silence) are not visible and count as no retries.
+    """
+    if isinstance(result, Transcript):
+        window_temperature = result.window_temperatures()
+    else:
+        window_temperature = {}
+        for segment in result.get("segments") or []:
+            window_temperature[segment.get("seek", segment.get("id"))] = segment.get(
+                "temperature", 0.0
+            )
+    ladder = list(temperatures)
+    retries = [
+        ladder.index(t) if t in ladder else int(t > ladder[0]) for t in window_temperature.values()
+    ]
+    return {
+        "windows": len(retries),
+        "fallback_windows": sum(1 for r in retries if r),
+        "fallback_retries": sum(retries),
+    }
@@ -0,0 +1,142 @@
+"""Zero-downtime switch of the default model.
+
+A swap runs in the background in four steps:
+
+1. stage: load and warm the new model next to the current one (both are in
+   memory for the duration of the swap);
+2. switch: point ``settings.mlx_model`` and the engine at the new model in one
+   step, so every request admitted afterwards uses it;
+3. drain: wait (up to ``SWAP_DRAIN_TIMEOUT_SECONDS``) for requests already
+   admitted on the old model to finish;
+4. unload the old model.
+
+If staging fails the old model stays the default. A config reload that
+changes ``MLX_MODEL`` starts the same swap.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any
+
+from ..config import reload_settings, settings
+from ..metrics import MODEL_SWAPS
+from .model_manager import model_manager
+
+logger = logging.getLogger(__name__)
+
+DRAIN_POLL_SECONDS = 0.05
+
+
+class SwapInProgressError(RuntimeError):
+    """A model swap is already running."""
+
+
+class ModelSwapper:
+    """Runs one default-model swap at a time and reports its progress."""
+
+    def __init__(self, drain_timeout: float = 300.0):
+        self.drain_timeout = drain_timeout
+        self._task: asyncio.Task | None = None
+        self._status: dict[str, Any] = {"state": "idle"}
+
+    @property
+    def busy(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def status(self) -> dict[str, Any]:
+        return dict(self._status)
+
+    def start(self, model: str) -> dict[str, Any]:
+        """Begin swapping to ``model`` in the background; returns the initial status."""
+        if self.busy:
+            raise SwapInProgressError(f"Already swapping to {self._status.get('to')}")
+        self._set("pending", model_manager.resolve_model_name(model))
+        self._task = asyncio.create_task(self._run(model))
+        return self.status()
+
+    async def wait(self) -> dict[str, Any]:
+        """Status once the running swap (if any) has finished."""
+        if self._task is not None:
+            await asyncio.shield(self._task)
+        return self.status()
+
+    async def _run(self, model: str) -> None:
+        try:
+            await self.swap(model)
+        except Exception:
+            pass  # recorded in the status and logged by swap()
+
+    async def swap(self, model: str) -> dict[str, Any]:
+        """Stage, switch to, and drain onto ``model``; returns the final status."""
+        from .mlx_engine import mlx_engine
+
+        new = model_manager.resolve_model_name(model)
+        old = model_manager.resolve_model_name(settings.mlx_model)
+        started = time.monotonic()
+        if new == old and mlx_engine.loaded_model == new:
+            self._set("idle", new, previous=old, result="unchanged")
+            return self.status()
+
+        self._set("loading", new, previous=old)
+        logger.info("Model swap %s -> %s: loading", old, new)
+        try:
+            await asyncio.to_thread(mlx_engine.stage_model, new)
+        except Exception as exc:
+            MODEL_SWAPS.labels("failed").inc()
+            logger.exception("Model swap %s -> %s failed; keeping %s", old, new, old)
+            self._set("failed", new, previous=old, error=f"{type(exc).__name__}: {exc}")
+            raise
+
+        # Requests admitted from here on resolve the new default
+        settings.mlx_model = new
+        mlx_engine.activate_model(new)
+
+        self._set("draining", new, previous=old)
+        deadline = time.monotonic() + self.drain_timeout
+        while mlx_engine.in_flight(old) and time.monotonic() < deadline:
+            await asyncio.sleep(DRAIN_POLL_SECONDS)
+        remaining = mlx_engine.in_flight(old)
+        if remaining:
+            logger.warning(
+                "Model swap: %d request(s) still on %s after %gs; unloading anyway",
+                remaining,
+                old,
+                self.drain_timeout,
+            )
+        if old != new:
+            mlx_engine.unload_model(old)
+
+        MODEL_SWAPS.labels("completed").inc()
+        elapsed = time.monotonic() - started
+        logger.info("Model swap %s -> %s: done in %.1fs", old, new, elapsed)
+        self._set(
+            "idle",
+            new,
+            previous=old,
+            result="completed",
+            seconds=round(elapsed, 2),
+            undrained=remaining,
+        )
+        return self.status()
+
+    def reload_config(self) -> dict[str, Any]:
+        """Re-read settings; a changed ``MLX_MODEL`` starts a swap."""
+        changed = reload_settings()
+        if changed:
+            logger.info("Settings reloaded: %s", ", ".join(sorted(changed)))
+        response: dict[str, Any] = {"changed": sorted(changed)}
+        model = changed.get("mlx_model")
+        if model is not None:
+            response["model_swap"] = self.start(model)
+        return response
+
+    def _set(self, state: str, model: str, **details: Any) -> None:
+        self._status = {"state": state, "to": model, "updated": time.time(), **details}
+
+
+def _create_swapper() -> ModelSwapper:
+    return ModelSwapper(drain_timeout=settings.swap_drain_timeout_seconds)
+
+
+model_swapper = _create_swapper()
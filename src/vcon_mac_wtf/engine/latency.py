@@ -0,0 +1,210 @@
+"""Online latency model: processing time as a function of audio duration.
+
+For every (machine, model, decode profile) the predictor fits
+
+    seconds = overhead + rtf * audio_seconds
+
+by exponentially weighted least squares over measured transcriptions, so the
+fit follows changes (thermal throttling, a new mlx release) while smoothing
+noise. Until a fit has enough spread in durations it falls back to a ratio
+through the origin, and before any observation to a prior real-time factor
+for the model scaled by the profile's relative cost.
+
+This is the one latency model: the scheduler's job ordering and wait
+estimates, admission and load shedding, and quality-tier selection all
+predict through it.
+
+Fits are keyed by machine (CPU brand and memory size) and persisted as JSON,
+so a restarted server -- or another machine sharing the file -- predicts well
+from the first request.
+"""
+
+import json
+import logging
+import os
+import platform
+import subprocess
+import threading
+import time
+from functools import cache
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+DECAY = 0.98  # weight an observation keeps per newer one (memory of ~50 jobs)
+MIN_OBSERVATIONS = 3  # before fitting an intercept
+MIN_SPREAD_SECONDS = 5.0  # std-dev of durations needed to separate overhead from rate
+SAVE_INTERVAL = 30.0  # seconds between writes of the persisted model
+DEFAULT_RTF = 0.1
+# Starting real-time factors per model (Apple silicon, rough) until jobs are observed
+PRIOR_RTF: dict[str, float] = {
+    "mlx-community/whisper-tiny": 0.02,
+    "mlx-community/whisper-base": 0.03,
+    "mlx-community/whisper-small": 0.05,
+    "mlx-community/whisper-medium": 0.12,
+    "mlx-community/whisper-large-v3": 0.2,
+    "mlx-community/whisper-turbo": 0.1,
+}
+# Run time relative to ``accurate`` before a profile has been observed
+PROFILE_COST: dict[str, float] = {"fast": 0.6, "balanced": 0.8, "accurate": 1.0}
+
+
+def prior_rtf(model: str, profile: str) -> float:
+    """Real-time factor assumed for a model and profile before any observation."""
+    return PRIOR_RTF.get(model, DEFAULT_RTF) * PROFILE_COST.get(profile, 1.0)
+
+
+@cache
+def machine_id() -> str:
+    """Stable description of this machine's hardware, e.g. ``Apple M2 Max/64GB``."""
+    chip = ""
+    if platform.system() == "Darwin":
+        try:
+            chip = subprocess.run(
+                ["sysctl", "-n", "machdep.cpu.brand_string"],
+                capture_output=True,
+                text=True,
+                timeout=2,
+            ).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            pass
+    chip = chip or platform.processor() or platform.machine() or "unknown"
+    try:
+        memory = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+        return f"{chip}/{round(memory / 2**30)}GB"
+    except (AttributeError, OSError, ValueError):
+        return chip
+
+
+class _Fit:
+    """Exponentially weighted sufficient statistics for a line fit."""
+
+    FIELDS = ("n", "sw", "sx", "sy", "sxx", "sxy")
+
+    def __init__(self, **stats: float):
+        for name in self.FIELDS:
+            setattr(self, name, float(stats.get(name, 0.0)))
+
+    def observe(self, x: float, y: float) -> None:
+        self.sw, self.sx, self.sy = DECAY * self.sw + 1, DECAY * self.sx + x, DECAY * self.sy + y
+        self.sxx = DECAY * self.sxx + x * x
+        self.sxy = DECAY * self.sxy + x * y
+        self.n += 1
+
+    def coefficients(self) -> tuple[float, float] | None:
+        """(overhead seconds, real-time factor), or None before any observation."""
+        if not self.n or self.sxx <= 0:
+            return None
+        variance = self.sxx / self.sw - (self.sx / self.sw) ** 2
+        if self.n >= MIN_OBSERVATIONS and variance >= MIN_SPREAD_SECONDS**2:
+            rtf = (self.sw * self.sxy - self.sx * self.sy) / (self.sw * self.sxx - self.sx**2)
+            overhead = (self.sy - rtf * self.sx) / self.sw
+            if rtf > 0 and overhead >= 0:
+                return overhead, rtf
+        return 0.0, max(self.sxy / self.sxx, 0.0)
+
+    def to_dict(self) -> dict[str, float]:
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+
+class LatencyPredictor:
+    """Predicts processing seconds per model and decode profile on this machine."""
+
+    def __init__(self, path: Path | None = None, machine: str | None = None):
+        self.path = path
+        self.machine = machine or machine_id()
+        # machine -> "model|profile" -> fit; other machines' fits are kept for the file
+        self._fits: dict[str, dict[str, _Fit]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._saved = 0.0
+        if path is not None:
+            self.load()
+
+    def _fit(self, model: str, profile: str) -> _Fit | None:
+        return self._fits.get(self.machine, {}).get(f"{model}|{profile}")
+
+    def coefficients(self, model: str, profile: str) -> tuple[float, float]:
+        """(overhead seconds, real-time factor) for the model and profile."""
+        fit = self._fit(model, profile)
+        coefficients = fit.coefficients() if fit is not None else None
+        if coefficients is not None:
+            return coefficients
+        return 0.0, prior_rtf(model, profile)
+
+    def predict(self, model: str, profile: str, audio_seconds: float) -> float:
+        """Expected processing seconds for ``audio_seconds`` of audio."""
+        overhead, rtf = self.coefficients(model, profile)
+        return overhead + rtf * max(audio_seconds, 0.0)
+
+    def observe(self, model: str, profile: str, audio_seconds: float, seconds: float) -> None:
+        """Learn from a finished transcription."""
+        if audio_seconds <= 0 or seconds <= 0:
+            return
+        with self._lock:
+            fits = self._fits.setdefault(self.machine, {})
+            fits.setdefault(f"{model}|{profile}", _Fit()).observe(audio_seconds, seconds)
+            self._dirty = True
+        if self.path is not None and time.monotonic() - self._saved >= SAVE_INTERVAL:
+            self.save()
+
+    def snapshot(self) -> dict[str, Any]:
+        """This machine's fits, for ``/health/ready`` and fleet routing."""
+        models: dict[str, dict[str, Any]] = {}
+        for key, fit in self._fits.get(self.machine, {}).items():
+            model, _, profile = key.partition("|")
+            overhead, rtf = fit.coefficients() or (0.0, 0.0)
+            models.setdefault(model, {})[profile] = {
+                "rtf": round(rtf, 4),
+                "overhead_seconds": round(overhead, 3),
+                "observations": int(fit.n),
+            }
+        return {"machine": self.machine, "models": models}
+
+    def load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as exc:
+            logger.warning("Ignoring unreadable latency model %s: %s", self.path, exc)
+            return
+        with self._lock:
+            self._fits = {
+                machine: {key: _Fit(**stats) for key, stats in fits.items()}
+                for machine, fits in (data.get("machines") or {}).items()
+            }
+        logger.info("Loaded latency model from %s", self.path)
+
+    def save(self) -> None:
+        """Write the fits (atomically) if anything changed since the last save."""
+        if self.path is None or not self._dirty:
+            return
+        with self._lock:
+            data = {
+                "version": 1,
+                "machines": {
+                    machine: {key: fit.to_dict() for key, fit in fits.items()}
+                    for machine, fits in self._fits.items()
+                },
+            }
+            self._dirty = False
+            self._saved = time.monotonic()
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(data))
+            tmp.replace(self.path)
+        except OSError as exc:
+            logger.warning("Could not save latency model to %s: %s", self.path, exc)
+
+
+def _create_predictor() -> LatencyPredictor:
+    from ..config import settings
+
+    path = Path(settings.latency_model_file).expanduser() if settings.latency_model_file else None
+    return LatencyPredictor(path)
+
+
+latency_predictor = _create_predictor()
@@ -0,0 +1,210 @@
+"""Memory governance: per-request estimates and budgeted admission.
+
+Each transcription reserves an estimate of its peak unified-memory footprint
+before it reaches the engine. When the projected total would exceed
+``MEMORY_BUDGET_MB`` the request waits (FIFO) until earlier ones release their
+reservations, instead of pushing the machine into swap.
+
+The estimate is deliberately simple and conservative:
+
+    peak = audio_seconds * PCM_BYTES_PER_SECOND * PCM_COPIES
+         + model weights * ACTIVATION_FRACTION     (encoder activations, KV cache)
+         + model weights                           (only if the model is not resident)
+"""
+
+import asyncio
+import logging
+import resource
+import sys
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
+from ..metrics import MEMORY_RESERVED, MEMORY_WAITING
+from .model_manager import model_manager
+from .probe import probe_duration
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+# Parameter counts for the known checkpoints (see README "Available Models")
+MODEL_PARAMETERS: dict[str, float] = {
+    "mlx-community/whisper-tiny": 39e6,
+    "mlx-community/whisper-base": 74e6,
+    "mlx-community/whisper-small": 244e6,
+    "mlx-community/whisper-medium": 769e6,
+    "mlx-community/whisper-large-v3": 1550e6,
+    "mlx-community/whisper-turbo": 809e6,
+}
+UNKNOWN_MODEL_PARAMETERS = 1550e6  # assume large-v3 for custom checkpoints
+BYTES_PER_PARAMETER = 2.0  # fp16 weights
+
+# 16 kHz float32 samples; decoded audio plus its padded log-mel copy
+PCM_BYTES_PER_SECOND = 16000 * 4
+PCM_COPIES = 2
+ACTIVATION_FRACTION = 0.5
+
+# Fallback for compressed containers: 64 kbps overestimates duration for
+# typical call recordings, which errs on the side of reserving more memory.
+FALLBACK_BYTES_PER_SECOND = 8000
+
+
+def model_weight_bytes(model: str) -> int:
+    """Approximate resident size of a model's weights."""
+    resolved = model_manager.resolve_model_name(model)
+    params = MODEL_PARAMETERS.get(resolved)
+    if params is None:
+        base = resolved.lower()
+        params = next(
+            (p for name, p in MODEL_PARAMETERS.items() if base.startswith(name.lower())),
+            UNKNOWN_MODEL_PARAMETERS,
+        )
+    bytes_per_param = BYTES_PER_PARAMETER
+    if "4bit" in resolved or "q4" in resolved:
+        bytes_per_param = 0.5
+    elif "8bit" in resolved or "q8" in resolved:
+        bytes_per_param = 1.0
+    return int(params * bytes_per_param)
+
+
+def estimate_request_bytes(model: str, audio_seconds: float, load_required: bool) -> int:
+    """Projected peak memory of one transcription."""
+    weights = model_weight_bytes(model)
+    total = audio_seconds * PCM_BYTES_PER_SECOND * PCM_COPIES + weights * ACTIVATION_FRACTION
+    if load_required:
+        total += weights
+    return int(total)
+
+
+def estimate_audio_seconds(audio_bytes: bytes, suffix: str = ".wav") -> float:
+    """Audio duration from the container header, else a conservative bitrate-based estimate."""
+    duration = probe_duration(audio_bytes)
+    if duration is not None:
+        return duration
+    return len(audio_bytes) / FALLBACK_BYTES_PER_SECOND
+
+
+def process_peak_rss_bytes() -> int:
+    """Peak resident set size of this process (ru_maxrss is bytes on macOS, KiB on Linux)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Reservation:
+    __slots__ = ("nbytes", "model", "audio_seconds", "waited")
+
+    def __init__(self, nbytes: int, model: str, audio_seconds: float):
+        self.nbytes = nbytes
+        self.model = model
+        self.audio_seconds = audio_seconds
+        self.waited = 0.0
+
+
+class MemoryGovernor:
+    """Admits transcriptions while their projected peak fits in the memory budget.
+
+    A budget of 0 disables waiting (reservations are still tracked for
+    reporting). A request larger than the whole budget is admitted when nothing
+    else is running, so it cannot wait forever.
+    """
+
+    def __init__(self, budget_bytes: int = 0):
+        self.budget_bytes = budget_bytes
+        self.reserved_bytes = 0
+        self.active = 0
+        self._waiters: deque[tuple[int, asyncio.Future]] = deque()
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for _, fut in self._waiters if not fut.done())
+
+    def _fits(self, nbytes: int) -> bool:
+        if not self.budget_bytes or self.active == 0:
+            return True
+        return self.reserved_bytes + nbytes <= self.budget_bytes
+
+    def _grant(self, nbytes: int) -> None:
+        self.reserved_bytes += nbytes
+        self.active += 1
+        MEMORY_RESERVED.set(self.reserved_bytes)
+
+    def _wake(self) -> None:
+        # FIFO: stop at the first waiter that does not fit
+        while self._waiters:
+            nbytes, fut = self._waiters[0]
+            if fut.done():
+                self._waiters.popleft()
+                continue
+            if not self._fits(nbytes):
+                break
+            self._waiters.popleft()
+            self._grant(nbytes)
+            fut.set_result(None)
+        MEMORY_WAITING.set(self.waiting)
+
+    def release(self, nbytes: int) -> None:
+        self.reserved_bytes -= nbytes
+        self.active -= 1
+        MEMORY_RESERVED.set(self.reserved_bytes)
+        self._wake()
+
+    @asynccontextmanager
+    async def reserve(
+        self, model: str, audio_seconds: float, load_required: bool = False
+    ) -> AsyncIterator[Reservation]:
+        """Wait until the request's projected peak fits, hold it for the block."""
+        nbytes = estimate_request_bytes(model, audio_seconds, load_required)
+        reservation = Reservation(nbytes, model, audio_seconds)
+        if self.budget_bytes and nbytes > self.budget_bytes:
+            logger.warning(
+                "Request needs ~%d MB, more than the %d MB budget; running it alone",
+                nbytes // MB,
+                self.budget_bytes // MB,
+            )
+
+        loop = asyncio.get_running_loop()
+        if not self._waiters and self._fits(nbytes):
+            self._grant(nbytes)
+        else:
+            fut = loop.create_future()
+            self._waiters.append((nbytes, fut))
+            MEMORY_WAITING.set(self.waiting)
+            start = loop.time()
+            try:
+                await fut
+            except asyncio.CancelledError:
+                if fut.done() and not fut.cancelled():
+                    self.release(nbytes)  # granted just as we were cancelled
+                else:
+                    self._wake()  # drop our entry; later waiters may now fit
+                raise
+            reservation.waited = loop.time() - start
+
+        try:
+            yield reservation
+        finally:
+            self.release(nbytes)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "budget_mb": round(self.budget_bytes / MB, 1),
+            "reserved_mb": round(self.reserved_bytes / MB, 1),
+            "free_mb": (
+                round(max(0, self.budget_bytes - self.reserved_bytes) / MB, 1)
+                if self.budget_bytes
+                else None
+            ),
+            "active": self.active,
+            "waiting": self.waiting,
+            "process_peak_rss_mb": round(process_peak_rss_bytes() / MB, 1),
+        }
+
+
+def _create_governor() -> MemoryGovernor:
+    from ..config import settings
+
+    return MemoryGovernor(budget_bytes=settings.memory_budget_mb * MB)
+
+
+memory_governor = _create_governor()
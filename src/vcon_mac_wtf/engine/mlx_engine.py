@@ -1,12 +1,32 @@
 """Core MLX Whisper engine wrapping mlx_whisper.transcribe()."""
 
 import asyncio
+import functools
+import gc
 import logging
 import tempfile
-from pathlib import Path
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from types import SimpleNamespace
 from typing import Any
 
+from ..cancellation import RequestCancelledError, current_cancel_token, raise_if_cancelled
+from ..config import settings
+from ..metrics import (
+    AUDIO_SECONDS,
+    ENGINE_MEMORY,
+    INFERENCE_QUEUED,
+    MODEL_CACHE,
+    MODEL_LOADED,
+    REAL_TIME_FACTOR,
+    WASTED_INFERENCE_SECONDS,
+    current_endpoint,
+)
+from ..tracing import record_memory, record_stage
 from .model_manager import model_manager
+from .transcript import Transcript
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +36,14 @@ class MLXWhisperEngine:
 
     def __init__(self):
         self._loaded_model: str | None = None
+        # Model currently held by mlx_whisper's single-slot model cache
+        self._resident_model: str | None = None
+        # Model being loaded into memory (first use or warm-up), if any
+        self._loading_model: str | None = None
+        self._running = 0
+        self._running_lock = threading.Lock()
+        # Requests admitted per model (queued or running), for draining on a swap
+        self._in_flight: Counter[str] = Counter()
 
     @property
     def is_loaded(self) -> bool:
@@ -25,41 +53,281 @@ class MLXWhisperEngine:
     def loaded_model(self) -> str | None:
         return self._loaded_model
 
+    @property
+    def resident_model(self) -> str | None:
+        return self._resident_model
+
+    @property
+    def loading_model(self) -> str | None:
+        return self._loading_model
+
+    def configure_memory(self, cache_limit_mb: int = 0, memory_limit_mb: int = 0) -> None:
+        """Apply Metal buffer-cache and memory limits (0 keeps the MLX default)."""
+        api = _metal_api()
+        if api is None:
+            if cache_limit_mb or memory_limit_mb:
+                logger.warning("Metal memory limits requested but mlx is not available")
+            return
+        if cache_limit_mb:
+            api.set_cache_limit(cache_limit_mb * 1024 * 1024)
+        if memory_limit_mb:
+            api.set_memory_limit(memory_limit_mb * 1024 * 1024)
+        logger.info(
+            "Metal memory limits: cache=%s MB, memory=%s MB",
+            cache_limit_mb or "default",
+            memory_limit_mb or "default",
+        )
+
+    def memory_stats(self) -> dict[str, int]:
+        """Active, peak and cached Metal memory in bytes ({} without mlx)."""
+        api = _metal_api()
+        if api is None:
+            return {}
+        return {
+            "active_bytes": api.get_active_memory(),
+            "peak_bytes": api.get_peak_memory(),
+            "cache_bytes": api.get_cache_memory(),
+        }
+
+    def release_memory(self) -> None:
+        """Drop unreferenced arrays and return the Metal buffer cache to the system."""
+        gc.collect()
+        api = _metal_api()
+        if api is not None:
+            api.clear_cache()
+
     def load_model(self, model_name: str) -> None:
         """Pre-load a model by running a tiny transcription to warm the cache."""
-        import mlx_whisper
-
         resolved = model_manager.resolve_model_name(model_name)
         logger.info("Loading MLX Whisper model: %s", resolved)
         # Create a tiny silent WAV to trigger model download and load
-        _warm_up_model(resolved)
+        self._loading_model = resolved
+        try:
+            self._warm_up(resolved)
+        finally:
+            self._loading_model = None
         self._loaded_model = resolved
+        self._mark_resident(resolved)
         logger.info("Model loaded: %s", resolved)
 
+    def stage_model(self, model_name: str) -> str:
+        """Load and warm a model alongside the resident one, without evicting it.
+
+        Blocking. The model stays pinned in memory until ``unload_model``, so
+        requests for the current model keep being served while it loads.
+        """
+        resolved = model_manager.resolve_model_name(model_name)
+        logger.info("Staging MLX Whisper model: %s", resolved)
+        self._loading_model = resolved
+        try:
+            self._hold(resolved)
+            self._warm_up(resolved)
+        finally:
+            self._loading_model = None
+        return resolved
+
+    def activate_model(self, model_name: str) -> None:
+        """Make a staged model the default."""
+        resolved = model_manager.resolve_model_name(model_name)
+        self._loaded_model = resolved
+        self._mark_resident(resolved)
+
+    def unload_model(self, model_name: str) -> None:
+        """Drop a model from memory once nothing uses it."""
+        resolved = model_manager.resolve_model_name(model_name)
+        self._release_model(resolved)
+        MODEL_LOADED.labels(resolved).set(0)
+        self.release_memory()
+        logger.info("Model unloaded: %s", resolved)
+
+    def in_flight(self, model_name: str) -> int:
+        """Requests admitted for the model that have not finished."""
+        return self._in_flight[model_manager.resolve_model_name(model_name)]
+
+    @contextmanager
+    def using(self, model_name: str):
+        """Count a request against the model from admission until it finishes."""
+        resolved = model_manager.resolve_model_name(model_name)
+        with self._running_lock:
+            self._in_flight[resolved] += 1
+        try:
+            yield
+        finally:
+            with self._running_lock:
+                self._in_flight[resolved] -= 1
+                if not self._in_flight[resolved]:
+                    del self._in_flight[resolved]
+
     async def transcribe(
         self,
-        audio_path: str,
+        audio_path: str | Any,
         model: str | None = None,
         language: str | None = None,
         word_timestamps: bool = True,
-    ) -> dict[str, Any]:
-        """Transcribe an audio file using MLX Whisper.
+        decode_options: dict[str, Any] | None = None,
+    ) -> Transcript:
+        """Transcribe an audio file, or samples from ``decode_audio``, using MLX Whisper.
 
         Runs the blocking mlx_whisper.transcribe() in a thread pool to avoid
-        blocking the FastAPI event loop.
+        blocking the FastAPI event loop. ``decode_options`` are extra keyword
+        arguments for mlx_whisper.transcribe() (see engine.decode). The result
+        is converted to a columnar ``Transcript`` in the worker thread.
         """
         resolved_model = model_manager.resolve_model_name(model) if model else self._loaded_model
         if not resolved_model:
             raise RuntimeError("No model loaded. Call load_model() first or pass a model name.")
 
-        result = await asyncio.to_thread(
-            _run_transcribe,
+        started = [False]
+        submitted = time.perf_counter()
+        INFERENCE_QUEUED.inc()
+        try:
+            result = await _to_thread_held(
+                self._run_instrumented,
+                started,
+                submitted,
+                audio_path=audio_path,
+                model=resolved_model,
+                language=language,
+                word_timestamps=word_timestamps,
+                decode_options=decode_options,
+            )
+        finally:
+            if not started[0]:
+                INFERENCE_QUEUED.dec()
+        return result
+
+    def _run_instrumented(
+        self,
+        started: list[bool],
+        submitted: float,
+        audio_path: str | Any,
+        model: str,
+        language: str | None,
+        word_timestamps: bool,
+        decode_options: dict[str, Any] | None = None,
+    ) -> Transcript:
+        """Run _run_transcribe in the worker thread, recording queue wait and inference."""
+        started[0] = True
+        INFERENCE_QUEUED.dec()
+        begin = time.perf_counter()
+        record_stage("queue_wait", begin - submitted, model)
+        token = current_cancel_token.get()
+        if token is not None:
+            token.raise_if_cancelled()  # abandoned while waiting for a thread
+        cache_result = "hit" if model == self._resident_model else "miss"
+
+        # Metal's peak counter is process-wide: reset it only when no other
+        # inference is running, so the reported peak bounds this request's.
+        with self._running_lock:
+            if self._running == 0:
+                self._reset_peak_memory()
+            self._running += 1
+        if cache_result == "miss":
+            self._loading_model = model
+        try:
+            result = self._transcribe_sync(
+                audio_path=audio_path,
+                model=model,
+                language=language,
+                word_timestamps=word_timestamps,
+                decode_options=decode_options,
+            )
+        except RequestCancelledError as exc:
+            WASTED_INFERENCE_SECONDS.labels(model, exc.reason).inc(time.perf_counter() - begin)
+            raise
+        finally:
+            with self._running_lock:
+                self._running -= 1
+            if self._loading_model == model:
+                self._loading_model = None
+
+        elapsed = time.perf_counter() - begin
+        record_stage("inference", elapsed, model)
+        if token is not None and token.reason is not None:
+            # Finished after the caller gave up (between window checks)
+            WASTED_INFERENCE_SECONDS.labels(model, token.reason).inc(elapsed)
+        MODEL_CACHE.labels(model, cache_result).inc()
+        self._mark_resident(model)
+
+        stats = self.memory_stats()
+        if stats:
+            record_memory(peak=stats["peak_bytes"], current=stats["active_bytes"])
+            for key, nbytes in stats.items():
+                ENGINE_MEMORY.labels(key.removesuffix("_bytes")).set(nbytes)
+
+        duration = result_duration(result)
+        if duration > 0:
+            endpoint = current_endpoint.get()
+            AUDIO_SECONDS.labels(model, endpoint).inc(duration)
+            REAL_TIME_FACTOR.labels(model, endpoint).observe(elapsed / duration)
+        return Transcript.from_result(result)  # the per-word dicts are dropped here
+
+    def _transcribe_sync(
+        self,
+        audio_path: str | Any,
+        model: str,
+        language: str | None,
+        word_timestamps: bool,
+        decode_options: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        """Blocking transcription; the backend hook overridden by other engines."""
+        return _run_transcribe(
             audio_path=audio_path,
-            model=resolved_model,
+            model=model,
             language=language,
             word_timestamps=word_timestamps,
+            decode_options=decode_options,
         )
-        return result
+
+    def decode_audio(
+        self, audio_bytes: bytes, suffix: str = ".wav", max_seconds: float | None = None
+    ) -> Any:
+        """Blocking CPU decode to 16 kHz mono samples for ``transcribe_bytes(pcm=...)``.
+
+        A backend hook; returning None leaves decoding to inference.
+        ``max_seconds`` decodes only the start of the audio.
+        """
+        from .pipeline import decode_pcm
+
+        return decode_pcm(audio_bytes, suffix, max_seconds)
+
+    async def detect_language(self, samples: Any, model: str | None = None) -> dict[str, float]:
+        """Language probabilities for up to 30 s of ``decode_audio`` samples.
+
+        Runs the encoder and the language-token step only, no decoding.
+        """
+        resolved_model = model_manager.resolve_model_name(model) if model else self._loaded_model
+        if not resolved_model:
+            raise RuntimeError("No model loaded. Call load_model() first or pass a model name.")
+        return await _to_thread_held(self._detect_language_sync, samples, resolved_model)
+
+    def _detect_language_sync(self, samples: Any, model: str) -> dict[str, float]:
+        """Blocking language identification; the backend hook overridden by other engines."""
+        return _run_detect_language(samples, model)
+
+    def _warm_up(self, model: str) -> None:
+        """Blocking model load and warm-up; the backend hook overridden by other engines."""
+        _warm_up_model(model)
+
+    def _hold(self, model: str) -> None:
+        """Load a model outside mlx_whisper's single-slot cache; a backend hook."""
+        _hold_model(model)
+
+    def _release_model(self, model: str) -> None:
+        """Forget a held model; a backend hook."""
+        _release_held_model(model)
+
+    def _reset_peak_memory(self) -> None:
+        api = _metal_api()
+        if api is not None:
+            api.reset_peak_memory()
+
+    def _mark_resident(self, model: str) -> None:
+        if self._resident_model and self._resident_model != model:
+            MODEL_LOADED.labels(self._resident_model).set(0)
+        self._resident_model = model
+        MODEL_LOADED.labels(model).set(1)
+        model_manager.mark_used(model)
 
     async def transcribe_bytes(
         self,
@@ -68,8 +336,22 @@ class MLXWhisperEngine:
         model: str | None = None,
         language: str | None = None,
         word_timestamps: bool = True,
-    ) -> dict[str, Any]:
-        """Transcribe audio from bytes by writing to a temp file first."""
+        decode_options: dict[str, Any] | None = None,
+        pcm: Any = None,
+    ) -> Transcript:
+        """Transcribe audio from bytes by writing to a temp file first.
+
+        ``pcm``, the samples ``decode_audio`` produced for these bytes, skips
+        the file and the decode inside mlx_whisper.
+        """
+        if pcm is not None:
+            return await self.transcribe(
+                audio_path=pcm,
+                model=model,
+                language=language,
+                word_timestamps=word_timestamps,
+                decode_options=decode_options,
+            )
         with tempfile.NamedTemporaryFile(suffix=suffix, delete=True) as tmp:
             tmp.write(audio_bytes)
             tmp.flush()
@@ -78,19 +360,70 @@ class MLXWhisperEngine:
                 model=model,
                 language=language,
                 word_timestamps=word_timestamps,
+                decode_options=decode_options,
             )
 
 
+async def _to_thread_held(func, /, *args, **kwargs):
+    """``asyncio.to_thread`` that, when cancelled, re-raises only once the thread is done.
+
+    Cancelling the await does not stop the worker: MLX runs on until its next
+    cancellation check (the request's token is set by then). The caller's
+    inference slot and memory reservation must stay held until it lets go,
+    or the next queued job would run inference alongside it.
+    """
+    future = asyncio.ensure_future(asyncio.to_thread(func, *args, **kwargs))
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        while not future.done():
+            try:
+                await asyncio.wait({future})
+            except asyncio.CancelledError:
+                continue  # already leaving; keep waiting for the thread
+        if not future.cancelled():
+            future.exception()  # retrieved: the cancellation is what propagates
+        raise
+
+
+def result_duration(result: Transcript | dict[str, Any]) -> float:
+    """Audio duration covered by a result (mlx_whisper omits ``duration``)."""
+    if isinstance(result, Transcript):
+        return result.covered_seconds
+    duration = result.get("duration")
+    if duration:
+        return float(duration)
+    segments = result.get("segments") or []
+    return float(segments[-1].get("end", 0.0)) if segments else 0.0
+
+
+@functools.cache
+def _metal_api() -> Any:
+    """Module exposing MLX's memory functions, or None without mlx.
+
+    MLX 0.24 moved them from ``mlx.core.metal`` to ``mlx.core``.
+    """
+    try:
+        import mlx.core as mx
+    except ImportError:
+        return None
+    return mx if hasattr(mx, "get_peak_memory") else mx.metal
+
+
 def _run_transcribe(
-    audio_path: str,
+    audio_path: str | Any,
     model: str,
     language: str | None,
     word_timestamps: bool,
+    decode_options: dict[str, Any] | None = None,
 ) -> dict[str, Any]:
     """Synchronous wrapper around mlx_whisper.transcribe() for use in a thread."""
     import mlx_whisper
 
+    _install_window_hook()
+
     kwargs: dict[str, Any] = {
+        **(decode_options or {}),
         "path_or_hf_repo": model,
         "word_timestamps": word_timestamps,
     }
@@ -101,6 +434,106 @@ def _run_transcribe(
     return result
 
 
+def _run_detect_language(samples: Any, model: str) -> dict[str, float]:
+    """One encoder pass over a 30-second window and the language-token logits.
+
+    The model comes from mlx_whisper's cache when it is the resident one;
+    another model is held next to it (as for a hot swap) so language
+    identification never evicts the transcription model.
+    """
+    import mlx.core as mx
+    from mlx_whisper.audio import N_FRAMES, N_SAMPLES, log_mel_spectrogram, pad_or_trim
+    from mlx_whisper.decoding import detect_language
+    from mlx_whisper.tokenizer import get_tokenizer
+    from mlx_whisper.transcribe import ModelHolder
+
+    if ModelHolder.model_path == model and ModelHolder.model is not None:
+        whisper = ModelHolder.model
+    else:
+        _hold_model(model)
+        whisper = _held_models[model][1]
+    if not whisper.is_multilingual:
+        raise ValueError(f"{model} is English-only and cannot identify languages")
+    mel = log_mel_spectrogram(samples, n_mels=whisper.dims.n_mels, padding=N_SAMPLES)
+    mel = pad_or_trim(mel, N_FRAMES, axis=-2).astype(mx.float16)
+    tokenizer = get_tokenizer(True, num_languages=whisper.num_languages)
+    _, probs = detect_language(whisper, mel, tokenizer)
+    return probs
+
+
+def _install_window_hook() -> None:
+    """Make mlx_whisper check the request's cancel token after every 30-second window.
+
+    mlx_whisper.transcribe() has no callback, but advances its tqdm progress
+    bar once per decoded window; a tqdm subclass whose ``update`` calls
+    ``raise_if_cancelled()`` turns that into a cooperative abort point.
+    """
+    import mlx_whisper.transcribe as transcribe_module
+
+    progress = transcribe_module.tqdm
+    if getattr(progress, "_cancellable", False):
+        return
+    base = getattr(progress, "tqdm", progress)
+
+    class _CancellableProgress(base):
+        _cancellable = True
+
+        def update(self, n=1):
+            raise_if_cancelled()
+            return super().update(n)
+
+    if base is progress:
+        transcribe_module.tqdm = _CancellableProgress
+    else:
+        # The module does ``import tqdm`` and calls ``tqdm.tqdm(...)``
+        transcribe_module.tqdm = SimpleNamespace(tqdm=_CancellableProgress, _cancellable=True)
+
+
+# Models loaded for a hot swap. mlx_whisper caches a single model and
+# reloads whenever a call names another, so the incoming model is held here
+# and served from this dict while requests for the outgoing one drain.
+_held_models: dict[str, tuple[Any, Any]] = {}  # path -> (dtype, model)
+
+
+def _hold_model(model: str) -> None:
+    import mlx.core as mx
+    from mlx_whisper.load_models import load_model
+
+    _install_model_hook()
+    if model not in _held_models:
+        # transcribe() loads in float16 unless fp16=False is passed
+        _held_models[model] = (mx.float16, load_model(model, dtype=mx.float16))
+
+
+def _release_held_model(model: str) -> None:
+    import mlx_whisper.transcribe as transcribe_module
+
+    _held_models.pop(model, None)
+    holder = transcribe_module.ModelHolder
+    if holder.model_path == model:
+        holder.model = None
+        holder.model_path = None
+
+
+def _install_model_hook() -> None:
+    """Let mlx_whisper's model cache serve held models before loading from disk."""
+    import mlx_whisper.transcribe as transcribe_module
+
+    holder = transcribe_module.ModelHolder
+    if getattr(holder, "_serves_held", False):
+        return
+    get_model = holder.get_model.__func__
+
+    def get_held_model(cls, model_path, dtype):
+        held_dtype, held = _held_models.get(model_path, (None, None))
+        if held is not None and held_dtype == dtype:
+            return held
+        return get_model(cls, model_path, dtype)
+
+    holder.get_model = classmethod(get_held_model)
+    holder._serves_held = True
+
+
 def _warm_up_model(model: str) -> None:
     """Warm up the model by loading it. mlx_whisper downloads on first use."""
     import struct
@@ -134,4 +567,15 @@ def _warm_up_model(model: str) -> None:
         mlx_whisper.transcribe(tmp.name, path_or_hf_repo=model)
 
 
-mlx_engine = MLXWhisperEngine()
+def create_engine(backend: str) -> MLXWhisperEngine:
+    """Instantiate the transcription engine for a backend name (mlx or simulated)."""
+    if backend == "simulated":
+        from .simulated_engine import SimulatedWhisperEngine
+
+        return SimulatedWhisperEngine(real_time_factor=settings.simulated_rtf)
+    if backend != "mlx":
+        raise ValueError(f"Unknown engine backend: {backend}")
+    return MLXWhisperEngine()
+
+
+mlx_engine = create_engine(settings.engine_backend)
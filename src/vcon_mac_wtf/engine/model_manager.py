@@ -1,6 +1,24 @@
-"""Model management: listing, short-name aliases, cache info."""
+"""Model management: aliases, listing, and the local Hugging Face cache.
 
+The cache is read directly from the hub layout
+(``models--org--name/{refs,snapshots,blobs}``) under ``HF_HUB_CACHE``, else
+``HF_HOME/hub``, else ``~/.cache/huggingface/hub`` -- the same resolution
+huggingface_hub uses -- so inventory, verification and garbage collection need
+no network and no extra dependency. Only prefetching imports huggingface_hub
+(installed with mlx-whisper).
+"""
+
+import hashlib
+import logging
+import os
+import re
+import shutil
+import threading
+import time
 from pathlib import Path
+from typing import Iterable, NamedTuple
+
+logger = logging.getLogger(__name__)
 
 # Short name -> HuggingFace model ID
 MODEL_ALIASES: dict[str, str] = {
@@ -15,35 +33,273 @@ MODEL_ALIASES: dict[str, str] = {
 # All known models (alias values + some additional)
 ALL_MODELS: list[str] = list(MODEL_ALIASES.values())
 
+# Files an MLX Whisper checkpoint needs: its config plus one weights file
+CONFIG_FILE = "config.json"
+WEIGHT_FILES = ("weights.safetensors", "weights.npz", "model.safetensors")
+# LFS blobs are named by the SHA-256 of their content; git blobs by SHA-1
+_SHA256_NAME = re.compile(r"^[0-9a-f]{64}$")
+# Don't rewrite the last-use stamp on every request
+LAST_USE_RESOLUTION = 60.0
+
+
+def hub_cache_dir() -> Path:
+    """Hugging Face hub cache directory, honouring HF_HUB_CACHE and HF_HOME."""
+    for var in ("HF_HUB_CACHE", "HUGGINGFACE_HUB_CACHE"):
+        if os.environ.get(var):
+            return Path(os.environ[var]).expanduser()
+    if os.environ.get("HF_HOME"):
+        return Path(os.environ["HF_HOME"]).expanduser() / "hub"
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    base = Path(xdg).expanduser() if xdg else Path.home() / ".cache"
+    return base / "huggingface" / "hub"
+
+
+class CachedModel(NamedTuple):
+    model: str
+    path: Path
+    size_bytes: int
+    revisions: int
+    last_used: float | None  # epoch seconds; last load/use or download
+
 
 class ModelManager:
-    """Manages MLX Whisper model resolution and listing."""
+    """Resolves and lists models and manages their local cache."""
+
+    def __init__(self, cache_dir: Path | None = None):
+        self._cache_dir = cache_dir
+        self._downloading: set[str] = set()
+        self._lock = threading.Lock()
+        self._last_stamp: dict[str, float] = {}
+
+    @property
+    def cache_dir(self) -> Path:
+        # Resolved lazily: .env (and so HF_HOME) is loaded after import
+        return self._cache_dir or hub_cache_dir()
 
     def resolve_model_name(self, name: str) -> str:
         """Resolve a short name or pass through a full model ID."""
         return MODEL_ALIASES.get(name, name)
 
     def list_models(self) -> list[dict]:
-        """List available models in OpenAI-compatible format."""
+        """List known models (and any other cached Whisper checkpoints) with cache info."""
+        cached = {c.model: c for c in self.inventory()}
         models = []
+        aliases: dict[str, list[str]] = {}
         for alias, model_id in MODEL_ALIASES.items():
+            aliases.setdefault(model_id, []).append(alias)
+        extra = [m for m in cached if m not in aliases and "whisper" in m.lower()]
+        for model_id in [*aliases, *sorted(extra)]:
+            info = cached.get(model_id)
             models.append(
                 {
                     "id": model_id,
                     "object": "model",
-                    "owned_by": "mlx-community",
-                    "aliases": [alias],
+                    "owned_by": model_id.split("/")[0] if "/" in model_id else "local",
+                    "aliases": aliases.get(model_id),
+                    "cached": info is not None,
+                    "downloading": model_id in self._downloading,
+                    "size_bytes": info.size_bytes if info else None,
+                    "last_used": info.last_used if info else None,
                 }
             )
         return models
 
-    def is_cached(self, model_name: str) -> bool:
-        """Check if a model is locally cached (best-effort heuristic)."""
+    # -- cache inventory ------------------------------------------------------
+
+    def repo_dir(self, model_name: str) -> Path:
         resolved = self.resolve_model_name(model_name)
-        cache_dir = Path.home() / ".cache" / "huggingface" / "hub"
         # HuggingFace caches as models--org--name
-        slug = resolved.replace("/", "--")
-        return (cache_dir / f"models--{slug}").exists()
+        return self.cache_dir / f"models--{resolved.replace('/', '--')}"
+
+    def snapshot_dir(self, model_name: str) -> Path | None:
+        """Snapshot ``main`` points at, else the most recent one, else None."""
+        repo = self.repo_dir(model_name)
+        ref = repo / "refs" / "main"
+        if ref.is_file():
+            snapshot = repo / "snapshots" / ref.read_text().strip()
+            if snapshot.is_dir():
+                return snapshot
+        snapshots = [p for p in (repo / "snapshots").glob("*") if p.is_dir()]
+        return max(snapshots, key=lambda p: p.stat().st_mtime, default=None)
+
+    def is_cached(self, model_name: str) -> bool:
+        """Whether a snapshot of the model with its config is on disk."""
+        snapshot = self.snapshot_dir(model_name)
+        return snapshot is not None and (snapshot / CONFIG_FILE).exists()
+
+    def cached_models(self) -> list[str]:
+        """IDs of models with a usable snapshot (cheap: no size walk)."""
+        if not self.cache_dir.is_dir():
+            return []
+        names = (
+            r.name.removeprefix("models--").replace("--", "/")
+            for r in self.cache_dir.glob("models--*")
+        )
+        return sorted(m for m in names if self.is_cached(m))
+
+    def cache_info(self, model_name: str) -> CachedModel | None:
+        repo = self.repo_dir(model_name)
+        snapshots = [p for p in (repo / "snapshots").glob("*") if p.is_dir()]
+        if not snapshots:
+            return None
+        return CachedModel(
+            model=self.resolve_model_name(model_name),
+            path=repo,
+            size_bytes=_disk_usage(repo),
+            revisions=len(snapshots),
+            last_used=max(p.stat().st_mtime for p in snapshots),
+        )
+
+    def inventory(self) -> list[CachedModel]:
+        """Every model repository in the cache."""
+        if not self.cache_dir.is_dir():
+            return []
+        found = []
+        for repo in sorted(self.cache_dir.glob("models--*")):
+            info = self.cache_info(repo.name.removeprefix("models--").replace("--", "/"))
+            if info is not None:
+                found.append(info)
+        return found
+
+    def mark_used(self, model_name: str) -> None:
+        """Stamp the model's snapshot as used now (its mtime doubles as last-use)."""
+        resolved = self.resolve_model_name(model_name)
+        now = time.time()
+        if now - self._last_stamp.get(resolved, 0.0) < LAST_USE_RESOLUTION:
+            return
+        self._last_stamp[resolved] = now
+        snapshot = self.snapshot_dir(resolved)
+        if snapshot is not None:
+            try:
+                os.utime(snapshot)
+            except OSError as exc:
+                logger.debug("Could not stamp %s: %s", snapshot, exc)
+
+    # -- prefetch / verify / gc ----------------------------------------------
+
+    def prefetch(self, model_name: str) -> Path:
+        """Download the model into the cache if needed and return its snapshot path."""
+        from huggingface_hub import snapshot_download
+
+        resolved = self.resolve_model_name(model_name)
+        with self._lock:
+            self._downloading.add(resolved)
+        try:
+            logger.info("Prefetching %s into %s", resolved, self.cache_dir)
+            path = Path(snapshot_download(repo_id=resolved, cache_dir=self.cache_dir))
+        finally:
+            with self._lock:
+                self._downloading.discard(resolved)
+        problems = self.verify(resolved)
+        if problems:
+            raise RuntimeError(f"{resolved} incomplete after download: {'; '.join(problems)}")
+        return path
+
+    def is_downloading(self, model_name: str) -> bool:
+        return self.resolve_model_name(model_name) in self._downloading
+
+    def verify(self, model_name: str, deep: bool = False) -> list[str]:
+        """Problems with the cached snapshot ([] if usable).
+
+        Checks that every file resolves and is non-empty and that the config
+        and a weights file are present. ``deep`` also re-hashes LFS blobs
+        against their SHA-256 names.
+        """
+        snapshot = self.snapshot_dir(model_name)
+        if snapshot is None:
+            return ["not cached"]
+        problems = []
+        names = set()
+        for path in sorted(snapshot.rglob("*")):
+            if path.is_dir():
+                continue
+            rel = path.relative_to(snapshot).as_posix()
+            if not path.exists():
+                problems.append(f"{rel}: broken link")
+                continue
+            if path.stat().st_size == 0:
+                problems.append(f"{rel}: empty")
+                continue
+            if deep:
+                blob = path.resolve()
+                if _SHA256_NAME.match(blob.name) and _sha256(blob) != blob.name:
+                    problems.append(f"{rel}: checksum mismatch")
+                    continue
+            names.add(rel)
+        if CONFIG_FILE not in names:
+            problems.append(f"{CONFIG_FILE}: missing")
+        if not any(name in names for name in WEIGHT_FILES):
+            problems.append("weights: missing")
+        return problems
+
+    def gc(
+        self,
+        keep: Iterable[str] = (),
+        unused_days: float | None = None,
+        dry_run: bool = False,
+    ) -> list[tuple[Path, int]]:
+        """Remove stale snapshots, orphaned blobs and (optionally) unused models.
+
+        Snapshots no ref points at and blobs no snapshot links to are always
+        collected. With ``unused_days``, whole models not used for that long
+        are removed too, except those in ``keep``. Returns ``(path, bytes)``
+        for everything removed (or that would be, with ``dry_run``).
+        """
+        keep = {self.resolve_model_name(m) for m in keep}
+        removed: list[tuple[Path, int]] = []
+
+        def remove(path: Path) -> None:
+            size = _disk_usage(path) if path.is_dir() else path.lstat().st_size
+            removed.append((path, size))
+            if dry_run:
+                return
+            if path.is_dir() and not path.is_symlink():
+                shutil.rmtree(path)
+            else:
+                path.unlink()
+
+        cutoff = time.time() - unused_days * 86400 if unused_days is not None else None
+        for info in self.inventory():
+            if cutoff is not None and info.model not in keep and (info.last_used or 0) < cutoff:
+                logger.info(
+                    "Removing %s (unused since %s)", info.model, time.ctime(info.last_used)
+                )
+                remove(info.path)
+                continue
+
+            repo = info.path
+            refs = {p.read_text().strip() for p in (repo / "refs").rglob("*") if p.is_file()}
+            for snapshot in (repo / "snapshots").glob("*"):
+                if refs and snapshot.name not in refs:
+                    remove(snapshot)
+            live = {
+                p.resolve().name
+                for snapshot in (repo / "snapshots").glob("*")
+                if not (dry_run and any(snapshot == r for r, _ in removed))
+                for p in snapshot.rglob("*")
+                if p.is_symlink()
+            }
+            for blob in (repo / "blobs").glob("*"):
+                if blob.name not in live and not blob.name.endswith(".incomplete"):
+                    remove(blob)
+        return removed
+
+
+def _disk_usage(path: Path) -> int:
+    """Bytes on disk under ``path``, counting each blob once and not following links."""
+    total = 0
+    for p in path.rglob("*"):
+        if p.is_file() and not p.is_symlink():
+            total += p.stat().st_size
+    return total
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
 
 
 model_manager = ModelManager()
@@ -0,0 +1,168 @@
+"""Load-adaptive model selection: quality tiers that degrade under queueing.
+
+A request may name a quality tier (``quality``, ``balanced``, ``fast``) instead
+of a model. Each tier is a ladder of models, best first. The scheduler
+predicts the time to result for each rung: queue wait plus the job's own
+expected run time, both shorter for a smaller model (under SJF a shorter job
+also sorts earlier). While that estimate for the current rung exceeds the
+endpoint's ``target``, the policy steps down; once the next rung up would
+finish within ``recover_fraction * target`` it steps back up. The gap between
+the two thresholds keeps the choice from flapping with every request.
+
+Concrete model names and aliases pass through unchanged.
+"""
+
+import logging
+from typing import Callable, NamedTuple
+
+from ..metrics import MODEL_SELECTED
+from .model_manager import model_manager
+
+logger = logging.getLogger(__name__)
+
+# Tier -> models, best first
+QUALITY_TIERS: dict[str, tuple[str, ...]] = {
+    "quality": (
+        "mlx-community/whisper-large-v3",
+        "mlx-community/whisper-turbo",
+        "mlx-community/whisper-small",
+    ),
+    "balanced": (
+        "mlx-community/whisper-turbo",
+        "mlx-community/whisper-small",
+        "mlx-community/whisper-base",
+    ),
+    "fast": (
+        "mlx-community/whisper-small",
+        "mlx-community/whisper-base",
+        "mlx-community/whisper-tiny",
+    ),
+}
+
+LatencyEstimator = Callable[[str, float, str | None], float]
+
+
+class ModelSelection(NamedTuple):
+    model: str  # resolved model ID actually used
+    requested: str
+    tier: str | None  # None when a concrete model was requested
+    level: int  # rung on the tier ladder; 0 = best
+    estimated_seconds: float  # predicted time to result with ``model``
+
+    @property
+    def degraded(self) -> bool:
+        return self.level > 0
+
+    def describe(self) -> dict:
+        """Summary for response metadata."""
+        return {
+            "requested": self.requested,
+            "tier": self.tier,
+            "model": self.model,
+            "degraded": self.degraded,
+            "estimated_seconds": round(self.estimated_seconds, 2),
+        }
+
+
+class ModelPolicy:
+    """Maps requested models or tiers to concrete models for one endpoint.
+
+    ``target`` of 0 disables degradation: tiers always get their best model.
+    ``estimate(model, audio_seconds)`` defaults to the inference scheduler's
+    prediction (wait plus run time) for a job submitted now.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        target: float = 0.0,
+        recover_fraction: float = 0.5,
+        tiers: dict[str, tuple[str, ...]] | None = None,
+        estimate: LatencyEstimator | None = None,
+    ):
+        if not 0 <= recover_fraction <= 1:
+            raise ValueError("recover_fraction must be between 0 and 1")
+        self.endpoint = endpoint
+        self.target = target
+        self.recover_fraction = recover_fraction
+        self.tiers = tiers if tiers is not None else QUALITY_TIERS
+        self._estimate = estimate
+        self._level: dict[str, int] = {}
+
+    def estimate(self, model: str, audio_seconds: float, profile: str | None = None) -> float:
+        if self._estimate is not None:
+            return self._estimate(model, audio_seconds, profile)
+        from .scheduler import inference_scheduler
+
+        wait = inference_scheduler.estimated_wait_for(model, audio_seconds, profile)
+        return wait + inference_scheduler.expected_seconds(model, audio_seconds, profile)
+
+    def select(
+        self, requested: str, audio_seconds: float = 0.0, profile: str | None = None
+    ) -> ModelSelection:
+        """Pick the model to run for ``requested`` given current load."""
+        ladder = self.tiers.get(requested)
+        if ladder is None:
+            model = model_manager.resolve_model_name(requested)
+            return ModelSelection(model, requested, None, 0, 0.0)
+
+        level = min(self._level.get(requested, 0), len(ladder) - 1)
+        latency = self.estimate(ladder[level], audio_seconds, profile) if self.target else 0.0
+        if self.target:
+            # Step up while the better model has clearly recovered...
+            while level > 0:
+                better = self.estimate(ladder[level - 1], audio_seconds, profile)
+                if better > self.recover_fraction * self.target:
+                    break
+                level, latency = level - 1, better
+            # ...then down while the current one would miss the target
+            while latency > self.target and level < len(ladder) - 1:
+                level += 1
+                latency = self.estimate(ladder[level], audio_seconds, profile)
+
+        previous = self._level.get(requested, 0)
+        if level != previous:
+            logger.info(
+                "%s tier %r: %s -> %s (estimated %.1fs, target %gs)",
+                self.endpoint,
+                requested,
+                ladder[previous],
+                ladder[level],
+                latency,
+                self.target,
+            )
+        self._level[requested] = level
+        MODEL_SELECTED.labels(self.endpoint, requested, ladder[level]).inc()
+        return ModelSelection(ladder[level], requested, requested, level, latency)
+
+    def snapshot(self) -> dict:
+        return {
+            "target_seconds": self.target,
+            "recover_fraction": self.recover_fraction,
+            "tiers": {
+                tier: ladder[min(self._level.get(tier, 0), len(ladder) - 1)]
+                for tier, ladder in self.tiers.items()
+            },
+        }
+
+
+def _create_policies() -> dict[str, ModelPolicy]:
+    from ..config import settings
+
+    def target(override: float | None) -> float:
+        return settings.model_policy_target_seconds if override is None else override
+
+    return {
+        endpoint: ModelPolicy(
+            endpoint,
+            target=target(override),
+            recover_fraction=settings.model_policy_recover_fraction,
+        )
+        for endpoint, override in (
+            ("/v1/audio/transcriptions", settings.model_policy_openai_target_seconds),
+            ("/transcribe", settings.model_policy_vcon_target_seconds),
+        )
+    }
+
+
+model_policies = _create_policies()
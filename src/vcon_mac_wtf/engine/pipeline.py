@@ -0,0 +1,267 @@
+"""Staged audio pipeline: CPU decode in front of GPU inference.
+
+mlx_whisper decodes its input with ffmpeg inside ``transcribe()``, so
+without this stage an inference slot sits idle while each request's audio
+is decoded, and the CPU idles during inference. Here the engine's
+``decode_audio`` (container decode, down-mix and resample to 16 kHz mono
+float32) runs in a pool of ``DECODE_WORKERS`` threads before the request
+queues for an inference slot, and the samples are handed to mlx_whisper
+directly. Decoding request N+1 thus overlaps inference of request N.
+
+Decoded audio waits in a bounded hand-off (``DECODE_QUEUE_DEPTH`` buffers,
+counting decodes in progress) so a burst cannot decode far ahead of
+inference and hold every recording's samples in memory at once. A buffer
+is freed when its request starts inference. The log-mel spectrogram stays
+inside ``transcribe()``, where MLX computes it on the GPU.
+
+Requests join the inference scheduler's queue before they wait here, and
+buffers go to waiters in the scheduler's order (its ticket key), so the jobs
+decoded ahead are the ones that will run next. A job the scheduler grants a
+slot to while it still waits for a buffer stops waiting and decodes in its
+slot: buffers held by jobs further back never block the job that runs next.
+
+Busy time per stage is counted in ``vcon_mac_wtf_pipeline_busy_seconds_total``
+and reported as utilization over the last minute on ``/health/ready``.
+"""
+
+import asyncio
+import heapq
+import io
+import itertools
+import subprocess
+import tempfile
+import threading
+import time
+import wave
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Callable, Iterator
+
+from ..metrics import PIPELINE_BUSY_SECONDS, PIPELINE_CAPACITY
+from ..tracing import record_stage
+from .scheduler import Ticket
+
+SAMPLE_RATE = 16000
+UTILIZATION_WINDOW = 60.0  # seconds
+
+
+def decode_pcm(audio_bytes: bytes, suffix: str = ".wav", max_seconds: float | None = None) -> Any:
+    """Decode audio to 16 kHz mono float32 samples (a NumPy array), as mlx_whisper does.
+
+    16 kHz 16-bit PCM WAV is read directly; anything else goes through
+    ffmpeg with the same conversion mlx_whisper's ``load_audio`` uses.
+    ``max_seconds`` stops decoding after that much audio.
+    """
+    import numpy as np
+
+    samples = _read_pcm_wav(audio_bytes, max_seconds)
+    if samples is None:
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=True) as tmp:
+            tmp.write(audio_bytes)
+            tmp.flush()
+            cmd = [
+                "ffmpeg", "-nostdin", "-i", tmp.name, "-threads", "0",
+                "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(SAMPLE_RATE),
+            ]  # fmt: skip
+            if max_seconds is not None:
+                cmd += ["-t", str(max_seconds)]
+            cmd.append("-")
+            try:
+                out = subprocess.run(cmd, capture_output=True, check=True).stdout
+            except subprocess.CalledProcessError as exc:
+                raise RuntimeError(f"Failed to load audio: {exc.stderr.decode()}") from exc
+        samples = np.frombuffer(out, np.int16)
+    return samples.astype(np.float32) / 32768.0
+
+
+def _read_pcm_wav(audio_bytes: bytes, max_seconds: float | None = None) -> Any:
+    """int16 mono samples of a 16 kHz 16-bit PCM WAV (channels averaged), else None."""
+    import numpy as np
+
+    try:
+        with wave.open(io.BytesIO(audio_bytes), "rb") as wav:
+            if wav.getframerate() != SAMPLE_RATE or wav.getsampwidth() != 2:
+                return None
+            channels = wav.getnchannels()
+            frames = wav.getnframes()
+            if max_seconds is not None:
+                frames = min(frames, int(max_seconds * SAMPLE_RATE))
+            frames = wav.readframes(frames)
+    except (wave.Error, EOFError):
+        return None
+    samples = np.frombuffer(frames, "<i2")
+    if channels > 1:
+        samples = samples[: len(samples) - len(samples) % channels].reshape(-1, channels)
+        samples = samples.mean(axis=1).astype(np.int16)
+    return samples
+
+
+class StageMeter:
+    """Busy time of one pipeline stage, for utilization against its capacity."""
+
+    def __init__(self, name: str, capacity: int):
+        self.name = name
+        self.capacity = max(1, capacity)
+        self.active = 0
+        self._lock = threading.Lock()
+        self._starts: dict[int, float] = {}
+        self._done: deque[tuple[float, float]] = deque()  # (start, end), oldest first
+        self._ids = itertools.count()
+        PIPELINE_CAPACITY.labels(name).set(self.capacity)
+
+    @contextmanager
+    def busy(self) -> Iterator[None]:
+        """Count the block as one unit of this stage's capacity in use."""
+        start = time.monotonic()
+        with self._lock:
+            key = next(self._ids)
+            self._starts[key] = start
+            self.active += 1
+        try:
+            yield
+        finally:
+            end = time.monotonic()
+            with self._lock:
+                del self._starts[key]
+                self.active -= 1
+                self._done.append((start, end))
+            PIPELINE_BUSY_SECONDS.labels(self.name).inc(end - start)
+
+    def utilization(self, window: float = UTILIZATION_WINDOW) -> float:
+        """Fraction of capacity busy over the last ``window`` seconds."""
+        now = time.monotonic()
+        since = now - window
+        with self._lock:
+            while self._done and self._done[0][1] < since:
+                self._done.popleft()
+            intervals = [*self._done, *((start, now) for start in self._starts.values())]
+        busy = sum(end - max(start, since) for start, end in intervals if end > since)
+        return min(busy / (window * self.capacity), 1.0)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "active": self.active,
+            "utilization": round(self.utilization(), 3),
+        }
+
+
+class Handoff:
+    """Decoded audio waiting for inference; ``release`` frees its hand-off buffer."""
+
+    __slots__ = ("pcm", "_release")
+
+    def __init__(self, pcm: Any, release: Callable[[], None]):
+        self.pcm = pcm
+        self._release: Callable[[], None] | None = release
+
+    def release(self) -> None:
+        if self._release is not None:
+            self._release()
+            self._release = None
+
+
+class AudioPipeline:
+    """Decodes audio in a CPU pool ahead of inference, ``depth`` buffers at most."""
+
+    def __init__(self, workers: int = 2, depth: int = 2, slots: int = 1):
+        self.workers = max(1, workers)
+        self.depth = depth
+        self.decode = StageMeter("decode", self.workers)
+        self.inference = StageMeter("inference", slots)
+        self._executor: ThreadPoolExecutor | None = None
+        self._buffers = 0
+        self._waiters: list[tuple[float, int, asyncio.Future]] = []  # heap by scheduler key
+        self._order = itertools.count()
+
+    @property
+    def enabled(self) -> bool:
+        return self.depth > 0
+
+    @asynccontextmanager
+    async def handoff(
+        self, decode: Callable[[], Any], model: str = "", ticket: Ticket | None = None
+    ) -> AsyncIterator[Handoff]:
+        """Run ``decode`` in the CPU pool once a hand-off buffer is free.
+
+        The buffer is held until ``Handoff.release`` (when inference starts)
+        or the end of the block. With the request's scheduler ``ticket``,
+        waiters are served in scheduler order, and a request granted its slot
+        decodes at once without a buffer; otherwise in arrival order.
+        """
+        waited = time.perf_counter()
+        buffered = await self._acquire(ticket)
+        record_stage("decode_wait", time.perf_counter() - waited, model)
+        handoff = Handoff(None, self._release_buffer if buffered else lambda: None)
+        try:
+            started = time.perf_counter()
+            loop = asyncio.get_running_loop()
+            handoff.pcm = await loop.run_in_executor(self._pool(), self._run, decode)
+            record_stage("audio_decode", time.perf_counter() - started, model)
+            yield handoff
+        finally:
+            handoff.release()
+
+    def _run(self, decode: Callable[[], Any]) -> Any:
+        with self.decode.busy():
+            return decode()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="decode")
+        return self._executor
+
+    async def _acquire(self, ticket: Ticket | None = None) -> bool:
+        """Take a buffer (True), or return False once ``ticket`` holds its slot."""
+        if self._buffers < self.depth and not self._waiting():
+            self._buffers += 1
+            return True
+        future = asyncio.get_running_loop().create_future()
+        key = ticket.key if ticket is not None else 0.0
+        heapq.heappush(self._waiters, (key, next(self._order), future))
+        try:
+            if ticket is None:
+                await future  # the releaser hands its buffer over
+            else:
+                await asyncio.wait((future, ticket.future), return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release_buffer()  # granted just as we were cancelled
+            raise
+        finally:
+            future.cancel()  # no-op once granted; the heap drops it lazily
+        return not future.cancelled()
+
+    def _waiting(self) -> int:
+        return sum(1 for *_, future in self._waiters if not future.done())
+
+    def _release_buffer(self) -> None:
+        while self._waiters:
+            future = heapq.heappop(self._waiters)[2]
+            if not future.done():
+                future.set_result(None)
+                return
+        self._buffers -= 1
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "decode": self.decode.snapshot(),
+            "inference": self.inference.snapshot(),
+            "buffered": self._buffers,
+            "depth": self.depth,
+            "waiting": self._waiting(),
+        }
+
+
+def _create_pipeline() -> AudioPipeline:
+    from ..config import settings
+
+    return AudioPipeline(
+        workers=settings.decode_workers,
+        depth=settings.decode_queue_depth,
+        slots=settings.inference_slots,
+    )
+
+
+audio_pipeline = _create_pipeline()
@@ -0,0 +1,202 @@
+"""Audio duration and channel probing from container headers, without decoding.
+
+Durations: WAV (RIFF), FLAC (STREAMINFO), MP3 (Xing/Info/VBRI frame counts,
+else constant bitrate from the first frame) and MP4/M4A (``mvhd`` box).
+Channel counts: WAV, FLAC and MP3. Each probe reads a few header bytes;
+anything unrecognised returns None so callers can fall back to an estimate.
+"""
+
+import struct
+from typing import NamedTuple
+
+# MPEG audio: bitrate tables (kbps) and sample rates, indexed from the frame header
+_MP3_BITRATES = {
+    # (version is MPEG-1, layer III)
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    # MPEG-2/2.5, layers II and III share a table; layer I differs
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+}
+_MP3_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),  # MPEG-1
+    2: (22050, 24000, 16000),  # MPEG-2
+    0: (11025, 12000, 8000),  # MPEG-2.5
+}
+
+
+def probe_duration(data: bytes) -> float | None:
+    """Duration in seconds read from the container header, or None if unknown."""
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        return wav_duration(data)
+    if data[:4] == b"fLaC":
+        return flac_duration(data)
+    if data[4:8] == b"ftyp":
+        return mp4_duration(data)
+    if data[:3] == b"ID3" or (len(data) > 1 and data[0] == 0xFF and data[1] & 0xE0 == 0xE0):
+        return mp3_duration(data)
+    return None
+
+
+class WavFormat(NamedTuple):
+    format_tag: int  # 1 = PCM, 3 = float, 0xFFFE = extensible
+    channels: int
+    sample_rate: int
+    byte_rate: int
+    block_align: int  # bytes per frame (all channels)
+    bits_per_sample: int
+    data_offset: int
+    data_size: int  # clamped to the bytes actually present
+
+
+def probe_channels(data: bytes) -> int | None:
+    """Channel count from the container header, or None if unknown."""
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        fmt = wav_format(data)
+        return fmt.channels if fmt else None
+    if data[:4] == b"fLaC" and len(data) >= 42 and data[4] & 0x7F == 0:
+        return ((data[20] >> 1) & 0x7) + 1
+    frame = _mp3_first_frame(data)
+    if frame is not None:
+        header = int.from_bytes(data[frame : frame + 4], "big")
+        return 1 if (header >> 6) & 0x3 == 3 else 2
+    return None
+
+
+def wav_format(data: bytes) -> WavFormat | None:
+    """Parse the ``fmt `` and ``data`` chunks of a RIFF/WAVE file."""
+    if len(data) < 12 or data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        return None
+    pos, fmt = 12, None
+    while pos + 8 <= len(data):
+        chunk_id, size = struct.unpack_from("<4sI", data, pos)
+        if chunk_id == b"fmt " and size >= 16 and pos + 24 <= len(data):
+            fmt = struct.unpack_from("<HHIIHH", data, pos + 8)
+        elif chunk_id == b"data":
+            if fmt is None or not fmt[3]:
+                return None
+            # Streaming writers leave the size unset; fall back to what is present
+            available = len(data) - pos - 8
+            return WavFormat(*fmt, data_offset=pos + 8, data_size=min(size, available))
+        pos += 8 + size + (size & 1)
+    return None
+
+
+def wav_duration(data: bytes) -> float | None:
+    """Duration from a RIFF/WAVE header, or None if ``data`` is not a parsable WAV."""
+    fmt = wav_format(data)
+    return fmt.data_size / fmt.byte_rate if fmt else None
+
+
+def flac_duration(data: bytes) -> float | None:
+    """Duration from the FLAC STREAMINFO block (always the first metadata block)."""
+    if len(data) < 42 or data[:4] != b"fLaC" or data[4] & 0x7F != 0:
+        return None
+    # STREAMINFO bytes 10..17: sample rate (20 bits), channels, bps, total samples (36 bits)
+    packed = int.from_bytes(data[18:26], "big")
+    sample_rate = packed >> 44
+    total_samples = packed & 0xFFFFFFFFF
+    if not sample_rate or not total_samples:
+        return None
+    return total_samples / sample_rate
+
+
+def mp4_duration(data: bytes) -> float | None:
+    """Duration from the ``moov/mvhd`` box of an MP4/M4A file.
+
+    Files written for streaming keep ``moov`` at the front; when it trails the
+    media data it is still found as long as the whole file is in ``data``.
+    """
+    pos = 0
+    end = len(data)
+    while pos + 8 <= end:
+        size, box = struct.unpack_from(">I4s", data, pos)
+        header = 8
+        if size == 1 and pos + 16 <= end:
+            size = struct.unpack_from(">Q", data, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header:
+            return None
+        if box == b"moov":
+            # Descend: mvhd is a direct child of moov
+            end = min(pos + size, len(data))
+            pos += header
+            continue
+        if box == b"mvhd":
+            body = pos + header
+            version = data[body] if body < len(data) else None
+            if version == 1 and body + 32 <= len(data):
+                timescale, duration = struct.unpack_from(">IQ", data, body + 20)
+            elif version == 0 and body + 20 <= len(data):
+                timescale, duration = struct.unpack_from(">II", data, body + 12)
+            else:
+                return None
+            return duration / timescale if timescale else None
+        pos += size
+    return None
+
+
+def _mp3_first_frame(data: bytes) -> int | None:
+    """Offset of the first MPEG audio frame sync, skipping an ID3v2 tag."""
+    pos = 0
+    if data[:3] == b"ID3" and len(data) >= 10:
+        # ID3v2 size is a 28-bit syncsafe integer
+        size = 0
+        for b in data[6:10]:
+            size = (size << 7) | (b & 0x7F)
+        pos = 10 + size + (10 if data[5] & 0x10 else 0)
+    elif not (len(data) > 1 and data[0] == 0xFF and data[1] & 0xE0 == 0xE0):
+        return None
+
+    limit = min(len(data) - 4, pos + 65536)
+    while pos < limit and not (data[pos] == 0xFF and data[pos + 1] & 0xE0 == 0xE0):
+        pos += 1
+    return pos if pos < limit else None
+
+
+def mp3_duration(data: bytes) -> float | None:
+    """Duration of an MP3 from its Xing/Info/VBRI header, else assuming constant bitrate."""
+    pos = _mp3_first_frame(data)
+    if pos is None:
+        return None
+
+    header = int.from_bytes(data[pos : pos + 4], "big")
+    version_bits = (header >> 19) & 0x3
+    layer_bits = (header >> 17) & 0x3
+    bitrate_index = (header >> 12) & 0xF
+    rate_index = (header >> 10) & 0x3
+    if version_bits == 1 or layer_bits == 0 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    mpeg1 = version_bits == 3
+    layer = 4 - layer_bits
+    sample_rate = _MP3_SAMPLE_RATES[version_bits][rate_index]
+    bitrate = _MP3_BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    if layer == 1:
+        samples_per_frame = 384
+    elif layer == 3 and not mpeg1:
+        samples_per_frame = 576
+    else:
+        samples_per_frame = 1152
+
+    # Xing/Info sits after the side information; VBRI at a fixed offset of 32
+    mono = (header >> 6) & 0x3 == 3
+    side_info = (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+    xing = pos + 4 + side_info
+    if data[xing : xing + 4] in (b"Xing", b"Info") and len(data) >= xing + 12:
+        flags = struct.unpack_from(">I", data, xing + 4)[0]
+        if flags & 0x1:
+            frames = struct.unpack_from(">I", data, xing + 8)[0]
+            return frames * samples_per_frame / sample_rate
+    vbri = pos + 4 + 32
+    if data[vbri : vbri + 4] == b"VBRI" and len(data) >= vbri + 18:
+        frames = struct.unpack_from(">I", data, vbri + 14)[0]
+        return frames * samples_per_frame / sample_rate
+
+    audio_bytes = len(data) - pos
+    if data[-128:-125] == b"TAG":  # ID3v1 trailer
+        audio_bytes -= 128
+    return audio_bytes * 8 / bitrate
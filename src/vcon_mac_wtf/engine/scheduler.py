@@ -0,0 +1,207 @@
+"""Inference scheduling: shortest-expected-job-first with aging.
+
+Transcriptions acquire one of ``INFERENCE_SLOTS`` slots before running. When
+all slots are busy, waiters are ordered by expected inference time (the
+latency model's prediction for the probed duration, model and decode profile)
+so short clips are not stuck behind hour-long recordings. Aging credits each
+waiter ``aging_rate`` seconds of priority per second waited, so long jobs are
+not starved.
+
+A job joins the queue (``queued``) before its audio is decoded, so jobs still
+waiting for the decode stage count in the depth and wait estimates, and the
+decode hand-off serves them in the same order (see ``engine.pipeline``).
+
+Because every waiter ages at the same rate, the priority
+``expected - aging_rate * (now - arrival)`` orders jobs exactly like the
+time-independent key ``expected + aging_rate * arrival``, which lets a heap
+keep the queue.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
+from ..metrics import SCHEDULER_QUEUED
+from .latency import LatencyPredictor
+
+
+class Ticket:
+    __slots__ = ("model", "audio_seconds", "expected", "key", "seq", "future", "estimated_wait")
+
+    def __init__(self, model: str, audio_seconds: float, expected: float, key: float, seq: int):
+        self.model = model
+        self.audio_seconds = audio_seconds
+        self.expected = expected
+        self.key = key
+        self.seq = seq
+        self.future: asyncio.Future | None = None
+        self.estimated_wait = 0.0
+
+    def __lt__(self, other: "Ticket") -> bool:
+        return (self.key, self.seq) < (other.key, other.seq)
+
+
+class InferenceScheduler:
+    """Grants inference slots in shortest-expected-job-first order with aging.
+
+    ``policy`` is ``sjf`` or ``fifo`` (arrival order, for comparison).
+    Expected run times come from ``predictor`` (the shared latency model in
+    the server; a fresh, prior-only one by default). ``profile`` arguments
+    default to ``DECODE_PROFILE``.
+    """
+
+    def __init__(
+        self,
+        slots: int = 1,
+        aging_rate: float = 1.0,
+        policy: str = "sjf",
+        predictor: LatencyPredictor | None = None,
+    ):
+        if policy not in ("sjf", "fifo"):
+            raise ValueError(f"Unknown scheduler policy: {policy}")
+        self.slots = max(1, slots)
+        self.aging_rate = aging_rate
+        self.policy = policy
+        self._queue: list[Ticket] = []
+        self._running: dict[int, tuple[Ticket, float]] = {}  # seq -> (ticket, start time)
+        self._seq = itertools.count()
+        self.predictor = predictor if predictor is not None else LatencyPredictor()
+
+    def expected_seconds(
+        self, model: str, audio_seconds: float, profile: str | None = None
+    ) -> float:
+        """Predicted processing seconds for a job (the latency model's estimate)."""
+        if profile is None:
+            from ..config import settings
+
+            profile = settings.decode_profile
+        return self.predictor.predict(model, profile, audio_seconds)
+
+    @property
+    def depth(self) -> int:
+        return sum(1 for t in self._queue if not t.future.done())
+
+    def _remaining_running(self, now: float) -> list[float]:
+        return sorted(
+            max(0.0, ticket.expected - (now - started))
+            for ticket, started in self._running.values()
+        )
+
+    def estimate_wait(self, ahead: list[float], now: float | None = None) -> float:
+        """Expected wait for a job queued behind ``ahead`` (expected seconds of each).
+
+        Simulates the slots as a pool: each job ahead takes the slot that frees
+        up first.
+        """
+        now = time.monotonic() if now is None else now
+        free_at = self._remaining_running(now)
+        free_at += [0.0] * (self.slots - len(free_at))
+        heapq.heapify(free_at)
+        for expected in ahead:
+            heapq.heappush(free_at, heapq.heappop(free_at) + expected)
+        return free_at[0]
+
+    def estimated_wait_for(
+        self, model: str, audio_seconds: float, profile: str | None = None
+    ) -> float:
+        """Wait a new job of this size would see if submitted now."""
+        now = time.monotonic()
+        expected = self.expected_seconds(model, audio_seconds, profile)
+        key = self._key(expected, now)
+        ahead = [t.expected for t in sorted(self._queue) if not t.future.done() and t.key < key]
+        return self.estimate_wait(ahead, now)
+
+    def _key(self, expected: float, now: float) -> float:
+        if self.policy == "fifo":
+            return now
+        return expected + self.aging_rate * now
+
+    def _dispatch(self) -> None:
+        now = time.monotonic()
+        while self._queue and len(self._running) < self.slots:
+            ticket = heapq.heappop(self._queue)
+            if ticket.future.done():  # cancelled while waiting
+                continue
+            self._running[ticket.seq] = (ticket, now)
+            SCHEDULER_QUEUED.dec()
+            ticket.future.set_result(None)
+
+    @asynccontextmanager
+    async def queued(
+        self, model: str, audio_seconds: float, profile: str | None = None
+    ) -> AsyncIterator[Ticket]:
+        """Join the queue now; ``wait`` then blocks until the job holds a slot.
+
+        The job counts in the depth and wait estimates from here on, and
+        leaving the block gives up its place or its slot.
+        """
+        now = time.monotonic()
+        expected = self.expected_seconds(model, audio_seconds, profile)
+        ticket = Ticket(model, audio_seconds, expected, self._key(expected, now), next(self._seq))
+        ticket.future = asyncio.get_running_loop().create_future()
+
+        if len(self._running) < self.slots and not self.depth:
+            self._running[ticket.seq] = (ticket, now)
+            ticket.future.set_result(None)
+        else:
+            ahead = [t.expected for t in sorted(self._queue) if not t.future.done() and t < ticket]
+            ticket.estimated_wait = self.estimate_wait(ahead, now)
+            heapq.heappush(self._queue, ticket)
+            SCHEDULER_QUEUED.inc()
+        try:
+            yield ticket
+        finally:
+            if ticket.seq in self._running:
+                self._release(ticket)
+            else:  # left before its turn; the heap drops it lazily
+                ticket.future.cancel()
+                SCHEDULER_QUEUED.dec()
+
+    async def wait(self, ticket: Ticket) -> None:
+        """Wait, in SJF order, until ``ticket`` holds a slot."""
+        await asyncio.shield(ticket.future)
+
+    @asynccontextmanager
+    async def slot(
+        self, model: str, audio_seconds: float, profile: str | None = None
+    ) -> AsyncIterator[Ticket]:
+        """Hold an inference slot for the block; waits in SJF order when all are busy."""
+        async with self.queued(model, audio_seconds, profile) as ticket:
+            await self.wait(ticket)
+            yield ticket
+
+    def _release(self, ticket: Ticket) -> None:
+        del self._running[ticket.seq]
+        self._dispatch()
+
+    def snapshot(self) -> dict[str, Any]:
+        queued = [t.expected for t in sorted(self._queue) if not t.future.done()]
+        return {
+            "policy": self.policy,
+            "slots": self.slots,
+            "running": len(self._running),
+            "queued": self.depth,
+            "queued_audio_seconds": round(
+                sum(t.audio_seconds for t in self._queue if not t.future.done()), 1
+            ),
+            # For a job joining the back of the queue
+            "estimated_wait_seconds": round(self.estimate_wait(queued), 1),
+        }
+
+
+def _create_scheduler() -> InferenceScheduler:
+    from ..config import settings
+    from .latency import latency_predictor
+
+    return InferenceScheduler(
+        slots=settings.inference_slots,
+        aging_rate=settings.scheduler_aging_rate,
+        policy=settings.scheduler_policy,
+        predictor=latency_predictor,
+    )
+
+
+inference_scheduler = _create_scheduler()
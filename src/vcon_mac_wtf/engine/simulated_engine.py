@@ -0,0 +1,145 @@
+"""Simulated Whisper engine for benchmarks, load tests and fleet tests without MLX."""
+
+import array
+import io
+import logging
+import time
+import wave
+from pathlib import Path
+from typing import Any
+
+from ..cancellation import raise_if_cancelled
+from .mlx_engine import MLXWhisperEngine
+
+logger = logging.getLogger(__name__)
+
+# Whisper processes audio in 30-second windows
+WINDOW_SECONDS = 30.0
+SEGMENT_SECONDS = 6.0
+WORD_SECONDS = 0.4
+MIN_SEGMENT_SECONDS = 0.05
+SIMULATED_LANGUAGES = {"en": 0.9, "es": 0.06, "fr": 0.04}
+
+_VOCABULARY = (
+    "thanks for calling how can I help you today I would like to check the status "
+    "of my order sure let me look that up for you one moment please"
+).split()
+
+
+def synthetic_result(duration: float, word_timestamps: bool = True) -> dict[str, Any]:
+    """Build a deterministic mlx_whisper-shaped result covering ``duration`` seconds."""
+    segments: list[dict[str, Any]] = []
+    texts: list[str] = []
+    vocab_len = len(_VOCABULARY)
+    word_index = 0
+    seg_start = 0.0
+    while duration - seg_start >= MIN_SEGMENT_SECONDS:
+        seg_end = min(seg_start + SEGMENT_SECONDS, duration)
+        n_words = max(1, int((seg_end - seg_start) / WORD_SECONDS))
+        word_len = (seg_end - seg_start) / n_words
+        words = []
+        for k in range(n_words):
+            start = seg_start + k * word_len
+            words.append(
+                {
+                    "word": " " + _VOCABULARY[word_index % vocab_len],
+                    "start": round(start, 3),
+                    "end": round(start + word_len * 0.9, 3),
+                    "probability": 0.9 + (word_index % 10) / 100,
+                }
+            )
+            word_index += 1
+        text = "".join(w["word"] for w in words)
+        segment: dict[str, Any] = {
+            "id": len(segments),
+            "seek": int(seg_start * 100),
+            "start": round(seg_start, 3),
+            "end": round(seg_end, 3),
+            "text": text,
+            "tokens": list(range(50364, 50364 + n_words)),
+            "temperature": 0.0,
+            "avg_logprob": -0.2,
+            "compression_ratio": 1.4,
+            "no_speech_prob": 0.01,
+        }
+        if word_timestamps:
+            segment["words"] = words
+        segments.append(segment)
+        texts.append(text)
+        seg_start = seg_end
+    return {"text": "".join(texts), "segments": segments, "language": "en"}
+
+
+def audio_duration(audio_path: str) -> float:
+    """Duration from the WAV header, else estimated from size at 128 kbps."""
+    try:
+        with wave.open(audio_path, "rb") as wav:
+            return wav.getnframes() / float(wav.getframerate())
+    except (wave.Error, EOFError):
+        return Path(audio_path).stat().st_size / 16000.0
+
+
+class SimulatedWhisperEngine(MLXWhisperEngine):
+    """Fabricates transcripts at a configurable real-time factor instead of running MLX.
+
+    Sleeps ``real_time_factor`` seconds per second of audio, one 30-second
+    window at a time, so queueing and cancellation behave like the real engine.
+    """
+
+    def __init__(self, real_time_factor: float = 0.05, load_seconds: float = 0.0):
+        super().__init__()
+        self.real_time_factor = real_time_factor
+        self.load_seconds = load_seconds
+
+    def _warm_up(self, model: str) -> None:
+        if self.load_seconds:
+            time.sleep(self.load_seconds)
+
+    def decode_audio(
+        self, audio_bytes: bytes, suffix: str = ".wav", max_seconds: float | None = None
+    ) -> Any:
+        """Raw samples of 16 kHz mono 16-bit WAV (no NumPy needed); None for anything else."""
+        try:
+            with wave.open(io.BytesIO(audio_bytes), "rb") as wav:
+                if (wav.getframerate(), wav.getnchannels(), wav.getsampwidth()) != (16000, 1, 2):
+                    return None
+                frames = wav.getnframes()
+                if max_seconds is not None:
+                    frames = min(frames, int(max_seconds * 16000))
+                return array.array("h", wav.readframes(frames))
+        except (wave.Error, EOFError):
+            return None
+
+    def _detect_language_sync(self, samples: Any, model: str) -> dict[str, float]:
+        # One encoder pass: a small fraction of a window's decoding time
+        time.sleep(min(len(samples) / 16000.0, WINDOW_SECONDS) * self.real_time_factor * 0.1)
+        return dict(SIMULATED_LANGUAGES)
+
+    def _hold(self, model: str) -> None:
+        pass
+
+    def _release_model(self, model: str) -> None:
+        pass
+
+    def _transcribe_sync(
+        self,
+        audio_path: str | Any,
+        model: str,
+        language: str | None,
+        word_timestamps: bool,
+        decode_options: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        if isinstance(audio_path, str):
+            duration = audio_duration(audio_path)
+        else:
+            duration = len(audio_path) / 16000.0  # decoded samples
+        remaining = duration
+        while remaining > 0 and self.real_time_factor > 0:
+            raise_if_cancelled()  # window boundary, as in mlx_whisper
+            window = min(remaining, WINDOW_SECONDS)
+            time.sleep(window * self.real_time_factor)
+            remaining -= window
+        result = synthetic_result(duration, word_timestamps)
+        if language:
+            result["language"] = language
+        return result
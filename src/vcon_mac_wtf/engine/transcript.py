@@ -0,0 +1,271 @@
+"""Columnar transcription results.
+
+mlx_whisper returns one dict per segment and per word. For multi-hour audio
+that is tens of thousands of small dicts, each with its own boxed floats and
+strings, and every reshaping (verbose_json ``words``, WTF conversion) used to
+copy them again. ``Transcript`` holds the same data in columns: ``array``
+doubles for times and scores, flat token ids, and one text buffer with
+offsets for segment texts and one for word texts. ``Segment`` and ``Word``
+are ``__slots__`` views over a row, made on access.
+
+The engine converts each result as it returns, so the dicts are garbage as
+soon as inference finishes, and the response formats serialize from the
+columns. Only the fields mlx_whisper produces are kept; an absent optional
+score is stored as NaN and left out again on output.
+"""
+
+import math
+from array import array
+from typing import Any, Iterator
+
+# Optional per-segment scores, in mlx_whisper's key order
+SEGMENT_SCORES = ("temperature", "avg_logprob", "compression_ratio", "no_speech_prob")
+
+
+class Word:
+    """One word of a transcript (a view; nothing is copied until read)."""
+
+    __slots__ = ("_transcript", "index")
+
+    def __init__(self, transcript: "Transcript", index: int):
+        self._transcript = transcript
+        self.index = index
+
+    @property
+    def text(self) -> str:
+        t, i = self._transcript, self.index
+        return t.word_text[t.word_text_offsets[i] : t.word_text_offsets[i + 1]]
+
+    @property
+    def start(self) -> float:
+        return self._transcript.word_start[self.index]
+
+    @property
+    def end(self) -> float:
+        return self._transcript.word_end[self.index]
+
+    @property
+    def probability(self) -> float | None:
+        value = self._transcript.word_probability[self.index]
+        return None if math.isnan(value) else value
+
+
+class Segment:
+    """One segment of a transcript (a view; nothing is copied until read)."""
+
+    __slots__ = ("_transcript", "index")
+
+    def __init__(self, transcript: "Transcript", index: int):
+        self._transcript = transcript
+        self.index = index
+
+    @property
+    def id(self) -> int:
+        return self._transcript.seg_id[self.index]
+
+    @property
+    def seek(self) -> int | None:
+        seek = self._transcript.seg_seek[self.index]
+        return None if seek < 0 else seek
+
+    @property
+    def start(self) -> float:
+        return self._transcript.seg_start[self.index]
+
+    @property
+    def end(self) -> float:
+        return self._transcript.seg_end[self.index]
+
+    @property
+    def text(self) -> str:
+        t, i = self._transcript, self.index
+        return t.seg_text[t.seg_text_offsets[i] : t.seg_text_offsets[i + 1]]
+
+    @property
+    def tokens(self) -> array:
+        t, i = self._transcript, self.index
+        return t.seg_tokens[t.seg_token_offsets[i] : t.seg_token_offsets[i + 1]]
+
+    def score(self, name: str) -> float | None:
+        """``temperature``, ``avg_logprob``, ``compression_ratio`` or ``no_speech_prob``."""
+        value = self._transcript.seg_scores[name][self.index]
+        return None if math.isnan(value) else value
+
+    @property
+    def word_range(self) -> range:
+        offsets = self._transcript.seg_word_offsets
+        return range(offsets[self.index], offsets[self.index + 1])
+
+    @property
+    def words(self) -> Iterator[Word]:
+        for i in self.word_range:
+            yield Word(self._transcript, i)
+
+
+class Transcript:
+    """A transcription result stored in columns; iterate for ``Segment`` views.
+
+    ``duration`` is the result's own ``duration`` (mlx_whisper leaves it out,
+    so usually None); ``covered_seconds`` falls back to the last segment end.
+    ``has_words`` is set when the segments carried word timestamps.
+    """
+
+    __slots__ = (
+        "text",
+        "language",
+        "duration",
+        "has_words",
+        "seg_id",
+        "seg_seek",
+        "seg_start",
+        "seg_end",
+        "seg_scores",
+        "seg_text",
+        "seg_text_offsets",
+        "seg_tokens",
+        "seg_token_offsets",
+        "seg_word_offsets",
+        "word_start",
+        "word_end",
+        "word_probability",
+        "word_text",
+        "word_text_offsets",
+    )
+
+    def __init__(self, text: str = "", language: str = "en", duration: float | None = None):
+        self.text = text
+        self.language = language
+        self.duration = duration
+        self.has_words = False
+        self.seg_id = array("q")
+        self.seg_seek = array("q")  # -1 when the segment had none
+        self.seg_start = array("d")
+        self.seg_end = array("d")
+        self.seg_scores = {name: array("d") for name in SEGMENT_SCORES}
+        self.seg_text = ""
+        self.seg_text_offsets = array("I", [0])
+        self.seg_tokens = array("i")
+        self.seg_token_offsets = array("I", [0])
+        self.seg_word_offsets = array("I", [0])
+        self.word_start = array("d")
+        self.word_end = array("d")
+        self.word_probability = array("d")
+        self.word_text = ""
+        self.word_text_offsets = array("I", [0])
+
+    @classmethod
+    def from_result(cls, result: "Transcript | dict[str, Any]") -> "Transcript":
+        """Columns from an mlx_whisper result dict; a Transcript is returned as is."""
+        if isinstance(result, Transcript):
+            return result
+        transcript = cls(result.get("text", ""), result.get("language", "en"))
+        transcript.duration = result.get("duration")
+        seg_texts: list[str] = []
+        word_texts: list[str] = []
+        for segment in result.get("segments") or ():
+            transcript._append_segment(segment, seg_texts, word_texts)
+        transcript.seg_text = "".join(seg_texts)
+        transcript.word_text = "".join(word_texts)
+        return transcript
+
+    def _append_segment(
+        self, segment: dict[str, Any], seg_texts: list[str], word_texts: list[str]
+    ) -> None:
+        self.seg_id.append(segment.get("id", len(self.seg_id)))
+        self.seg_seek.append(segment.get("seek", -1))
+        self.seg_start.append(segment.get("start", 0.0))
+        self.seg_end.append(segment.get("end", 0.0))
+        for name, column in self.seg_scores.items():
+            column.append(segment.get(name, math.nan))
+        text = segment.get("text", "")
+        seg_texts.append(text)
+        self.seg_text_offsets.append(self.seg_text_offsets[-1] + len(text))
+        self.seg_tokens.extend(segment.get("tokens") or ())
+        self.seg_token_offsets.append(len(self.seg_tokens))
+
+        words = segment.get("words")
+        if words is not None:
+            self.has_words = True
+        for word in words or ():
+            self.word_start.append(word.get("start", 0.0))
+            self.word_end.append(word.get("end", 0.0))
+            self.word_probability.append(word.get("probability", math.nan))
+            text = word.get("word", "")
+            word_texts.append(text)
+            self.word_text_offsets.append(self.word_text_offsets[-1] + len(text))
+        self.seg_word_offsets.append(len(self.word_start))
+
+    def __len__(self) -> int:
+        return len(self.seg_start)
+
+    def __getitem__(self, index: int) -> Segment:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("segment index out of range")
+        return Segment(self, index)
+
+    def __iter__(self) -> Iterator[Segment]:
+        for i in range(len(self)):
+            yield Segment(self, i)
+
+    @property
+    def word_count(self) -> int:
+        return len(self.word_start)
+
+    def words(self) -> Iterator[Word]:
+        for i in range(self.word_count):
+            yield Word(self, i)
+
+    @property
+    def covered_seconds(self) -> float:
+        """Audio duration covered: ``duration`` if set, else the last segment's end."""
+        if self.duration:
+            return float(self.duration)
+        return self.seg_end[-1] if len(self) else 0.0
+
+    def window_temperatures(self) -> dict[int, float]:
+        """Decode window (segment ``seek``, else ``id``) -> temperature its segments used."""
+        temperatures = self.seg_scores["temperature"]
+        windows: dict[int, float] = {}
+        for i in range(len(self)):
+            seek = self.seg_seek[i]
+            temperature = temperatures[i]
+            windows[seek if seek >= 0 else self.seg_id[i]] = (
+                0.0 if math.isnan(temperature) else temperature
+            )
+        return windows
+
+    def segment_dicts(self) -> Iterator[dict[str, Any]]:
+        """Segments as mlx_whisper shaped them, one dict at a time."""
+        scores = list(self.seg_scores.items())
+        word_offsets = self.seg_word_offsets
+        for segment in self:
+            i = segment.index
+            out: dict[str, Any] = {"id": self.seg_id[i]}
+            if self.seg_seek[i] >= 0:
+                out["seek"] = self.seg_seek[i]
+            out["start"] = self.seg_start[i]
+            out["end"] = self.seg_end[i]
+            out["text"] = segment.text
+            out["tokens"] = segment.tokens.tolist()
+            for name, column in scores:
+                if not math.isnan(column[i]):
+                    out[name] = column[i]
+            if self.has_words:
+                out["words"] = list(self._word_dicts(word_offsets[i], word_offsets[i + 1], True))
+            yield out
+
+    def word_dicts(self) -> Iterator[dict[str, Any]]:
+        """All words, for the verbose_json top-level ``words`` array, one dict at a time."""
+        return self._word_dicts(0, self.word_count, False)
+
+    def _word_dicts(self, first: int, stop: int, probability: bool) -> Iterator[dict[str, Any]]:
+        # Straight from the columns: this runs once per word of every response
+        starts, ends, probabilities = self.word_start, self.word_end, self.word_probability
+        text, offsets = self.word_text, self.word_text_offsets
+        for i in range(first, stop):
+            out = {"word": text[offsets[i] : offsets[i + 1]], "start": starts[i], "end": ends[i]}
+            if probability and not math.isnan(probabilities[i]):
+                out["probability"] = probabilities[i]
+            yield out
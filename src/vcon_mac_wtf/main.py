@@ -1,6 +1,10 @@
 """FastAPI application entry point."""
 
+import asyncio
 import logging
+import signal
+import sys
+import time
 from contextlib import asynccontextmanager
 
 from dotenv import load_dotenv
@@ -10,9 +14,27 @@ from fastapi import FastAPI
 load_dotenv()  # Load .env so HF_TOKEN etc. are available to huggingface_hub
 from fastapi.middleware.cors import CORSMiddleware
 
+from .cancellation import CancellationMiddleware
 from .config import settings
+from .engine.hot_swap import SwapInProgressError, model_swapper
+from .engine.latency import latency_predictor
 from .engine.mlx_engine import mlx_engine
-from .routes import health, models, openai_compat, transcribe
+from .engine.model_manager import model_manager
+from .memwatch import MemoryWatchMiddleware, memory_watchdog
+from .metrics import MetricsMiddleware
+from .profiling import ProfilingMiddleware
+from .routes import (
+    admin,
+    health,
+    language,
+    metrics,
+    models,
+    openai_compat,
+    transcribe,
+    transcripts,
+)
+from .services.store import transcript_store
+from .tracing import TracingMiddleware, create_exporter, get_exporter, set_exporter
 
 logger = logging.getLogger(__name__)
 
@@ -25,14 +47,56 @@ async def lifespan(app: FastAPI):
         settings.mlx_model,
         settings.preload_model,
     )
+    set_exporter(create_exporter(settings.tracing_exporter, settings.tracing_file))
+    if settings.memory_watch:
+        memory_watchdog.start()
+    mlx_engine.configure_memory(settings.metal_cache_limit_mb, settings.metal_memory_limit_mb)
     if settings.preload_model:
         logger.info("Preloading MLX Whisper model: %s", settings.mlx_model)
         mlx_engine.load_model(settings.mlx_model)
         logger.info("Model loaded successfully")
+    prefetch = _split(settings.prefetch_models)
+    prefetch_task = asyncio.create_task(_prefetch(prefetch)) if prefetch else None
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, _reload_config)
+    except (AttributeError, NotImplementedError, RuntimeError):
+        pass  # no SIGHUP (Windows) or not in the main thread
     yield
+    if prefetch_task is not None:
+        prefetch_task.cancel()
+    latency_predictor.save()
+    await asyncio.to_thread(transcript_store.close)
+    exporter = get_exporter()
+    if exporter is not None:
+        await asyncio.to_thread(exporter.shutdown)
+    await asyncio.to_thread(memory_watchdog.stop)
     logger.info("Shutting down vcon-mac-wtf server")
 
 
+async def _prefetch(models: list[str]) -> None:
+    """Download uncached models one at a time without holding up startup."""
+    for model in models:
+        if model_manager.is_cached(model):
+            continue
+        try:
+            await asyncio.to_thread(model_manager.prefetch, model)
+            logger.info("Prefetched %s", model_manager.resolve_model_name(model))
+        except Exception:
+            logger.exception("Prefetch of %s failed", model)
+
+
+def _reload_config() -> None:
+    """SIGHUP: re-read settings, hot-swapping the model if MLX_MODEL changed."""
+    try:
+        model_swapper.reload_config()
+    except SwapInProgressError as exc:
+        logger.warning("Config reload: %s; MLX_MODEL change not applied", exc)
+
+
+def _split(value: str) -> list[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
 app = FastAPI(
     title="vcon-mac-wtf",
     description="MLX Whisper transcription server for Apple Silicon with WTF/vCon support",
@@ -47,16 +111,129 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+TRANSCRIPTION_ENDPOINTS = (
+    "/v1/audio/transcriptions",
+    "/v1/audio/transcriptions/raw",
+    "/transcribe",
+    "/v1/audio/language",
+)
+
+app.add_middleware(
+    CancellationMiddleware,
+    endpoints=TRANSCRIPTION_ENDPOINTS,
+    default_timeout=settings.request_timeout_seconds,
+)
+app.add_middleware(ProfilingMiddleware, endpoints=TRANSCRIPTION_ENDPOINTS)
+app.add_middleware(MemoryWatchMiddleware, endpoints=TRANSCRIPTION_ENDPOINTS)
+app.add_middleware(MetricsMiddleware, endpoints=TRANSCRIPTION_ENDPOINTS)
+app.add_middleware(TracingMiddleware, endpoints=TRANSCRIPTION_ENDPOINTS)
+
+app.include_router(admin.router)
 app.include_router(health.router)
+app.include_router(language.router)
+app.include_router(metrics.router)
 app.include_router(models.router)
 app.include_router(openai_compat.router)
 app.include_router(transcribe.router)
+app.include_router(transcripts.router)
 
 
-def run() -> None:
+def run(argv: list[str] | None = None) -> None:
     """CLI entry point for `vcon-mac-wtf` command."""
+    import argparse
+
     import uvicorn
 
+    parser = argparse.ArgumentParser(prog="vcon-mac-wtf")
+    sub = parser.add_subparsers(dest="command")
+    sub.add_parser("serve", help="Run the transcription server (default)")
+    router_parser = sub.add_parser("router", help="Route requests across several servers")
+    router_parser.add_argument(
+        "--backend",
+        action="append",
+        default=[],
+        help="Backend base URL (repeatable; default: ROUTER_BACKENDS)",
+    )
+    router_parser.add_argument("--host", default=settings.host)
+    router_parser.add_argument("--port", type=int, default=settings.port)
+    router_parser.add_argument(
+        "--poll-interval", type=float, default=settings.router_poll_interval
+    )
+    router_parser.add_argument("--retries", type=int, default=settings.router_retries)
+    models_parser = sub.add_parser("models", help="Inspect and manage the local model cache")
+    models_sub = models_parser.add_subparsers(dest="action", required=True)
+    models_sub.add_parser("list", help="Cached models with size and last use")
+    for action, help_text in (
+        ("prefetch", "Download models (default: MLX_MODEL and PREFETCH_MODELS)"),
+        ("verify", "Check cached files (default: every cached model)"),
+    ):
+        action_parser = models_sub.add_parser(action, help=help_text)
+        action_parser.add_argument("model", nargs="*")
+    models_sub.choices["verify"].add_argument(
+        "--deep", action="store_true", help="Also re-hash weights against their checksums"
+    )
+    gc_parser = models_sub.add_parser("gc", help="Remove stale revisions and unused models")
+    gc_parser.add_argument(
+        "--unused-days",
+        type=float,
+        default=None,
+        help="Also remove whole models unused for this many days "
+        "(never MLX_MODEL or PREFETCH_MODELS)",
+    )
+    gc_parser.add_argument("--dry-run", action="store_true")
+    batch_parser = sub.add_parser(
+        "batch", help="Transcribe a directory of audio files and vCons without HTTP"
+    )
+    batch_parser.add_argument("input", help="Directory of audio, vCon .json and .ndjson files")
+    batch_parser.add_argument("output", help="Directory for enriched vCons and WTF documents")
+    batch_parser.add_argument("--model", default=None, help="Model or alias (default: MLX_MODEL)")
+    batch_parser.add_argument("--language", default=None)
+    batch_parser.add_argument(
+        "--profile", default=None, help="Decode profile (default: DECODE_PROFILE)"
+    )
+    batch_parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Inputs in flight at once (default: twice INFERENCE_SLOTS)",
+    )
+    batch_parser.add_argument(
+        "--manifest", default=None, help="Checkpoint file (default: OUTPUT/.batch-manifest.jsonl)"
+    )
+    batch_parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="Retry inputs a previous run recorded as failed",
+    )
+    batch_parser.add_argument(
+        "--report-interval", type=float, default=30.0, help="Seconds between progress lines"
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == "models":
+        sys.exit(_models_command(args))
+
+    if args.command == "batch":
+        sys.exit(_batch_command(args))
+
+    if args.command == "router":
+        try:
+            from .router import run_router
+        except ImportError as exc:
+            parser.error(f"router mode needs httpx ({exc}); pip install vcon-mac-wtf[router]")
+        backends = args.backend or [u.strip() for u in settings.router_backends.split(",") if u]
+        if not backends:
+            parser.error("no backends: pass --backend URL or set ROUTER_BACKENDS")
+        run_router(
+            backends,
+            host=args.host,
+            port=args.port,
+            poll_interval=args.poll_interval,
+            retries=args.retries,
+            log_level=settings.log_level,
+        )
+        return
+
     uvicorn.run(
         "vcon_mac_wtf.main:app",
         host=settings.host,
@@ -65,5 +242,89 @@ def run() -> None:
     )
 
 
+def _models_command(args) -> int:
+    """`vcon-mac-wtf models ...`: returns the process exit code."""
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    configured = [settings.mlx_model, *_split(settings.prefetch_models)]
+    print(f"Cache: {model_manager.cache_dir}")
+
+    if args.action == "list":
+        for info in model_manager.inventory():
+            used = time.strftime("%Y-%m-%d %H:%M", time.localtime(info.last_used))
+            print(
+                f"{info.model:50} {info.size_bytes / 1e6:10.1f} MB  "
+                f"{info.revisions} rev  last used {used}"
+            )
+        return 0
+
+    if args.action == "prefetch":
+        failed = 0
+        for model in args.model or configured:
+            try:
+                print(
+                    f"{model_manager.resolve_model_name(model)}: {model_manager.prefetch(model)}"
+                )
+            except Exception as exc:
+                failed += 1
+                print(f"{model}: FAILED ({exc})")
+        return 1 if failed else 0
+
+    if args.action == "verify":
+        models = args.model or [info.model for info in model_manager.inventory()]
+        bad = 0
+        for model in models:
+            problems = model_manager.verify(model, deep=args.deep)
+            bad += bool(problems)
+            status = "ok" if not problems else "; ".join(problems)
+            print(f"{model_manager.resolve_model_name(model)}: {status}")
+        return 1 if bad else 0
+
+    removed = model_manager.gc(keep=configured, unused_days=args.unused_days, dry_run=args.dry_run)
+    for path, nbytes in removed:
+        print(f"{'would remove' if args.dry_run else 'removed'} {path} ({nbytes / 1e6:.1f} MB)")
+    print(
+        f"{sum(n for _, n in removed) / 1e6:.1f} MB {'reclaimable' if args.dry_run else 'freed'}"
+    )
+    return 0
+
+
+def _batch_command(args) -> int:
+    """`vcon-mac-wtf batch IN OUT`: returns 1 if any input failed."""
+    from pathlib import Path
+
+    from .engine.decode import resolve_decode_options
+    from .services.batch import run_batch
+
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    try:
+        decode = resolve_decode_options(args.profile)
+    except ValueError as exc:
+        print(exc, file=sys.stderr)
+        return 2
+    mlx_engine.configure_memory(settings.metal_cache_limit_mb, settings.metal_memory_limit_mb)
+    mlx_engine.load_model(args.model or settings.mlx_model)
+    try:
+        summary = asyncio.run(
+            run_batch(
+                Path(args.input),
+                Path(args.output),
+                model=args.model,
+                language=args.language,
+                decode=decode,
+                jobs=args.jobs or 2 * settings.inference_slots,
+                manifest_path=Path(args.manifest) if args.manifest else None,
+                retry_failed=args.retry_failed,
+                report_interval=args.report_interval,
+            )
+        )
+    except ValueError as exc:
+        print(exc, file=sys.stderr)
+        return 2
+    finally:
+        latency_predictor.save()
+        transcript_store.close()
+    return 1 if summary["failed"] else 0
+
+
 if __name__ == "__main__":
     run()
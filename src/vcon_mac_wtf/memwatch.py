@@ -0,0 +1,352 @@
+"""Python memory-growth watchdog (``MEMORY_WATCH``).
+
+When enabled, ``tracemalloc`` traces allocations from startup and a watchdog
+thread takes a snapshot every ``MEMORY_WATCH_INTERVAL_SECONDS``. Each one is
+diffed against the baseline (the first snapshot, or the last reset) and
+against the previous snapshot, giving the allocation sites whose live memory
+grew the most. The same pass counts live objects that should not outlive a
+request: transcripts, transcription result dicts, segment dicts, WTF
+documents, upload buffers and large ``bytes`` objects (audio). Growth of traced memory past
+``MEMORY_WATCH_THRESHOLD_MB`` over the baseline is logged as a warning and
+counted in ``vcon_mac_wtf_memory_growth_alerts_total``, once per further
+threshold of growth.
+
+Transcription requests also report their peak Python allocation (traced
+peak minus traced memory at the start) in ``X-Memory-Python-Peak-MB`` and
+``vcon_mac_wtf_request_python_peak_bytes``. The peak counter is
+process-wide, so with concurrent requests this is an upper bound.
+
+Everything is reported by ``GET /admin/memory``. Tracing costs CPU time and
+memory for every allocation, so this is a diagnostic mode, off by default.
+Metal buffers held by MLX are not Python allocations; they are in
+``/health/ready`` under ``memory``.
+"""
+
+import gc
+import io
+import linecache
+import logging
+import resource
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from types import ModuleType
+from typing import Any
+
+from .engine.transcript import Transcript
+from .metrics import (
+    LIVE_OBJECTS,
+    MEMORY_GROWTH_ALERTS,
+    PYTHON_TRACED_BYTES,
+    REQUEST_PYTHON_PEAK,
+)
+from .tracing import record_memory
+
+logger = logging.getLogger(__name__)
+
+LARGE_BYTES = 64 * 1024  # bytes objects at least this big are counted as buffers
+HISTORY = 48  # samples kept for the object-count history
+RECENT_REQUESTS = 50
+
+_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, linecache.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+_BUFFER_TYPES = frozenset({bytearray, io.BytesIO, tempfile.SpooledTemporaryFile})
+
+
+def count_live_objects(min_bytes: int = LARGE_BYTES) -> dict[str, int]:
+    """Live objects of the kinds a request creates, from the garbage collector's view.
+
+    Columnar results are counted as ``transcripts``. Dicts are classified by
+    their keys: mlx_whisper results (``text`` and ``segments``), WTF documents
+    (``transcript`` and ``segments``) and segments (``start``, ``end``,
+    ``text`` and ``words`` or ``tokens``). ``bytes`` are
+    not tracked by the collector, so large ones are found through the
+    containers, coroutines and objects that reference them (a local variable
+    of a running plain function is not seen).
+    """
+    counts: Counter[str] = Counter()
+    sizes: dict[int, int] = {}
+    for obj in gc.get_objects():
+        kind = type(obj)
+        if kind is dict:
+            if "segments" in obj:
+                if "text" in obj:
+                    counts["result_dicts"] += 1
+                elif "transcript" in obj:
+                    counts["wtf_documents"] += 1
+            elif "start" in obj and "end" in obj and "text" in obj:
+                if "words" in obj or "tokens" in obj:
+                    counts["segments"] += 1
+        elif kind in _BUFFER_TYPES:
+            counts["buffers"] += 1
+        elif kind is Transcript:
+            counts["transcripts"] += 1
+        elif kind is ModuleType:
+            continue  # its dict is tracked; _asyncio's traverse walks a freelist (3.12)
+        for ref in gc.get_referents(obj):
+            if type(ref) is bytes:
+                if len(ref) >= min_bytes:
+                    sizes[id(ref)] = len(ref)
+            elif type(ref) is dict and not gc.is_tracked(ref):
+                for value in ref.values():  # dicts of atomic values are invisible to gc
+                    if type(value) is bytes and len(value) >= min_bytes:
+                        sizes[id(value)] = len(value)
+    counts["large_bytes"] = len(sizes)
+    return {
+        **{kind: counts[kind] for kind in sorted(counts)},
+        "large_bytes_total": sum(sizes.values()),
+    }
+
+
+def max_rss_bytes() -> int:
+    """Peak resident set size of the process (``ru_maxrss`` is bytes on macOS, KiB on Linux)."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+class MemoryWatchdog:
+    """Periodic tracemalloc snapshots, diffed against a baseline, with growth alerts."""
+
+    def __init__(
+        self,
+        interval: float = 300.0,
+        threshold_mb: float = 100.0,
+        frames: int = 5,
+        top: int = 20,
+    ):
+        self.interval = interval
+        self.threshold = int(threshold_mb * 1024 * 1024)
+        self.frames = frames
+        self.top = top
+        self.active = False
+        self._owns_tracing = False
+        self._lock = threading.Lock()
+        self._sample_lock = threading.Lock()  # one snapshot and object walk at a time
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._baseline: tracemalloc.Snapshot | None = None
+        self._previous: tracemalloc.Snapshot | None = None
+        self._baseline_traced = 0
+        self._baseline_objects: dict[str, int] = {}
+        self._report: dict[str, Any] = {}
+        self._history: deque[dict[str, Any]] = deque(maxlen=HISTORY)
+        self._next_alert = self.threshold
+        self._alerts = 0
+        self._running = 0
+        self._requests: deque[dict[str, Any]] = deque(maxlen=RECENT_REQUESTS)
+
+    def start(self) -> None:
+        """Start tracing allocations and the sampling thread."""
+        if self.active:
+            return
+        if not tracemalloc.is_tracing():  # else already on (PYTHONTRACEMALLOC)
+            tracemalloc.start(self.frames)
+            self._owns_tracing = True
+        self._stop.clear()
+        self.active = True
+        self._thread = threading.Thread(target=self._run, name="memwatch", daemon=True)
+        self._thread.start()
+        logger.info(
+            "Memory watch on: snapshots every %.0fs, alert at +%.0f MB",
+            self.interval,
+            self.threshold / 1048576,
+        )
+
+    def stop(self) -> None:
+        """Stop sampling and tracing."""
+        if not self.active:
+            return
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.active = False
+        if self._owns_tracing:
+            tracemalloc.stop()
+            self._owns_tracing = False
+
+    def reset(self) -> dict[str, Any]:
+        """Take a fresh baseline now; later growth is measured from here."""
+        with self._lock:
+            self._baseline = None
+            self._next_alert = self.threshold
+        return self.sample()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except Exception:
+                logger.exception("Memory watch sample failed")
+            self._stop.wait(self.interval)
+
+    def sample(self) -> dict[str, Any]:
+        """Snapshot, diff and count now; returns the report."""
+        with self._sample_lock:
+            return self._sample()
+
+    def _sample(self) -> dict[str, Any]:
+        snapshot = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+        traced, _ = tracemalloc.get_traced_memory()
+        objects = count_live_objects()
+        now = time.time()
+        with self._lock:
+            if self._baseline is None:
+                self._baseline, self._previous = snapshot, snapshot
+                self._baseline_traced = traced
+                self._baseline_objects = objects
+                self._history.clear()
+            baseline, previous = self._baseline, self._previous
+            self._previous = snapshot
+        growth = traced - self._baseline_traced
+        report = {
+            "time": now,
+            "traced_bytes": traced,
+            "growth_bytes": growth,
+            "max_rss_bytes": max_rss_bytes(),
+            "objects": objects,
+            "objects_growth": {
+                kind: count - self._baseline_objects.get(kind, 0)
+                for kind, count in objects.items()
+            },
+            "top_growth": _top_sites(snapshot, baseline, self.top),
+            "recent_growth": _top_sites(snapshot, previous, self.top),
+        }
+        PYTHON_TRACED_BYTES.set(traced)
+        for kind, count in objects.items():
+            LIVE_OBJECTS.labels(kind).set(count)
+        with self._lock:
+            self._report = report
+            self._history.append({"time": now, "traced_bytes": traced, **objects})
+            alert = growth >= self._next_alert
+            if alert:
+                self._alerts += 1
+                while self._next_alert <= growth:
+                    self._next_alert += self.threshold
+        if alert:
+            MEMORY_GROWTH_ALERTS.inc()
+            top = report["top_growth"][0] if report["top_growth"] else None
+            logger.warning(
+                "Python memory grew %.1f MB since baseline (%s); top site: %s",
+                growth / 1048576,
+                ", ".join(f"{k}={v:+d}" for k, v in report["objects_growth"].items() if v),
+                f"{top['site'][0]} (+{top['size_diff'] / 1048576:.1f} MB)" if top else "-",
+            )
+        return report
+
+    def request_started(self) -> int:
+        """Begin measuring a request's peak; returns the traced memory at its start."""
+        with self._lock:
+            if self._running == 0:
+                tracemalloc.reset_peak()  # only when no other request depends on it
+            self._running += 1
+        return tracemalloc.get_traced_memory()[0]
+
+    def request_finished(self, path: str, started_bytes: int) -> int:
+        """Peak bytes allocated over the request's start, recorded for the request."""
+        with self._lock:
+            concurrent = self._running > 1
+            self._running -= 1
+        peak = max(0, tracemalloc.get_traced_memory()[1] - started_bytes)
+        REQUEST_PYTHON_PEAK.labels(path).observe(peak)
+        record_memory(python_peak=peak)
+        with self._lock:
+            self._requests.append(
+                {"path": path, "time": time.time(), "peak_bytes": peak, "concurrent": concurrent}
+            )
+        return peak
+
+    def status(self, top: int | None = None) -> dict[str, Any]:
+        with self._lock:
+            report = dict(self._report)
+            requests = list(self._requests)
+            history = list(self._history)
+            alerts = self._alerts
+        if top is not None:
+            for key in ("top_growth", "recent_growth"):
+                if key in report:
+                    report[key] = report[key][:top]
+        return {
+            "active": self.active,
+            "interval_seconds": self.interval,
+            "threshold_bytes": self.threshold,
+            "alerts": alerts,
+            "last_sample": report or None,
+            "history": history,
+            "requests": requests,
+        }
+
+
+def _top_sites(
+    snapshot: tracemalloc.Snapshot, since: tracemalloc.Snapshot | None, top: int
+) -> list[dict[str, Any]]:
+    """Allocation sites (innermost frame first) that grew most between snapshots."""
+    if since is None:
+        return []
+    stats = snapshot.compare_to(since, "traceback")
+    sites = []
+    for stat in stats:
+        if stat.size_diff <= 0:
+            continue
+        sites.append(
+            {
+                "site": [f"{frame.filename}:{frame.lineno}" for frame in reversed(stat.traceback)],
+                "size": stat.size,
+                "size_diff": stat.size_diff,
+                "count": stat.count,
+                "count_diff": stat.count_diff,
+            }
+        )
+        if len(sites) >= top:
+            break
+    return sites
+
+
+class MemoryWatchMiddleware:
+    """ASGI middleware measuring each request's peak Python allocation to ``endpoints``."""
+
+    def __init__(self, app, endpoints=()):
+        self.app = app
+        self.endpoints = frozenset(endpoints)
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "")
+        if not memory_watchdog.active or scope["type"] != "http" or path not in self.endpoints:
+            await self.app(scope, receive, send)
+            return
+        started = memory_watchdog.request_started()
+        finished = False
+
+        async def send_wrapper(message):
+            nonlocal finished
+            if message["type"] == "http.response.start" and not finished:
+                finished = True  # before the tracing middleware adds its headers
+                memory_watchdog.request_finished(path, started)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not finished:
+                memory_watchdog.request_finished(path, started)
+
+
+def _create_watchdog() -> MemoryWatchdog:
+    from .config import settings
+
+    return MemoryWatchdog(
+        interval=settings.memory_watch_interval_seconds,
+        threshold_mb=settings.memory_watch_threshold_mb,
+        frames=settings.memory_watch_frames,
+    )
+
+
+memory_watchdog = _create_watchdog()
@@ -0,0 +1,438 @@
+"""Prometheus metrics: a small in-process registry with text exposition.
+
+Implements counters, gauges and histograms with just enough of the Prometheus
+text format to serve ``GET /metrics`` without an extra dependency. Label
+children are cached per label tuple, so the hot path is a dict lookup plus a
+locked add.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Iterable
+
+# Endpoint label for the request currently being served. Set by
+# MetricsMiddleware and copied into worker threads by asyncio.to_thread().
+current_endpoint: ContextVar[str] = ContextVar("current_endpoint", default="internal")
+
+# Latency buckets (seconds) covering sub-millisecond parsing up to hour-long inference
+STAGE_BUCKETS: tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0,
+)  # fmt: skip
+
+# Real-time factor buckets (processing seconds per audio second)
+RTF_BUCKETS: tuple[float, ...] = (
+    0.01, 0.02, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 5.0,
+)  # fmt: skip
+
+# Allocation size buckets (bytes), 1 MiB to 4 GiB
+BYTES_BUCKETS: tuple[float, ...] = tuple(float(2**n) for n in range(20, 33, 2))
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _CounterChild:
+    __slots__ = ("_value", "_lock")
+
+    def __init__(self) -> None:
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value -= amount
+
+    def set(self, value: float) -> None:
+        self._value = float(value)
+
+
+class _HistogramChild:
+    __slots__ = ("_bounds", "_counts", "_sum", "_lock")
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        idx = bisect_left(self._bounds, value)
+        with self._lock:
+            self._counts[idx] += 1
+            self._sum += value
+
+    def time(self) -> "_Timer":
+        """Context manager observing the elapsed wall time of its block."""
+        return _Timer(self)
+
+    @property
+    def count(self) -> int:
+        return sum(self._counts)
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+
+class _Timer:
+    __slots__ = ("_child", "_start")
+
+    def __init__(self, child: _HistogramChild) -> None:
+        self._child = child
+
+    def __enter__(self) -> "_Timer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._child.observe(time.perf_counter() - self._start)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Return the child for a label value tuple, creating it on first use."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(
+                    f"{self.name} expects labels {self.labelnames}, got {len(values)} values"
+                )
+            with self._lock:
+                child = self._children.setdefault(tuple(str(v) for v in values), self._new_child())
+        return child
+
+    def clear(self) -> None:
+        with self._lock:
+            self._children.clear()
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def _samples(self) -> list[str]:
+        return [
+            f"{self.name}{_label_str(self.labelnames, key)} {_format_value(child.value)}"
+            for key, child in list(self._children.items())
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = STAGE_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _samples(self) -> list[str]:
+        lines = []
+        for key, child in list(self._children.items()):
+            with child._lock:
+                counts = list(child._counts)
+                total = child._sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_label_str(self.labelnames, key, le)} {cumulative}"
+                )
+            labels = _label_str(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metrics in registration order and renders the exposition text."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = STAGE_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name: str) -> _Metric | None:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    "vcon_mac_wtf_stage_duration_seconds",
+    "Time spent per request processing stage.",
+    ("stage", "model", "endpoint"),
+)
+REQUESTS = registry.counter(
+    "vcon_mac_wtf_requests_total",
+    "HTTP requests served, by endpoint and status code.",
+    ("endpoint", "status"),
+)
+REQUESTS_IN_FLIGHT = registry.gauge(
+    "vcon_mac_wtf_requests_in_flight",
+    "HTTP requests currently being served.",
+    ("endpoint",),
+)
+INFERENCE_QUEUED = registry.gauge(
+    "vcon_mac_wtf_inference_queued",
+    "Transcriptions submitted to the engine that have not started yet.",
+)
+SCHEDULER_QUEUED = registry.gauge(
+    "vcon_mac_wtf_scheduler_queued",
+    "Transcriptions waiting for an inference slot.",
+)
+AUDIO_SECONDS = registry.counter(
+    "vcon_mac_wtf_audio_seconds_total",
+    "Seconds of audio transcribed.",
+    ("model", "endpoint"),
+)
+REAL_TIME_FACTOR = registry.histogram(
+    "vcon_mac_wtf_real_time_factor",
+    "Inference seconds per second of audio.",
+    ("model", "endpoint"),
+    buckets=RTF_BUCKETS,
+)
+MODEL_LOADED = registry.gauge(
+    "vcon_mac_wtf_model_loaded",
+    "1 if the model is resident in the engine, else 0.",
+    ("model",),
+)
+MODEL_CACHE = registry.counter(
+    "vcon_mac_wtf_model_cache_total",
+    "Transcriptions served by the resident model (hit) or after a model load (miss).",
+    ("model", "result"),
+)
+MEMORY_RESERVED = registry.gauge(
+    "vcon_mac_wtf_memory_reserved_bytes",
+    "Projected peak memory reserved by admitted transcriptions.",
+)
+MEMORY_WAITING = registry.gauge(
+    "vcon_mac_wtf_memory_admission_waiting",
+    "Transcriptions waiting for memory budget.",
+)
+ENGINE_MEMORY = registry.gauge(
+    "vcon_mac_wtf_engine_memory_bytes",
+    "Backend (Metal) memory after the last transcription: active, peak or cache.",
+    ("kind",),
+)
+MODEL_SELECTED = registry.counter(
+    "vcon_mac_wtf_model_selected_total",
+    "Models chosen for quality-tier requests, by endpoint and tier.",
+    ("endpoint", "tier", "model"),
+)
+DECODE_FALLBACK_RETRIES = registry.counter(
+    "vcon_mac_wtf_decode_fallback_retries_total",
+    "Windows re-decoded at a higher temperature, by model and decode profile.",
+    ("model", "profile"),
+)
+MODEL_SWAPS = registry.counter(
+    "vcon_mac_wtf_model_swaps_total",
+    "Default-model hot swaps, by outcome.",
+    ("result",),
+)
+STAGES_SKIPPED = registry.counter(
+    "vcon_mac_wtf_stages_skipped_total",
+    "Optional pipeline stages skipped because the response would not use them.",
+    ("stage", "endpoint"),
+)
+PIPELINE_BUSY_SECONDS = registry.counter(
+    "vcon_mac_wtf_pipeline_busy_seconds_total",
+    "Busy seconds per pipeline stage (decode or inference), summed over its workers.",
+    ("stage",),
+)
+PIPELINE_CAPACITY = registry.gauge(
+    "vcon_mac_wtf_pipeline_capacity",
+    "Workers per pipeline stage; busy-seconds rate / capacity is utilization.",
+    ("stage",),
+)
+CANCELLED = registry.counter(
+    "vcon_mac_wtf_requests_cancelled_total",
+    "Requests abandoned on deadline or client disconnect.",
+    ("endpoint", "reason"),
+)
+WASTED_INFERENCE_SECONDS = registry.counter(
+    "vcon_mac_wtf_wasted_inference_seconds_total",
+    "Inference seconds spent on requests that were cancelled before the result was used.",
+    ("model", "reason"),
+)
+PYTHON_TRACED_BYTES = registry.gauge(
+    "vcon_mac_wtf_python_traced_bytes",
+    "Python heap traced by tracemalloc at the last memory-watch sample (MEMORY_WATCH).",
+)
+LIVE_OBJECTS = registry.gauge(
+    "vcon_mac_wtf_live_objects",
+    "Live request-scoped objects (result dicts, segments, buffers) at the last sample.",
+    ("kind",),
+)
+MEMORY_GROWTH_ALERTS = registry.counter(
+    "vcon_mac_wtf_memory_growth_alerts_total",
+    "Times traced Python memory grew another MEMORY_WATCH_THRESHOLD_MB over the baseline.",
+)
+REQUEST_PYTHON_PEAK = registry.histogram(
+    "vcon_mac_wtf_request_python_peak_bytes",
+    "Peak Python allocation per request while MEMORY_WATCH is on (upper bound if concurrent).",
+    ("endpoint",),
+    buckets=BYTES_BUCKETS,
+)
+ERRORS = registry.counter(
+    "vcon_mac_wtf_errors_total",
+    "Errors raised while serving requests, by exception type.",
+    ("endpoint", "exception"),
+)
+
+
+def observe_stage(stage: str, seconds: float, model: str = "") -> None:
+    """Record a stage duration for the current endpoint."""
+    STAGE_SECONDS.labels(stage, model, current_endpoint.get()).observe(seconds)
+
+
+def record_skipped(stages: Iterable[str]) -> None:
+    """Count stages an execution plan skipped for the current endpoint."""
+    for name in stages:
+        STAGES_SKIPPED.labels(name, current_endpoint.get()).inc()
+
+
+def record_error(exc: BaseException) -> None:
+    """Count an exception against the current endpoint."""
+    ERRORS.labels(current_endpoint.get(), type(exc).__name__).inc()
+
+
+class MetricsMiddleware:
+    """ASGI middleware tracking in-flight requests and status codes per endpoint.
+
+    Only paths listed in ``endpoints`` are labelled individually; everything else
+    is left uninstrumented to keep label cardinality bounded.
+    """
+
+    def __init__(self, app, endpoints: Iterable[str]):
+        self.app = app
+        self.endpoints = frozenset(endpoints)
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "")
+        if scope["type"] != "http" or path not in self.endpoints:
+            await self.app(scope, receive, send)
+            return
+
+        token = current_endpoint.set(path)
+        in_flight = REQUESTS_IN_FLIGHT.labels(path)
+        in_flight.inc()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight.dec()
+            REQUESTS.labels(path, str(status)).inc()
+            current_endpoint.reset(token)
@@ -0,0 +1,14 @@
+"""Admin API request models."""
+
+from pydantic import BaseModel, Field
+
+
+class ModelSwapRequest(BaseModel):
+    model: str  # model ID or alias to make the default
+
+
+class ProfileRequest(BaseModel):
+    # Stops at whichever limit comes first; neither means PROFILING_MAX_SECONDS
+    seconds: float | None = Field(default=None, gt=0)
+    requests: int | None = Field(default=None, gt=0)  # finished transcription requests
+    interval_ms: float | None = Field(default=None, ge=1)  # default PROFILING_INTERVAL_MS
@@ -25,6 +25,11 @@ class ModelObject(BaseModel):
     object: str = "model"
     owned_by: str = "mlx-community"
     aliases: list[str] | None = None
+    # loaded (resident in the engine), loading, downloading, cached or not_cached
+    state: str | None = None
+    cached: bool | None = None
+    size_bytes: int | None = None
+    last_used: float | None = None  # epoch seconds
 
 
 class ModelListResponse(BaseModel):
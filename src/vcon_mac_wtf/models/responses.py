@@ -1,6 +1,7 @@
 """Health and error response models."""
 
 from datetime import datetime, timezone
+from typing import Any
 
 from pydantic import BaseModel, Field
 
@@ -14,6 +15,13 @@ class HealthResponse(BaseModel):
 class ReadyResponse(BaseModel):
     status: str
     model: str | None = None
+    resident_model: str | None = None  # model currently held by the engine
+    cached_models: list[str] | None = None  # on local disk (no download needed)
+    memory: dict[str, Any] | None = None
+    scheduler: dict[str, Any] | None = None
+    pipeline: dict[str, Any] | None = None  # decode/inference stage utilization and hand-off
+    model_swap: dict[str, Any] | None = None  # state of the last default-model swap
+    latency: dict[str, Any] | None = None  # learned processing time per model and profile
     timestamp: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
 
 
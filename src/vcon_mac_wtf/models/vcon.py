@@ -1,8 +1,15 @@
-"""Pydantic models for vCon documents."""
+"""Pydantic models for vCon documents.
+
+``/transcribe`` validates the raw request body against ``Vcon`` in one pass
+(pydantic-core parses the JSON natively) and serializes the enriched model
+straight back to bytes. Unknown fields are kept (``extra="allow"``) and only
+fields present in the request are written back (``exclude_unset``), so a
+vCon round-trips unchanged apart from the added analysis.
+"""
 
 from typing import Any
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, model_validator
 
 
 class Party(BaseModel, extra="allow"):
@@ -14,21 +21,29 @@ class Party(BaseModel, extra="allow"):
 class Dialog(BaseModel, extra="allow"):
     type: str
     start: str | None = None
-    duration: float | None = None
-    parties: list[int] | int | None = None
+    duration: int | float | None = None  # kept as sent (30 stays 30)
+    # One party index per channel; a channel may carry several parties
+    parties: list[int | list[int]] | int | None = None
     mediatype: str | None = None
     body: str | None = None
     url: str | None = None
     encoding: str | None = None
 
+    @property
+    def is_audio(self) -> bool:
+        """A recording with an audio mediatype."""
+        return self.type == "recording" and (self.mediatype or "").startswith("audio/")
+
+
+class Analysis(BaseModel):
+    model_config = ConfigDict(extra="allow", populate_by_name=True)
 
-class Analysis(BaseModel, extra="allow"):
     type: str
     dialog: int | list[int] | None = None
     mediatype: str | None = None
     vendor: str | None = None
     product: str | None = None
-    schema_: str | None = None  # 'schema' is reserved in Pydantic
+    schema_: str | None = Field(default=None, alias="schema")  # 'schema' is reserved
     body: Any = None
     encoding: str | None = None
 
@@ -41,3 +56,20 @@ class Vcon(BaseModel, extra="allow"):
     dialog: list[Dialog] = []
     analysis: list[Analysis] = []
     attachments: list[Any] = []
+
+    _audio_dialogs: list[int] = PrivateAttr(default_factory=list)
+
+    @model_validator(mode="after")
+    def _select_audio_dialogs(self) -> "Vcon":
+        self._audio_dialogs = [i for i, dialog in enumerate(self.dialog) if dialog.is_audio]
+        return self
+
+    @property
+    def audio_dialogs(self) -> list[int]:
+        """Indexes of the audio recording dialogs, found during validation."""
+        return self._audio_dialogs
+
+    def dump_json(self) -> bytes:
+        """Serialize with the original field names, omitting fields the input did not set."""
+        # to_json renders bytes directly (model_dump_json would build a str first)
+        return self.__pydantic_serializer__.to_json(self, by_alias=True, exclude_unset=True)
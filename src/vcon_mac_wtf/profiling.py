@@ -0,0 +1,241 @@
+"""On-demand sampling profiler for a running server.
+
+An admin request starts a session that samples the Python stack of every
+thread (the event loop, ``asyncio.to_thread`` inference workers, background
+threads) every ``PROFILING_INTERVAL_MS`` until T seconds pass or N
+transcription requests finish. The result is available as collapsed stacks
+(``thread;outer;...;inner count``, the input of flamegraph.pl and speedscope)
+or as a pstats file (``python -m pstats``, snakeviz) built from the samples.
+
+Sampling rather than cProfile: since Python 3.12 cProfile is one
+process-wide tool that mixes the call stacks of concurrent threads, while a
+sampler sees each thread separately and costs the same however hot the code
+is. Frames inside MLX show up as the Python call that entered it. With no
+session running there is no sampler thread and the middleware only checks a
+flag.
+"""
+
+import logging
+import marshal
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Iterable
+
+logger = logging.getLogger(__name__)
+
+# (filename, first line, function name), the key pstats uses for a function
+Frame = tuple[str, int, str]
+
+
+class ProfilingActiveError(RuntimeError):
+    """A profiling session is already running."""
+
+
+class SamplingProfiler:
+    """Samples all threads' stacks for one session at a time and keeps the last result."""
+
+    def __init__(self, interval: float = 0.01, max_seconds: float = 300.0):
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._samples: Counter[tuple[str, tuple[Frame, ...]]] = Counter()
+        self._status: dict[str, Any] = {"state": "idle"}
+        self._ticks = 0
+        self._started = 0.0
+        self._elapsed = 0.0
+        self._requests_seen = 0
+        self.active = False  # read without the lock on every request
+
+    def start(
+        self,
+        seconds: float | None = None,
+        requests: int | None = None,
+        interval: float | None = None,
+    ) -> dict[str, Any]:
+        """Begin sampling until ``seconds`` pass or ``requests`` requests finish.
+
+        Without either limit the session runs for ``max_seconds``, which also
+        caps ``seconds``.
+        """
+        with self._lock:
+            if self.active:
+                raise ProfilingActiveError("A profiling session is already running")
+            seconds = min(seconds or self.max_seconds, self.max_seconds)
+            interval = interval or self.interval
+            self._samples = Counter()
+            self._ticks = 0
+            self._requests_seen = 0
+            self._elapsed = 0.0
+            self._started = time.monotonic()
+            self._status = {
+                "state": "running",
+                "started": time.time(),
+                "seconds": seconds,
+                "requests": requests,
+                "interval_ms": round(interval * 1000, 3),
+            }
+            self._stop.clear()
+            self.active = True
+            self._thread = threading.Thread(
+                target=self._run, args=(seconds, interval), name="profiler", daemon=True
+            )
+            self._thread.start()
+        logger.info("Profiling started (%s)", self._status)
+        return self.status()
+
+    def stop(self) -> dict[str, Any]:
+        """End the running session (if any) and wait for its result."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        return self.status()
+
+    def request_finished(self) -> None:
+        """Count a finished request; ends a request-limited session at its limit."""
+        with self._lock:
+            if not self.active:
+                return
+            self._requests_seen += 1
+            limit = self._status.get("requests")
+            if limit is not None and self._requests_seen >= limit:
+                self._stop.set()  # the sampler finishes the session
+
+    def status(self) -> dict[str, Any]:
+        with self._lock:
+            elapsed = time.monotonic() - self._started if self.active else self._elapsed
+            return {
+                **self._status,
+                "elapsed_seconds": round(elapsed, 3),
+                "requests_seen": self._requests_seen,
+                "samples": self._ticks,
+                "threads": sorted({thread for thread, _ in self._samples}),
+            }
+
+    def _run(self, seconds: float, interval: float) -> None:
+        deadline = self._started + seconds
+        own = threading.get_ident()
+        try:
+            while not self._stop.wait(interval):
+                self._sample(own)
+                if time.monotonic() >= deadline:
+                    break
+        finally:
+            with self._lock:
+                self._elapsed = time.monotonic() - self._started
+                self.active = False
+                self._status["state"] = "finished"
+            logger.info("Profiling finished: %d samples over %.1fs", self._ticks, self._elapsed)
+
+    def _sample(self, own: int) -> None:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        frames = sys._current_frames()
+        samples = []
+        for ident, frame in frames.items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                frame = frame.f_back
+            stack.reverse()
+            samples.append((names.get(ident, f"thread-{ident}"), tuple(stack)))
+        del frames  # drop references to other threads' frames promptly
+        with self._lock:
+            self._samples.update(samples)
+            self._ticks += 1
+
+    def collapsed(self) -> str:
+        """Samples as collapsed stacks, one ``thread;root;...;leaf count`` line per stack."""
+        with self._lock:
+            samples = list(self._samples.items())
+        lines = [
+            ";".join([thread, *(_label(frame) for frame in stack)]) + f" {count}"
+            for (thread, stack), count in samples
+        ]
+        return "\n".join(sorted(lines)) + ("\n" if lines else "")
+
+    def pstats(self) -> bytes:
+        """Samples as a marshalled pstats table (seconds estimated from sample counts)."""
+        with self._lock:
+            samples = list(self._samples.items())
+            period = self._elapsed / self._ticks if self._ticks else self.interval
+        return marshal.dumps(_pstats_table(((stack, n) for (_, stack), n in samples), period))
+
+
+def _label(frame: Frame) -> str:
+    filename, line, name = frame
+    short = "/".join(filename.replace("\\", "/").rsplit("/", 2)[-2:])
+    return f"{name} ({short}:{line})".replace(";", ",")
+
+
+def _pstats_table(
+    samples: Iterable[tuple[tuple[Frame, ...], int]], period: float
+) -> dict[Frame, tuple]:
+    """Build the ``{func: (cc, nc, tt, ct, callers)}`` table pstats.Stats loads.
+
+    Each sample counts as one call of ``period`` seconds: own time for the
+    innermost frame, cumulative time once for every function on the stack.
+    """
+    table: dict[Frame, list] = {}
+    callers: dict[Frame, Counter[Frame]] = {}
+    for stack, count in samples:
+        if not stack:
+            continue
+        seconds = count * period
+        for func in set(stack):
+            entry = table.setdefault(func, [0, 0, 0.0, 0.0])
+            entry[0] += count
+            entry[1] += count
+            entry[3] += seconds
+        table[stack[-1]][2] += seconds
+        for caller, callee in set(zip(stack, stack[1:])):
+            callers.setdefault(callee, Counter())[caller] += count
+    return {
+        func: (
+            cc,
+            nc,
+            tt,
+            ct,
+            {
+                caller: (n, n, 0.0, n * period)
+                for caller, n in callers.get(func, Counter()).items()
+            },
+        )
+        for func, (cc, nc, tt, ct) in table.items()
+    }
+
+
+class ProfilingMiddleware:
+    """ASGI middleware counting finished requests to ``endpoints`` for a profiling session."""
+
+    def __init__(self, app, endpoints=()):
+        self.app = app
+        self.endpoints = frozenset(endpoints)
+
+    async def __call__(self, scope, receive, send):
+        if not profiler.active or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if scope.get("path", "") in self.endpoints:
+                profiler.request_finished()
+
+
+def _create_profiler() -> SamplingProfiler:
+    from .config import settings
+
+    return SamplingProfiler(
+        interval=settings.profiling_interval_ms / 1000,
+        max_seconds=settings.profiling_max_seconds,
+    )
+
+
+profiler = _create_profiler()
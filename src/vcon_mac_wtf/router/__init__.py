@@ -0,0 +1,16 @@
+"""Fleet router: a load-aware gateway across several vcon-mac-wtf instances.
+
+Run with ``vcon-mac-wtf router --backend http://mini-1:8000 --backend ...``
+(requires ``httpx``: ``pip install vcon-mac-wtf[router]``).
+"""
+
+from .app import create_router_app, run_router
+from .pool import Backend, BackendPool, NoBackendAvailableError
+
+__all__ = [
+    "Backend",
+    "BackendPool",
+    "NoBackendAvailableError",
+    "create_router_app",
+    "run_router",
+]
@@ -0,0 +1,209 @@
+"""Router application: forwards transcription requests to the best backend."""
+
+import json
+import logging
+import math
+from contextlib import asynccontextmanager
+
+import httpx
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+
+from ..cancellation import CancellationMiddleware
+from ..engine.memory import estimate_audio_seconds
+from ..engine.model_manager import model_manager
+from ..engine.model_policy import QUALITY_TIERS
+from ..models.responses import HealthResponse
+from ..services.vcon_processor import vcon_audio_seconds
+from ..tracing import TracingMiddleware, request_id
+from .pool import Backend, BackendPool, NoBackendAvailableError
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPTION_ENDPOINTS = (
+    "/v1/audio/transcriptions",
+    "/v1/audio/transcriptions/raw",
+    "/transcribe",
+)
+
+# Request headers passed through to backends; everything else is hop-specific
+FORWARD_REQUEST_HEADERS = (
+    "accept",
+    "authorization",
+    "content-disposition",
+    "content-language",
+    "content-type",
+    "x-request-timeout",
+)
+# Response headers not copied back (recomputed here or set by our own middleware)
+DROP_RESPONSE_HEADERS = frozenset(
+    ("connection", "content-encoding", "content-length", "transfer-encoding", "x-request-id")
+)
+
+
+def _routing_model(model: str) -> str:
+    """Model to route on: tiers are placed by their best model, the backend degrades."""
+    if not model:
+        return ""
+    if model in QUALITY_TIERS:
+        return QUALITY_TIERS[model][0]
+    return model_manager.resolve_model_name(model)
+
+
+def _vcon_audio_seconds(body: bytes) -> float:
+    try:
+        return vcon_audio_seconds(json.loads(body))
+    except (ValueError, AttributeError):
+        return 0.0
+
+
+def create_router_app(pool: BackendPool, retries: int = 2) -> FastAPI:
+    """Build the router app fronting the backends in ``pool``."""
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        logger.info("Routing across %d backends", len(pool.backends))
+        await pool.start()
+        yield
+        await pool.stop()
+
+    app = FastAPI(
+        title="vcon-mac-wtf router",
+        description="Load-aware gateway across vcon-mac-wtf instances",
+        version="0.1.0",
+        lifespan=lifespan,
+    )
+    app.add_middleware(CancellationMiddleware, endpoints=TRANSCRIPTION_ENDPOINTS)
+    app.add_middleware(TracingMiddleware, endpoints=TRANSCRIPTION_ENDPOINTS)
+    app.state.pool = pool
+
+    async def forward(request: Request, body: bytes, model: str, audio_seconds: float):
+        headers = {k: v for k, v in request.headers.items() if k in FORWARD_REQUEST_HEADERS}
+        headers["x-request-id"] = request_id() or ""
+        tried: set[str] = set()
+        for attempt in range(retries + 1):
+            try:
+                backend = pool.choose(model, exclude=tried, audio_seconds=audio_seconds)
+            except NoBackendAvailableError:
+                break
+            tried.add(backend.url)
+            expected = backend.expected_seconds(model, audio_seconds)
+            pool.begin(backend, expected)
+            try:
+                resp = await pool.client.request(
+                    request.method,
+                    backend.url + request.url.path,
+                    params=request.query_params,
+                    content=body,
+                    headers=headers,
+                )
+            except (httpx.ConnectError, httpx.ConnectTimeout) as exc:
+                # Nothing reached the backend, so another one can safely take it
+                backend.mark_down(f"{type(exc).__name__}: {exc}")
+                logger.warning("Backend %s refused connection; retrying", backend.url)
+                continue
+            except httpx.TransportError as exc:
+                raise HTTPException(
+                    status_code=502, detail=f"Backend {backend.url} failed: {exc}"
+                ) from exc
+            finally:
+                pool.end(backend, expected)
+            if resp.status_code == 503 and attempt < retries:
+                logger.info("Backend %s returned 503; retrying elsewhere", backend.url)
+                continue
+            return _relay(resp, backend)
+
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "No backend available"},
+            headers={"Retry-After": str(max(1, math.ceil(pool.poll_interval)))},
+        )
+
+    @app.post("/v1/audio/transcriptions")
+    async def route_transcription(request: Request):
+        body = await request.body()
+        form = await request.form()
+        model = str(form.get("model") or "")
+        upload = form.get("file")
+        audio_seconds = 0.0
+        if upload is not None and hasattr(upload, "read"):
+            audio_seconds = estimate_audio_seconds(await upload.read())
+        return await forward(request, body, _routing_model(model), audio_seconds)
+
+    @app.post("/v1/audio/transcriptions/raw")
+    async def route_raw_transcription(request: Request):
+        body = await request.body()
+        model = request.query_params.get("model") or ""
+        return await forward(request, body, _routing_model(model), estimate_audio_seconds(body))
+
+    @app.post("/transcribe")
+    async def route_vcon(request: Request):
+        body = await request.body()
+        model = request.query_params.get("model") or ""
+        return await forward(request, body, _routing_model(model), _vcon_audio_seconds(body))
+
+    @app.get("/v1/models")
+    async def route_models(request: Request):
+        return await forward(request, b"", "", 0.0)
+
+    @app.get("/health")
+    async def health() -> HealthResponse:
+        return HealthResponse()
+
+    @app.get("/health/ready")
+    async def ready():
+        accepting = any(b.accepting for b in pool.backends)
+        return JSONResponse(
+            status_code=200 if accepting else 503,
+            content={
+                "status": "ok" if accepting else "not_ready",
+                "backends": [b.snapshot() for b in pool.backends],
+            },
+        )
+
+    @app.get("/router/backends")
+    async def list_backends():
+        return {"backends": [b.snapshot() for b in pool.backends]}
+
+    @app.post("/router/backends/drain")
+    async def drain(url: str, wait: bool = False, timeout: float | None = None):
+        """Stop sending new work to ``url``; with ``wait``, return once it is idle."""
+        try:
+            backend = pool.drain(url)
+        except KeyError:
+            raise HTTPException(status_code=404, detail=f"Unknown backend: {url}")
+        drained = await pool.wait_drained(url, timeout) if wait else backend.in_flight == 0
+        return {**backend.snapshot(), "drained": drained}
+
+    @app.post("/router/backends/undrain")
+    async def undrain(url: str):
+        try:
+            return pool.undrain(url).snapshot()
+        except KeyError:
+            raise HTTPException(status_code=404, detail=f"Unknown backend: {url}")
+
+    return app
+
+
+def _relay(resp: httpx.Response, backend: Backend) -> Response:
+    headers = {k: v for k, v in resp.headers.items() if k not in DROP_RESPONSE_HEADERS}
+    headers["x-routed-to"] = backend.url
+    return Response(content=resp.content, status_code=resp.status_code, headers=headers)
+
+
+def run_router(
+    backends: list[str],
+    host: str,
+    port: int,
+    poll_interval: float = 1.0,
+    retries: int = 2,
+    log_level: str = "info",
+) -> None:
+    """Serve the router (blocking)."""
+    import uvicorn
+
+    logging.basicConfig(level=getattr(logging, log_level.upper(), logging.INFO))
+    pool = BackendPool(backends, poll_interval=poll_interval)
+    uvicorn.run(
+        create_router_app(pool, retries=retries), host=host, port=port, log_level=log_level
+    )
@@ -0,0 +1,219 @@
+"""Backend pool: health polling, load-aware selection and draining."""
+
+import asyncio
+import logging
+import time
+from typing import Any
+
+import httpx
+
+from ..engine.latency import prior_rtf
+
+logger = logging.getLogger(__name__)
+
+POLL_TIMEOUT = 2.0
+
+
+class NoBackendAvailableError(Exception):
+    """No healthy, non-draining backend is left to try."""
+
+
+class Backend:
+    """One vcon-mac-wtf instance and the load it last reported."""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.healthy = False
+        self.loaded = False
+        self.draining = False
+        self.resident_model: str | None = None
+        self.cached_models: frozenset[str] = frozenset()
+        self.slots = 1
+        self.queued = 0
+        self.running = 0
+        self.reported_wait = 0.0
+        self.free_memory_mb: float | None = None
+        # Learned latency model: model -> decode profile -> {rtf, overhead_seconds}
+        self.latency: dict[str, dict[str, dict[str, float]]] = {}
+        self.decode_profile: str | None = None
+        self.machine: str | None = None
+        self.last_poll = 0.0
+        self.error: str | None = None
+        # Work routed here and not yet answered, in expected inference seconds
+        self.in_flight = 0
+        self.pending_seconds = 0.0
+
+    @property
+    def accepting(self) -> bool:
+        return self.healthy and not self.draining
+
+    def expected_seconds(self, model: str, audio_seconds: float) -> float:
+        """Predicted processing time on this backend's hardware.
+
+        Uses the latency fit the backend reports for the model and its decode
+        profile, else the same prior the backend itself starts from.
+        """
+        profile = self.decode_profile or ""
+        fit = (self.latency.get(model) or {}).get(profile)
+        if fit:
+            return fit["overhead_seconds"] + fit["rtf"] * audio_seconds
+        return audio_seconds * prior_rtf(model, profile)
+
+    def expected_wait(self) -> float:
+        """Predicted wait for new work: the larger of the backend's report and our own count.
+
+        The report is up to one poll interval stale; pending_seconds covers
+        requests routed since, while the report covers traffic from other
+        clients.
+        """
+        return max(self.reported_wait, self.pending_seconds / self.slots)
+
+    def apply_ready(self, ready: dict[str, Any]) -> None:
+        """Update from a ``/health/ready`` body.
+
+        ``not_ready`` means the backend is up without a model loaded yet
+        (``PRELOAD_MODEL=false``, or still loading at startup). It loads one on
+        its first request, so it stays eligible, behind backends with a model.
+        """
+        scheduler = ready.get("scheduler") or {}
+        memory = ready.get("memory") or {}
+        latency = ready.get("latency") or {}
+        self.healthy = ready.get("status") in ("ok", "not_ready")
+        self.loaded = ready.get("status") == "ok"
+        self.resident_model = ready.get("resident_model") or ready.get("model")
+        self.cached_models = frozenset(ready.get("cached_models") or ())
+        self.slots = max(1, int(scheduler.get("slots", 1)))
+        self.queued = int(scheduler.get("queued", 0))
+        self.running = int(scheduler.get("running", 0))
+        self.reported_wait = float(scheduler.get("estimated_wait_seconds", 0.0))
+        self.latency = dict(latency.get("models") or {})
+        self.decode_profile = latency.get("decode_profile")
+        self.machine = latency.get("machine")
+        self.free_memory_mb = memory.get("free_mb")
+        self.last_poll = time.monotonic()
+        self.error = None
+
+    def mark_down(self, error: str) -> None:
+        self.healthy = False
+        self.error = error
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "url": self.url,
+            "machine": self.machine,
+            "healthy": self.healthy,
+            "loaded": self.loaded,
+            "draining": self.draining,
+            "resident_model": self.resident_model,
+            "cached_models": sorted(self.cached_models),
+            "queued": self.queued,
+            "running": self.running,
+            "in_flight": self.in_flight,
+            "expected_wait_seconds": round(self.expected_wait(), 2),
+            "free_memory_mb": self.free_memory_mb,
+            "error": self.error,
+        }
+
+
+class BackendPool:
+    """Polls backends' ``/health/ready`` and picks where each request goes.
+
+    Selection prefers accepting backends that already hold the requested
+    model (no model swap), then ones with it on disk (no download), then ones
+    with any model loaded (no cold start), then the earliest expected
+    completion (wait plus processing time on that backend's hardware), then
+    the fewest requests in flight.
+    """
+
+    def __init__(
+        self,
+        urls: list[str],
+        poll_interval: float = 1.0,
+        client: httpx.AsyncClient | None = None,
+    ):
+        if not urls:
+            raise ValueError("Router needs at least one backend URL")
+        self.backends = [Backend(url) for url in urls]
+        self.poll_interval = poll_interval
+        self.client = client or httpx.AsyncClient(timeout=None)
+        self._poller: asyncio.Task | None = None
+
+    async def poll_once(self) -> None:
+        await asyncio.gather(*(self._poll(b) for b in self.backends))
+
+    async def _poll(self, backend: Backend) -> None:
+        try:
+            resp = await self.client.get(f"{backend.url}/health/ready", timeout=POLL_TIMEOUT)
+            backend.apply_ready(resp.json())
+        except (httpx.HTTPError, ValueError) as exc:
+            if backend.healthy:
+                logger.warning("Backend %s unreachable: %s", backend.url, exc)
+            backend.mark_down(f"{type(exc).__name__}: {exc}")
+
+    async def _poll_forever(self) -> None:
+        while True:
+            await self.poll_once()
+            await asyncio.sleep(self.poll_interval)
+
+    async def start(self) -> None:
+        await self.poll_once()
+        self._poller = asyncio.create_task(self._poll_forever())
+
+    async def stop(self) -> None:
+        if self._poller is not None:
+            self._poller.cancel()
+        await self.client.aclose()
+
+    def choose(
+        self, model: str, exclude: set[str] = frozenset(), audio_seconds: float = 0.0
+    ) -> Backend:
+        candidates = [b for b in self.backends if b.accepting and b.url not in exclude]
+        if not candidates:
+            raise NoBackendAvailableError("No backend available")
+        return min(
+            candidates,
+            key=lambda b: (
+                0 if not model or b.resident_model == model else 1,
+                0 if not model or model in b.cached_models else 1,  # no download
+                0 if b.loaded else 1,  # no cold start
+                b.expected_wait() + b.expected_seconds(model, audio_seconds),
+                b.in_flight,
+            ),
+        )
+
+    def get(self, url: str) -> Backend:
+        url = url.rstrip("/")
+        for backend in self.backends:
+            if backend.url == url:
+                return backend
+        raise KeyError(url)
+
+    def drain(self, url: str) -> Backend:
+        """Stop routing new work to a backend; requests in flight finish normally."""
+        backend = self.get(url)
+        backend.draining = True
+        logger.info("Draining backend %s (%d in flight)", backend.url, backend.in_flight)
+        return backend
+
+    def undrain(self, url: str) -> Backend:
+        backend = self.get(url)
+        backend.draining = False
+        return backend
+
+    async def wait_drained(self, url: str, timeout: float | None = None) -> bool:
+        """Wait until a draining backend has no requests in flight."""
+        backend = self.get(url)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while backend.in_flight:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.05)
+        return True
+
+    def begin(self, backend: Backend, expected_seconds: float) -> None:
+        backend.in_flight += 1
+        backend.pending_seconds += expected_seconds
+
+    def end(self, backend: Backend, expected_seconds: float) -> None:
+        backend.in_flight -= 1
+        backend.pending_seconds = max(0.0, backend.pending_seconds - expected_seconds)
@@ -0,0 +1,129 @@
+"""Admin endpoints: default-model hot swap, config reload, profiling and memory watch.
+
+Every endpoint requires ``Authorization: Bearer <ADMIN_TOKEN>``; with no
+``ADMIN_TOKEN`` configured the admin API is disabled. Profiling additionally
+needs ``PROFILING_ENABLED``, and the memory report ``MEMORY_WATCH``.
+"""
+
+import asyncio
+import hmac
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+
+from ..config import settings
+from ..engine.hot_swap import SwapInProgressError, model_swapper
+from ..memwatch import memory_watchdog
+from ..models.admin import ModelSwapRequest, ProfileRequest
+from ..profiling import ProfilingActiveError, profiler
+
+WWW_AUTHENTICATE = {"WWW-Authenticate": "Bearer"}
+
+
+def require_admin(authorization: str | None = Header(default=None)) -> None:
+    """Reject requests without the configured admin bearer token."""
+    if not settings.admin_token:
+        raise HTTPException(status_code=403, detail="Admin API disabled (set ADMIN_TOKEN)")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(
+        token.encode(), settings.admin_token.encode()
+    ):
+        raise HTTPException(
+            status_code=401, detail="Invalid admin token", headers=WWW_AUTHENTICATE
+        )
+
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/model")
+async def model_status() -> dict:
+    """Current default model and the state of the last swap."""
+    return {"model": settings.mlx_model, "swap": model_swapper.status()}
+
+
+@router.post("/model", status_code=202)
+async def swap_model(request: ModelSwapRequest) -> dict:
+    """Load ``model`` in the background, then make it the default and unload the old one."""
+    try:
+        return {"model": settings.mlx_model, "swap": model_swapper.start(request.model)}
+    except SwapInProgressError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
+
+@router.post("/reload")
+async def reload_config() -> dict:
+    """Re-read the environment and .env; a changed MLX_MODEL is hot-swapped."""
+    try:
+        return model_swapper.reload_config()
+    except SwapInProgressError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
+
+def require_profiling() -> None:
+    if not settings.profiling_enabled:
+        raise HTTPException(status_code=403, detail="Profiling disabled (set PROFILING_ENABLED)")
+
+
+@router.get("/profile", dependencies=[Depends(require_profiling)])
+async def profile_status() -> dict:
+    """State of the current or last profiling session."""
+    return profiler.status()
+
+
+@router.post("/profile", status_code=202, dependencies=[Depends(require_profiling)])
+async def start_profile(request: ProfileRequest) -> dict:
+    """Sample every thread until ``seconds`` pass or ``requests`` transcriptions finish."""
+    interval = request.interval_ms / 1000 if request.interval_ms else None
+    try:
+        return profiler.start(request.seconds, request.requests, interval)
+    except ProfilingActiveError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
+
+@router.delete("/profile", dependencies=[Depends(require_profiling)])
+async def stop_profile() -> dict:
+    """End the running session early."""
+    return await asyncio.to_thread(profiler.stop)
+
+
+@router.get("/profile/result", dependencies=[Depends(require_profiling)])
+async def profile_result(format: Literal["collapsed", "pstats"] = "collapsed") -> Response:
+    """The last session's samples as collapsed stacks (flamegraphs) or a pstats file."""
+    status = profiler.status()
+    if status["state"] == "running":
+        raise HTTPException(status_code=409, detail="Profiling still running")
+    if status["state"] == "idle":
+        raise HTTPException(status_code=404, detail="No profile captured yet")
+    if format == "pstats":
+        return Response(
+            profiler.pstats(),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": 'attachment; filename="profile.pstats"'},
+        )
+    return Response(profiler.collapsed(), media_type="text/plain")
+
+
+def require_memory_watch() -> None:
+    if not memory_watchdog.active:
+        raise HTTPException(status_code=403, detail="Memory watch disabled (set MEMORY_WATCH)")
+
+
+@router.get("/memory", dependencies=[Depends(require_memory_watch)])
+async def memory_report(top: int = Query(default=20, ge=1, le=500)) -> dict:
+    """Last sample: traced growth, top growth sites, live objects and request peaks."""
+    return memory_watchdog.status(top)
+
+
+@router.post("/memory/sample", dependencies=[Depends(require_memory_watch)])
+async def memory_sample(top: int = Query(default=20, ge=1, le=500)) -> dict:
+    """Take a snapshot now instead of waiting for the next interval."""
+    await asyncio.to_thread(memory_watchdog.sample)
+    return memory_watchdog.status(top)
+
+
+@router.post("/memory/reset", dependencies=[Depends(require_memory_watch)])
+async def memory_reset() -> dict:
+    """Make the current state the baseline that growth is measured from."""
+    await asyncio.to_thread(memory_watchdog.reset)
+    return memory_watchdog.status(0)
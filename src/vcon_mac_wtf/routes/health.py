@@ -1,8 +1,17 @@
 """Health check endpoints."""
 
+import asyncio
+
 from fastapi import APIRouter
 
+from ..config import settings
+from ..engine.hot_swap import model_swapper
+from ..engine.latency import latency_predictor
+from ..engine.memory import MB, memory_governor
 from ..engine.mlx_engine import mlx_engine
+from ..engine.model_manager import model_manager
+from ..engine.pipeline import audio_pipeline
+from ..engine.scheduler import inference_scheduler
 from ..models.responses import HealthResponse, ReadyResponse
 
 router = APIRouter(tags=["health"])
@@ -15,6 +24,18 @@ async def health() -> HealthResponse:
 
 @router.get("/health/ready")
 async def ready() -> ReadyResponse:
+    memory = memory_governor.snapshot()
+    for key, nbytes in mlx_engine.memory_stats().items():
+        memory[key.replace("_bytes", "_mb")] = round(nbytes / MB, 1)
+    load = {
+        "resident_model": mlx_engine.resident_model,
+        "cached_models": await asyncio.to_thread(model_manager.cached_models),
+        "memory": memory,
+        "scheduler": inference_scheduler.snapshot(),
+        "pipeline": audio_pipeline.snapshot(),
+        "model_swap": model_swapper.status(),
+        "latency": {**latency_predictor.snapshot(), "decode_profile": settings.decode_profile},
+    }
     if mlx_engine.is_loaded:
-        return ReadyResponse(status="ok", model=mlx_engine.loaded_model)
-    return ReadyResponse(status="not_ready", model=None)
+        return ReadyResponse(status="ok", model=mlx_engine.loaded_model, **load)
+    return ReadyResponse(status="not_ready", model=None, **load)
@@ -0,0 +1,60 @@
+"""Language identification endpoint: POST /v1/audio/language."""
+
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, Form, HTTPException, UploadFile
+
+from ..cancellation import RequestCancelledError
+from ..metrics import record_error
+from ..services.language import identify_language
+from ..tracing import mark_parsed, stage
+from .openai_compat import check_upload_size, upload_suffix
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["transcription"])
+
+
+@router.post("/v1/audio/language")
+async def detect_language(
+    file: UploadFile,
+    model: str = Form(default=""),
+    seconds: Optional[float] = Form(default=None, gt=0, le=30),
+    find_speech: bool = Form(default=True),
+    languages: Optional[str] = Form(default=None),
+    top: int = Form(default=5, ge=1, le=100),
+):
+    """Spoken language of the recording, ranked, without transcribing it.
+
+    Examines ``seconds`` (default ``LANGUAGE_ID_SECONDS``) from the first
+    speech found by energy detection, or from the start with
+    ``find_speech=false``. ``languages`` (comma-separated codes) restricts
+    the candidates.
+    """
+    mark_parsed()
+    with stage("upload_read", model):
+        audio_bytes = await file.read()
+    check_upload_size(len(audio_bytes))
+    candidates = [code.strip() for code in (languages or "").split(",") if code.strip()]
+    try:
+        return await identify_language(
+            audio_bytes,
+            suffix=upload_suffix(file),
+            model=model or None,
+            seconds=seconds,
+            find_speech=find_speech,
+            languages=candidates or None,
+            top=top,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except RequestCancelledError:
+        raise  # answered by CancellationMiddleware
+    except Exception as exc:
+        record_error(exc)
+        logger.exception("Language identification failed for %s", file.filename)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Language identification error: {type(exc).__name__}: {exc}",
+        )
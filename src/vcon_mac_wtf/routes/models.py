@@ -1,7 +1,10 @@
 """Model listing endpoint (OpenAI-compatible)."""
 
+import asyncio
+
 from fastapi import APIRouter
 
+from ..engine.mlx_engine import mlx_engine
 from ..engine.model_manager import model_manager
 from ..models.openai_compat import ModelListResponse, ModelObject
 
@@ -10,6 +13,18 @@ router = APIRouter(tags=["models"])
 
 @router.get("/v1/models")
 async def list_models() -> ModelListResponse:
-    raw = model_manager.list_models()
-    data = [ModelObject(**m) for m in raw]
+    """Known models with their cache state, so clients can steer clear of cold ones."""
+    raw = await asyncio.to_thread(model_manager.list_models)  # walks the cache on disk
+    data = []
+    for m in raw:
+        downloading = m.pop("downloading", False)
+        if m["id"] == mlx_engine.resident_model:
+            state = "loaded"
+        elif m["id"] == mlx_engine.loading_model:
+            state = "loading"
+        elif downloading:
+            state = "downloading"
+        else:
+            state = "cached" if m["cached"] else "not_cached"
+        data.append(ModelObject(**m, state=state))
     return ModelListResponse(data=data)
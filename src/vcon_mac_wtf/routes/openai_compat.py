@@ -1,20 +1,45 @@
 """OpenAI-compatible transcription endpoint: POST /v1/audio/transcriptions."""
 
+import io
+import json
 import logging
 import time
-from typing import Optional
+from collections.abc import Iterator
+from email.message import EmailMessage
+from itertools import batched
+from pathlib import PurePath
+from typing import Any, Optional
 
-from fastapi import APIRouter, Form, HTTPException, UploadFile
+from fastapi import APIRouter, Form, HTTPException, Query, Request, UploadFile
+from fastapi.responses import Response
 
+from ..cancellation import RequestCancelledError
 from ..config import settings
+from ..engine.decode import DecodeOptions, resolve_decode_options
+from ..engine.memory import estimate_audio_seconds
 from ..engine.mlx_engine import mlx_engine
-from ..services.transcription import transcribe_audio_bytes
+from ..engine.model_manager import model_manager
+from ..engine.model_policy import model_policies
+from ..engine.transcript import Transcript
+from ..metrics import record_error, record_skipped
+from ..services.plan import ExecutionPlan, plan_openai
+from ..services.store import transcript_store
+from ..services.transcription import (
+    AudioTooLongError,
+    DeadlineUnreachableError,
+    admit,
+    transcribe_audio_bytes,
+)
 from ..services.wtf_converter import convert_result_to_wtf
+from ..tracing import mark_parsed, stage
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["transcription"])
 
+# Items encoded per call when rendering verbose_json arrays
+RENDER_BATCH = 256
+
 # Map media types to file suffixes for temp files
 MEDIATYPE_SUFFIXES: dict[str, str] = {
     "audio/wav": ".wav",
@@ -30,6 +55,15 @@ MEDIATYPE_SUFFIXES: dict[str, str] = {
     "audio/webm": ".webm",
 }
 
+# The raw endpoint reads the body itself, so describe it for the docs
+RAW_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        media_type: {"schema": {"type": "string", "format": "binary"}}
+        for media_type in ("audio/*", "application/octet-stream")
+    },
+}
+
 
 @router.post("/v1/audio/transcriptions")
 async def create_transcription(
@@ -38,38 +72,183 @@ async def create_transcription(
     response_format: str = Form(default="verbose_json"),
     language: Optional[str] = Form(default=None),
     timestamp_granularities: Optional[list[str]] = Form(default=None),
+    temperature: Optional[float] = Form(default=None),
+    decode_profile: Optional[str] = Form(default=None),
+    temperature_fallback: Optional[bool] = Form(default=None),
+    condition_on_previous_text: Optional[bool] = Form(default=None),
+    compression_ratio_threshold: Optional[float] = Form(default=None),
+    logprob_threshold: Optional[float] = Form(default=None),
+    no_speech_threshold: Optional[float] = Form(default=None),
+    best_of: Optional[int] = Form(default=None),
 ):
-    """OpenAI-compatible audio transcription endpoint."""
+    """OpenAI-compatible audio transcription endpoint.
+
+    Beyond the OpenAI fields, accepts a decode profile (fast, balanced,
+    accurate) and per-request decode overrides. Word alignment, segment
+    detail and WTF conversion only run when ``response_format`` and
+    ``timestamp_granularities`` return them.
+    """
+    mark_parsed()
+    try:
+        decode = resolve_decode_options(
+            decode_profile,
+            temperature=temperature,
+            temperature_fallback=temperature_fallback,
+            condition_on_previous_text=condition_on_previous_text,
+            compression_ratio_threshold=compression_ratio_threshold,
+            logprob_threshold=logprob_threshold,
+            no_speech_threshold=no_speech_threshold,
+            best_of=best_of,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
     effective_model = model if model else settings.mlx_model
+    model_label = model_manager.resolve_model_name(effective_model)
 
-    # Determine word timestamps from granularities
-    want_words = True
-    if timestamp_granularities:
-        want_words = "word" in timestamp_granularities
+    # Only run the stages whose output this response returns
+    plan = plan_openai(response_format, timestamp_granularities)
 
     # Read audio bytes
-    audio_bytes = await file.read()
-    if not audio_bytes:
-        raise HTTPException(status_code=400, detail="Empty audio file")
+    with stage("upload_read", model_label):
+        audio_bytes = await file.read()
+    check_upload_size(len(audio_bytes))
+    return await _transcribe_upload(
+        audio_bytes,
+        upload_suffix(file),
+        file.filename,
+        effective_model,
+        response_format,
+        language,
+        plan,
+        decode,
+    )
+
+
+@router.post("/v1/audio/transcriptions/raw", openapi_extra={"requestBody": RAW_REQUEST_BODY})
+async def create_transcription_raw(
+    request: Request,
+    model: str = Query(default="", description="MLX Whisper model or quality tier"),
+    response_format: str = Query(default="verbose_json"),
+    language: Optional[str] = Query(
+        default=None, description="Language hint; else the Content-Language header"
+    ),
+    timestamp_granularities: Optional[list[str]] = Query(default=None),
+    filename: Optional[str] = Query(
+        default=None, description="Name whose suffix gives the container format"
+    ),
+    temperature: Optional[float] = Query(default=None),
+    decode_profile: Optional[str] = Query(default=None),
+    temperature_fallback: Optional[bool] = Query(default=None),
+    condition_on_previous_text: Optional[bool] = Query(default=None),
+    compression_ratio_threshold: Optional[float] = Query(default=None),
+    logprob_threshold: Optional[float] = Query(default=None),
+    no_speech_threshold: Optional[float] = Query(default=None),
+    best_of: Optional[int] = Query(default=None),
+):
+    """``/v1/audio/transcriptions`` with the audio as the raw request body.
 
+    For clients that do not need OpenAI form compatibility: the body
+    (``Content-Type: audio/*`` or ``application/octet-stream``) is read
+    straight into one buffer, without the multipart parser and its spooled
+    temporary file. Options are query parameters with the form fields'
+    names; the container format comes from ``filename``, a
+    ``Content-Disposition`` filename or the content type.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if not content_type.startswith("audio/") and content_type != "application/octet-stream":
+        raise HTTPException(
+            status_code=415,
+            detail="Send the audio as the body with Content-Type audio/* or "
+            "application/octet-stream",
+        )
+    mark_parsed()
+    try:
+        decode = resolve_decode_options(
+            decode_profile,
+            temperature=temperature,
+            temperature_fallback=temperature_fallback,
+            condition_on_previous_text=condition_on_previous_text,
+            compression_ratio_threshold=compression_ratio_threshold,
+            logprob_threshold=logprob_threshold,
+            no_speech_threshold=no_speech_threshold,
+            best_of=best_of,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    effective_model = model if model else settings.mlx_model
+    model_label = model_manager.resolve_model_name(effective_model)
+    plan = plan_openai(response_format, timestamp_granularities)
+
+    filename = filename or _disposition_filename(request.headers.get("content-disposition"))
+    with stage("upload_read", model_label):
+        audio_bytes = await read_raw_body(request)
+    return await _transcribe_upload(
+        audio_bytes,
+        _suffix(content_type, filename),
+        filename,
+        effective_model,
+        response_format,
+        language or request.headers.get("content-language") or None,
+        plan,
+        decode,
+    )
+
+
+async def read_raw_body(request: Request) -> bytes:
+    """The request body, streamed into one buffer and returned without a copy.
+
+    Over ``MAX_AUDIO_SIZE_MB`` is a 413: up front from a declared
+    ``Content-Length``, else as soon as the received bytes pass it, without
+    reading the rest. ``BytesIO`` grows its buffer in place and
+    ``getvalue`` hands that buffer over, so the body is never held twice.
+    """
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit():
+        check_upload_size(int(declared))
+    body = io.BytesIO()
+    async for chunk in request.stream():
+        body.write(chunk)
+        check_upload_size(body.tell(), allow_empty=True)
+    check_upload_size(body.tell())
+    return body.getvalue()
+
+
+def check_upload_size(nbytes: int, allow_empty: bool = False) -> None:
+    """400 for an empty upload, 413 over ``MAX_AUDIO_SIZE_MB``."""
+    if not nbytes and not allow_empty:
+        raise HTTPException(status_code=400, detail="Empty audio file")
     max_bytes = settings.max_audio_size_mb * 1024 * 1024
-    if len(audio_bytes) > max_bytes:
+    if nbytes > max_bytes:
         raise HTTPException(
             status_code=413,
-            detail=f"Audio file too large ({len(audio_bytes)} bytes, max {max_bytes})",
+            detail=f"Audio file too large ({nbytes} bytes, max {max_bytes})",
         )
 
-    # Determine file suffix from content type
-    content_type = file.content_type or "audio/wav"
-    suffix = MEDIATYPE_SUFFIXES.get(content_type, ".wav")
-    # Also try suffix from filename
-    if file.filename:
-        from pathlib import Path
 
-        file_suffix = Path(file.filename).suffix
-        if file_suffix:
-            suffix = file_suffix
+async def _transcribe_upload(
+    audio_bytes: bytes,
+    suffix: str,
+    filename: str | None,
+    effective_model: str,
+    response_format: str,
+    language: str | None,
+    plan: ExecutionPlan,
+    decode: DecodeOptions,
+) -> Response:
+    """Admission, transcription and the response, shared by both upload forms."""
+    # Quality tiers map to a concrete model depending on current load
+    audio_seconds = estimate_audio_seconds(audio_bytes, suffix)
+    selection = model_policies["/v1/audio/transcriptions"].select(
+        effective_model, audio_seconds, decode.profile
+    )
+    effective_model = selection.model
+    model_label = selection.model
+    try:
+        admit(effective_model, decode.profile, audio_seconds)
+    except DeadlineUnreachableError as exc:
+        raise shed(exc)
 
+    digest = transcript_store.hash_audio(audio_bytes) if plan.wtf_conversion else None
     start = time.monotonic()
     try:
         result = await transcribe_audio_bytes(
@@ -77,54 +256,135 @@ async def create_transcription(
             suffix=suffix,
             model=effective_model,
             language=language,
-            word_timestamps=want_words,
+            word_timestamps=plan.word_alignment,
+            decode=decode,
         )
+    except AudioTooLongError as exc:
+        raise HTTPException(status_code=413, detail=str(exc))
+    except RequestCancelledError:
+        raise  # answered by CancellationMiddleware
     except Exception as exc:
-        import gc
-        gc.collect()
-        logger.exception("Transcription failed for %s (%d bytes)", file.filename, len(audio_bytes))
+        record_error(exc)
+        logger.exception("Transcription failed for %s (%d bytes)", filename, len(audio_bytes))
         raise HTTPException(
             status_code=500,
             detail=f"Transcription engine error: {type(exc).__name__}: {exc}",
         )
     processing_time = time.monotonic() - start
+    decode_summary = decode.describe(result)
+    headers = {
+        "X-Model": model_label,
+        "X-Decode-Profile": decode.profile,
+        "X-Decode-Fallback-Retries": str(decode_summary["fallback_retries"]),
+        "X-Skipped-Stages": plan.header(),
+    }
+    record_skipped(plan.skipped)
 
     # Format response
     if response_format == "text":
-        return result.get("text", "")
+        return _serialize(result.text, model_label, headers)
 
     if response_format == "json":
-        return {"text": result.get("text", "")}
+        return _serialize({"text": result.text}, model_label, headers)
 
-    if response_format == "wtf":
-        wtf_doc = convert_result_to_wtf(result, effective_model, processing_time)
-        return wtf_doc
+    if plan.wtf_conversion:
+        extensions = {"decode": decode_summary}
+        if selection.tier:
+            extensions["model_policy"] = selection.describe()
+        with stage("wtf_conversion", model_label):
+            wtf_doc = convert_result_to_wtf(result, effective_model, processing_time, extensions)
+        if digest is not None:
+            transcript_store.put(await digest, wtf_doc, model_label)
+        return _serialize(wtf_doc, model_label, headers)
 
     # Default: verbose_json
-    response: dict = {
+    response = verbose_json(result, plan.segments, plan.word_alignment)
+    response["decode"] = decode_summary
+    return _serialize(response, model_label, headers)
+
+
+def upload_suffix(file: UploadFile) -> str:
+    """Temp-file suffix for an upload: from the filename, else the content type."""
+    return _suffix(file.content_type, file.filename)
+
+
+def _suffix(content_type: str | None, filename: str | None) -> str:
+    suffix = MEDIATYPE_SUFFIXES.get(content_type or "audio/wav", ".wav")
+    if filename:
+        file_suffix = PurePath(filename).suffix
+        if file_suffix:
+            suffix = file_suffix
+    return suffix
+
+
+def _disposition_filename(header: str | None) -> str | None:
+    """``filename`` parameter of a ``Content-Disposition`` header, if any."""
+    if not header:
+        return None
+    message = EmailMessage()
+    message["content-disposition"] = header
+    return message.get_filename()
+
+
+def shed(exc: DeadlineUnreachableError) -> HTTPException:
+    """503 with Retry-After when the backlog is the problem, else 504."""
+    if exc.retry_after is None:
+        return HTTPException(status_code=504, detail=str(exc))
+    return HTTPException(
+        status_code=503, detail=str(exc), headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
+def verbose_json(result: Transcript, segments: bool, words: bool) -> dict[str, Any]:
+    """verbose_json body; ``segments`` and ``words`` are iterators over the columns.
+
+    Pass it to ``render_json``, which writes the arrays one item at a time.
+    """
+    response: dict[str, Any] = {
         "task": "transcribe",
-        "language": result.get("language", "en"),
-        "duration": result.get("duration", 0.0),
-        "text": result.get("text", ""),
+        "language": result.language,
+        "duration": result.duration if result.duration is not None else 0.0,
+        "text": result.text,
     }
+    if segments and len(result):
+        response["segments"] = result.segment_dicts()
+    # Every segment's words, flattened into the top-level array
+    if words and result.word_count:
+        response["words"] = result.word_dicts()
+    return response
 
-    segments = result.get("segments", [])
-    if segments:
-        response["segments"] = segments
-
-    # Flatten words from segments for top-level words array
-    if want_words and segments:
-        all_words = []
-        for seg in segments:
-            for w in seg.get("words", []):
-                all_words.append(
-                    {
-                        "word": w.get("word", ""),
-                        "start": w.get("start", 0.0),
-                        "end": w.get("end", 0.0),
-                    }
-                )
-        if all_words:
-            response["words"] = all_words
 
-    return response
+def render_json(content: Any) -> bytes:
+    """JSON as JSONResponse renders it, writing iterator values as arrays in batches.
+
+    At most ``RENDER_BATCH`` segment or word dicts exist at a time, encoded
+    straight into the body buffer, instead of a list of all of them next to
+    the encoded body.
+    """
+    if not isinstance(content, dict):
+        return _dumps(content).encode("utf-8")
+    out = io.BytesIO()
+    for n, (key, value) in enumerate(content.items()):
+        out.write(b"{" if n == 0 else b",")
+        out.write(_dumps(key).encode("utf-8") + b":")
+        if isinstance(value, Iterator):
+            out.write(b"[")
+            for i, batch in enumerate(batched(value, RENDER_BATCH)):
+                if i:
+                    out.write(b",")
+                out.write(_dumps(batch)[1:-1].encode("utf-8"))  # without the brackets
+            out.write(b"]")
+        else:
+            out.write(_dumps(value).encode("utf-8"))
+    out.write(b"}" if content else b"{}")
+    return out.getvalue()
+
+
+# JSONResponse's encoding, built once: json.dumps with options makes an encoder per call
+_dumps = json.JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode
+
+
+def _serialize(content, model_label: str, headers: dict[str, str]) -> Response:
+    """Render the JSON response body inside the serialization stage timer."""
+    with stage("serialization", model_label):
+        return Response(render_json(content), media_type="application/json", headers=headers)
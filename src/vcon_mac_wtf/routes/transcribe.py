@@ -1,54 +1,130 @@
 """vCon-native transcription endpoint: POST /transcribe."""
 
 import logging
-from typing import Any, Optional
+from typing import Literal, Optional
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
 
-from ..services.vcon_processor import process_vcon
+from ..config import settings
+from ..engine.decode import resolve_decode_options
+from ..engine.model_policy import model_policies
+from ..metrics import record_skipped
+from ..models.vcon import Vcon
+from ..services.plan import plan_vcon
+from ..services.transcription import DeadlineUnreachableError, admit
+from ..services.vcon_processor import process_vcon, vcon_audio_seconds
+from ..tracing import mark_parsed, stage
+from .openai_compat import shed
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["transcription"])
 
 
-@router.post("/transcribe")
+# The body is read and validated by the handler, so describe it for the docs
+VCON_REQUEST_BODY = {
+    "required": True,
+    "content": {"application/json": {"schema": {"type": "object", "title": "vCon"}}},
+}
+
+
+@router.post("/transcribe", openapi_extra={"requestBody": VCON_REQUEST_BODY})
 async def transcribe_vcon(
-    body: dict[str, Any],
-    model: Optional[str] = Query(default=None, description="MLX Whisper model override"),
+    request: Request,
+    model: Optional[str] = Query(
+        default=None, description="MLX Whisper model or quality tier (quality, balanced, fast)"
+    ),
     language: Optional[str] = Query(default=None, description="Language hint (e.g. en, es)"),
     word_timestamps: bool = Query(default=True, description="Include word-level timestamps"),
+    detail: Literal["full", "segments"] = Query(
+        default="full", description="WTF detail: full (with words) or segments (no word alignment)"
+    ),
+    on_existing: Optional[Literal["skip", "replace", "append"]] = Query(
+        default=None,
+        description="Dialogs already transcribed with this model: skip, replace or append",
+    ),
+    detect_language: bool = Query(
+        default=False,
+        description="Without a language hint, identify each dialog's language from its speech",
+    ),
+    decode_profile: Optional[str] = Query(
+        default=None, description="Decode profile: fast, balanced or accurate"
+    ),
+    temperature: Optional[float] = Query(
+        default=None, description="0 keeps the profile's fallback ladder; >0 samples at it only"
+    ),
+    temperature_fallback: Optional[bool] = Query(default=None),
+    condition_on_previous_text: Optional[bool] = Query(default=None),
+    compression_ratio_threshold: Optional[float] = Query(default=None),
+    logprob_threshold: Optional[float] = Query(default=None),
+    no_speech_threshold: Optional[float] = Query(default=None),
+    best_of: Optional[int] = Query(default=None),
 ):
-    """Accept a vCon, transcribe audio dialogs, return enriched vCon with WTF analysis."""
-    # Basic validation
-    if "dialog" not in body:
-        raise HTTPException(status_code=400, detail="Missing 'dialog' field in vCon")
+    """Accept a vCon, transcribe audio dialogs, return enriched vCon with WTF analysis.
 
-    dialogs = body.get("dialog", [])
-    audio_dialogs = [
-        d
-        for d in dialogs
-        if d.get("type") == "recording" and (d.get("mediatype", "")).startswith("audio/")
-    ]
-    if not audio_dialogs:
+    The raw body is parsed and validated against the vCon models in one pass
+    by pydantic-core; the enriched vCon is serialized straight back to bytes.
+    """
+    try:
+        vcon = Vcon.model_validate_json(await request.body())
+    except ValidationError as exc:
+        # Without inputs: an invalid-JSON error would echo the whole body
+        raise RequestValidationError(exc.errors(include_url=False, include_input=False))
+    mark_parsed()
+    try:
+        decode = resolve_decode_options(
+            decode_profile,
+            temperature=temperature,
+            temperature_fallback=temperature_fallback,
+            condition_on_previous_text=condition_on_previous_text,
+            compression_ratio_threshold=compression_ratio_threshold,
+            logprob_threshold=logprob_threshold,
+            no_speech_threshold=no_speech_threshold,
+            best_of=best_of,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    plan = plan_vcon(detail, word_timestamps)
+    if "dialog" not in vcon.model_fields_set:
+        raise HTTPException(status_code=400, detail="Missing 'dialog' field in vCon")
+    if not vcon.audio_dialogs:
         raise HTTPException(status_code=422, detail="No audio recording dialogs found in vCon")
 
+    # Quality tiers map to a concrete model depending on current load
+    audio_seconds = vcon_audio_seconds(vcon)
+    selection = model_policies["/transcribe"].select(
+        model or settings.mlx_model, audio_seconds, decode.profile
+    )
+    try:
+        admit(selection.model, decode.profile, audio_seconds)
+    except DeadlineUnreachableError as exc:
+        raise shed(exc)
+
     enriched, stats = await process_vcon(
-        vcon_data=body,
-        model=model,
+        vcon=vcon,
+        model=selection.model,
         language=language,
-        word_timestamps=word_timestamps,
+        word_timestamps=plan.word_alignment,
+        on_existing=on_existing,
+        model_policy=selection.describe() if selection.tier else None,
+        decode=decode,
+        detect_language=detect_language,
     )
 
     # Return enriched vCon with stats in headers
-    from fastapi.responses import JSONResponse
-
     headers = {
         "X-Dialogs-Processed": str(stats["processed"]),
         "X-Dialogs-Skipped": str(stats["skipped"]),
         "X-Dialogs-Failed": str(stats["failed"]),
         "X-Processing-Time-Ms": str(stats["total_time_ms"]),
         "X-Provider": "mlx-whisper",
-        "X-Model": model or "",
+        "X-Model": selection.model,
+        "X-Decode-Profile": decode.profile,
+        "X-Decode-Fallback-Retries": str(stats["fallback_retries"]),
+        "X-Skipped-Stages": plan.header(),
     }
-    return JSONResponse(content=enriched, headers=headers)
+    record_skipped(plan.skipped)
+    with stage("serialization", selection.model):
+        return Response(enriched.dump_json(), media_type="application/json", headers=headers)
@@ -0,0 +1,55 @@
+"""Stored transcripts: lookup by vCon or audio hash, and phrase search.
+
+Served from the transcript store without inference; disabled unless
+``TRANSCRIPT_STORE`` is set.
+"""
+
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from ..services.store import transcript_store
+
+
+def require_store() -> None:
+    if not transcript_store.enabled:
+        raise HTTPException(
+            status_code=403, detail="Transcript store disabled (set TRANSCRIPT_STORE)"
+        )
+
+
+router = APIRouter(
+    prefix="/transcripts", tags=["transcripts"], dependencies=[Depends(require_store)]
+)
+
+
+@router.get("/search")
+async def search_transcripts(
+    q: str = Query(min_length=1, description="Phrase to find (case-insensitive)"),
+    limit: int = Query(default=20, ge=1, le=500),
+    model: Optional[str] = Query(default=None, description="Only transcripts from this model"),
+) -> dict:
+    """Segments containing the phrase, with its start and end in the recording."""
+    hits = await asyncio.to_thread(transcript_store.search, q, limit, model)
+    return {"query": q, "hits": hits}
+
+
+@router.get("/by-hash/{sha256}")
+async def transcripts_by_hash(sha256: str, model: Optional[str] = None) -> dict:
+    """Transcripts of the audio whose SHA-256 (hex) is ``sha256``."""
+    found = await asyncio.to_thread(transcript_store.by_audio_hash, sha256, model)
+    if not found:
+        raise HTTPException(status_code=404, detail="No transcript for this audio")
+    return {"audio_hash": sha256.lower(), "transcripts": found}
+
+
+@router.get("/{vcon_uuid}")
+async def transcripts_by_vcon(
+    vcon_uuid: str, dialog: Optional[int] = None, model: Optional[str] = None
+) -> dict:
+    """Transcripts of a vCon's dialogs (one dialog with ``dialog``)."""
+    found = await asyncio.to_thread(transcript_store.by_vcon, vcon_uuid, dialog, model)
+    if not found:
+        raise HTTPException(status_code=404, detail="No transcript for this vCon")
+    return {"vcon_uuid": vcon_uuid, "transcripts": found}
@@ -0,0 +1,453 @@
+"""Offline bulk transcription of a directory of audio files and vCons.
+
+``vcon-mac-wtf batch IN OUT`` runs the same engine and vCon processor as the
+server, without HTTP. Inputs are found recursively by suffix:
+
+- audio files (``.wav``, ``.mp3``, ...) become ``OUT/<path>.wtf.json``;
+- ``.json`` files are vCons, written enriched to ``OUT/<path>``;
+- ``.ndjson``/``.jsonl`` files hold one vCon per line, written in order.
+
+Stages run as a pipeline: a loader thread reads and validates the next files
+while earlier ones are in inference, and WTF conversion and output writing
+overlap with the next inference. The scheduler and memory governor admit
+work exactly as they do for HTTP requests.
+
+Each output is written atomically (temporary file, then rename) and then
+recorded in an append-only manifest (``OUT/.batch-manifest.jsonl``). A rerun
+skips inputs recorded as done whose size and mtime are unchanged, so an
+interrupted backfill resumes where it stopped.
+
+NDJSON inputs are streamed rather than loaded whole: a bounded window of lines
+is in flight, and finished lines are appended in order to
+``OUT/.<name>.partial``, which is the checkpoint (the manifest records the
+input as ``partial``). An interrupted file resumes after its last finished
+line. A line that fails is written through unchanged and its index recorded
+as ``failed_lines``, so one bad line does not lose the others, and
+``retry_failed`` redoes only those lines.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, NamedTuple
+
+from pydantic import ValidationError
+
+from ..config import settings
+from ..engine.decode import DecodeOptions, resolve_decode_options
+from ..engine.memory import estimate_audio_seconds
+from ..engine.mlx_engine import result_duration
+from ..engine.model_manager import model_manager
+from ..models.vcon import Vcon
+from .store import transcript_store
+from .transcription import transcribe_audio_bytes
+from .vcon_processor import AUDIO_SUFFIXES, process_vcon, vcon_audio_seconds
+from .wtf_converter import convert_result_to_wtf
+
+logger = logging.getLogger(__name__)
+
+AUDIO_FILE_SUFFIXES = frozenset(AUDIO_SUFFIXES.values())
+VCON_SUFFIXES = frozenset({".json"})
+NDJSON_SUFFIXES = frozenset({".ndjson", ".jsonl"})
+MANIFEST_NAME = ".batch-manifest.jsonl"
+WTF_SUFFIX = ".wtf.json"
+
+
+class BatchItem(NamedTuple):
+    path: Path
+    name: str  # path relative to the input directory, with "/" separators
+    kind: str  # audio, vcon or ndjson
+
+
+def discover(input_dir: Path) -> list[BatchItem]:
+    """Inputs under ``input_dir`` in path order; hidden files and unknown suffixes are ignored."""
+    items = []
+    for path in sorted(input_dir.rglob("*")):
+        relative = path.relative_to(input_dir)
+        if not path.is_file() or any(part.startswith(".") for part in relative.parts):
+            continue
+        suffix = path.suffix.lower()
+        if suffix in AUDIO_FILE_SUFFIXES:
+            kind = "audio"
+        elif suffix in VCON_SUFFIXES:
+            kind = "vcon"
+        elif suffix in NDJSON_SUFFIXES:
+            kind = "ndjson"
+        else:
+            continue
+        items.append(BatchItem(path, relative.as_posix(), kind))
+    return items
+
+
+def output_name(item: BatchItem) -> str:
+    return item.name + WTF_SUFFIX if item.kind == "audio" else item.name
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """Write ``data`` so ``path`` holds either the old content or all of the new."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class Manifest:
+    """Append-only record of finished inputs; the last entry per input wins."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries: dict[str, dict[str, Any]] = {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line from an interrupted run
+                    self.entries[entry["input"]] = entry
+        except FileNotFoundError:
+            pass
+        self._file = None
+
+    def status(self, item: BatchItem, output_dir: Path) -> str | None:
+        """``done`` or ``failed`` for an unchanged input seen before, else None."""
+        entry = self.entries.get(item.name)
+        if entry is None:
+            return None
+        stat = item.path.stat()
+        if entry.get("size") != stat.st_size or entry.get("mtime_ns") != stat.st_mtime_ns:
+            return None
+        if entry["status"] == "done" and not (output_dir / entry["output"]).exists():
+            return None
+        return entry["status"]
+
+    def record(self, item: BatchItem, status: str, **details: Any) -> None:
+        stat = item.path.stat()
+        entry = {
+            "input": item.name,
+            "status": status,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            **details,
+            "time": time.time(),
+        }
+        self.entries[item.name] = entry
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class Progress:
+    """Files and audio processed so far, with throughput in audio-hours per hour."""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.skipped = 0
+        self.audio_seconds = 0.0
+        self.started = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def audio_hours_per_hour(self) -> float:
+        return self.audio_seconds / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "files": self.total,
+            "done": self.done,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "audio_hours": round(self.audio_seconds / 3600, 4),
+            "elapsed_seconds": round(self.elapsed, 2),
+            "audio_hours_per_hour": round(self.audio_hours_per_hour, 2),
+        }
+
+    def line(self) -> str:
+        finished = self.done + self.failed + self.skipped
+        return (
+            f"{finished}/{self.total} files ({self.failed} failed, {self.skipped} skipped), "
+            f"{self.audio_seconds / 3600:.2f} h audio in {self.elapsed:.0f}s: "
+            f"{self.audio_hours_per_hour:.1f} audio-hours/hour"
+        )
+
+
+class _DialogsFailedError(Exception):
+    """An input finished but some of its dialogs failed."""
+
+
+class _LinesFailedError(Exception):
+    """An NDJSON input was written, but some of its lines failed and were passed through."""
+
+    def __init__(self, lines: list[int], audio_seconds: float):
+        super().__init__(f"{len(lines)} line(s) failed")
+        self.lines = lines
+        self.audio_seconds = audio_seconds
+
+
+async def run_batch(
+    input_dir: Path,
+    output_dir: Path,
+    *,
+    model: str | None = None,
+    language: str | None = None,
+    decode: DecodeOptions | None = None,
+    on_existing: str | None = None,
+    jobs: int = 2,
+    manifest_path: Path | None = None,
+    retry_failed: bool = False,
+    report: Callable[[str], None] = print,
+    report_interval: float = 30.0,
+) -> dict[str, Any]:
+    """Transcribe every input under ``input_dir`` into ``output_dir``; returns the summary.
+
+    ``jobs`` inputs (or NDJSON lines) are in flight at once, and as many more
+    are loaded ahead. Inputs whose processing fails are recorded as failed
+    and, unless ``retry_failed``, not retried by later runs; for NDJSON only
+    the failed lines are.
+    """
+    input_dir, output_dir = input_dir.resolve(), output_dir.resolve()
+    if output_dir == input_dir or input_dir in output_dir.parents:
+        raise ValueError("Output directory must be outside the input directory")
+    decode = decode or resolve_decode_options()
+    manifest = Manifest(manifest_path or output_dir / MANIFEST_NAME)
+    items = discover(input_dir)
+    progress = Progress(len(items))
+    pending = []
+    for item in items:
+        status = manifest.status(item, output_dir)
+        if status == "done" or (status == "failed" and not retry_failed):
+            progress.skipped += 1
+        else:
+            pending.append(item)
+    report(f"{len(items)} inputs, {len(pending)} to process ({progress.skipped} already done)")
+
+    limit = asyncio.Semaphore(max(jobs, 1))
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(jobs, 1))
+    last_report = time.monotonic()
+
+    async def transcribe_vcon(vcon: Vcon) -> tuple[bytes, float]:
+        async with limit:
+            enriched, stats = await process_vcon(
+                vcon, model=model, language=language, on_existing=on_existing, decode=decode
+            )
+        if stats["failed"]:
+            raise _DialogsFailedError(f"{stats['failed']} dialog(s) failed")
+        return enriched.dump_json(), vcon_audio_seconds(vcon)
+
+    async def transcribe_audio(item: BatchItem, audio: bytes) -> tuple[bytes, float]:
+        digest = transcript_store.hash_audio(audio)
+        async with limit:
+            started = time.monotonic()
+            result = await transcribe_audio_bytes(
+                audio,
+                suffix=item.path.suffix.lower(),
+                model=model,
+                language=language,
+                decode=decode,
+            )
+            elapsed = time.monotonic() - started
+        effective_model = model or settings.mlx_model
+        doc = convert_result_to_wtf(
+            result, effective_model, elapsed, {"decode": decode.describe(result)}
+        )
+        if digest is not None:
+            model_name = model_manager.resolve_model_name(effective_model)
+            transcript_store.put(await digest, doc, model_name)
+        audio_seconds = result_duration(result) or estimate_audio_seconds(audio, item.path.suffix)
+        return json.dumps(doc).encode(), audio_seconds
+
+    async def transcribe_line(line: bytes) -> tuple[bytes, float, str | None]:
+        try:
+            vcon = await asyncio.to_thread(_validate, line)
+            data, audio_seconds = await transcribe_vcon(vcon)
+        except Exception as exc:
+            return line.rstrip(b"\r\n"), 0.0, f"{type(exc).__name__}: {exc}"
+        return data, audio_seconds, None
+
+    async def transcribe_ndjson(item: BatchItem) -> float:
+        """Stream the lines of ``item`` through a bounded window, checkpointing each one."""
+        output = output_dir / output_name(item)
+        partial = output.with_name(f".{output.name}.partial")
+        resume = output.with_name(f".{output.name}.resume")
+        entry = manifest.entries.get(item.name, {})
+        status = manifest.status(item, output_dir)
+        previous = None  # finished lines of an earlier run, reused by index
+        if status == "partial" and partial.exists():
+            os.replace(partial, resume)
+            previous = resume
+        elif status == "failed" and "failed_lines" in entry and output.exists():
+            previous = output
+        earlier_failed = entry.get("failed_lines", []) if previous else []
+        redo = set(earlier_failed) if retry_failed else set()
+        partial.parent.mkdir(parents=True, exist_ok=True)
+        manifest.record(item, "partial", failed_lines=[i for i in earlier_failed if i not in redo])
+
+        failed: list[int] = []
+        audio_seconds = 0.0
+        window: deque[tuple[int, Any]] = deque()
+        with (
+            open(item.path, "rb") as source,
+            open(previous or os.devnull, "rb") as earlier,
+            open(partial, "wb") as out,
+        ):
+
+            async def write_next() -> None:
+                nonlocal audio_seconds
+                index, pending_line = window.popleft()
+                if isinstance(pending_line, asyncio.Task):
+                    data, seconds, error = await pending_line
+                else:
+                    data, seconds, error = pending_line
+                if error is not None:
+                    failed.append(index)
+                    # Recorded before the line, so a resume never counts it as done
+                    manifest.record(item, "partial", failed_lines=failed)
+                    if error:
+                        logger.warning("%s line %d failed: %s", item.name, index, error)
+                audio_seconds += seconds
+                out.write(data + b"\n")
+                out.flush()
+                os.fsync(out.fileno())
+
+            try:
+                index = 0
+                reusing = previous is not None
+                while line := await asyncio.to_thread(source.readline):
+                    if not line.strip():
+                        continue
+                    done = earlier.readline() if reusing else b""
+                    reusing = done.endswith(b"\n")  # a torn last line is redone
+                    if reusing and index not in redo:
+                        # An empty error keeps an earlier failure recorded without logging it again
+                        was_failed = index in earlier_failed
+                        window.append((index, (done[:-1], 0.0, "" if was_failed else None)))
+                    else:
+                        window.append((index, asyncio.create_task(transcribe_line(line))))
+                    index += 1
+                    if len(window) >= 2 * max(jobs, 1):
+                        await write_next()
+                while window:
+                    await write_next()
+            finally:
+                tasks = [task for _, task in window if isinstance(task, asyncio.Task)]
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+        os.replace(partial, output)
+        resume.unlink(missing_ok=True)
+        if failed:
+            raise _LinesFailedError(failed, audio_seconds)
+        return audio_seconds
+
+    async def process(item: BatchItem, loaded: Any) -> tuple[bytes | None, float]:
+        """Output bytes and audio seconds; NDJSON writes its own output as it goes."""
+        if item.kind == "audio":
+            return await transcribe_audio(item, loaded)
+        if item.kind == "vcon":
+            return await transcribe_vcon(loaded)
+        return None, await transcribe_ndjson(item)
+
+    async def load() -> None:
+        for item in pending:
+            try:
+                loaded: Any = await asyncio.to_thread(_load, item)
+            except Exception as exc:
+                loaded = exc
+            await queue.put((item, loaded))
+        for _ in range(max(jobs, 1)):
+            await queue.put(None)
+
+    async def worker() -> None:
+        nonlocal last_report
+        while (entry := await queue.get()) is not None:
+            item, loaded = entry
+            started = time.monotonic()
+            try:
+                if isinstance(loaded, Exception):
+                    raise loaded
+                data, audio_seconds = await process(item, loaded)
+                if data is not None:
+                    await asyncio.to_thread(write_atomic, output_dir / output_name(item), data)
+            except _LinesFailedError as exc:
+                progress.failed += 1
+                progress.audio_seconds += exc.audio_seconds
+                manifest.record(
+                    item,
+                    "failed",
+                    error=str(exc),
+                    output=output_name(item),
+                    failed_lines=exc.lines,
+                )
+                logger.warning("%s: %s", item.name, exc)
+            except Exception as exc:
+                progress.failed += 1
+                error = f"{type(exc).__name__}: {exc}"
+                manifest.record(item, "failed", error=error)
+                logger.warning("%s failed: %s", item.name, error)
+            else:
+                progress.done += 1
+                progress.audio_seconds += audio_seconds
+                manifest.record(
+                    item,
+                    "done",
+                    output=output_name(item),
+                    audio_seconds=round(audio_seconds, 3),
+                    seconds=round(time.monotonic() - started, 3),
+                )
+                logger.info("%s done (%.1fs audio)", item.name, audio_seconds)
+            if time.monotonic() - last_report >= report_interval:
+                last_report = time.monotonic()
+                report(progress.line())
+
+    try:
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(load())
+            for _ in range(max(jobs, 1)):
+                tg.create_task(worker())
+    finally:
+        manifest.close()
+    report(progress.line())
+    return progress.summary()
+
+
+def _load(item: BatchItem) -> Any:
+    """Read and validate an input (runs in a thread, ahead of inference).
+
+    NDJSON inputs are streamed line by line when processed, so nothing is loaded.
+    """
+    if item.kind == "ndjson":
+        return None
+    data = item.path.read_bytes()
+    if item.kind == "audio":
+        return data
+    return _validate(data)
+
+
+def _validate(data: bytes) -> Vcon:
+    try:
+        vcon = Vcon.model_validate_json(data)
+    except ValidationError as exc:
+        raise ValueError(f"invalid vCon: {exc.error_count()} validation error(s)") from None
+    if "dialog" not in vcon.model_fields_set:
+        raise ValueError("vCon has no dialog")
+    return vcon
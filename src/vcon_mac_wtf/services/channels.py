@@ -0,0 +1,82 @@
+"""Splitting multi-channel recordings into one mono track per channel."""
+
+import asyncio
+import io
+import logging
+import wave
+
+from ..engine.probe import wav_format
+
+logger = logging.getLogger(__name__)
+
+# WAVE format tags that hold integer PCM samples
+PCM_FORMAT_TAGS = (1, 0xFFFE)
+
+
+def split_wav_channels(audio_bytes: bytes) -> list[bytes] | None:
+    """Split an interleaved PCM WAV into mono WAVs, one per channel, without decoding.
+
+    Returns None if ``audio_bytes`` is not integer PCM WAV. Each output keeps
+    the source sample rate and width; Whisper resamples as usual.
+    """
+    fmt = wav_format(audio_bytes)
+    if fmt is None or fmt.format_tag not in PCM_FORMAT_TAGS or fmt.channels < 2:
+        return None
+    width = fmt.bits_per_sample // 8
+    frame = fmt.block_align or width * fmt.channels
+    if width == 0 or frame != width * fmt.channels:
+        return None
+    n_frames = fmt.data_size // frame
+    start = fmt.data_offset
+    end = start + n_frames * frame
+
+    tracks = []
+    for channel in range(fmt.channels):
+        mono = bytearray(n_frames * width)
+        # Strided copies: byte k of every sample of this channel
+        for k in range(width):
+            mono[k::width] = audio_bytes[start + channel * width + k : end : frame]
+        buf = io.BytesIO()
+        with wave.open(buf, "wb") as out:
+            out.setnchannels(1)
+            out.setsampwidth(width)
+            out.setframerate(fmt.sample_rate)
+            out.writeframes(mono)
+        tracks.append(buf.getvalue())
+    return tracks
+
+
+async def extract_channel_ffmpeg(audio_bytes: bytes, channel: int) -> bytes:
+    """Extract one channel of any ffmpeg-readable container as 16 kHz mono WAV."""
+    proc = await asyncio.create_subprocess_exec(
+        "ffmpeg",
+        "-nostdin",
+        "-loglevel",
+        "error",
+        "-i",
+        "pipe:0",
+        "-af",
+        f"pan=mono|c0=c{channel}",
+        "-ar",
+        "16000",
+        "-f",
+        "wav",
+        "pipe:1",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    out, err = await proc.communicate(audio_bytes)
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg channel {channel} extraction failed: {err.decode().strip()}")
+    return out
+
+
+async def split_channels(audio_bytes: bytes, channels: int) -> list[bytes]:
+    """Mono WAV per channel: in-process for PCM WAV, through ffmpeg otherwise."""
+    tracks = await asyncio.to_thread(split_wav_channels, audio_bytes)
+    if tracks is not None:
+        return tracks
+    return list(
+        await asyncio.gather(*(extract_channel_ffmpeg(audio_bytes, c) for c in range(channels)))
+    )
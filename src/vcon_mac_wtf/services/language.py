@@ -0,0 +1,114 @@
+"""Spoken-language identification without transcription.
+
+Only the start of the audio is decoded (``SCAN_SECONDS`` at most). A
+window of ``LANGUAGE_ID_SECONDS`` (Whisper's 30-second window at most) is
+taken from the first stretch of speech found by frame energy, so leading
+silence, ringing or hold music do not decide the language, then the engine
+runs the encoder and the language-token step on it. That is one encoder
+pass instead of a full decode, so the answer comes back in milliseconds to
+a few hundred milliseconds depending on the model.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any
+
+from ..config import settings
+from ..engine.mlx_engine import mlx_engine
+from ..engine.model_manager import model_manager
+from ..engine.scheduler import inference_scheduler
+from ..tracing import record_stage
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+WINDOW_SECONDS = 30.0  # the encoder's input length
+SCAN_SECONDS = 120.0  # how far into the audio to look for speech
+FRAME_SECONDS = 0.03
+MIN_SPEECH_SECONDS = 0.15  # voiced run that counts as speech
+PRE_ROLL_SECONDS = 0.2  # keep the onset of the first word
+SPEECH_THRESHOLD_DB = -40.0  # dBFS, raised to 10 dB over the noise floor
+
+
+def speech_onset(samples: Any, threshold_db: float = SPEECH_THRESHOLD_DB) -> int | None:
+    """Sample index where speech starts (by frame energy), or None if there is none.
+
+    ``samples`` are 16 kHz mono, float in [-1, 1] or int16.
+    """
+    import numpy as np
+
+    x = np.asarray(samples)
+    if x.dtype.kind in "iu":
+        x = x.astype(np.float32) / 32768.0
+    frame = int(FRAME_SECONDS * SAMPLE_RATE)
+    n_frames = len(x) // frame
+    if n_frames == 0:
+        return None
+    energy = np.mean(np.square(x[: n_frames * frame].reshape(n_frames, frame)), axis=1)
+    level = 10 * np.log10(energy + 1e-10)
+    threshold = max(threshold_db, float(np.percentile(level, 10)) + 10)
+    run = max(1, round(MIN_SPEECH_SECONDS / FRAME_SECONDS))
+    voiced = np.convolve((level > threshold).astype(np.int32), np.ones(run, np.int32), "valid")
+    hits = np.flatnonzero(voiced >= run)
+    if not len(hits):
+        return None
+    return max(0, int(hits[0]) * frame - int(PRE_ROLL_SECONDS * SAMPLE_RATE))
+
+
+async def identify_language(
+    audio_bytes: bytes,
+    suffix: str = ".wav",
+    model: str | None = None,
+    seconds: float | None = None,
+    find_speech: bool = True,
+    languages: list[str] | None = None,
+    top: int = 5,
+) -> dict[str, Any]:
+    """Rank the spoken languages of the audio's first speech window.
+
+    ``languages`` restricts the candidates (probabilities are renormalised
+    over them). Raises ValueError for audio that cannot be decoded.
+    """
+    model_name = model_manager.resolve_model_name(
+        model or settings.language_id_model or settings.mlx_model
+    )
+    seconds = min(seconds or settings.language_id_seconds, WINDOW_SECONDS)
+    scan = max(SCAN_SECONDS, seconds) if find_speech else seconds
+
+    started = time.perf_counter()
+    samples = await asyncio.to_thread(mlx_engine.decode_audio, audio_bytes, suffix, scan)
+    if samples is None:
+        raise ValueError("Audio could not be decoded")
+    record_stage("audio_decode", time.perf_counter() - started, model_name)
+
+    onset = speech_onset(samples) if find_speech else None
+    start = onset or 0
+    window = samples[start : start + int(seconds * SAMPLE_RATE)]
+
+    with mlx_engine.using(model_name):
+        async with inference_scheduler.slot(model_name, 0.0):
+            detected = time.perf_counter()
+            probs = await mlx_engine.detect_language(window, model_name)
+            record_stage("language_id", time.perf_counter() - detected, model_name)
+
+    if languages:
+        probs = {code: p for code, p in probs.items() if code in languages}
+        total = sum(probs.values()) or 1.0
+        probs = {code: p / total for code, p in probs.items()}
+    ranked = sorted(probs.items(), key=lambda item: item[1], reverse=True)[:top]
+    if not ranked:
+        raise ValueError("None of the requested languages is known to the model")
+    logger.info("Language %s (p=%.2f) from %s", ranked[0][0], ranked[0][1], model_name)
+    return {
+        "language": ranked[0][0],
+        "probability": round(ranked[0][1], 4),
+        "languages": [{"language": code, "probability": round(p, 4)} for code, p in ranked],
+        "window": {
+            "start": round(start / SAMPLE_RATE, 3),
+            "end": round((start + len(window)) / SAMPLE_RATE, 3),
+            "speech": onset is not None,
+        },
+        "model": model_name,
+        "processing_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
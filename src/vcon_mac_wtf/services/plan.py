@@ -0,0 +1,58 @@
+"""Execution plans: which optional pipeline stages a response actually uses.
+
+Word-level alignment is a second pass over the decoder's cross-attention
+after transcription, and segment detail and WTF conversion are work done on
+the result. A plan is built from what the caller asked to get back, so
+stages whose output would be discarded are not run. ``skipped`` names them
+for the ``X-Skipped-Stages`` header and the skipped-stage counter.
+"""
+
+from typing import NamedTuple
+
+# Optional stages in pipeline order
+STAGES = ("word_alignment", "segments", "wtf_conversion")
+
+# WTF documents always carry segments; ``segments`` drops word-level detail
+WTF_DETAIL_LEVELS = ("full", "segments")
+
+
+class ExecutionPlan(NamedTuple):
+    word_alignment: bool  # word timestamps from mlx_whisper
+    segments: bool  # per-segment detail in the response
+    wtf_conversion: bool
+
+    @property
+    def skipped(self) -> tuple[str, ...]:
+        return tuple(name for name in STAGES if not getattr(self, name))
+
+    def header(self) -> str:
+        return ",".join(self.skipped) or "none"
+
+
+def plan_openai(
+    response_format: str, timestamp_granularities: list[str] | None = None
+) -> ExecutionPlan:
+    """Plan for ``/v1/audio/transcriptions``.
+
+    ``text`` and ``json`` return only the transcript. ``verbose_json`` returns
+    segments and words unless ``timestamp_granularities`` names just one of
+    them; ``wtf`` always has segments and has words unless granularities
+    leave them out.
+    """
+    if response_format in ("text", "json"):
+        return ExecutionPlan(word_alignment=False, segments=False, wtf_conversion=False)
+    wants = set(timestamp_granularities or ("segment", "word"))
+    words = "word" in wants
+    if response_format == "wtf":
+        return ExecutionPlan(word_alignment=words, segments=True, wtf_conversion=True)
+    return ExecutionPlan(word_alignment=words, segments="segment" in wants, wtf_conversion=False)
+
+
+def plan_vcon(detail: str = "full", word_timestamps: bool = True) -> ExecutionPlan:
+    """Plan for ``/transcribe`` from the requested WTF detail level."""
+    if detail not in WTF_DETAIL_LEVELS:
+        raise ValueError(
+            f"Unknown WTF detail level {detail!r}; choose from {', '.join(WTF_DETAIL_LEVELS)}"
+        )
+    words = word_timestamps and detail == "full"
+    return ExecutionPlan(word_alignment=words, segments=True, wtf_conversion=True)
@@ -0,0 +1,377 @@
+"""Persistent transcript store with a full-text index over segments.
+
+With ``TRANSCRIPT_STORE`` set to a database path, every WTF document the
+server or the batch CLI produces is kept in SQLite, keyed by vCon uuid,
+dialog index, the SHA-256 of the audio and the model. Segment text goes into
+an FTS5 index with each segment's word timings, so a phrase search returns
+the calls it occurs in and where (start/end seconds) without re-running
+transcription.
+
+Writes stay off the request path. Callers start ``hash_audio`` (a worker
+thread) alongside transcription and hand the digest to ``put``, which only
+enqueues it with the document, so queued transcripts never pin their
+recordings in memory; a writer thread commits everything queued in one
+transaction every ``TRANSCRIPT_STORE_FLUSH_SECONDS``. A transcript is thus
+readable up to that long after its response was sent. When the queue is full
+(the disk cannot keep up) documents are dropped with a warning rather than
+slowing transcription. Reads open their own connection; the database runs in
+WAL mode so they do not wait for the writer.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import queue
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = 1000  # documents waiting for the writer
+BATCH_SIZE = 500  # documents per transaction at most
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    id INTEGER PRIMARY KEY,
+    vcon_uuid TEXT,
+    dialog INTEGER,
+    audio_hash TEXT NOT NULL,
+    model TEXT NOT NULL,
+    created REAL NOT NULL,
+    language TEXT,
+    duration REAL,
+    text TEXT,
+    wtf TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS transcripts_key
+    ON transcripts (audio_hash, model, coalesce(vcon_uuid, ''), coalesce(dialog, -1));
+CREATE INDEX IF NOT EXISTS transcripts_vcon ON transcripts (vcon_uuid, dialog);
+CREATE VIRTUAL TABLE IF NOT EXISTS segments USING fts5(
+    text,
+    transcript_id UNINDEXED,
+    segment UNINDEXED,
+    seg_start UNINDEXED,
+    seg_end UNINDEXED,
+    speaker UNINDEXED,
+    words UNINDEXED
+);
+"""
+
+# Same notion of a token as FTS5's default unicode61 tokenizer, for locating hits
+_TOKEN = re.compile(r"\w+")
+
+
+def audio_hash(audio: bytes) -> str:
+    """SHA-256 (hex) of the audio, the key transcripts are stored and looked up by."""
+    return hashlib.sha256(audio).hexdigest()
+
+
+class _Pending(NamedTuple):
+    audio_hash: str  # SHA-256 hex of the audio; the bytes themselves are not queued
+    wtf: dict[str, Any]
+    model: str
+    vcon_uuid: str | None
+    dialog: int | None
+    created: float
+
+
+class TranscriptStore:
+    """SQLite transcript store; an empty ``path`` disables it."""
+
+    def __init__(self, path: str | Path = "", flush_seconds: float = 1.0):
+        self.path = Path(path).expanduser() if path else None
+        self.flush_seconds = flush_seconds
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._ready = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def hash_audio(self, audio: bytes) -> "asyncio.Task[str] | None":
+        """Start hashing ``audio`` in a worker thread for a later ``put``; None when disabled.
+
+        Started before transcription, the digest is ready by the time the
+        transcript is, without the event loop hashing up to the upload limit.
+        """
+        if not self.enabled:
+            return None
+        return asyncio.ensure_future(asyncio.to_thread(audio_hash, audio))
+
+    def put(
+        self,
+        audio_hash: str,
+        wtf: dict[str, Any],
+        model: str,
+        vcon_uuid: str | None = None,
+        dialog: int | None = None,
+    ) -> None:
+        """Queue a transcript for the writer; never blocks, hashes or touches the disk."""
+        if not self.enabled:
+            return
+        self._start()
+        try:
+            self._queue.put_nowait(
+                _Pending(audio_hash, wtf, model, vcon_uuid, dialog, time.time())
+            )
+        except queue.Full:
+            self.dropped += 1
+            logger.warning("Transcript store queue full; transcript not stored")
+
+    def flush(self) -> None:
+        """Wait until everything queued so far is committed."""
+        if self._thread is None:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def close(self) -> None:
+        """Commit what is queued and stop the writer."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def _start(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="transcript-store", daemon=True
+                )
+                self._thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        with self._lock:
+            if not self._ready:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(self.path)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(SCHEMA)
+                conn.close()
+                self._ready = True
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # -- writer --------------------------------------------------------------
+
+    def _run(self) -> None:
+        conn = self._connect()
+        try:
+            while True:
+                batch, markers, stop = self._collect()
+                if batch:
+                    try:
+                        with conn:
+                            for pending in batch:
+                                _write(conn, pending)
+                    except sqlite3.Error:
+                        logger.exception("Failed to store %d transcript(s)", len(batch))
+                for marker in markers:
+                    marker.set()
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def _collect(self) -> tuple[list[_Pending], list[threading.Event], bool]:
+        """Block for the next item, then gather more for up to ``flush_seconds``."""
+        batch: list[_Pending] = []
+        markers: list[threading.Event] = []
+        item = self._queue.get()
+        deadline = time.monotonic() + self.flush_seconds
+        while True:
+            if item is None:
+                return batch, markers, True
+            if isinstance(item, threading.Event):
+                markers.append(item)
+                return batch, markers, False  # flush() is waiting: commit now
+            batch.append(item)
+            remaining = deadline - time.monotonic()
+            if len(batch) >= BATCH_SIZE or remaining <= 0:
+                return batch, markers, False
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                return batch, markers, False
+
+    # -- reads (blocking; call through asyncio.to_thread) -----------------------
+
+    def by_vcon(
+        self, vcon_uuid: str, dialog: int | None = None, model: str | None = None
+    ) -> list[dict[str, Any]]:
+        """Stored transcripts of a vCon, by dialog then newest first."""
+        where, params = ["vcon_uuid = ?"], [vcon_uuid]
+        if dialog is not None:
+            where.append("dialog = ?")
+            params.append(dialog)
+        return self._select(where, params, model)
+
+    def by_audio_hash(self, audio_hash: str, model: str | None = None) -> list[dict[str, Any]]:
+        """Stored transcripts of the audio with this SHA-256 (hex), newest first."""
+        return self._select(["audio_hash = ?"], [audio_hash.lower()], model)
+
+    def _select(self, where: list[str], params: list[Any], model: str | None) -> list[dict]:
+        if model is not None:
+            where.append("model = ?")
+            params.append(model)
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT * FROM transcripts WHERE "
+                + " AND ".join(where)
+                + " ORDER BY dialog, created DESC",
+                params,
+            ).fetchall()
+        finally:
+            conn.close()
+        return [_transcript(row) for row in rows]
+
+    def search(
+        self, phrase: str, limit: int = 20, model: str | None = None
+    ) -> list[dict[str, Any]]:
+        """Occurrences of ``phrase`` (case-insensitive) with their time offsets.
+
+        Matching is per segment, so a phrase spanning two segments is not
+        found. Offsets come from the word timestamps; without them, a hit
+        spans its segment.
+        """
+        tokens = _TOKEN.findall(phrase.lower())
+        if not tokens:
+            return []
+        sql = (
+            "SELECT s.text, s.segment, s.seg_start, s.seg_end, s.speaker, s.words,"
+            " t.vcon_uuid, t.dialog, t.audio_hash, t.model, t.created"
+            " FROM segments s JOIN transcripts t ON t.id = s.transcript_id"
+            " WHERE segments MATCH ?"
+        )
+        params: list[Any] = ['"' + " ".join(tokens) + '"']
+        if model is not None:
+            sql += " AND t.model = ?"
+            params.append(model)
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+        conn = self._connect()
+        try:
+            rows = conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+        hits = []
+        for row in rows:
+            source = {
+                "vcon_uuid": row["vcon_uuid"],
+                "dialog": row["dialog"],
+                "audio_hash": row["audio_hash"],
+                "model": row["model"],
+                "segment": row["segment"],
+                "speaker": row["speaker"],
+                "text": row["text"],
+            }
+            spans = _locate(tokens, json.loads(row["words"]))
+            for start, end in spans or [(row["seg_start"], row["seg_end"])]:
+                hits.append({**source, "start": start, "end": end})
+        return hits[:limit]
+
+
+def _write(conn: sqlite3.Connection, pending: _Pending) -> None:
+    """Insert or replace one transcript and its segments (inside the writer's transaction)."""
+    audio_hash = pending.audio_hash
+    doc = pending.wtf
+    transcript = doc.get("transcript") or {}
+    row = conn.execute(
+        "SELECT id FROM transcripts WHERE audio_hash = ? AND model = ?"
+        " AND vcon_uuid IS ? AND dialog IS ?",
+        (audio_hash, pending.model, pending.vcon_uuid, pending.dialog),
+    ).fetchone()
+    values = (
+        pending.created,
+        transcript.get("language"),
+        transcript.get("duration"),
+        transcript.get("text"),
+        json.dumps(doc),
+    )
+    if row is None:
+        transcript_id = conn.execute(
+            "INSERT INTO transcripts (vcon_uuid, dialog, audio_hash, model,"
+            " created, language, duration, text, wtf) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (pending.vcon_uuid, pending.dialog, audio_hash, pending.model, *values),
+        ).lastrowid
+    else:
+        transcript_id = row["id"]
+        conn.execute(
+            "UPDATE transcripts SET created = ?, language = ?, duration = ?, text = ?, wtf = ?"
+            " WHERE id = ?",
+            (*values, transcript_id),
+        )
+        conn.execute("DELETE FROM segments WHERE transcript_id = ?", (transcript_id,))
+    words = {word.get("id"): word for word in doc.get("words") or []}
+    conn.executemany(
+        "INSERT INTO segments (text, transcript_id, segment, seg_start, seg_end, speaker, words)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [
+            (
+                segment.get("text", ""),
+                transcript_id,
+                segment.get("id"),
+                segment.get("start"),
+                segment.get("end"),
+                segment.get("speaker"),
+                json.dumps(
+                    [
+                        [words[i].get("text", ""), words[i].get("start"), words[i].get("end")]
+                        for i in segment.get("words") or []
+                        if i in words
+                    ]
+                ),
+            )
+            for segment in doc.get("segments") or []
+        ],
+    )
+
+
+def _locate(tokens: list[str], words: list[list]) -> list[tuple[float, float]]:
+    """(start, end) of each run of ``words`` spelling out ``tokens``."""
+    flat: list[tuple[str, int]] = []  # (token, index of the word it came from)
+    for index, (text, _, _) in enumerate(words):
+        flat.extend((token, index) for token in _TOKEN.findall(text.lower()))
+    spans = []
+    n = len(tokens)
+    for i in range(len(flat) - n + 1):
+        if [token for token, _ in flat[i : i + n]] == tokens:
+            first, last = words[flat[i][1]], words[flat[i + n - 1][1]]
+            spans.append((first[1], last[2]))
+    return spans
+
+
+def _transcript(row: sqlite3.Row) -> dict[str, Any]:
+    return {
+        "vcon_uuid": row["vcon_uuid"],
+        "dialog": row["dialog"],
+        "audio_hash": row["audio_hash"],
+        "model": row["model"],
+        "created": row["created"],
+        "language": row["language"],
+        "duration": row["duration"],
+        "wtf": json.loads(row["wtf"]),
+    }
+
+
+def _create_store() -> TranscriptStore:
+    from ..config import settings
+
+    return TranscriptStore(settings.transcript_store, settings.transcript_store_flush_seconds)
+
+
+transcript_store = _create_store()
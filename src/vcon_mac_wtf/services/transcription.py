@@ -1,33 +1,165 @@
 """High-level transcription orchestration."""
 
 import logging
-from typing import Any
+import math
+import time
+from contextlib import nullcontext
 
-from ..engine.mlx_engine import mlx_engine
+from ..cancellation import current_cancel_token
+from ..config import settings
+from ..engine.decode import DecodeOptions, fallback_stats, resolve_decode_options
+from ..engine.latency import latency_predictor
+from ..engine.memory import estimate_audio_seconds, memory_governor
+from ..engine.mlx_engine import mlx_engine, result_duration
+from ..engine.model_manager import model_manager
+from ..engine.pipeline import Handoff, audio_pipeline
+from ..engine.probe import probe_duration
+from ..engine.scheduler import Ticket, inference_scheduler
+from ..engine.transcript import Transcript
+from ..metrics import DECODE_FALLBACK_RETRIES
+from ..tracing import (
+    record_estimated_completion,
+    record_estimated_wait,
+    record_memory,
+    record_stage,
+)
 
 logger = logging.getLogger(__name__)
 
 
+class AudioTooLongError(ValueError):
+    """Probed audio duration exceeds MAX_AUDIO_DURATION_SECONDS."""
+
+
+class DeadlineUnreachableError(Exception):
+    """The request is predicted to miss its deadline, so it is shed at admission.
+
+    ``retry_after`` is the seconds until the queue ahead should have drained
+    enough, or None when even an idle server could not finish in time.
+    """
+
+    def __init__(self, estimated_seconds: float, remaining: float, retry_after: int | None):
+        super().__init__(
+            f"Predicted completion in {estimated_seconds:.1f}s exceeds the "
+            f"{remaining:.1f}s left before the deadline"
+        )
+        self.estimated_seconds = estimated_seconds
+        self.retry_after = retry_after
+
+
+def admit(model: str, profile: str, audio_seconds: float) -> float:
+    """Predict the time to result for new work and shed it if it would miss its deadline.
+
+    The prediction (queue wait plus processing time from the latency model)
+    is attached to the request as ``X-Estimated-Completion-Seconds``.
+    """
+    model_name = model_manager.resolve_model_name(model)
+    processing = inference_scheduler.expected_seconds(model_name, audio_seconds, profile)
+    wait = inference_scheduler.estimated_wait_for(model_name, audio_seconds, profile)
+    estimate = wait + processing
+    record_estimated_completion(estimate)
+
+    token = current_cancel_token.get()
+    remaining = token.remaining() if token is not None else None
+    if settings.load_shedding and remaining is not None and estimate > remaining:
+        # Once the backlog ahead shrinks by the overshoot, the job fits again
+        retry_after = math.ceil(estimate - remaining) if processing <= remaining else None
+        raise DeadlineUnreachableError(estimate, remaining, retry_after)
+    return estimate
+
+
+def check_audio_duration(audio_bytes: bytes) -> float | None:
+    """Probe the duration from the container header and enforce the duration limit.
+
+    Returns None when the container could not be probed; the limit is only
+    applied to probed durations.
+    """
+    duration = probe_duration(audio_bytes)
+    limit = settings.max_audio_duration_seconds
+    if duration is not None and limit and duration > limit:
+        raise AudioTooLongError(f"Audio too long ({duration:.1f}s, max {limit:g}s)")
+    return duration
+
+
 async def transcribe_audio_bytes(
     audio_bytes: bytes,
     suffix: str = ".wav",
     model: str | None = None,
     language: str | None = None,
     word_timestamps: bool = True,
-) -> dict[str, Any]:
-    """Transcribe audio bytes and return the raw MLX Whisper result dict."""
+    decode: DecodeOptions | None = None,
+) -> Transcript:
+    """Transcribe audio bytes and return the result as a columnar ``Transcript``.
+
+    Joins the inference queue (shortest expected job first), decodes the
+    audio in the CPU stage of the pipeline (overlapping other requests'
+    inference), then waits for its slot and for memory admission: the request's projected
+    peak (from audio duration and model size) must fit in the configured
+    budget. ``decode`` defaults to the DECODE_PROFILE settings.
+    """
     logger.info(
         "Transcribing %d bytes (model=%s, language=%s)",
         len(audio_bytes),
         model,
         language,
     )
-    result = await mlx_engine.transcribe_bytes(
-        audio_bytes=audio_bytes,
-        suffix=suffix,
-        model=model,
-        language=language,
-        word_timestamps=word_timestamps,
+    model_name = model_manager.resolve_model_name(
+        model or mlx_engine.loaded_model or settings.mlx_model
     )
-    logger.info("Transcription complete: %d chars", len(result.get("text", "")))
+    decode = decode or resolve_decode_options()
+    audio_seconds = check_audio_duration(audio_bytes)
+    if audio_seconds is None:
+        audio_seconds = estimate_audio_seconds(audio_bytes, suffix)
+
+    # Counted from admission so a model hot swap drains queued requests too
+    with mlx_engine.using(model_name):
+        async with (
+            inference_scheduler.queued(model_name, audio_seconds, decode.profile) as ticket,
+            _decoded(audio_bytes, suffix, model_name, ticket) as handoff,
+        ):
+            submitted = time.perf_counter()
+            await inference_scheduler.wait(ticket)
+            handoff.release()  # decoded audio leaves the hand-off queue
+            record_stage("slot_wait", time.perf_counter() - submitted, model_name)
+            record_estimated_wait(ticket.estimated_wait)
+            load_required = model_name != mlx_engine.resident_model
+            async with memory_governor.reserve(
+                model_name, audio_seconds, load_required
+            ) as reserved:
+                record_stage("memory_wait", reserved.waited, model_name)
+                record_memory(estimated=reserved.nbytes)
+                started = time.perf_counter()
+                try:
+                    with audio_pipeline.inference.busy():
+                        result = await mlx_engine.transcribe_bytes(
+                            audio_bytes=audio_bytes,
+                            suffix=suffix,
+                            model=model,
+                            language=language,
+                            word_timestamps=word_timestamps,
+                            decode_options=decode.options,
+                            pcm=handoff.pcm,
+                        )
+                except Exception:
+                    mlx_engine.release_memory()
+                    raise
+    result = Transcript.from_result(result)  # for engines that hand back the plain dict
+    latency_predictor.observe(
+        model_name,
+        decode.profile,
+        result_duration(result) or audio_seconds,
+        time.perf_counter() - started,
+    )
+    retries = fallback_stats(result, decode.temperatures)["fallback_retries"]
+    DECODE_FALLBACK_RETRIES.labels(model_name, decode.profile).inc(retries)
+    logger.info("Transcription complete: %d chars", len(result.text))
     return result
+
+
+def _decoded(audio_bytes: bytes, suffix: str, model: str, ticket: Ticket):
+    """Hand-off of the engine's decoded audio, or no samples when the pipeline is off."""
+    if not audio_pipeline.enabled:
+        return nullcontext(Handoff(None, lambda: None))
+    return audio_pipeline.handoff(
+        lambda: mlx_engine.decode_audio(audio_bytes, suffix), model, ticket
+    )
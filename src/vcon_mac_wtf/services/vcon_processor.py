@@ -1,13 +1,24 @@
 """vCon processing: parse, extract audio, transcribe, enrich."""
 
+import asyncio
 import base64
 import logging
 import time
 from typing import Any
 
+from ..cancellation import RequestCancelledError
 from ..config import settings
-from .transcription import transcribe_audio_bytes
-from .wtf_converter import convert_result_to_wtf
+from ..engine.decode import DecodeOptions, resolve_decode_options
+from ..engine.model_manager import model_manager
+from ..engine.probe import probe_channels
+from ..metrics import record_error
+from ..models.vcon import Analysis, Dialog, Party, Vcon
+from ..tracing import span, stage
+from .channels import split_channels
+from .language import identify_language
+from .store import transcript_store
+from .transcription import AudioTooLongError, transcribe_audio_bytes
+from .wtf_converter import convert_result_to_wtf, merge_channel_wtf
 
 logger = logging.getLogger(__name__)
 
@@ -26,82 +37,329 @@ AUDIO_SUFFIXES: dict[str, str] = {
     "audio/webm": ".webm",
 }
 
+# What to do with a dialog that already has a matching wtf_transcription analysis
+EXISTING_POLICIES = ("skip", "replace", "append")
+ANALYSIS_VENDOR = "mlx-whisper"
+ANALYSIS_SCHEMA = "wtf-1.0"
+
+# 16 kHz 16-bit mono PCM, base64-encoded: rough size of one second in a vCon body
+VCON_BYTES_PER_SECOND = 32000 * 4 / 3
+
 
 async def process_vcon(
-    vcon_data: dict[str, Any],
+    vcon: Vcon,
     model: str | None = None,
     language: str | None = None,
     word_timestamps: bool = True,
-) -> dict[str, Any]:
+    on_existing: str | None = None,
+    model_policy: dict[str, Any] | None = None,
+    decode: DecodeOptions | None = None,
+    detect_language: bool = False,
+) -> tuple[Vcon, dict[str, Any]]:
     """Process a vCon: find audio dialogs, transcribe, and enrich with WTF analysis.
 
-    Returns the enriched vCon dict with analysis entries appended.
+    A dialog that already has a ``wtf_transcription`` analysis from this vendor,
+    model and schema is handled per ``on_existing`` (default
+    ``settings.on_existing_analysis``): ``skip`` leaves it untouched without
+    decoding or transcribing, ``replace`` re-transcribes and drops the old
+    entry (an entry covering other dialogs too is narrowed to those),
+    ``append`` re-transcribes and keeps both. ``model_policy`` (the
+    quality-tier selection behind ``model``) and the decode settings with
+    their fallback retries are recorded in each WTF document's extensions.
+    With ``detect_language`` and no ``language`` hint, each dialog's language
+    is identified from its first speech (see services.language) before
+    transcription, instead of by Whisper from the first 30 seconds, and the
+    ranking is recorded under ``extensions.language_id``.
+
+    Returns the enriched vCon (analysis entries appended) and per-dialog stats.
     """
+    policy = on_existing or settings.on_existing_analysis
+    if policy not in EXISTING_POLICIES:
+        raise ValueError(f"Unknown existing-analysis policy: {policy}")
+    decode = decode or resolve_decode_options()
     effective_model = model or settings.mlx_model
-    dialogs = vcon_data.get("dialog", [])
-    analysis = list(vcon_data.get("analysis", []))
+    model_label = model_manager.resolve_model_name(effective_model)
+    audio_dialogs = set(vcon.audio_dialogs)
+    analysis = list(vcon.analysis)
+    existing = _existing_transcriptions(analysis, model_label) if policy != "append" else {}
 
-    stats = {"processed": 0, "skipped": 0, "failed": 0, "total_time_ms": 0}
+    stats = {
+        "processed": 0,
+        "skipped": 0,
+        "failed": 0,
+        "total_time_ms": 0,
+        "fallback_retries": 0,
+    }
 
-    for i, dialog in enumerate(dialogs):
-        # Only process recording dialogs with audio mediatypes
-        if dialog.get("type") != "recording":
+    for i, dialog in enumerate(vcon.dialog):
+        # Only recording dialogs with audio mediatypes (selected during validation)
+        if i not in audio_dialogs:
             stats["skipped"] += 1
             continue
 
-        mediatype = dialog.get("mediatype", "")
-        if not mediatype.startswith("audio/"):
+        mediatype = dialog.mediatype
+        body = dialog.body
+        if not body:
             stats["skipped"] += 1
             continue
 
-        body = dialog.get("body")
-        if not body:
+        if i in existing and policy == "skip":
             stats["skipped"] += 1
+            logger.info("Dialog %d already transcribed with %s; skipping", i, model_label)
+            continue
+
+        with span("dialog", index=i, mediatype=mediatype):
+            try:
+                # Decode base64url body to bytes
+                with stage("decode", model_label):
+                    audio_bytes = _decode_audio_body(body, dialog.encoding or "base64url")
+                digest = transcript_store.hash_audio(audio_bytes)
+                suffix = AUDIO_SUFFIXES.get(mediatype, ".wav")
+                language_id = None
+                if detect_language and not language:
+                    language_id = await _identify_language(audio_bytes, suffix, i)
+                dialog_language = language_id["language"] if language_id else language
+
+                start = time.monotonic()
+                channel_speakers = _channel_speakers(dialog, audio_bytes)
+                if channel_speakers:
+                    wtf_doc = await _transcribe_channels(
+                        audio_bytes,
+                        channel_speakers,
+                        vcon.parties,
+                        effective_model,
+                        dialog_language,
+                        word_timestamps,
+                        decode,
+                        model_policy,
+                    )
+                    elapsed = time.monotonic() - start
+                    wtf_doc["metadata"]["processing_time"] = elapsed
+                else:
+                    result = await transcribe_audio_bytes(
+                        audio_bytes=audio_bytes,
+                        suffix=suffix,
+                        model=effective_model,
+                        language=dialog_language,
+                        word_timestamps=word_timestamps,
+                        decode=decode,
+                    )
+                    elapsed = time.monotonic() - start
+
+                    # Convert to WTF
+                    extensions = _extensions(decode.describe(result), model_policy)
+                    with stage("wtf_conversion", model_label):
+                        wtf_doc = convert_result_to_wtf(
+                            result, effective_model, elapsed, extensions
+                        )
+
+                if language_id is not None:
+                    wtf_doc["extensions"]["language_id"] = language_id
+
+                # Append analysis entry, taking this dialog out of the one it supersedes
+                if i in existing:
+                    analysis = _release_dialog(analysis, existing, i)
+                analysis.append(
+                    Analysis(
+                        type="wtf_transcription",
+                        dialog=i,
+                        mediatype="application/json",
+                        vendor=ANALYSIS_VENDOR,
+                        product=effective_model,
+                        schema=ANALYSIS_SCHEMA,
+                        body=wtf_doc,
+                        encoding="json",
+                    )
+                )
+                if digest is not None:
+                    transcript_store.put(await digest, wtf_doc, model_label, vcon.uuid, i)
+
+                stats["processed"] += 1
+                stats["fallback_retries"] += wtf_doc["extensions"]["decode"]["fallback_retries"]
+                stats["total_time_ms"] += int(elapsed * 1000)
+                logger.info("Dialog %d transcribed (%.1fs)", i, elapsed)
+
+            except RequestCancelledError:
+                raise  # abandon the whole vCon, not just this dialog
+
+            except AudioTooLongError as exc:
+                stats["failed"] += 1
+                logger.warning("Dialog %d rejected: %s", i, exc)
+
+            except Exception as exc:
+                record_error(exc)
+                stats["failed"] += 1
+                logger.exception("Failed to transcribe dialog %d", i)
+
+    return vcon.model_copy(update={"analysis": analysis}), stats
+
+
+def vcon_audio_seconds(vcon: dict[str, Any] | Vcon) -> float:
+    """Audio seconds in a vCon from dialog durations, else from the body size.
+
+    Cheap enough to run before decoding anything (routing, model selection).
+    Takes a validated ``Vcon`` or, in the router, the parsed JSON as is.
+    """
+    if isinstance(vcon, Vcon):
+        dialogs = [(d.type, d.duration, d.body) for d in vcon.dialog]
+    else:
+        dialogs = [
+            (d.get("type"), d.get("duration"), d.get("body"))
+            for d in vcon.get("dialog") or []
+            if isinstance(d, dict)
+        ]
+    total = 0.0
+    for dialog_type, duration, body in dialogs:
+        if dialog_type != "recording":
+            continue
+        if isinstance(duration, (int, float)) and duration > 0:
+            total += duration
+        else:
+            total += len(body or "") / VCON_BYTES_PER_SECOND
+    return total
+
+
+def _existing_transcriptions(analysis: list[Analysis], model_label: str) -> dict[int, Analysis]:
+    """Dialog index -> existing wtf_transcription entry from this vendor, model and schema.
+
+    ``product`` is compared after alias resolution, so an entry written for
+    ``turbo`` matches a request for ``mlx-community/whisper-turbo``.
+    """
+    found: dict[int, Analysis] = {}
+    for entry in analysis:
+        if entry.type != "wtf_transcription":
             continue
+        if entry.vendor != ANALYSIS_VENDOR or entry.schema_ != ANALYSIS_SCHEMA:
+            continue
+        product = entry.product
+        if not product or model_manager.resolve_model_name(product) != model_label:
+            continue
+        dialog = entry.dialog
+        for index in dialog if isinstance(dialog, list) else [dialog]:
+            if isinstance(index, int):
+                found.setdefault(index, entry)
+    return found
+
+
+def _release_dialog(
+    analysis: list[Analysis], existing: dict[int, Analysis], index: int
+) -> list[Analysis]:
+    """``analysis`` without dialog ``index`` in the existing entry it is replaced from.
+
+    An entry for that dialog alone is dropped. One covering several dialogs
+    still holds the others' transcripts, so it stays, narrowed to them.
+    """
+    old = existing[index]
+    remaining = [d for d in old.dialog if d != index] if isinstance(old.dialog, list) else []
+    if not remaining:
+        return [a for a in analysis if a is not old]
+    narrowed = old.model_copy(update={"dialog": remaining})
+    for dialog in remaining:
+        if existing.get(dialog) is old:
+            existing[dialog] = narrowed
+    return [narrowed if a is old else a for a in analysis]
+
+
+async def _identify_language(audio_bytes: bytes, suffix: str, index: int) -> dict | None:
+    """Language ranking for a dialog, or None to leave detection to Whisper."""
+    try:
+        return await identify_language(audio_bytes, suffix)
+    except ValueError as exc:
+        logger.warning("Dialog %d: language identification skipped: %s", index, exc)
+        return None
 
-        try:
-            # Decode base64url body to bytes
-            audio_bytes = _decode_audio_body(body, dialog.get("encoding", "base64url"))
-            suffix = AUDIO_SUFFIXES.get(mediatype, ".wav")
 
+def _channel_speakers(dialog: Dialog, audio_bytes: bytes) -> list[int] | None:
+    """Party index per audio channel, when the dialog maps one party to each channel.
+
+    In vCon, a recording's ``parties`` list gives the party (or parties) on each
+    channel in channel order. Returns None for single-channel audio, when
+    splitting is disabled, or when the parties do not line up with the channels.
+    """
+    parties = dialog.parties
+    if not settings.channel_split or not isinstance(parties, list) or len(parties) < 2:
+        return None
+    if probe_channels(audio_bytes) != len(parties):
+        return None
+    speakers = []
+    for channel, entry in enumerate(parties):
+        if isinstance(entry, list):
+            entry = entry[0] if entry else channel
+        speakers.append(entry if isinstance(entry, int) else channel)
+    return speakers
+
+
+def _party_label(parties: list[Party], index: int) -> str:
+    party = parties[index] if 0 <= index < len(parties) else None
+    if party is not None:
+        for label in (party.name, party.tel, party.mailto):
+            if label:
+                return label
+    return f"Party {index}"
+
+
+async def _transcribe_channels(
+    audio_bytes: bytes,
+    speakers: list[int],
+    parties: list[Party],
+    model: str,
+    language: str | None,
+    word_timestamps: bool,
+    decode: DecodeOptions,
+    model_policy: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Transcribe each channel concurrently and merge into one speaker-attributed WTF doc."""
+    model_label = model_manager.resolve_model_name(model)
+    with stage("channel_split", model_label, channels=len(speakers)):
+        tracks = await split_channels(audio_bytes, len(speakers))
+
+    async def transcribe_channel(channel: int, track: bytes) -> dict[str, Any]:
+        with span("channel", index=channel, party=speakers[channel]):
             start = time.monotonic()
             result = await transcribe_audio_bytes(
-                audio_bytes=audio_bytes,
-                suffix=suffix,
-                model=effective_model,
+                audio_bytes=track,
+                suffix=".wav",
+                model=model,
                 language=language,
                 word_timestamps=word_timestamps,
+                decode=decode,
             )
-            elapsed = time.monotonic() - start
-
-            # Convert to WTF
-            wtf_doc = convert_result_to_wtf(result, effective_model, elapsed)
-
-            # Append analysis entry
-            analysis.append(
-                {
-                    "type": "wtf_transcription",
-                    "dialog": i,
-                    "mediatype": "application/json",
-                    "vendor": "mlx-whisper",
-                    "product": effective_model,
-                    "schema": "wtf-1.0",
-                    "body": wtf_doc,
-                    "encoding": "json",
-                }
-            )
+            return {"result": result, "elapsed": time.monotonic() - start}
+
+    try:
+        async with asyncio.TaskGroup() as tg:
+            tasks = [tg.create_task(transcribe_channel(c, t)) for c, t in enumerate(tracks)]
+    except ExceptionGroup as group:
+        # One channel failing fails the dialog; surface it as the single-channel path would
+        cancelled = [e for e in group.exceptions if isinstance(e, RequestCancelledError)]
+        raise (cancelled or group.exceptions)[0] from None
 
-            stats["processed"] += 1
-            stats["total_time_ms"] += int(elapsed * 1000)
-            logger.info("Dialog %d transcribed (%.1fs)", i, elapsed)
+    with stage("wtf_conversion", model_label):
+        docs = []
+        for channel, task in enumerate(tasks):
+            out = task.result()
+            if not out["result"].text.strip():
+                continue  # silent channel: nothing to attribute
+            extensions = _extensions(decode.describe(out["result"]), model_policy)
+            doc = convert_result_to_wtf(out["result"], model, out["elapsed"], extensions)
+            speaker = speakers[channel]
+            docs.append((speaker, _party_label(parties, speaker), doc))
+        if not docs:
+            # Every channel silent: convert one so the usual empty-transcript error surfaces
+            convert_result_to_wtf(tasks[0].result()["result"], model, 0.0)
+        merged = merge_channel_wtf(docs, 0.0)
+    merged["extensions"] = {
+        **(merged.get("extensions") or {}),
+        "channels": {str(c): speaker for c, speaker in enumerate(speakers)},
+    }
+    return merged
 
-        except Exception:
-            stats["failed"] += 1
-            logger.exception("Failed to transcribe dialog %d", i)
 
-    enriched = dict(vcon_data)
-    enriched["analysis"] = analysis
-    return enriched, stats
+def _extensions(decode: dict[str, Any], model_policy: dict[str, Any] | None) -> dict[str, Any]:
+    extensions = {"decode": decode}
+    if model_policy is not None:
+        extensions["model_policy"] = model_policy
+    return extensions
 
 
 def _decode_audio_body(body: str, encoding: str) -> bytes:
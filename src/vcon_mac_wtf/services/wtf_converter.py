@@ -1,27 +1,246 @@
 """Bridge to the wtf-transcript-converter library."""
 
 import logging
+import math
 from typing import Any
 
+from ..engine.transcript import Transcript
+
 logger = logging.getLogger(__name__)
 
+# WhisperConverter's punctuation test: a stripped word that is a substring of this
+_PUNCTUATION = ".,!?;:()[]{}'\"-"
+
+# Per-result counts in ``extensions.decode`` (engine.decode.fallback_stats)
+FALLBACK_COUNTS = ("windows", "fallback_windows", "fallback_retries")
+
 
 def convert_result_to_wtf(
-    whisper_result: dict[str, Any],
+    whisper_result: Transcript | dict[str, Any],
     model_name: str,
     processing_time_seconds: float,
+    extensions: dict[str, Any] | None = None,
 ) -> dict[str, Any]:
-    """Convert an MLX Whisper result dict to WTF format using WhisperConverter.
+    """Convert an MLX Whisper result to WTF format using WhisperConverter.
+
+    A ``Transcript`` is written from its columns: the library builds and
+    validates the header (transcript, metadata, quality, extensions) and the
+    segments and words are emitted directly with the same values and checks,
+    without an intermediate dict and model per word. ``extensions`` (e.g.
+    the model-policy selection or decode settings) are merged into the
+    document's ``extensions``.
 
     Returns the WTF document as a JSON-serializable dict.
     """
+    if isinstance(whisper_result, Transcript):
+        doc = _transcript_to_wtf(whisper_result, model_name, processing_time_seconds)
+    else:
+        from wtf_transcript_converter.providers.whisper import WhisperConverter
+
+        # Augment the result with metadata the converter expects
+        augmented = dict(whisper_result)
+        augmented["model"] = model_name
+        augmented["processing_time"] = processing_time_seconds
+
+        converter = WhisperConverter()
+        wtf_doc = converter.convert_to_wtf(augmented)
+        doc = wtf_doc.model_dump(exclude_none=True)
+    if extensions:
+        doc.setdefault("extensions", {}).update(extensions)
+    return doc
+
+
+def _transcript_to_wtf(
+    transcript: Transcript, model_name: str, processing_time_seconds: float
+) -> dict[str, Any]:
+    """WTF document for a Transcript, equal to WhisperConverter's for the same result."""
     from wtf_transcript_converter.providers.whisper import WhisperConverter
 
-    # Augment the result with metadata the converter expects
-    augmented = dict(whisper_result)
-    augmented["model"] = model_name
-    augmented["processing_time"] = processing_time_seconds
+    header = {"text": transcript.text, "language": transcript.language}
+    if transcript.duration is not None:
+        header["duration"] = transcript.duration
+    header["model"] = model_name
+    header["processing_time"] = processing_time_seconds
+    head = WhisperConverter().convert_to_wtf(header).model_dump(exclude_none=True)
+
+    segments: list[dict[str, Any]] = []
+    words: list[dict[str, Any]] = []
+    logprobs = transcript.seg_scores["avg_logprob"]
+    low_confidence = 0
+    previous_end = None
+    for segment in transcript:
+        i = segment.index
+        start, end = segment.start, segment.end
+        _check_item("Segment", i, segment.text, start, end)
+        if previous_end is not None and start < previous_end:
+            raise ValueError(f"Segments {i - 1} and {i} have overlapping times")
+        previous_end = end
+        logprob = logprobs[i]
+        out: dict[str, Any] = {
+            "id": i,
+            "start": start,
+            "end": end,
+            "text": segment.text.strip(),
+            "confidence": 0.5 if math.isnan(logprob) else _clamp(math.exp(logprob)),
+            "speaker": 0,
+        }
+        word_ids: list[int] = []
+        if transcript.has_words:
+            out["words"] = word_ids
+        segments.append(out)
+        for word in segment.words:
+            text = word.text
+            word_id = word.index
+            _check_item("Word", word_id, text, word.start, word.end)
+            probability = word.probability
+            confidence = 0.5 if probability is None else _clamp(probability)
+            low_confidence += confidence < 0.5
+            word_ids.append(word_id)
+            words.append(
+                {
+                    "id": word_id,
+                    "start": word.start,
+                    "end": word.end,
+                    "text": text.strip(),
+                    "confidence": confidence,
+                    "speaker": 0,
+                    "is_punctuation": text.strip() in _PUNCTUATION,
+                }
+            )
+
+    present = [value for value in logprobs if not math.isnan(value)]
+    if not segments:
+        confidence = 0.0
+    elif present:
+        confidence = _clamp(math.exp(sum(present) / len(present)))
+    else:
+        confidence = 0.5
+    head["transcript"]["confidence"] = confidence
+    head["quality"]["average_confidence"] = confidence
+    head["quality"]["low_confidence_words"] = low_confidence
+    head["extensions"]["whisper"]["tokens"] = transcript.seg_tokens.tolist()
+
+    doc = {"transcript": head["transcript"], "segments": segments, "metadata": head["metadata"]}
+    if words:
+        doc["words"] = words
+    doc["extensions"] = head["extensions"]
+    doc["quality"] = head["quality"]
+    return doc
+
+
+def _check_item(kind: str, index: int, text: str, start: float, end: float) -> None:
+    """The checks the WTF models apply to each segment and word."""
+    if not text.strip():
+        raise ValueError(f"{kind} text cannot be empty")
+    if start < 0 or end < 0:
+        raise ValueError(f"{kind} {index}: times must be >= 0")
+    if end <= start:
+        raise ValueError(f"{kind} {index}: end time ({end}) must be after start time ({start})")
+
+
+def _clamp(confidence: float) -> float:
+    return max(0.0, min(1.0, confidence))
+
+
+def merge_channel_wtf(
+    channel_docs: list[tuple[int | str, str, dict[str, Any]]],
+    processing_time_seconds: float,
+) -> dict[str, Any]:
+    """Merge per-channel WTF documents into one time-ordered transcript.
+
+    ``channel_docs`` holds ``(speaker, label, wtf_doc)`` per channel. Segments
+    and words keep their channel's speaker and are interleaved by start time.
+    Speech on separate channels may overlap (crosstalk), which the
+    single-speaker WTFDocument model rejects, so the merge is assembled as a
+    plain dict. Extensions are the first channel's, with the decode fallback
+    counts summed over all channels.
+    """
+    segments: list[dict[str, Any]] = []
+    words: list[dict[str, Any]] = []
+    for speaker, _, doc in channel_docs:
+        doc_words = doc.get("words") or []
+        offset = len(words)
+        for word in doc_words:
+            words.append({**word, "speaker": speaker})
+        for seg in doc.get("segments") or []:
+            segments.append(
+                {
+                    **seg,
+                    "speaker": speaker,
+                    "words": [offset + i for i in seg.get("words") or []],
+                }
+            )
+
+    # Re-number words in time order, then point segments at the new ids
+    word_order = sorted(
+        range(len(words)), key=lambda i: (words[i]["start"], str(words[i]["speaker"]))
+    )
+    new_id = {old: new for new, old in enumerate(word_order)}
+    words = [{**words[old], "id": new} for new, old in enumerate(word_order)]
+    segments.sort(key=lambda s: (s["start"], str(s["speaker"])))
+    for i, seg in enumerate(segments):
+        seg["id"] = i
+        seg["words"] = sorted(new_id[w] for w in seg["words"])
+
+    speakers: dict[str, dict[str, Any]] = {}
+    for speaker, label, _ in channel_docs:
+        own = [s for s in segments if s["speaker"] == speaker]
+        speakers[str(speaker)] = {
+            "id": speaker,
+            "label": label,
+            "segments": [s["id"] for s in own],
+            "total_time": round(sum(s["end"] - s["start"] for s in own), 3),
+            "confidence": 1.0,  # attribution comes from the channel, not diarization
+        }
+
+    first = channel_docs[0][2]
+    confidences = [w["confidence"] for w in words if "confidence" in w]
+    if not confidences:
+        confidences = [s["confidence"] for s in segments if "confidence" in s]
+    confidence = sum(confidences) / len(confidences) if confidences else 0.0
+    duration = max(d["transcript"].get("duration", 0.0) for _, _, d in channel_docs)
+
+    metadata = dict(first.get("metadata") or {})
+    metadata["processing_time"] = processing_time_seconds
+    metadata["audio"] = {**(metadata.get("audio") or {}), "channels": len(channel_docs)}
+
+    merged: dict[str, Any] = {
+        "transcript": {
+            **first["transcript"],
+            "text": " ".join(s["text"].strip() for s in segments if s.get("text")),
+            "duration": duration,
+            "confidence": confidence,
+        },
+        "segments": segments,
+        "metadata": metadata,
+        "words": words,
+        "speakers": speakers,
+    }
+    if first.get("extensions"):
+        merged["extensions"] = _merge_extensions(
+            [d.get("extensions") or {} for _, _, d in channel_docs]
+        )
+    qualities = [d["quality"] for _, _, d in channel_docs if d.get("quality")]
+    if qualities:
+        merged["quality"] = {
+            **qualities[0],
+            "average_confidence": confidence,
+            "low_confidence_words": sum(q.get("low_confidence_words", 0) for q in qualities),
+            "processing_warnings": [
+                w for q in qualities for w in q.get("processing_warnings", [])
+            ],
+        }
+    return merged
+
 
-    converter = WhisperConverter()
-    wtf_doc = converter.convert_to_wtf(augmented)
-    return wtf_doc.model_dump(exclude_none=True)
+def _merge_extensions(channel_extensions: list[dict[str, Any]]) -> dict[str, Any]:
+    """First channel's extensions, with ``decode`` window and retry counts added up."""
+    merged = dict(channel_extensions[0])
+    decodes = [ext["decode"] for ext in channel_extensions if "decode" in ext]
+    if decodes:
+        decode = dict(decodes[0])
+        for key in FALLBACK_COUNTS:
+            if key in decode:
+                decode[key] = sum(d.get(key, 0) for d in decodes)
+        merged["decode"] = decode
+    return merged
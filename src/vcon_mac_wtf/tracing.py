@@ -0,0 +1,472 @@
+"""Per-request stage tracing: request IDs, Server-Timing headers and spans.
+
+Every HTTP request gets a RequestTrace carried in a context variable. Code on
+the request path wraps its work in ``stage()`` (timed, reported in the
+``Server-Timing`` header and the stage histogram) or ``span()`` (structural,
+e.g. one per vCon dialog). Spans are only materialised when an exporter is
+configured, so the default off state costs a context-variable lookup.
+
+Exporters are pluggable: in-memory (tests), JSON-lines file, or
+OpenTelemetry when ``opentelemetry-api`` is installed.
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+from .metrics import observe_stage
+
+logger = logging.getLogger(__name__)
+
+REQUEST_ID_HEADER = "x-request-id"
+SPAN_QUEUE_SIZE = 10000  # requests' spans waiting for the file writer
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    start_ns: int
+    end_ns: int = 0
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+class SpanExporter:
+    """Receives the finished spans of one request."""
+
+    def export(self, spans: list[Span]) -> None:
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        pass
+
+
+class InMemorySpanExporter(SpanExporter):
+    """Keeps exported spans in a list; intended for tests."""
+
+    def __init__(self):
+        self._spans: list[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, spans: list[Span]) -> None:
+        with self._lock:
+            self._spans.extend(spans)
+
+    def get_finished_spans(self) -> list[Span]:
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+
+
+class FileSpanExporter(SpanExporter):
+    """Appends spans as JSON lines to a file.
+
+    ``export`` runs at the end of every request, on the event loop, so it only
+    queues the spans; a writer thread serializes and appends them. When the
+    queue is full (the disk cannot keep up) spans are dropped with a warning.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=SPAN_QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def export(self, spans: list[Span]) -> None:
+        self._start()
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            self.dropped += 1
+            logger.warning("Span file queue full; spans not written")
+
+    def flush(self) -> None:
+        """Wait until everything exported so far is written."""
+        if self._thread is None:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def shutdown(self) -> None:
+        """Write what is queued and stop the writer."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def _start(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="span-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch, markers, stop = self._collect()
+            if batch:
+                try:
+                    with open(self.path, "a", encoding="utf-8") as fh:
+                        for spans in batch:
+                            fh.write(
+                                "".join(json.dumps(asdict(s), default=str) + "\n" for s in spans)
+                            )
+                except (OSError, TypeError, ValueError):
+                    logger.exception("Span export failed")
+            for marker in markers:
+                marker.set()
+            if stop:
+                return
+
+    def _collect(self) -> tuple[list[list[Span]], list[threading.Event], bool]:
+        """Block for the next item, then take whatever else is already queued."""
+        batch: list[list[Span]] = []
+        markers: list[threading.Event] = []
+        item = self._queue.get()
+        while True:
+            if item is None:
+                return batch, markers, True
+            if isinstance(item, threading.Event):
+                markers.append(item)
+                return batch, markers, False  # flush() is waiting: write now
+            batch.append(item)
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return batch, markers, False
+
+
+class OpenTelemetrySpanExporter(SpanExporter):
+    """Replays finished spans through the globally configured OpenTelemetry tracer.
+
+    Requires ``opentelemetry-api``; the SDK and its exporters are configured by
+    the deployment (e.g. ``opentelemetry-instrument``).
+    """
+
+    def __init__(self, tracer_name: str = "vcon_mac_wtf"):
+        from opentelemetry import trace as otel_trace
+
+        self._otel_trace = otel_trace
+        self._tracer = otel_trace.get_tracer(tracer_name)
+
+    def export(self, spans: list[Span]) -> None:
+        otel_spans: dict[str, Any] = {}
+        for s in sorted(spans, key=lambda s: s.start_ns):
+            parent = otel_spans.get(s.parent_id) if s.parent_id else None
+            context = self._otel_trace.set_span_in_context(parent) if parent else None
+            otel_span = self._tracer.start_span(
+                s.name, context=context, start_time=s.start_ns, attributes=s.attributes
+            )
+            otel_spans[s.span_id] = otel_span
+        for s in spans:
+            otel_spans[s.span_id].end(end_time=s.end_ns)
+
+
+_exporter: SpanExporter | None = None
+
+
+def set_exporter(exporter: SpanExporter | None) -> None:
+    """Install the span exporter (None disables span collection)."""
+    global _exporter
+    _exporter = exporter
+
+
+def get_exporter() -> SpanExporter | None:
+    return _exporter
+
+
+def create_exporter(kind: str, file_path: str = "traces.jsonl") -> SpanExporter | None:
+    """Build an exporter from its settings name: none, memory, file or otel."""
+    kind = kind.lower()
+    if kind in ("", "none"):
+        return None
+    if kind == "memory":
+        return InMemorySpanExporter()
+    if kind == "file":
+        return FileSpanExporter(file_path)
+    if kind == "otel":
+        try:
+            return OpenTelemetrySpanExporter()
+        except ImportError:
+            logger.warning("TRACING_EXPORTER=otel but opentelemetry-api is not installed")
+            return None
+    raise ValueError(f"Unknown tracing exporter: {kind}")
+
+
+class RequestTrace:
+    """Stage timings and spans collected for one request."""
+
+    def __init__(self, request_id: str, endpoint: str, collect_spans: bool):
+        self.request_id = request_id
+        self.endpoint = endpoint
+        self.trace_id = uuid.uuid4().hex
+        self.started = time.perf_counter()
+        self.stages: dict[str, float] = {}  # stage name -> accumulated seconds
+        self.spans: list[Span] | None = [] if collect_spans else None
+        self.memory: dict[str, int] = {}  # estimated/peak/current bytes
+        self.estimated_wait: float | None = None  # scheduler's predicted slot wait, seconds
+        # Predicted time to result at admission (queue wait + processing), seconds
+        self.estimated_completion: float | None = None
+        self._lock = threading.Lock()
+
+    def add_stage(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def note_memory(self, kind: str, nbytes: int, keep_max: bool = True) -> None:
+        with self._lock:
+            if keep_max:
+                nbytes = max(nbytes, self.memory.get(kind, 0))
+            self.memory[kind] = nbytes
+
+    def extra_headers(self) -> list[tuple[bytes, bytes]]:
+        """Memory and estimated-wait response headers for what was recorded."""
+        headers = [
+            (f"x-memory-{kind}-mb".encode("latin-1"), f"{nbytes / 1048576:.1f}".encode("latin-1"))
+            for kind, nbytes in self.memory.items()
+        ]
+        if self.estimated_wait is not None:
+            headers.append((b"x-estimated-wait-seconds", f"{self.estimated_wait:.1f}".encode()))
+        if self.estimated_completion is not None:
+            headers.append(
+                (b"x-estimated-completion-seconds", f"{self.estimated_completion:.1f}".encode())
+            )
+        return headers
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """Render the stage breakdown as a Server-Timing header value."""
+        parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages.items()]
+        parts.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(parts)
+
+    def new_span(self, name: str, attributes: dict[str, Any]) -> Span | None:
+        if self.spans is None:
+            return None
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            trace_id=self.trace_id,
+            span_id=os.urandom(8).hex(),
+            parent_id=parent.span_id if parent else None,
+            start_ns=time.time_ns(),
+            attributes={"request_id": self.request_id, **attributes},
+        )
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+
+current_trace: ContextVar[RequestTrace | None] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+class _SpanScope:
+    """Context manager for span() and stage(); a stage also records its duration."""
+
+    __slots__ = ("_name", "_model", "_attributes", "_is_stage", "_start", "_span", "_token")
+
+    def __init__(self, name: str, model: str, attributes: dict[str, Any], is_stage: bool):
+        self._name = name
+        self._model = model
+        self._attributes = attributes
+        self._is_stage = is_stage
+        self._span = None
+        self._token = None
+
+    def __enter__(self) -> "_SpanScope":
+        trace = current_trace.get()
+        if trace is not None and trace.spans is not None:
+            if self._model:
+                self._attributes["model"] = self._model
+            self._span = trace.new_span(self._name, self._attributes)
+            self._token = _current_span.set(self._span)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        seconds = time.perf_counter() - self._start
+        if self._span is not None:
+            self._span.end_ns = time.time_ns()
+            if exc_type is not None:
+                self._span.attributes["error"] = exc_type.__name__
+            _current_span.reset(self._token)
+        if self._is_stage:
+            observe_stage(self._name, seconds, self._model)
+            trace = current_trace.get()
+            if trace is not None:
+                trace.add_stage(self._name, seconds)
+
+
+def stage(name: str, model: str = "", **attributes: Any) -> _SpanScope:
+    """Time a processing stage of the current request."""
+    return _SpanScope(name, model, attributes, is_stage=True)
+
+
+def span(name: str, **attributes: Any) -> _SpanScope:
+    """Open a structural child span (no stage timing) in the current request."""
+    return _SpanScope(name, "", attributes, is_stage=False)
+
+
+def record_stage(name: str, seconds: float, model: str = "") -> None:
+    """Record a stage measured elsewhere (e.g. queue wait observed in a worker thread)."""
+    observe_stage(name, seconds, model)
+    trace = current_trace.get()
+    if trace is None:
+        return
+    trace.add_stage(name, seconds)
+    if trace.spans is not None:
+        end_ns = time.time_ns()
+        span_ = trace.new_span(name, {"model": model} if model else {})
+        span_.start_ns = end_ns - int(seconds * 1e9)
+        span_.end_ns = end_ns
+
+
+def record_memory(
+    estimated: int | None = None,
+    peak: int | None = None,
+    current: int | None = None,
+    python_peak: int | None = None,
+) -> None:
+    """Attach memory figures (bytes) to the current request.
+
+    Estimates and peaks keep the maximum over the request (e.g. across vCon
+    dialogs); current is the latest reading. ``python_peak`` is the request's
+    peak Python allocation (memory watch). Reported as ``X-Memory-*-MB``
+    response headers and in the request log line.
+    """
+    trace = current_trace.get()
+    if trace is None:
+        return
+    if estimated is not None:
+        trace.note_memory("estimated", estimated)
+    if peak is not None:
+        trace.note_memory("peak", peak)
+    if current is not None:
+        trace.note_memory("current", current, keep_max=False)
+    if python_peak is not None:
+        trace.note_memory("python-peak", python_peak)
+
+
+def record_estimated_wait(seconds: float) -> None:
+    """Add the scheduler's predicted wait to the current request (summed over dialogs)."""
+    trace = current_trace.get()
+    if trace is not None:
+        with trace._lock:
+            trace.estimated_wait = (trace.estimated_wait or 0.0) + seconds
+
+
+def record_estimated_completion(seconds: float) -> None:
+    """Attach the predicted time to result made when the request was admitted."""
+    trace = current_trace.get()
+    if trace is not None:
+        trace.estimated_completion = seconds
+
+
+def mark_parsed() -> None:
+    """Record the time from request arrival until the handler runs as the ``parse`` stage.
+
+    Covers body receipt plus FastAPI's multipart/JSON parsing, which happen
+    before the endpoint function is called.
+    """
+    trace = current_trace.get()
+    if trace is not None and "parse" not in trace.stages:
+        record_stage("parse", trace.elapsed())
+
+
+def request_id() -> str | None:
+    trace = current_trace.get()
+    return trace.request_id if trace else None
+
+
+class TracingMiddleware:
+    """ASGI middleware assigning request IDs and emitting Server-Timing and trace logs.
+
+    Honors an incoming ``X-Request-ID`` header. Requests to ``endpoints`` are
+    logged at INFO as one JSON line with the stage breakdown; others at DEBUG.
+    """
+
+    def __init__(self, app, endpoints=()):
+        self.app = app
+        self.endpoints = frozenset(endpoints)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        rid = None
+        for key, value in scope.get("headers", []):
+            if key == b"x-request-id":
+                rid = value.decode("latin-1")[:128]
+                break
+        path = scope.get("path", "")
+        trace = RequestTrace(rid or uuid.uuid4().hex, path, collect_spans=_exporter is not None)
+        token = current_trace.set(trace)
+        root = span("http.request", method=scope.get("method", ""), path=path)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-request-id", trace.request_id.encode("latin-1")))
+                headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                headers.extend(trace.extra_headers())
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            with root:
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            current_trace.reset(token)
+            self._finish(trace, status)
+
+    def _finish(self, trace: RequestTrace, status: int) -> None:
+        level = logging.INFO if trace.endpoint in self.endpoints else logging.DEBUG
+        if logger.isEnabledFor(level):
+            record = {
+                "event": "request",
+                "request_id": trace.request_id,
+                "endpoint": trace.endpoint,
+                "status": status,
+                "total_ms": round(trace.elapsed() * 1000, 1),
+                "stages_ms": {k: round(v * 1000, 1) for k, v in trace.stages.items()},
+            }
+            if trace.estimated_wait is not None:
+                record["estimated_wait_s"] = round(trace.estimated_wait, 2)
+            if trace.estimated_completion is not None:
+                record["estimated_completion_s"] = round(trace.estimated_completion, 2)
+            if trace.memory:
+                record["memory_mb"] = {k: round(v / 1048576, 1) for k, v in trace.memory.items()}
+            logger.log(level, json.dumps(record))
+        exporter = _exporter
+        if exporter is not None and trace.spans:
+            try:
+                exporter.export(trace.spans)
+            except Exception:
+                logger.exception("Span export failed")
@@ -1,11 +1,15 @@
 """Shared test fixtures."""
 
+import os
 import struct
 from unittest.mock import MagicMock, patch
 
 import pytest
 from fastapi.testclient import TestClient
 
+# Keep the learned latency model in memory, not in the user's cache directory
+os.environ["LATENCY_MODEL_FILE"] = ""
+
 
 @pytest.fixture
 def sample_whisper_result():
@@ -63,6 +67,9 @@ def mock_mlx_engine(sample_whisper_result):
     with patch("vcon_mac_wtf.engine.mlx_engine.mlx_engine") as mock_eng:
         mock_eng.is_loaded = True
         mock_eng.loaded_model = "mlx-community/whisper-turbo"
+        mock_eng.resident_model = "mlx-community/whisper-turbo"
+        mock_eng.loading_model = None
+        mock_eng.memory_stats.return_value = {}
 
         async def fake_transcribe_bytes(**kwargs):
             return sample_whisper_result
@@ -81,6 +88,7 @@ def client(mock_mlx_engine):
     # Patch the engine at the module level before importing the app
     with patch("vcon_mac_wtf.main.mlx_engine", mock_mlx_engine), \
          patch("vcon_mac_wtf.routes.health.mlx_engine", mock_mlx_engine), \
+         patch("vcon_mac_wtf.routes.models.mlx_engine", mock_mlx_engine), \
          patch("vcon_mac_wtf.services.transcription.mlx_engine", mock_mlx_engine):
         from vcon_mac_wtf.main import app
         with TestClient(app) as c:
@@ -0,0 +1,156 @@
+"""Tests for the offline batch CLI."""
+
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+
+from vcon_mac_wtf.main import run
+from vcon_mac_wtf.services.batch import MANIFEST_NAME, Manifest, run_batch
+
+
+@pytest.fixture
+def engine(mock_mlx_engine):
+    with (
+        patch("vcon_mac_wtf.main.mlx_engine", mock_mlx_engine),
+        patch("vcon_mac_wtf.services.transcription.mlx_engine", mock_mlx_engine),
+    ):
+        yield mock_mlx_engine
+
+
+@pytest.fixture
+def inputs(tmp_path, sample_wav_bytes, sample_vcon):
+    root = tmp_path / "in"
+    (root / "calls").mkdir(parents=True)
+    (root / "greeting.wav").write_bytes(sample_wav_bytes)
+    (root / "calls" / "one.json").write_text(json.dumps(sample_vcon))
+    (root / "archive.ndjson").write_text(
+        "\n".join(json.dumps({**sample_vcon, "uuid": f"line-{i}"}) for i in range(2)) + "\n"
+    )
+    (root / "notes.txt").write_text("not an input")
+    return root
+
+
+async def test_processes_every_kind_of_input(engine, inputs, tmp_path):
+    out = tmp_path / "out"
+    lines = []
+    summary = await run_batch(inputs, out, report=lines.append)
+
+    assert summary["done"] == 3 and summary["failed"] == 0
+    assert summary["audio_hours"] > 0
+    assert "audio-hours/hour" in lines[-1]
+    assert engine.transcribe_bytes.call_count == 4
+
+    wtf = json.loads((out / "greeting.wav.wtf.json").read_text())
+    assert wtf["transcript"]["text"]
+    vcon = json.loads((out / "calls" / "one.json").read_text())
+    assert vcon["analysis"][0]["type"] == "wtf_transcription"
+    archive = (out / "archive.ndjson").read_text().splitlines()
+    assert [json.loads(line)["uuid"] for line in archive] == ["line-0", "line-1"]
+    assert not list(out.rglob("*.tmp"))
+
+
+async def test_resumes_from_manifest(engine, inputs, tmp_path, sample_vcon):
+    out = tmp_path / "out"
+    await run_batch(inputs, out, report=lambda line: None)
+    calls = engine.transcribe_bytes.call_count
+
+    summary = await run_batch(inputs, out, report=lambda line: None)
+    assert summary["skipped"] == 3 and summary["done"] == 0
+    assert engine.transcribe_bytes.call_count == calls
+
+    # A changed input is processed again
+    (inputs / "calls" / "one.json").write_text(json.dumps({**sample_vcon, "uuid": "changed"}))
+    summary = await run_batch(inputs, out, report=lambda line: None)
+    assert summary["done"] == 1 and summary["skipped"] == 2
+    assert json.loads((out / "calls" / "one.json").read_text())["uuid"] == "changed"
+    entries = [json.loads(line) for line in (out / MANIFEST_NAME).read_text().splitlines()]
+    assert [entry["status"] for entry in entries].count("done") == 4
+
+
+async def test_failed_inputs_are_retried_on_request(engine, inputs, tmp_path):
+    out = tmp_path / "out"
+    (inputs / "broken.json").write_text('{"dialog": "nope"}')
+    summary = await run_batch(inputs, out, report=lambda line: None)
+    assert summary["failed"] == 1
+    assert not (out / "broken.json").exists()
+
+    assert (await run_batch(inputs, out, report=lambda line: None))["skipped"] == 4
+    summary = await run_batch(inputs, out, retry_failed=True, report=lambda line: None)
+    assert summary["failed"] == 1 and summary["skipped"] == 3
+
+
+async def test_ndjson_keeps_good_lines_and_retries_failed_ones(engine, inputs, tmp_path):
+    out = tmp_path / "out"
+    archive = inputs / "archive.ndjson"
+    lines = archive.read_text().splitlines()
+    archive.write_text("\n".join([lines[0], '{"dialog": "nope"}', lines[1]]) + "\n")
+
+    summary = await run_batch(inputs, out, report=lambda line: None)
+    assert summary["failed"] == 1 and summary["done"] == 2
+    written = (out / "archive.ndjson").read_text().splitlines()
+    assert written[1] == '{"dialog": "nope"}'
+    assert [json.loads(written[i])["analysis"][0]["type"] for i in (0, 2)] == [
+        "wtf_transcription"
+    ] * 2
+    entry = Manifest(out / MANIFEST_NAME).entries["archive.ndjson"]
+    assert entry["status"] == "failed" and entry["failed_lines"] == [1]
+
+    # Only the failed line is redone; the finished ones are reused
+    calls = engine.transcribe_bytes.call_count
+    summary = await run_batch(inputs, out, retry_failed=True, report=lambda line: None)
+    assert summary["failed"] == 1 and summary["skipped"] == 2
+    assert engine.transcribe_bytes.call_count == calls
+    assert (out / "archive.ndjson").read_text().splitlines() == written
+
+
+async def test_interrupted_ndjson_resumes_after_last_line(
+    engine, tmp_path, sample_vcon, sample_whisper_result
+):
+    root = tmp_path / "in"
+    root.mkdir()
+    (root / "archive.ndjson").write_text(
+        "".join(json.dumps({**sample_vcon, "uuid": f"line-{i}"}) + "\n" for i in range(4))
+    )
+    out = tmp_path / "out"
+    stalled = asyncio.Event()
+
+    async def stall_after_two(**kwargs):
+        if engine.transcribe_bytes.call_count > 2:
+            stalled.set()
+            await asyncio.Event().wait()
+        return sample_whisper_result
+
+    engine.transcribe_bytes.side_effect = stall_after_two
+    run = asyncio.create_task(run_batch(root, out, jobs=1, report=lambda line: None))
+    await stalled.wait()
+    run.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await run
+    partial = out / ".archive.ndjson.partial"
+    assert len(partial.read_text().splitlines()) == 2
+    assert not (out / "archive.ndjson").exists()
+
+    async def transcribe(**kwargs):
+        return sample_whisper_result
+
+    engine.transcribe_bytes.reset_mock()
+    engine.transcribe_bytes.side_effect = transcribe
+    summary = await run_batch(root, out, report=lambda line: None)
+    assert summary["done"] == 1
+    assert engine.transcribe_bytes.call_count == 2
+    written = (out / "archive.ndjson").read_text().splitlines()
+    assert [json.loads(line)["uuid"] for line in written] == [f"line-{i}" for i in range(4)]
+    assert not list(out.glob(".archive.ndjson.*"))
+
+
+def test_cli_exit_code(engine, inputs, tmp_path, capsys):
+    with pytest.raises(SystemExit) as exc:
+        run(["batch", str(inputs), str(tmp_path / "out"), "--profile", "fast"])
+    assert exc.value.code == 0
+    assert "audio-hours/hour" in capsys.readouterr().out
+
+    with pytest.raises(SystemExit) as exc:
+        run(["batch", str(inputs), str(inputs / "out")])
+    assert exc.value.code == 2
@@ -0,0 +1,139 @@
+"""Tests for request deadlines, disconnect cancellation and cooperative aborts."""
+
+import asyncio
+import io
+import struct
+import time
+
+import pytest
+
+from vcon_mac_wtf.cancellation import (
+    CancellationMiddleware,
+    CancelToken,
+    RequestCancelledError,
+    current_cancel_token,
+)
+from vcon_mac_wtf.engine.simulated_engine import SimulatedWhisperEngine
+from vcon_mac_wtf.metrics import CANCELLED, WASTED_INFERENCE_SECONDS
+
+
+def test_token_deadline():
+    token = CancelToken(time.monotonic() + 60)
+    token.raise_if_cancelled()
+    assert 59 < token.remaining() <= 60
+
+    token = CancelToken(time.monotonic() - 1)
+    with pytest.raises(RequestCancelledError) as exc_info:
+        token.raise_if_cancelled()
+    assert exc_info.value.reason == "deadline"
+
+
+def test_deadline_header_returns_504(client, mock_mlx_engine, sample_wav_bytes):
+    async def slow_transcribe(**kwargs):
+        await asyncio.sleep(5)
+
+    mock_mlx_engine.transcribe_bytes.side_effect = slow_transcribe
+    before = CANCELLED.labels("/v1/audio/transcriptions", "deadline").value
+    start = time.monotonic()
+    resp = client.post(
+        "/v1/audio/transcriptions",
+        files={"file": ("test.wav", io.BytesIO(sample_wav_bytes), "audio/wav")},
+        data={"model": "turbo"},
+        headers={"X-Request-Timeout": "0.1"},
+    )
+    assert resp.status_code == 504
+    assert time.monotonic() - start < 2
+    assert CANCELLED.labels("/v1/audio/transcriptions", "deadline").value == before + 1
+
+
+def test_deadline_query_parameter(client, mock_mlx_engine, sample_vcon):
+    async def slow_transcribe(**kwargs):
+        await asyncio.sleep(5)
+
+    mock_mlx_engine.transcribe_bytes.side_effect = slow_transcribe
+    resp = client.post("/transcribe?timeout=0.1", json=sample_vcon)
+    assert resp.status_code == 504
+
+
+async def test_disconnect_cancels_queued_work():
+    cancelled = asyncio.Event()
+
+    async def app(scope, receive, send):
+        await receive()
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    middleware = CancellationMiddleware(app, endpoints=["/transcribe"])
+    messages = [{"type": "http.request", "body": b"{}", "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await asyncio.sleep(0.05)
+        return {"type": "http.disconnect"}
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "path": "/transcribe", "headers": [], "query_string": b""}
+    await asyncio.wait_for(middleware(scope, receive, send), timeout=2)
+    assert cancelled.is_set()
+    assert sent[0]["status"] == 499
+
+
+def _long_wav(path, seconds: int) -> None:
+    # Header only: the simulated engine reads the duration from the header
+    data_size = seconds * 16000 * 2
+    header = struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_size, b"WAVE", b"fmt ", 16, 1, 1, 16000, 32000, 2, 16,
+        b"data", data_size,
+    )  # fmt: skip
+    path.write_bytes(header)
+
+
+async def test_inference_aborts_at_window_boundary(tmp_path):
+    wav = tmp_path / "long.wav"
+    _long_wav(wav, 3600)
+    engine = SimulatedWhisperEngine(real_time_factor=0.002)  # 60 ms per window
+    model = "mlx-community/whisper-tiny"
+    wasted_before = WASTED_INFERENCE_SECONDS.labels(model, "deadline").value
+
+    token = CancelToken(time.monotonic() + 0.1)
+    ctx = current_cancel_token.set(token)
+    try:
+        start = time.monotonic()
+        with pytest.raises(RequestCancelledError):
+            await engine.transcribe(str(wav), model=model)
+    finally:
+        current_cancel_token.reset(ctx)
+    # 120 windows would take 7.2 s; the abort lands on the next window boundary
+    assert time.monotonic() - start < 1
+    assert WASTED_INFERENCE_SECONDS.labels(model, "deadline").value > wasted_before
+
+
+async def test_cancelled_inference_keeps_caller_until_thread_stops(tmp_path):
+    wav = tmp_path / "long.wav"
+    _long_wav(wav, 3600)
+    engine = SimulatedWhisperEngine(real_time_factor=0.01)  # 300 ms per window
+    token = CancelToken()
+    ctx = current_cancel_token.set(token)
+    try:
+        task = asyncio.ensure_future(
+            engine.transcribe(str(wav), model="mlx-community/whisper-tiny")
+        )
+        while engine._running == 0:
+            await asyncio.sleep(0.01)
+        token.cancel("disconnect")  # as CancellationMiddleware does, then cancels the task
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    finally:
+        current_cancel_token.reset(ctx)
+    # The slot and memory reservation held by the caller outlive the worker
+    assert engine._running == 0
@@ -0,0 +1,133 @@
+"""Tests for per-channel splitting and speaker-attributed merging."""
+
+import base64
+import io
+import struct
+import wave
+
+from vcon_mac_wtf.engine.probe import probe_channels
+from vcon_mac_wtf.services.channels import split_wav_channels
+from vcon_mac_wtf.services.wtf_converter import convert_result_to_wtf, merge_channel_wtf
+
+
+def make_wav(channels: list[list[int]], sample_rate: int = 8000) -> bytes:
+    """Interleaved 16-bit PCM WAV from per-channel sample lists."""
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as out:
+        out.setnchannels(len(channels))
+        out.setsampwidth(2)
+        out.setframerate(sample_rate)
+        frames = [s for frame in zip(*channels) for s in frame]
+        out.writeframes(struct.pack(f"<{len(frames)}h", *frames))
+    return buf.getvalue()
+
+
+def read_wav(data: bytes) -> tuple[int, list[int]]:
+    with wave.open(io.BytesIO(data)) as wav:
+        raw = wav.readframes(wav.getnframes())
+        return wav.getnchannels(), list(struct.unpack(f"<{len(raw) // 2}h", raw))
+
+
+def test_split_wav_channels():
+    left, right = list(range(100)), [-s for s in range(100)]
+    stereo = make_wav([left, right])
+    assert probe_channels(stereo) == 2
+
+    tracks = split_wav_channels(stereo)
+    assert [read_wav(t) for t in tracks] == [(1, left), (1, right)]
+    assert split_wav_channels(make_wav([left])) is None
+    assert split_wav_channels(b"not audio") is None
+
+
+def _channel_result(text: str, start: float) -> dict:
+    return {
+        "text": f" {text}",
+        "language": "en",
+        "segments": [
+            {
+                "id": 0,
+                "start": start,
+                "end": start + 1.0,
+                "text": f" {text}",
+                "avg_logprob": -0.1,
+                "no_speech_prob": 0.01,
+                "words": [
+                    {"word": f" {text}", "start": start, "end": start + 1.0, "probability": 0.9}
+                ],
+            }
+        ],
+    }
+
+
+def test_stereo_dialog_transcribed_per_party(client, mock_mlx_engine, sample_vcon):
+    # The agent (party 1) is on channel 0 and speaks second; the caller speaks first
+    by_channel = {1: _channel_result("Hello", 0.0), -1: _channel_result("Hi there", 0.5)}
+    by_channel[1]["segments"].append({**by_channel[1]["segments"][0], "start": 2.0, "end": 3.0})
+    by_channel[1]["segments"][1]["words"] = [
+        {"word": " Bye", "start": 2.0, "end": 3.0, "probability": 0.9}
+    ]
+    by_channel[1]["segments"][1]["text"] = " Bye"
+
+    async def fake_transcribe_bytes(audio_bytes, **kwargs):
+        _, samples = read_wav(audio_bytes)
+        return by_channel[samples[0]]
+
+    mock_mlx_engine.transcribe_bytes.side_effect = fake_transcribe_bytes
+    stereo = make_wav([[1] * 8000, [-1] * 8000])
+    sample_vcon["dialog"][0]["body"] = base64.urlsafe_b64encode(stereo).decode()
+    sample_vcon["dialog"][0]["parties"] = [1, 0]
+
+    resp = client.post("/transcribe", json=sample_vcon)
+    assert resp.status_code == 200
+    assert mock_mlx_engine.transcribe_bytes.call_count == 2
+
+    wtf = resp.json()["analysis"][0]["body"]
+    assert [(s["text"].strip(), s["speaker"]) for s in wtf["segments"]] == [
+        ("Hello", 1),
+        ("Hi there", 0),
+        ("Bye", 1),
+    ]
+    assert [s["id"] for s in wtf["segments"]] == [0, 1, 2]
+    assert [w["speaker"] for w in wtf["words"]] == [1, 0, 1]
+    assert wtf["segments"][2]["words"] == [2]
+    assert wtf["speakers"]["0"]["label"] == "Alice"
+    assert wtf["speakers"]["1"] == {
+        "id": 1,
+        "label": "Bob",
+        "segments": [0, 2],
+        "total_time": 2.0,
+        "confidence": 1.0,
+    }
+    assert wtf["extensions"]["channels"] == {"0": 1, "1": 0}
+
+
+def test_stereo_without_party_mapping_not_split(client, mock_mlx_engine, sample_vcon):
+    stereo = make_wav([[1] * 800, [-1] * 800])
+    sample_vcon["dialog"][0]["body"] = base64.urlsafe_b64encode(stereo).decode()
+    sample_vcon["dialog"][0]["parties"] = [0, 1, 2]
+
+    resp = client.post("/transcribe", json=sample_vcon)
+    assert resp.status_code == 200
+    assert mock_mlx_engine.transcribe_bytes.call_count == 1
+
+
+def test_merge_sums_decode_fallbacks_across_channels():
+    decode = {"profile": "accurate", "windows": 2, "fallback_windows": 1, "fallback_retries": 1}
+    docs = []
+    for speaker, (text, retries) in enumerate([("Hello", 1), ("Hi there", 3)]):
+        doc = convert_result_to_wtf(
+            _channel_result(text, float(speaker)),
+            "turbo",
+            1.0,
+            {"decode": {**decode, "fallback_retries": retries}, "model_policy": {"tier": "fast"}},
+        )
+        docs.append((speaker, f"Party {speaker}", doc))
+
+    extensions = merge_channel_wtf(docs, 2.0)["extensions"]
+    assert extensions["decode"] == {
+        "profile": "accurate",
+        "windows": 4,
+        "fallback_windows": 2,
+        "fallback_retries": 4,
+    }
+    assert extensions["model_policy"] == {"tier": "fast"}
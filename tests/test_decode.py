@@ -0,0 +1,94 @@
+"""Tests for decode profiles, per-request overrides and fallback accounting."""
+
+import io
+
+import pytest
+
+from vcon_mac_wtf.engine.decode import (
+    FALLBACK_TEMPERATURES,
+    fallback_stats,
+    resolve_decode_options,
+)
+
+
+def test_profiles_and_overrides():
+    assert resolve_decode_options().options["temperature"] == FALLBACK_TEMPERATURES
+    fast = resolve_decode_options("fast")
+    assert fast.temperatures == (0.0,)
+    assert fast.options["condition_on_previous_text"] is False
+
+    # 0 keeps the ladder, a positive temperature pins it
+    assert resolve_decode_options("balanced", temperature=0).temperatures == (0.0, 0.4, 0.8)
+    assert resolve_decode_options("balanced", temperature=0.3).temperatures == (0.3,)
+    assert resolve_decode_options("accurate", temperature_fallback=False).temperatures == (0.0,)
+
+    tuned = resolve_decode_options("fast", logprob_threshold=-0.5, best_of=3)
+    assert tuned.options["logprob_threshold"] == -0.5
+    assert tuned.options["best_of"] == 3
+
+
+@pytest.mark.parametrize(
+    "profile,overrides",
+    [("slow", {}), ("fast", {"temperature": -1}), ("fast", {"best_of": 0}), ("fast", {"x": 1})],
+)
+def test_invalid_options(profile, overrides):
+    with pytest.raises(ValueError):
+        resolve_decode_options(profile, **overrides)
+
+
+def test_fallback_stats_groups_segments_by_window():
+    result = {
+        "segments": [
+            {"seek": 0, "temperature": 0.0},
+            {"seek": 0, "temperature": 0.0},
+            {"seek": 3000, "temperature": 0.4},
+            {"seek": 6000, "temperature": 0.8},
+        ]
+    }
+    stats = fallback_stats(result, (0.0, 0.4, 0.8))
+    assert stats == {"windows": 3, "fallback_windows": 2, "fallback_retries": 3}
+    assert fallback_stats({"segments": []}, (0.0,))["windows"] == 0
+
+
+def test_openai_endpoint_passes_decode_options(client, mock_mlx_engine, sample_wav_bytes):
+    resp = client.post(
+        "/v1/audio/transcriptions",
+        files={"file": ("test.wav", io.BytesIO(sample_wav_bytes), "audio/wav")},
+        data={"response_format": "verbose_json", "decode_profile": "balanced", "best_of": "2"},
+    )
+    assert resp.status_code == 200
+    assert resp.headers["X-Decode-Profile"] == "balanced"
+    assert resp.headers["X-Decode-Fallback-Retries"] == "0"
+    assert resp.json()["decode"]["windows"] == 2
+
+    options = mock_mlx_engine.transcribe_bytes.call_args.kwargs["decode_options"]
+    assert options["temperature"] == (0.0, 0.4, 0.8)
+    assert options["condition_on_previous_text"] is False
+    assert options["best_of"] == 2
+
+
+def test_openai_endpoint_rejects_unknown_profile(client, sample_wav_bytes):
+    resp = client.post(
+        "/v1/audio/transcriptions",
+        files={"file": ("test.wav", io.BytesIO(sample_wav_bytes), "audio/wav")},
+        data={"decode_profile": "slow"},
+    )
+    assert resp.status_code == 400
+
+
+def test_vcon_endpoint_records_decode_settings(
+    client, mock_mlx_engine, sample_vcon, sample_whisper_result
+):
+    sample_whisper_result["segments"][1]["temperature"] = 0.2
+    resp = client.post("/transcribe?decode_profile=accurate", json=sample_vcon)
+    assert resp.status_code == 200
+    assert resp.headers["X-Decode-Profile"] == "accurate"
+    assert resp.headers["X-Decode-Fallback-Retries"] == "1"
+
+    wtf = resp.json()["analysis"][0]["body"]
+    decode = wtf["extensions"]["decode"]
+    assert decode["profile"] == "accurate"
+    assert decode["fallback_windows"] == 1
+    assert decode["temperature"] == list(FALLBACK_TEMPERATURES)
+
+    assert client.post("/transcribe?temperature=-1", json=sample_vcon).status_code == 400
@@ -0,0 +1,90 @@
+"""Tests for default-model hot swap and the admin API."""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+
+from vcon_mac_wtf.config import settings
+from vcon_mac_wtf.engine.hot_swap import ModelSwapper, SwapInProgressError
+from vcon_mac_wtf.engine.simulated_engine import SimulatedWhisperEngine
+
+TURBO = "mlx-community/whisper-turbo"
+SMALL = "mlx-community/whisper-small"
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = SimulatedWhisperEngine(real_time_factor=0.0, load_seconds=0.05)
+    engine.load_model(TURBO)
+    monkeypatch.setattr(settings, "mlx_model", TURBO)
+    with patch("vcon_mac_wtf.engine.mlx_engine.mlx_engine", engine):
+        yield engine
+
+
+async def test_swap_switches_then_drains_old_model(engine):
+    swapper = ModelSwapper(drain_timeout=5)
+    with engine.using(TURBO):  # request admitted before the swap
+        swapper.start("small")
+        with pytest.raises(SwapInProgressError):
+            swapper.start("tiny")
+        while swapper.status()["state"] != "draining":
+            await asyncio.sleep(0.01)
+        # New requests already get the new default; the old one is still held
+        assert settings.mlx_model == SMALL
+        assert engine.loaded_model == SMALL
+        assert engine.in_flight(TURBO) == 1
+    status = await swapper.wait()
+    assert status["state"] == "idle"
+    assert status["result"] == "completed"
+    assert status["previous"] == TURBO
+    assert status["undrained"] == 0
+
+
+async def test_failed_load_keeps_old_default(engine, monkeypatch):
+    def broken(model):
+        raise OSError("download failed")
+
+    monkeypatch.setattr(engine, "_hold", broken)
+    swapper = ModelSwapper()
+    with pytest.raises(OSError):
+        await swapper.swap("small")
+    assert swapper.status()["state"] == "failed"
+    assert settings.mlx_model == TURBO
+    assert engine.loaded_model == TURBO
+
+
+async def test_config_reload_starts_swap(engine, monkeypatch):
+    monkeypatch.setenv("MLX_MODEL", "mlx-community/whisper-base")
+    monkeypatch.setenv("DECODE_PROFILE", "fast")
+    monkeypatch.setattr(settings, "decode_profile", settings.decode_profile)
+    swapper = ModelSwapper()
+    response = swapper.reload_config()
+    assert response["changed"] == ["decode_profile", "mlx_model"]
+    assert settings.decode_profile == "fast"
+    assert (await swapper.wait())["state"] == "idle"
+    assert settings.mlx_model == "mlx-community/whisper-base"
+
+
+def test_admin_api_requires_token(client, monkeypatch):
+    assert client.get("/admin/model").status_code == 403
+    monkeypatch.setattr(settings, "admin_token", "secret")
+    assert client.get("/admin/model").status_code == 401
+    resp = client.get("/admin/model", headers={"Authorization": "Bearer wrong"})
+    assert resp.status_code == 401
+
+
+def test_admin_swap_endpoint(client, engine, monkeypatch):
+    monkeypatch.setattr(settings, "admin_token", "secret")
+    auth = {"Authorization": "Bearer secret"}
+    resp = client.post("/admin/model", json={"model": "small"}, headers=auth)
+    assert resp.status_code == 202
+    assert resp.json()["swap"]["to"] == SMALL
+
+    deadline = time.monotonic() + 5
+    while client.get("/admin/model", headers=auth).json()["swap"]["state"] != "idle":
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+    assert client.get("/admin/model", headers=auth).json()["model"] == SMALL
+    assert client.get("/health/ready").json()["model_swap"]["result"] == "completed"
@@ -0,0 +1,91 @@
+"""Tests for language identification."""
+
+import io
+import math
+import struct
+import wave
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from vcon_mac_wtf.engine.simulated_engine import SimulatedWhisperEngine
+from vcon_mac_wtf.services.language import identify_language, speech_onset
+
+
+@pytest.fixture
+def engine():
+    engine = SimulatedWhisperEngine(real_time_factor=0.0)
+    with patch("vcon_mac_wtf.services.language.mlx_engine", engine):
+        yield engine
+
+
+def _wav(samples: list[int]) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(16000)
+        wav.writeframes(struct.pack(f"<{len(samples)}h", *samples))
+    return buffer.getvalue()
+
+
+async def test_ranks_languages(engine, sample_wav_bytes):
+    result = await identify_language(sample_wav_bytes, model="tiny", find_speech=False, top=2)
+    assert result["language"] == "en"
+    assert [entry["language"] for entry in result["languages"]] == ["en", "es"]
+    assert result["window"] == {"start": 0.0, "end": 0.1, "speech": False}
+    assert result["model"] == "mlx-community/whisper-tiny"
+
+
+async def test_candidates_are_renormalised(engine, sample_wav_bytes):
+    result = await identify_language(sample_wav_bytes, find_speech=False, languages=["es", "fr"])
+    assert result["language"] == "es"
+    assert result["probability"] == pytest.approx(0.6)
+    with pytest.raises(ValueError):
+        await identify_language(sample_wav_bytes, find_speech=False, languages=["xx"])
+
+
+async def test_window_is_limited(engine):
+    audio = _wav([0] * 16000 * 3)
+    result = await identify_language(audio, seconds=1.5, find_speech=False)
+    assert result["window"]["end"] == 1.5
+
+
+def test_speech_onset_skips_leading_silence():
+    pytest.importorskip("numpy")
+    tone = [int(8000 * math.sin(2 * math.pi * 220 * n / 16000)) for n in range(16000)]
+    onset = speech_onset([0] * 16000 + tone)
+    assert 0.75 * 16000 <= onset <= 0.81 * 16000
+    assert speech_onset([0] * 16000) is None
+
+
+def test_endpoint(client, engine, sample_wav_bytes):
+    response = client.post(
+        "/v1/audio/language",
+        files={"file": ("a.wav", sample_wav_bytes, "audio/wav")},
+        data={"find_speech": "false", "languages": "en,es"},
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["language"] == "en"
+    assert len(body["languages"]) == 2
+
+    undecodable = client.post(
+        "/v1/audio/language",
+        files={"file": ("a.mp3", b"not audio", "audio/mpeg")},
+        data={"find_speech": "false"},
+    )
+    assert undecodable.status_code == 400
+
+
+def test_transcribe_detects_language_first(client, mock_mlx_engine, sample_vcon):
+    detected = {"language": "es", "probability": 0.97, "languages": []}
+    with patch(
+        "vcon_mac_wtf.services.vcon_processor.identify_language",
+        AsyncMock(return_value=detected),
+    ):
+        response = client.post("/transcribe?detect_language=true", json=sample_vcon)
+    assert response.status_code == 200
+    assert mock_mlx_engine.transcribe_bytes.call_args.kwargs["language"] == "es"
+    wtf = response.json()["analysis"][0]["body"]
+    assert wtf["extensions"]["language_id"]["language"] == "es"
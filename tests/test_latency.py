@@ -0,0 +1,109 @@
+"""Tests for the online latency model, admission ETAs and load shedding."""
+
+import io
+
+import pytest
+
+from vcon_mac_wtf.engine.latency import PRIOR_RTF, LatencyPredictor, prior_rtf
+from vcon_mac_wtf.router import BackendPool
+
+TURBO = "mlx-community/whisper-turbo"
+
+
+def test_prior_before_observations():
+    predictor = LatencyPredictor(machine="test")
+    assert predictor.predict(TURBO, "accurate", 100) == pytest.approx(100 * PRIOR_RTF[TURBO])
+    assert predictor.predict(TURBO, "fast", 100) < predictor.predict(TURBO, "accurate", 100)
+
+
+def test_fits_overhead_and_rate():
+    predictor = LatencyPredictor(machine="test")
+    for seconds in (10, 60, 300, 30, 120, 600):
+        predictor.observe(TURBO, "accurate", seconds, 2.0 + 0.05 * seconds)
+    overhead, rtf = predictor.coefficients(TURBO, "accurate")
+    assert overhead == pytest.approx(2.0)
+    assert rtf == pytest.approx(0.05)
+    assert predictor.predict(TURBO, "accurate", 1000) == pytest.approx(52.0)
+    # Other profiles are learned separately
+    assert predictor.coefficients(TURBO, "fast")[0] == 0.0
+
+
+def test_same_length_clips_fit_through_origin():
+    predictor = LatencyPredictor(machine="test")
+    for _ in range(5):
+        predictor.observe(TURBO, "fast", 30, 3.0)
+    assert predictor.coefficients(TURBO, "fast") == (0.0, pytest.approx(0.1))
+
+
+def test_persists_per_machine(tmp_path):
+    path = tmp_path / "latency.json"
+    first = LatencyPredictor(path, machine="m1")
+    first.observe(TURBO, "accurate", 60, 3.0)
+    first.save()
+    other = LatencyPredictor(path, machine="m2")
+    other.observe(TURBO, "accurate", 60, 12.0)
+    other.save()
+
+    restarted = LatencyPredictor(path, machine="m1")
+    assert restarted.predict(TURBO, "accurate", 60) == pytest.approx(3.0)
+    assert restarted.snapshot()["models"][TURBO]["accurate"]["observations"] == 1
+    assert LatencyPredictor(path, machine="m2").predict(TURBO, "accurate", 60) == pytest.approx(12)
+
+
+def test_estimated_completion_header(client, sample_wav_bytes):
+    resp = client.post(
+        "/v1/audio/transcriptions",
+        files={"file": ("test.wav", io.BytesIO(sample_wav_bytes), "audio/wav")},
+    )
+    assert resp.status_code == 200
+    assert float(resp.headers["X-Estimated-Completion-Seconds"]) >= 0
+    assert "latency" in client.get("/health/ready").json()
+
+
+@pytest.mark.parametrize("wait,processing,status", [(50.0, 5.0, 503), (0.0, 50.0, 504)])
+def test_sheds_work_that_would_miss_deadline(
+    client, mock_mlx_engine, sample_wav_bytes, monkeypatch, wait, processing, status
+):
+    from vcon_mac_wtf.engine.latency import latency_predictor
+    from vcon_mac_wtf.engine.scheduler import inference_scheduler
+
+    monkeypatch.setattr(latency_predictor, "predict", lambda *args: processing)
+    monkeypatch.setattr(inference_scheduler, "estimated_wait_for", lambda *args: wait)
+    resp = client.post(
+        "/v1/audio/transcriptions",
+        files={"file": ("test.wav", io.BytesIO(sample_wav_bytes), "audio/wav")},
+        headers={"X-Request-Timeout": "10"},
+    )
+    assert resp.status_code == status
+    assert mock_mlx_engine.transcribe_bytes.call_count == 0
+    if status == 503:
+        assert 45 <= int(resp.headers["Retry-After"]) <= 46
+
+
+def test_router_prefers_faster_hardware():
+    pool = BackendPool(["http://slow", "http://fast"])
+    for backend, wait, rtf in zip(pool.backends, (1.0, 5.0), (0.2, 0.05)):
+        backend.apply_ready(
+            {
+                "status": "ok",
+                "resident_model": TURBO,
+                "scheduler": {"slots": 1, "estimated_wait_seconds": wait},
+                "latency": {
+                    "machine": backend.url,
+                    "decode_profile": "accurate",
+                    "models": {TURBO: {"accurate": {"rtf": rtf, "overhead_seconds": 0.5}}},
+                },
+            }
+        )
+    # 1 + 0.5 + 0.2 * 100 = 21.5 s vs 5 + 0.5 + 0.05 * 100 = 10.5 s
+    assert pool.choose(TURBO, audio_seconds=100).url == "http://fast"
+    # Short clips go where the queue is shorter
+    assert pool.choose(TURBO, audio_seconds=1).url == "http://slow"
+
+
+def test_router_falls_back_to_the_shared_prior():
+    pool = BackendPool(["http://new"])
+    backend = pool.backends[0]
+    backend.apply_ready({"status": "ok", "latency": {"decode_profile": "fast", "models": {}}})
+    assert backend.expected_seconds(TURBO, 100) == pytest.approx(100 * prior_rtf(TURBO, "fast"))
+    assert prior_rtf(TURBO, "fast") < PRIOR_RTF[TURBO]
@@ -0,0 +1,87 @@
+"""Tests for memory estimates, budgeted admission and memory reporting."""
+
+import asyncio
+import io
+
+import pytest
+
+from vcon_mac_wtf.engine.memory import (
+    MB,
+    MemoryGovernor,
+    estimate_audio_seconds,
+    estimate_request_bytes,
+    model_weight_bytes,
+)
+
+
+def test_estimate_audio_seconds(sample_wav_bytes):
+    assert estimate_audio_seconds(sample_wav_bytes) == pytest.approx(0.1)
+    # Unrecognised container: size-based estimate
+    assert estimate_audio_seconds(b"\x00" * 80000, ".ogg") == pytest.approx(10.0)
+
+
+def test_estimate_scales_with_model_and_duration():
+    sizes = [model_weight_bytes(m) for m in ("large-v3", "turbo", "tiny")]
+    assert sizes == sorted(sizes, reverse=True)
+    short = estimate_request_bytes("large-v3", 60, load_required=False)
+    long = estimate_request_bytes("large-v3", 3600, load_required=False)
+    assert long > short
+    assert estimate_request_bytes("large-v3", 60, load_required=True) - short == (
+        model_weight_bytes("large-v3")
+    )
+
+
+async def test_governor_waits_for_budget():
+    one = estimate_request_bytes("tiny", 60, False)
+    governor = MemoryGovernor(budget_bytes=int(one * 1.5))
+    order = []
+
+    async def job(name, hold):
+        async with governor.reserve("tiny", 60) as reservation:
+            order.append((name, "start", reservation.waited > 0))
+            await asyncio.sleep(hold)
+            order.append((name, "end", None))
+
+    await asyncio.gather(job("a", 0.05), job("b", 0))
+    assert order == [("a", "start", False), ("a", "end", None), ("b", "start", True),
+                     ("b", "end", None)]  # fmt: skip
+    assert governor.reserved_bytes == 0
+    assert governor.active == 0
+
+
+async def test_governor_admits_oversized_request_alone():
+    governor = MemoryGovernor(budget_bytes=1 * MB)
+    async with governor.reserve("large-v3", 3600) as reservation:
+        assert reservation.nbytes > governor.budget_bytes
+        assert governor.active == 1
+
+
+async def test_governor_cancelled_waiter_is_dropped():
+    one = estimate_request_bytes("tiny", 60, False)
+    governor = MemoryGovernor(budget_bytes=one)
+    async with governor.reserve("tiny", 60):
+        waiter = asyncio.create_task(governor.reserve("tiny", 60).__aenter__())
+        await asyncio.sleep(0)
+        assert governor.waiting == 1
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert governor.waiting == 0
+    assert governor.reserved_bytes == 0
+
+
+def test_memory_headers(client, sample_wav_bytes):
+    resp = client.post(
+        "/v1/audio/transcriptions",
+        files={"file": ("test.wav", io.BytesIO(sample_wav_bytes), "audio/wav")},
+        data={"model": "turbo", "response_format": "json"},
+    )
+    assert resp.status_code == 200
+    assert float(resp.headers["X-Memory-Estimated-MB"]) > 0
+    assert "memory_wait" in resp.headers["Server-Timing"]
+
+
+def test_ready_reports_memory(client):
+    memory = client.get("/health/ready").json()["memory"]
+    assert memory["active"] == 0
+    assert "budget_mb" in memory
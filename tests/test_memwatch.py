@@ -0,0 +1,78 @@
+"""Tests for the memory-growth watchdog and its admin endpoints."""
+
+import logging
+import time
+
+import pytest
+
+from vcon_mac_wtf.config import settings
+from vcon_mac_wtf.memwatch import MemoryWatchdog, count_live_objects, memory_watchdog
+
+AUTH = {"Authorization": "Bearer secret"}
+
+
+@pytest.fixture
+def watchdog():
+    watchdog = MemoryWatchdog(interval=3600, threshold_mb=1)
+    watchdog.start()
+    deadline = time.monotonic() + 5
+    while watchdog.status()["last_sample"] is None:  # first (baseline) sample
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    yield watchdog
+    watchdog.stop()
+
+
+def test_reports_growth_sites_and_objects(watchdog, caplog):
+    watchdog.reset()
+    leaked = [b"x" * 300_000 for _ in range(8)]
+    results = [{"text": "", "segments": [{"start": 0, "end": 1, "text": "", "tokens": []}]}]
+    with caplog.at_level(logging.WARNING, logger="vcon_mac_wtf.memwatch"):
+        report = watchdog.sample()
+
+    assert report["growth_bytes"] >= 2_000_000
+    top = report["top_growth"][0]
+    assert top["size_diff"] >= 2_000_000
+    assert top["site"][0].startswith(__file__)
+    assert report["objects_growth"]["large_bytes"] >= 8
+    assert report["objects_growth"]["result_dicts"] >= 1
+    assert report["objects_growth"]["segments"] >= 1
+    assert watchdog.status()["alerts"] == 1
+    assert "grew" in caplog.text
+    # The next alert waits for another threshold of growth
+    watchdog.sample()
+    assert watchdog.status()["alerts"] == 1
+    del leaked, results
+
+
+def test_count_live_objects_finds_audio_buffers():
+    held = [{"body": b"\0" * 100_000}]
+    counts = count_live_objects(min_bytes=100_000)
+    assert counts["large_bytes"] >= 1
+    assert counts["large_bytes_total"] >= len(held[0]["body"])
+
+
+def test_request_peak_and_admin_report(client, sample_wav_bytes, monkeypatch):
+    monkeypatch.setattr(settings, "admin_token", "secret")
+    assert client.get("/admin/memory", headers=AUTH).status_code == 403
+
+    memory_watchdog.start()
+    try:
+        response = client.post(
+            "/v1/audio/transcriptions",
+            files={"file": ("a.wav", sample_wav_bytes, "audio/wav")},
+            data={"response_format": "json"},
+        )
+        assert response.status_code == 200
+        assert float(response.headers["X-Memory-Python-Peak-MB"]) >= 0
+
+        report = client.post("/admin/memory/sample", headers=AUTH, params={"top": 3}).json()
+        assert report["active"] is True
+        assert report["requests"][-1]["path"] == "/v1/audio/transcriptions"
+        assert len(report["last_sample"]["top_growth"]) <= 3
+        assert "result_dicts" in report["last_sample"]["objects"]
+
+        reset = client.post("/admin/memory/reset", headers=AUTH).json()
+        assert reset["last_sample"]["growth_bytes"] == 0
+    finally:
+        memory_watchdog.stop()
@@ -0,0 +1,134 @@
+"""Tests for Prometheus metrics and the /metrics endpoint."""
+
+import io
+from unittest.mock import patch
+
+from vcon_mac_wtf.metrics import MetricsRegistry, registry
+
+
+def _sample_value(text: str, prefix: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"No sample starting with {prefix!r}")
+
+
+def test_registry_render_format():
+    reg = MetricsRegistry()
+    counter = reg.counter("jobs_total", "Jobs.", ("kind",))
+    gauge = reg.gauge("queue_depth", "Depth.")
+    hist = reg.histogram("latency_seconds", "Latency.", ("kind",), buckets=(0.1, 1.0))
+
+    counter.labels("a").inc()
+    counter.labels("a").inc(2)
+    gauge.set(3)
+    gauge.dec()
+    hist.labels("a").observe(0.05)
+    hist.labels("a").observe(0.5)
+    hist.labels("a").observe(5.0)
+
+    text = reg.render()
+    assert "# TYPE jobs_total counter" in text
+    assert 'jobs_total{kind="a"} 3' in text
+    assert "queue_depth 2" in text
+    assert 'latency_seconds_bucket{kind="a",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{kind="a",le="1"} 2' in text
+    assert 'latency_seconds_bucket{kind="a",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{kind="a"} 3' in text
+
+
+def test_labels_arity_is_checked():
+    reg = MetricsRegistry()
+    counter = reg.counter("x_total", "X.", ("a", "b"))
+    try:
+        counter.labels("only-one")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
+
+
+def test_metrics_endpoint_records_stages(client, sample_wav_bytes, sample_vcon):
+    client.post(
+        "/v1/audio/transcriptions",
+        files={"file": ("test.wav", io.BytesIO(sample_wav_bytes), "audio/wav")},
+        data={"model": "turbo", "response_format": "wtf"},
+    )
+    client.post("/transcribe", json=sample_vcon)
+
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    text = resp.text
+    model = "mlx-community/whisper-turbo"
+    for stage, endpoint in [
+        ("upload_read", "/v1/audio/transcriptions"),
+        ("wtf_conversion", "/v1/audio/transcriptions"),
+        ("serialization", "/v1/audio/transcriptions"),
+        ("decode", "/transcribe"),
+        ("wtf_conversion", "/transcribe"),
+        ("serialization", "/transcribe"),
+    ]:
+        prefix = (
+            f'vcon_mac_wtf_stage_duration_seconds_count{{stage="{stage}",'
+            f'model="{model}",endpoint="{endpoint}"}}'
+        )
+        assert _sample_value(text, prefix) >= 1
+    assert (
+        _sample_value(
+            text, 'vcon_mac_wtf_requests_total{endpoint="/transcribe",status="200"}'
+        )
+        >= 1
+    )
+    assert 'vcon_mac_wtf_requests_in_flight{endpoint="/transcribe"} 0' in text
+
+
+def test_metrics_counts_errors(client, mock_mlx_engine, sample_wav_bytes):
+    async def boom(**kwargs):
+        raise MemoryError("out of memory")
+
+    mock_mlx_engine.transcribe_bytes.side_effect = boom
+    resp = client.post(
+        "/v1/audio/transcriptions",
+        files={"file": ("test.wav", io.BytesIO(sample_wav_bytes), "audio/wav")},
+        data={"model": "turbo"},
+    )
+    assert resp.status_code == 500
+    text = client.get("/metrics").text
+    prefix = (
+        'vcon_mac_wtf_errors_total{endpoint="/v1/audio/transcriptions",'
+        'exception="MemoryError"}'
+    )
+    assert _sample_value(text, prefix) >= 1
+
+
+def test_metrics_disabled(client, monkeypatch):
+    from vcon_mac_wtf.config import settings
+
+    monkeypatch.setattr(settings, "metrics_enabled", False)
+    assert client.get("/metrics").status_code == 404
+
+
+async def test_engine_records_inference_and_cache(sample_whisper_result):
+    from vcon_mac_wtf.engine.mlx_engine import MLXWhisperEngine
+
+    engine = MLXWhisperEngine()
+    model = "mlx-community/whisper-metrics-test"
+    with patch(
+        "vcon_mac_wtf.engine.mlx_engine._run_transcribe", return_value=sample_whisper_result
+    ):
+        await engine.transcribe("unused.wav", model=model)
+        await engine.transcribe("unused.wav", model=model)
+
+    text = registry.render()
+    cache = "vcon_mac_wtf_model_cache_total"
+    assert _sample_value(text, f'{cache}{{model="{model}",result="miss"}}') == 1
+    assert _sample_value(text, f'{cache}{{model="{model}",result="hit"}}') == 1
+    assert _sample_value(text, f'vcon_mac_wtf_model_loaded{{model="{model}"}}') == 1
+    assert (
+        _sample_value(
+            text, f'vcon_mac_wtf_audio_seconds_total{{model="{model}",endpoint="internal"}}'
+        )
+        == 8.0
+    )
+    assert "vcon_mac_wtf_inference_queued 0" in text
@@ -0,0 +1,119 @@
+"""Tests for the model cache manager against a fake Hugging Face hub cache."""
+
+import hashlib
+import os
+import time
+
+import pytest
+
+from vcon_mac_wtf.engine.model_manager import ModelManager, hub_cache_dir, model_manager
+from vcon_mac_wtf.main import run
+
+
+def add_snapshot(cache, model, revision, files, ref="main"):
+    """Lay out a model revision the way huggingface_hub does: blobs + symlinked snapshot."""
+    repo = cache / f"models--{model.replace('/', '--')}"
+    (repo / "blobs").mkdir(parents=True, exist_ok=True)
+    snapshot = repo / "snapshots" / revision
+    snapshot.mkdir(parents=True)
+    for name, content in files.items():
+        blob = repo / "blobs" / hashlib.sha256(content).hexdigest()
+        blob.write_bytes(content)
+        (snapshot / name).symlink_to(os.path.relpath(blob, snapshot))
+    if ref:
+        (repo / "refs").mkdir(exist_ok=True)
+        (repo / "refs" / ref).write_text(revision)
+    return repo
+
+
+@pytest.fixture
+def cache(tmp_path):
+    files = {"config.json": b"{}", "weights.safetensors": b"w" * 1000}
+    add_snapshot(tmp_path, "mlx-community/whisper-tiny", "aaa", files)
+    return tmp_path
+
+
+def test_hub_cache_dir_honours_env(monkeypatch, tmp_path):
+    monkeypatch.delenv("HF_HUB_CACHE", raising=False)
+    monkeypatch.delenv("HUGGINGFACE_HUB_CACHE", raising=False)
+    monkeypatch.setenv("HF_HOME", str(tmp_path))
+    assert hub_cache_dir() == tmp_path / "hub"
+    monkeypatch.setenv("HF_HUB_CACHE", str(tmp_path / "elsewhere"))
+    assert hub_cache_dir() == tmp_path / "elsewhere"
+
+
+def test_inventory_and_verify(cache):
+    manager = ModelManager(cache)
+    assert manager.is_cached("tiny")
+    assert not manager.is_cached("turbo")
+    [info] = manager.inventory()
+    assert info.model == "mlx-community/whisper-tiny"
+    assert info.size_bytes == 1002 + len("aaa")  # blobs plus the ref
+    assert manager.verify("tiny", deep=True) == []
+    assert manager.verify("turbo") == ["not cached"]
+
+    blob = (manager.snapshot_dir("tiny") / "weights.safetensors").resolve()
+    blob.write_bytes(b"x" * 1000)
+    assert manager.verify("tiny") == []
+    assert manager.verify("tiny", deep=True) == [
+        "weights.safetensors: checksum mismatch",
+        "weights: missing",
+    ]
+    blob.unlink()
+    assert manager.verify("tiny") == ["weights.safetensors: broken link", "weights: missing"]
+
+
+def test_gc_removes_stale_revisions_and_unused_models(cache):
+    add_snapshot(cache, "mlx-community/whisper-tiny", "old", {"config.json": b"{old}"}, ref=None)
+    add_snapshot(cache, "mlx-community/whisper-base", "bbb", {"config.json": b"{b}"})
+    manager = ModelManager(cache)
+    old_blob = cache / "models--mlx-community--whisper-tiny" / "blobs"
+    old_blob /= hashlib.sha256(b"{old}").hexdigest()
+
+    planned = manager.gc(dry_run=True)
+    assert {p.name for p, _ in planned} == {"old", old_blob.name}
+    assert old_blob.exists()
+
+    manager.gc()
+    assert not old_blob.exists()
+    assert manager.verify("tiny", deep=True) == []
+
+    stale = time.time() - 10 * 86400
+    for model in ("tiny", "base"):
+        os.utime(manager.snapshot_dir(model), (stale, stale))
+    removed = manager.gc(keep=["tiny"], unused_days=7)
+    assert [p.name for p, _ in removed] == ["models--mlx-community--whisper-base"]
+    assert [i.model for i in manager.inventory()] == ["mlx-community/whisper-tiny"]
+
+
+def test_mark_used_updates_last_use(cache):
+    manager = ModelManager(cache)
+    os.utime(manager.snapshot_dir("tiny"), (0, 0))
+    manager.mark_used("tiny")
+    assert manager.cache_info("tiny").last_used > time.time() - 60
+
+
+def test_models_endpoint_reports_state(client, mock_mlx_engine, cache, monkeypatch):
+    monkeypatch.setattr(model_manager, "_cache_dir", cache)
+    monkeypatch.setattr(model_manager, "_downloading", {"mlx-community/whisper-small"})
+    mock_mlx_engine.loading_model = "mlx-community/whisper-base"
+
+    models = {m["id"]: m for m in client.get("/v1/models").json()["data"]}
+    assert models["mlx-community/whisper-turbo"]["state"] == "loaded"
+    assert models["mlx-community/whisper-base"]["state"] == "loading"
+    assert models["mlx-community/whisper-small"]["state"] == "downloading"
+    assert models["mlx-community/whisper-tiny"]["state"] == "cached"
+    assert models["mlx-community/whisper-tiny"]["size_bytes"] > 1000
+    assert models["mlx-community/whisper-medium"]["state"] == "not_cached"
+
+
+def test_models_cli(cache, monkeypatch, capsys):
+    monkeypatch.setattr(model_manager, "_cache_dir", cache)
+    with pytest.raises(SystemExit) as exit_info:
+        run(["models", "verify"])
+    assert exit_info.value.code == 0
+    assert "mlx-community/whisper-tiny: ok" in capsys.readouterr().out
+
+    with pytest.raises(SystemExit) as exit_info:
+        run(["models", "verify", "medium"])
+    assert exit_info.value.code == 1
@@ -0,0 +1,87 @@
+"""Tests for quality tiers and load-adaptive model selection."""
+
+import asyncio
+import io
+
+from vcon_mac_wtf.engine.model_policy import ModelPolicy, model_policies
+from vcon_mac_wtf.engine.scheduler import InferenceScheduler
+
+TURBO = "mlx-community/whisper-turbo"
+SMALL = "mlx-community/whisper-small"
+BASE = "mlx-community/whisper-base"
+
+
+def test_concrete_models_pass_through():
+    policy = ModelPolicy("test", target=1.0, estimate=lambda m, s, p: 1e9)
+    selection = policy.select("turbo", 60)
+    assert selection.model == TURBO
+    assert selection.tier is None
+    assert not selection.degraded
+
+
+def test_steps_down_and_recovers_with_hysteresis():
+    load = {TURBO: 30.0, SMALL: 12.0, BASE: 4.0}
+    policy = ModelPolicy(
+        "test", target=10.0, recover_fraction=0.5, estimate=lambda m, s, p: load[m]
+    )
+
+    assert policy.select("balanced").model == BASE
+    # Turbo back under target but not under half of it: stay degraded
+    load.update({TURBO: 8.0, SMALL: 6.0})
+    assert policy.select("balanced").model == BASE
+    load.update({SMALL: 4.0})
+    selection = policy.select("balanced")
+    assert selection.model == SMALL
+    assert selection.degraded
+    load.update({TURBO: 3.0})
+    assert policy.select("balanced").model == TURBO
+    assert policy.snapshot()["tiers"]["balanced"] == TURBO
+
+
+def test_disabled_policy_uses_best_model():
+    policy = ModelPolicy("test", target=0, estimate=lambda m, s, p: 1e9)
+    assert policy.select("quality").model == "mlx-community/whisper-large-v3"
+
+
+async def test_degrades_behind_long_job_on_scheduler():
+    scheduler = InferenceScheduler(slots=1)
+
+    def estimate(model, seconds, profile):
+        wait = scheduler.estimated_wait_for(model, seconds, profile)
+        return wait + scheduler.expected_seconds(model, seconds, profile)
+
+    policy = ModelPolicy("test", target=20.0, recover_fraction=0.75, estimate=estimate)
+    assert policy.select("balanced", 120).model == TURBO  # 12 s at turbo's prior RTF
+
+    async with scheduler.slot(TURBO, 100):  # ~10 s of work ahead
+        await asyncio.sleep(0)
+        assert policy.select("balanced", 120).model == SMALL
+    assert policy.select("balanced", 120).model == TURBO
+
+
+def test_endpoint_reports_selected_model(client, mock_mlx_engine, sample_wav_bytes, monkeypatch):
+    policy = model_policies["/v1/audio/transcriptions"]
+    monkeypatch.setattr(policy, "target", 5.0)
+    monkeypatch.setattr(policy, "_estimate", lambda m, s, p: 1.0 if m == SMALL else 60.0)
+    monkeypatch.setattr(policy, "_level", {})
+
+    resp = client.post(
+        "/v1/audio/transcriptions",
+        files={"file": ("test.wav", io.BytesIO(sample_wav_bytes), "audio/wav")},
+        data={"model": "balanced", "response_format": "wtf"},
+    )
+    assert resp.status_code == 200
+    assert resp.headers["X-Model"] == SMALL
+    assert mock_mlx_engine.transcribe_bytes.call_args.kwargs["model"] == SMALL
+    wtf = resp.json()
+    assert wtf["metadata"]["model"] == SMALL
+    assert wtf["extensions"]["model_policy"]["requested"] == "balanced"
+    assert wtf["extensions"]["model_policy"]["degraded"] is True
+
+
+def test_vcon_endpoint_reports_selected_model(client, sample_vcon):
+    resp = client.post("/transcribe?model=fast", json=sample_vcon)
+    assert resp.headers["X-Model"] == SMALL
+    body = resp.json()["analysis"][0]
+    assert body["product"] == SMALL
+    assert body["body"]["extensions"]["model_policy"]["tier"] == "fast"
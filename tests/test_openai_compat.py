@@ -1,6 +1,9 @@
 """Tests for the OpenAI-compatible endpoint."""
 
 import io
+from unittest.mock import patch
+
+from vcon_mac_wtf.config import settings
 
 
 def test_health(client):
@@ -70,3 +73,47 @@ def test_transcribe_empty_file(client):
         data={"model": "turbo"},
     )
     assert resp.status_code == 400
+
+
+def test_transcribe_raw_body_matches_multipart(client, mock_mlx_engine, sample_wav_bytes):
+    form = client.post(
+        "/v1/audio/transcriptions",
+        files={"file": ("test.wav", io.BytesIO(sample_wav_bytes), "audio/wav")},
+        data={"model": "turbo", "timestamp_granularities": ["segment"]},
+    )
+    raw = client.post(
+        "/v1/audio/transcriptions/raw",
+        params={"model": "turbo", "timestamp_granularities": ["segment"]},
+        content=sample_wav_bytes,
+        headers={"Content-Type": "application/octet-stream", "Content-Language": "de"},
+    )
+    assert raw.status_code == 200
+    assert raw.json() == form.json()
+    assert raw.headers["X-Skipped-Stages"] == "word_alignment,wtf_conversion"
+    call = mock_mlx_engine.transcribe_bytes.call_args.kwargs
+    assert call["audio_bytes"] == sample_wav_bytes
+    assert (call["suffix"], call["language"]) == (".wav", "de")
+
+
+def test_transcribe_raw_body_format_and_errors(client, mock_mlx_engine, sample_wav_bytes):
+    resp = client.post(
+        "/v1/audio/transcriptions/raw",
+        params={"response_format": "json"},
+        content=sample_wav_bytes,
+        headers={"Content-Type": "audio/wav", "Content-Disposition": 'inline; filename="a.m4a"'},
+    )
+    assert resp.status_code == 200
+    assert mock_mlx_engine.transcribe_bytes.call_args.kwargs["suffix"] == ".m4a"
+
+    def post(content, content_type="audio/wav"):
+        return client.post(
+            "/v1/audio/transcriptions/raw",
+            content=content,
+            headers={"Content-Type": content_type},
+        )
+
+    assert post(sample_wav_bytes, "multipart/form-data").status_code == 415
+    assert post(b"").status_code == 400
+    with patch.object(settings, "max_audio_size_mb", 0):
+        assert post(sample_wav_bytes).status_code == 413
+        assert post(iter([sample_wav_bytes])).status_code == 413  # chunked, no length
@@ -0,0 +1,171 @@
+"""Tests for the staged decode/inference pipeline."""
+
+import asyncio
+import io
+import struct
+import time
+import wave
+
+import pytest
+
+from vcon_mac_wtf.engine.pipeline import AudioPipeline, StageMeter, decode_pcm
+from vcon_mac_wtf.engine.scheduler import InferenceScheduler
+from vcon_mac_wtf.engine.simulated_engine import SimulatedWhisperEngine
+
+
+async def _request(pipeline, slot, name, log, decode_seconds=0.05, infer_seconds=0.1):
+    def decode():
+        time.sleep(decode_seconds)
+        log.append((f"decoded {name}", time.monotonic()))
+        return name
+
+    async with pipeline.handoff(decode) as handoff:
+        async with slot:
+            handoff.release()
+            with pipeline.inference.busy():
+                log.append((f"infer {name}", time.monotonic()))
+                await asyncio.sleep(infer_seconds)
+                log.append((f"done {name}", time.monotonic()))
+        return handoff.pcm
+
+
+async def test_decode_overlaps_inference():
+    pipeline = AudioPipeline(workers=1, depth=2, slots=1)
+    slot = asyncio.Semaphore(1)
+    log = []
+    results = await asyncio.gather(*(_request(pipeline, slot, n, log) for n in "abc"))
+    assert sorted(results) == ["a", "b", "c"]
+    at = dict(log)
+    first, second = sorted("abc", key=lambda n: at[f"infer {n}"])[:2]
+    # The next request was decoded while the first was in inference
+    assert at[f"infer {first}"] < at[f"decoded {second}"] < at[f"done {first}"]
+    snapshot = pipeline.snapshot()
+    assert snapshot["buffered"] == 0
+    assert snapshot["inference"]["utilization"] > 0
+    assert snapshot["decode"]["capacity"] == 1
+
+
+async def test_handoff_depth_bounds_decoding_ahead():
+    pipeline = AudioPipeline(workers=2, depth=1)
+    decoded = []
+    entered = asyncio.Event()
+    proceed = asyncio.Event()
+
+    async def first():
+        async with pipeline.handoff(lambda: decoded.append("first")) as handoff:
+            entered.set()
+            await proceed.wait()  # still waiting for a slot
+            handoff.release()
+
+    async def second():
+        async with pipeline.handoff(lambda: decoded.append("second")):
+            pass
+
+    task = asyncio.create_task(first())
+    await entered.wait()
+    waiting = asyncio.create_task(second())
+    await asyncio.sleep(0.05)
+    assert decoded == ["first"]
+    assert pipeline.snapshot()["waiting"] == 1
+    proceed.set()
+    await asyncio.gather(task, waiting)
+    assert decoded == ["first", "second"]
+    assert pipeline.snapshot()["buffered"] == 0
+
+
+async def test_cancelled_waiter_frees_nothing():
+    pipeline = AudioPipeline(depth=1)
+    async with pipeline.handoff(lambda: None):
+        waiter = asyncio.create_task(pipeline.handoff(lambda: None).__aenter__())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+    snapshot = pipeline.snapshot()
+    assert (snapshot["buffered"], snapshot["waiting"]) == (0, 0)
+
+
+async def _scheduled(scheduler, pipeline, name, seconds, log):
+    async with scheduler.queued("tiny", seconds) as ticket:
+        async with pipeline.handoff(lambda: log.append(name), ticket=ticket) as handoff:
+            await scheduler.wait(ticket)
+            handoff.release()
+            await asyncio.sleep(0.01)
+
+
+async def test_handoff_serves_waiters_in_scheduler_order():
+    scheduler = InferenceScheduler(slots=1, aging_rate=0)
+    pipeline = AudioPipeline(workers=1, depth=1)
+    decoded = []
+    async with scheduler.slot("tiny", 1):
+        async with pipeline.handoff(lambda: None) as blocker:
+            jobs = [
+                asyncio.create_task(_scheduled(scheduler, pipeline, "long", 100, decoded)),
+                asyncio.create_task(_scheduled(scheduler, pipeline, "short", 1, decoded)),
+            ]
+            await asyncio.sleep(0.02)
+            # Jobs waiting to be decoded are already part of the backlog
+            assert scheduler.snapshot()["queued"] == 2
+            assert scheduler.estimated_wait_for("tiny", 200) > scheduler.expected_seconds(
+                "tiny", 100
+            )
+            assert pipeline.snapshot()["waiting"] == 2
+            blocker.release()
+            await asyncio.sleep(0.02)
+            assert decoded == ["short"]
+    await asyncio.gather(*jobs)
+    assert decoded == ["short", "long"]
+    assert pipeline.snapshot()["buffered"] == 0
+
+
+async def test_job_granted_a_slot_decodes_without_a_buffer():
+    scheduler = InferenceScheduler(slots=1)
+    pipeline = AudioPipeline(workers=1, depth=1)
+    decoded = []
+    async with pipeline.handoff(lambda: None):  # the only buffer, held further back
+        await asyncio.wait_for(_scheduled(scheduler, pipeline, "next", 1, decoded), 1)
+        assert pipeline.snapshot()["buffered"] == 1
+    assert decoded == ["next"]
+    assert pipeline.snapshot()["buffered"] == 0
+
+
+def test_stage_meter_utilization():
+    meter = StageMeter("test", capacity=2)
+    with meter.busy():
+        assert meter.active == 1
+        time.sleep(0.02)
+    busy = meter.utilization(window=1.0)
+    assert 0.01 / 2 <= busy <= 0.05
+    assert meter.snapshot()["active"] == 0
+
+
+def _wav(samples: list[int], rate: int = 16000, channels: int = 1) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(struct.pack(f"<{len(samples)}h", *samples))
+    return buffer.getvalue()
+
+
+def test_decode_pcm_reads_16k_wav_directly():
+    pytest.importorskip("numpy")
+    pcm = decode_pcm(_wav([0, 16384, -32768, 100, 300, -100], channels=2))
+    assert pcm.dtype.name == "float32"
+    assert pcm.tolist() == pytest.approx([8192 / 32768, -16334 / 32768, 100 / 32768])
+
+
+def test_simulated_engine_takes_decoded_samples(sample_wav_bytes):
+    engine = SimulatedWhisperEngine(real_time_factor=0.0)
+    engine.load_model("tiny")
+    pcm = engine.decode_audio(sample_wav_bytes)
+    assert len(pcm) == 1600
+    result = asyncio.run(engine.transcribe_bytes(sample_wav_bytes, pcm=pcm))
+    assert result[-1].end == pytest.approx(0.1)
+    assert engine.decode_audio(b"not audio", ".mp3") is None
+
+
+def test_ready_reports_pipeline(client):
+    pipeline = client.get("/health/ready").json()["pipeline"]
+    assert set(pipeline) >= {"decode", "inference", "buffered", "depth"}
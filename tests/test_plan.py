@@ -0,0 +1,67 @@
+"""Tests for output-format-aware execution plans."""
+
+import io
+
+import pytest
+
+from vcon_mac_wtf.services.plan import plan_openai, plan_vcon
+
+
+@pytest.mark.parametrize(
+    "response_format,granularities,skipped",
+    [
+        ("text", None, ("word_alignment", "segments", "wtf_conversion")),
+        ("json", ["word"], ("word_alignment", "segments", "wtf_conversion")),
+        ("verbose_json", None, ("wtf_conversion",)),
+        ("verbose_json", ["segment"], ("word_alignment", "wtf_conversion")),
+        ("verbose_json", ["word"], ("segments", "wtf_conversion")),
+        ("wtf", None, ()),
+        ("wtf", ["segment"], ("word_alignment",)),
+    ],
+)
+def test_openai_plans(response_format, granularities, skipped):
+    assert plan_openai(response_format, granularities).skipped == skipped
+
+
+def test_vcon_plans():
+    assert plan_vcon().skipped == ()
+    assert plan_vcon("segments").skipped == ("word_alignment",)
+    assert plan_vcon("full", word_timestamps=False).skipped == ("word_alignment",)
+    with pytest.raises(ValueError):
+        plan_vcon("text")
+
+
+@pytest.mark.parametrize("response_format", ["text", "json"])
+def test_plain_formats_skip_word_alignment(
+    client, mock_mlx_engine, sample_wav_bytes, response_format
+):
+    resp = client.post(
+        "/v1/audio/transcriptions",
+        files={"file": ("test.wav", io.BytesIO(sample_wav_bytes), "audio/wav")},
+        data={"response_format": response_format},
+    )
+    assert resp.status_code == 200
+    assert resp.headers["X-Skipped-Stages"] == "word_alignment,segments,wtf_conversion"
+    assert mock_mlx_engine.transcribe_bytes.call_args.kwargs["word_timestamps"] is False
+
+
+def test_word_only_granularity_omits_segments(client, mock_mlx_engine, sample_wav_bytes):
+    resp = client.post(
+        "/v1/audio/transcriptions",
+        files={"file": ("test.wav", io.BytesIO(sample_wav_bytes), "audio/wav")},
+        data={"response_format": "verbose_json", "timestamp_granularities": ["word"]},
+    )
+    body = resp.json()
+    assert "segments" not in body
+    assert body["words"][0]["word"] == " Hello,"
+    assert mock_mlx_engine.transcribe_bytes.call_args.kwargs["word_timestamps"] is True
+
+
+def test_vcon_segment_detail_skips_word_alignment(client, mock_mlx_engine, sample_vcon):
+    resp = client.post("/transcribe?detail=segments", json=sample_vcon)
+    assert resp.status_code == 200
+    assert resp.headers["X-Skipped-Stages"] == "word_alignment"
+    assert mock_mlx_engine.transcribe_bytes.call_args.kwargs["word_timestamps"] is False
+
+    resp = client.post("/transcribe", json=sample_vcon)
+    assert resp.headers["X-Skipped-Stages"] == "none"
@@ -0,0 +1,52 @@
+"""Tests for header-only audio duration probing."""
+
+import struct
+
+import pytest
+
+from vcon_mac_wtf.engine.probe import probe_duration
+
+
+def _flac(sample_rate: int, total_samples: int) -> bytes:
+    packed = (sample_rate << 44) | (1 << 41) | (15 << 36) | total_samples
+    streaminfo = b"\x10\x00\x10\x00" + b"\x00" * 6 + packed.to_bytes(8, "big") + b"\x00" * 16
+    return b"fLaC" + b"\x80" + len(streaminfo).to_bytes(3, "big") + streaminfo
+
+
+def _mp3_frame_header() -> bytes:
+    # MPEG-1 layer III, 128 kbps, 44.1 kHz, stereo
+    return bytes([0xFF, 0xFB, 0x90, 0x00])
+
+
+def _box(kind: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+
+def test_wav(sample_wav_bytes):
+    assert probe_duration(sample_wav_bytes) == pytest.approx(0.1)
+
+
+def test_flac():
+    assert probe_duration(_flac(16000, 16000 * 90)) == pytest.approx(90.0)
+
+
+def test_mp3_xing():
+    frame = _mp3_frame_header() + b"\x00" * 32 + b"Xing" + struct.pack(">II", 1, 3445)
+    data = b"ID3\x03\x00\x00\x00\x00\x00\x0a" + b"\x00" * 10 + frame + b"\x00" * 400
+    assert probe_duration(data) == pytest.approx(3445 * 1152 / 44100)
+
+
+def test_mp3_constant_bitrate():
+    data = _mp3_frame_header() + b"\x00" * (16000 * 60 - 4)
+    assert probe_duration(data) == pytest.approx(60.0)
+
+
+def test_m4a():
+    mvhd = _box(b"mvhd", b"\x00" * 4 + struct.pack(">IIII", 0, 0, 1000, 125500) + b"\x00" * 80)
+    data = _box(b"ftyp", b"M4A \x00\x00\x00\x00") + _box(b"moov", mvhd) + _box(b"mdat", b"\x00")
+    assert probe_duration(data) == pytest.approx(125.5)
+
+
+def test_unknown_container():
+    assert probe_duration(b"OggS" + b"\x00" * 100) is None
+    assert probe_duration(b"") is None
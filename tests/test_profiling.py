@@ -0,0 +1,103 @@
+"""Tests for the on-demand sampling profiler and its admin endpoints."""
+
+import io
+import pstats
+import threading
+import time
+
+import pytest
+
+from vcon_mac_wtf.config import settings
+from vcon_mac_wtf.profiling import ProfilingActiveError, SamplingProfiler
+
+AUTH = {"Authorization": "Bearer secret"}
+
+
+def _spin(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def _wait_finished(profiler: SamplingProfiler) -> None:
+    deadline = time.monotonic() + 2
+    while profiler.active:
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def busy_thread():
+    stop = threading.Event()
+    thread = threading.Thread(target=_spin, args=(stop,), name="busy")
+    thread.start()
+    yield thread
+    stop.set()
+    thread.join()
+
+
+def test_samples_other_threads(busy_thread, tmp_path):
+    profiler = SamplingProfiler(interval=0.002)
+    profiler.start(seconds=0.2)
+    with pytest.raises(ProfilingActiveError):
+        profiler.start()
+    _wait_finished(profiler)
+    status = profiler.stop()
+    assert status["state"] == "finished"
+    assert status["samples"] > 0
+    assert "busy" in status["threads"]
+    assert "profiler" not in status["threads"]
+
+    busy = [line for line in profiler.collapsed().splitlines() if line.startswith("busy;")]
+    assert busy and all(" (" in line and int(line.rsplit(" ", 1)[1]) > 0 for line in busy)
+    assert any(";_spin (" in line for line in busy)
+
+    path = tmp_path / "profile.pstats"
+    path.write_bytes(profiler.pstats())
+    stats = pstats.Stats(str(path)).stats
+    (spin,) = [func for func in stats if func[2] == "_spin"]
+    cc, nc, tt, ct, callers = stats[spin]
+    assert nc > 0 and 0 < ct <= status["elapsed_seconds"] + 0.01
+    assert any(caller[2] == "run" for caller in callers)
+
+
+def test_stops_after_requests():
+    profiler = SamplingProfiler(interval=0.002)
+    profiler.start(requests=2)
+    profiler.request_finished()
+    assert profiler.active
+    profiler.request_finished()
+    _wait_finished(profiler)
+    assert profiler.status()["requests_seen"] == 2
+
+
+def test_profiling_requires_setting(client, monkeypatch):
+    monkeypatch.setattr(settings, "admin_token", "secret")
+    assert client.post("/admin/profile", json={}, headers=AUTH).status_code == 403
+    monkeypatch.setattr(settings, "profiling_enabled", True)
+    assert client.get("/admin/profile").status_code == 401
+
+
+def test_profile_next_request(client, sample_wav_bytes, monkeypatch):
+    monkeypatch.setattr(settings, "admin_token", "secret")
+    monkeypatch.setattr(settings, "profiling_enabled", True)
+    resp = client.post("/admin/profile", json={"requests": 1, "interval_ms": 1}, headers=AUTH)
+    assert resp.status_code == 202
+    assert resp.json()["state"] == "running"
+    assert client.post("/admin/profile", json={}, headers=AUTH).status_code == 409
+    assert client.get("/admin/profile/result", headers=AUTH).status_code == 409
+
+    client.post(
+        "/v1/audio/transcriptions",
+        files={"file": ("test.wav", io.BytesIO(sample_wav_bytes), "audio/wav")},
+    )
+    deadline = time.monotonic() + 2
+    while client.get("/admin/profile", headers=AUTH).json()["state"] != "finished":
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+    collapsed = client.get("/admin/profile/result", headers=AUTH)
+    assert collapsed.status_code == 200
+    assert collapsed.headers["content-type"].startswith("text/plain")
+    resp = client.get("/admin/profile/result?format=pstats", headers=AUTH)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/octet-stream"
@@ -0,0 +1,192 @@
+"""Tests for the fleet router using in-process stand-in backends."""
+
+import io
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from vcon_mac_wtf.router import BackendPool, create_router_app
+
+
+def make_backend(
+    name: str,
+    resident_model: str,
+    wait: float = 0.0,
+    status_code: int = 200,
+    cached_models: tuple[str, ...] = (),
+    status: str = "ok",
+):
+    """A stand-in backend reporting fixed load and echoing which instance answered."""
+    app = FastAPI()
+    app.state.calls = 0
+    app.state.status_code = status_code
+
+    @app.get("/health/ready")
+    async def ready():
+        loaded = status == "ok"
+        return {
+            "status": status,
+            "model": resident_model if loaded else None,
+            "resident_model": resident_model if loaded else None,
+            "cached_models": [resident_model, *cached_models],
+            "scheduler": {"slots": 1, "queued": 0, "running": 0, "estimated_wait_seconds": wait},
+            "memory": {"free_mb": 8000.0},
+        }
+
+    @app.post("/v1/audio/transcriptions")
+    @app.post("/v1/audio/transcriptions/raw")
+    @app.post("/transcribe")
+    async def transcribe(request: Request):
+        app.state.calls += 1
+        await request.body()
+        return JSONResponse(
+            status_code=app.state.status_code,
+            content={"backend": name},
+            headers={"x-request-id": request.headers.get("x-request-id", "")},
+        )
+
+    return app
+
+
+class HostTransport(httpx.AsyncBaseTransport):
+    """Dispatches requests to ASGI apps by host name."""
+
+    def __init__(self, apps: dict[str, FastAPI]):
+        self.transports = {host: httpx.ASGITransport(app=app) for host, app in apps.items()}
+
+    async def handle_async_request(self, request):
+        transport = self.transports.get(request.url.host)
+        if transport is None:
+            raise httpx.ConnectError("connection refused", request=request)
+        return await transport.handle_async_request(request)
+
+
+@pytest.fixture
+def fleet():
+    apps = {
+        "a": make_backend("a", "mlx-community/whisper-turbo", wait=30.0),
+        "b": make_backend("b", "mlx-community/whisper-turbo", wait=2.0),
+        "c": make_backend("c", "mlx-community/whisper-large-v3", wait=0.0),
+        "d": make_backend(
+            "d",
+            "mlx-community/whisper-large-v3",
+            wait=5.0,
+            cached_models=("mlx-community/whisper-small",),
+        ),
+    }
+    urls = [f"http://{host}" for host in apps]
+    pool = BackendPool(
+        urls + ["http://down"],
+        poll_interval=60,
+        client=httpx.AsyncClient(transport=HostTransport(apps), timeout=None),
+    )
+    with TestClient(create_router_app(pool, retries=2)) as client:
+        yield client, pool, apps
+
+
+def _post_audio(client, wav: bytes, model: str = "turbo"):
+    return client.post(
+        "/v1/audio/transcriptions",
+        files={"file": ("test.wav", io.BytesIO(wav), "audio/wav")},
+        data={"model": model},
+    )
+
+
+def test_routes_to_least_loaded_resident_backend(fleet, sample_wav_bytes):
+    client, pool, _ = fleet
+    resp = _post_audio(client, sample_wav_bytes)
+    assert resp.status_code == 200
+    # c is idle but would have to swap models; b holds turbo and waits less than a
+    assert resp.json() == {"backend": "b"}
+    assert resp.headers["X-Routed-To"] == "http://b"
+
+    resp = _post_audio(client, sample_wav_bytes, model="large-v3")
+    assert resp.json() == {"backend": "c"}
+
+    # Nobody holds small: d has it on disk, so it wins over the idler c
+    resp = _post_audio(client, sample_wav_bytes, model="small")
+    assert resp.json() == {"backend": "d"}
+
+
+def test_routes_raw_body_by_query_model(fleet, sample_wav_bytes):
+    client, _, apps = fleet
+    resp = client.post(
+        "/v1/audio/transcriptions/raw",
+        params={"model": "large-v3"},
+        content=sample_wav_bytes,
+        headers={"Content-Type": "audio/wav"},
+    )
+    assert resp.json() == {"backend": "c"}
+    assert apps["c"].state.calls == 1
+
+
+def test_request_id_forwarded(fleet, sample_vcon):
+    client, _, _ = fleet
+    resp = client.post("/transcribe?model=turbo", json=sample_vcon, headers={"X-Request-ID": "r1"})
+    assert resp.json() == {"backend": "b"}
+    assert resp.headers["X-Request-ID"] == "r1"
+
+
+def test_retries_on_503(fleet, sample_wav_bytes):
+    client, _, apps = fleet
+    apps["b"].state.status_code = 503
+    resp = _post_audio(client, sample_wav_bytes)
+    assert resp.status_code == 200
+    assert resp.json() == {"backend": "a"}
+    assert apps["b"].state.calls == 1
+
+
+def test_drain_and_undrain(fleet, sample_wav_bytes):
+    client, _, _ = fleet
+    resp = client.post("/router/backends/drain", params={"url": "http://b", "wait": True})
+    assert resp.json()["drained"] is True
+    assert _post_audio(client, sample_wav_bytes).json() == {"backend": "a"}
+
+    client.post("/router/backends/undrain", params={"url": "http://b"})
+    assert _post_audio(client, sample_wav_bytes).json() == {"backend": "b"}
+
+
+def test_cold_backend_gets_traffic_after_loaded_ones(sample_wav_bytes):
+    apps = {
+        "cold": make_backend("cold", "mlx-community/whisper-turbo", status="not_ready"),
+        "warm": make_backend("warm", "mlx-community/whisper-large-v3", wait=20.0),
+    }
+    pool = BackendPool(
+        [f"http://{host}" for host in apps],
+        poll_interval=60,
+        client=httpx.AsyncClient(transport=HostTransport(apps), timeout=None),
+    )
+    with TestClient(create_router_app(pool)) as client:
+        # A backend started with PRELOAD_MODEL=false loads on its first request
+        assert pool.get("http://cold").accepting
+        # Neither holds small: the loaded one wins despite its queue
+        assert _post_audio(client, sample_wav_bytes, model="small").json() == {"backend": "warm"}
+        client.post("/router/backends/drain", params={"url": "http://warm"})
+        assert _post_audio(client, sample_wav_bytes).json() == {"backend": "cold"}
+
+
+def test_no_backend_available(fleet, sample_wav_bytes):
+    client, _, _ = fleet
+    for host in "abcd":
+        client.post("/router/backends/drain", params={"url": f"http://{host}"})
+    resp = _post_audio(client, sample_wav_bytes)
+    assert resp.status_code == 503
+    assert "Retry-After" in resp.headers
+    assert client.get("/health/ready").status_code == 503
+
+
+def test_unreachable_backend_reported(fleet):
+    client, _, _ = fleet
+    backends = {b["url"]: b for b in client.get("/router/backends").json()["backends"]}
+    assert backends["http://down"]["healthy"] is False
+    assert backends["http://a"]["resident_model"] == "mlx-community/whisper-turbo"
+
+
+def test_backend_ready_reports_load(client):
+    ready = client.get("/health/ready").json()
+    assert ready["resident_model"] == "mlx-community/whisper-turbo"
+    assert {"queued", "running", "estimated_wait_seconds"} <= ready["scheduler"].keys()
+    assert "free_mb" in ready["memory"]
@@ -0,0 +1,110 @@
+"""Tests for shortest-expected-job-first scheduling and the duration limit."""
+
+import asyncio
+import io
+
+import pytest
+
+from vcon_mac_wtf.config import settings
+from vcon_mac_wtf.engine.scheduler import InferenceScheduler
+
+
+async def _run(scheduler, jobs, hold=0.01):
+    """Occupy the single slot, queue ``jobs`` (name, audio seconds), return start order."""
+    order = []
+
+    async def job(name, seconds):
+        async with scheduler.slot("tiny", seconds):
+            order.append(name)
+            await asyncio.sleep(hold)
+
+    blocker = asyncio.create_task(job("blocker", 1))
+    await asyncio.sleep(0)
+    tasks = []
+    for name, seconds in jobs:
+        tasks.append(asyncio.create_task(job(name, seconds)))
+        await asyncio.sleep(0)
+    await asyncio.gather(blocker, *tasks)
+    return order[1:]
+
+
+async def test_shortest_job_first():
+    scheduler = InferenceScheduler(slots=1, aging_rate=0)
+    order = await _run(scheduler, [("long", 5400), ("short", 10), ("medium", 600)])
+    assert order == ["short", "medium", "long"]
+
+
+async def test_fifo_policy():
+    scheduler = InferenceScheduler(slots=1, policy="fifo")
+    order = await _run(scheduler, [("long", 5400), ("short", 10), ("medium", 600)])
+    assert order == ["long", "short", "medium"]
+
+
+async def test_aging_prevents_starvation():
+    scheduler = InferenceScheduler(slots=1, aging_rate=1e5)
+    # Expected seconds differ by ~10 s; 5 ms of waiting at this rate outweighs it
+    order = []
+
+    async def job(name, seconds):
+        async with scheduler.slot("tiny", seconds):
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    blocker = asyncio.create_task(job("blocker", 1))
+    await asyncio.sleep(0)
+    long = asyncio.create_task(job("long", 100))
+    await asyncio.sleep(0.005)
+    short = asyncio.create_task(job("short", 1))
+    await asyncio.gather(blocker, long, short)
+    assert order == ["blocker", "long", "short"]
+
+
+async def test_estimated_wait_uses_latency_model():
+    scheduler = InferenceScheduler(slots=1, aging_rate=0)
+    waits = {}
+
+    async def job(name, seconds, hold):
+        async with scheduler.slot("tiny", seconds) as ticket:
+            waits[name] = ticket.estimated_wait
+            await asyncio.sleep(hold)
+
+    first = asyncio.create_task(job("first", 1, 0.05))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(job("second", 1, 0))
+    await asyncio.gather(first, second)
+    assert waits["first"] == 0
+    assert waits["second"] == pytest.approx(0.1, abs=0.01)  # 1 s at the default RTF
+
+    # Ordering and waits follow what the latency model has learned, per profile
+    fast = scheduler.expected_seconds("tiny", 10, "fast")
+    assert fast < scheduler.expected_seconds("tiny", 10, "accurate")
+    scheduler.predictor.observe("tiny", "fast", 10, 5.0)
+    assert scheduler.expected_seconds("tiny", 10, "fast") == pytest.approx(5.0)
+    assert scheduler.estimated_wait_for("tiny", 10, "fast") == 0
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        InferenceScheduler(policy="lottery")
+
+
+def test_max_audio_duration(client, sample_wav_bytes, monkeypatch):
+    monkeypatch.setattr(settings, "max_audio_duration_seconds", 0.05)
+    resp = client.post(
+        "/v1/audio/transcriptions",
+        files={"file": ("test.wav", io.BytesIO(sample_wav_bytes), "audio/wav")},
+        data={"model": "turbo", "response_format": "json"},
+    )
+    assert resp.status_code == 413
+    assert "too long" in resp.json()["detail"]
+
+
+def test_estimated_wait_header(client, sample_wav_bytes):
+    resp = client.post(
+        "/v1/audio/transcriptions",
+        files={"file": ("test.wav", io.BytesIO(sample_wav_bytes), "audio/wav")},
+        data={"model": "turbo", "response_format": "json"},
+    )
+    assert resp.headers["X-Estimated-Wait-Seconds"] == "0.0"
+    assert "slot_wait" in resp.headers["Server-Timing"]
+    assert client.get("/health/ready").json()["scheduler"]["queued"] == 0
@@ -0,0 +1,42 @@
+"""Tests for the simulated engine backend."""
+
+import pytest
+
+from vcon_mac_wtf.engine.mlx_engine import MLXWhisperEngine, create_engine
+from vcon_mac_wtf.engine.simulated_engine import SimulatedWhisperEngine, synthetic_result
+from vcon_mac_wtf.services.wtf_converter import convert_result_to_wtf
+
+
+def test_synthetic_result_covers_duration():
+    result = synthetic_result(65.0)
+    segments = result["segments"]
+    assert segments[0]["start"] == 0.0
+    assert segments[-1]["end"] == 65.0
+    assert all(s["words"] for s in segments)
+    assert result["text"] == "".join(s["text"] for s in segments)
+
+
+def test_synthetic_result_converts_to_wtf():
+    wtf = convert_result_to_wtf(synthetic_result(0.1), "simulated", 0.01)
+    assert wtf["transcript"]["text"]
+
+
+def test_synthetic_result_without_words():
+    result = synthetic_result(10.0, word_timestamps=False)
+    assert all("words" not in s for s in result["segments"])
+
+
+async def test_simulated_engine_transcribes_wav(sample_wav_bytes):
+    engine = SimulatedWhisperEngine(real_time_factor=0.0)
+    engine.load_model("tiny")
+    assert engine.loaded_model == "mlx-community/whisper-tiny"
+    result = await engine.transcribe_bytes(sample_wav_bytes, language="es")
+    assert result.language == "es"
+    assert result[-1].end == pytest.approx(0.1)
+
+
+def test_create_engine():
+    assert type(create_engine("mlx")) is MLXWhisperEngine
+    assert isinstance(create_engine("simulated"), SimulatedWhisperEngine)
+    with pytest.raises(ValueError):
+        create_engine("cuda")
@@ -0,0 +1,122 @@
+"""Tests for the transcript store and its endpoints."""
+
+import hashlib
+from unittest.mock import patch
+
+import pytest
+
+from vcon_mac_wtf.services.store import TranscriptStore, audio_hash
+from vcon_mac_wtf.services.wtf_converter import convert_result_to_wtf
+
+AUDIO_HASH = hashlib.sha256(b"audio").hexdigest()
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TranscriptStore(tmp_path / "transcripts.db", flush_seconds=0.05)
+    with (
+        patch("vcon_mac_wtf.routes.transcripts.transcript_store", store),
+        patch("vcon_mac_wtf.routes.openai_compat.transcript_store", store),
+        patch("vcon_mac_wtf.services.vcon_processor.transcript_store", store),
+    ):
+        yield store
+    store.close()
+
+
+@pytest.fixture
+def wtf_doc(sample_whisper_result):
+    return convert_result_to_wtf(sample_whisper_result, "turbo", 1.0)
+
+
+def test_put_is_batched_and_replaces_same_key(store, wtf_doc):
+    store.put(AUDIO_HASH, wtf_doc, "turbo", "call-1", 0)
+    store.put(AUDIO_HASH, wtf_doc, "turbo", "call-1", 0)
+    store.put(AUDIO_HASH, wtf_doc, "tiny", "call-1", 0)
+    store.flush()
+
+    found = store.by_vcon("call-1")
+    assert sorted(t["model"] for t in found) == ["tiny", "turbo"]
+    assert found[0]["wtf"]["transcript"]["text"] == wtf_doc["transcript"]["text"]
+    assert len(store.by_audio_hash(AUDIO_HASH.upper(), model="turbo")) == 1
+    # Replacing a transcript re-indexes its segments instead of duplicating them
+    assert len(store.search("transcription", model="turbo")) == 1
+
+
+async def test_put_neither_hashes_nor_touches_the_disk(store, wtf_doc):
+    audio = bytes(1 << 20)
+    digest = await store.hash_audio(audio)  # in a worker thread, off the event loop
+    assert digest == audio_hash(audio)
+    with (
+        patch.object(store, "_start"),  # no writer: inspect what was queued
+        patch("vcon_mac_wtf.services.store.hashlib") as hashing,
+        patch("vcon_mac_wtf.services.store.sqlite3") as sqlite,
+    ):
+        store.put(digest, wtf_doc, "turbo")
+    assert not hashing.mock_calls and not sqlite.mock_calls
+    pending = store._queue.get_nowait()
+    assert pending.audio_hash == digest
+    assert not any(isinstance(field, bytes) for field in pending)
+    assert TranscriptStore().hash_audio(audio) is None
+
+
+def test_search_reports_word_offsets(store, wtf_doc):
+    store.put(AUDIO_HASH, wtf_doc, "turbo", "call-1", 2)
+    store.flush()
+
+    [hit] = store.search("THIS is a")
+    assert (hit["vcon_uuid"], hit["dialog"], hit["segment"]) == ("call-1", 2, 0)
+    assert (hit["start"], hit["end"]) == (0.5, 1.0)
+    assert store.search("hello test") == []
+    assert store.search("?!") == []
+
+
+def test_search_falls_back_to_segment_times(store, wtf_doc):
+    del wtf_doc["words"]
+    store.put(AUDIO_HASH, wtf_doc, "turbo")
+    store.flush()
+    [hit] = store.search("test")
+    assert (hit["start"], hit["end"], hit["vcon_uuid"]) == (0.0, 2.5, None)
+
+
+def test_close_commits_queued_transcripts(tmp_path, wtf_doc):
+    store = TranscriptStore(tmp_path / "t.db", flush_seconds=60)
+    store.put(AUDIO_HASH, wtf_doc, "turbo", "call-1", 0)
+    store.close()
+    assert len(TranscriptStore(tmp_path / "t.db").by_vcon("call-1")) == 1
+
+
+def test_transcribe_stores_each_dialog(client, store, sample_vcon):
+    response = client.post("/transcribe", json=sample_vcon)
+    assert response.status_code == 200
+    store.flush()
+
+    found = client.get(f"/transcripts/{sample_vcon['uuid']}", params={"dialog": 0})
+    assert found.status_code == 200
+    [transcript] = found.json()["transcripts"]
+    assert transcript["model"] == "mlx-community/whisper-turbo"
+
+    hits = client.get("/transcripts/search", params={"q": "hello"}).json()["hits"]
+    assert hits[0]["vcon_uuid"] == sample_vcon["uuid"]
+    assert (hits[0]["start"], hits[0]["end"]) == (0.0, 0.4)
+
+    by_hash = client.get(f"/transcripts/by-hash/{transcript['audio_hash']}")
+    assert by_hash.json()["transcripts"][0]["vcon_uuid"] == sample_vcon["uuid"]
+    assert client.get("/transcripts/unknown").status_code == 404
+
+
+def test_openai_wtf_response_is_stored(client, store, sample_wav_bytes):
+    response = client.post(
+        "/v1/audio/transcriptions",
+        files={"file": ("a.wav", sample_wav_bytes, "audio/wav")},
+        data={"response_format": "wtf"},
+    )
+    assert response.status_code == 200
+    store.flush()
+    audio_hash = hashlib.sha256(sample_wav_bytes).hexdigest()
+    assert client.get(f"/transcripts/by-hash/{audio_hash}").status_code == 200
+
+
+def test_disabled_store(client):
+    response = client.get("/transcripts/search", params={"q": "hello"})
+    assert response.status_code == 403
+    assert "TRANSCRIPT_STORE" in response.json()["detail"]
@@ -0,0 +1,115 @@
+"""Tests for request tracing, Server-Timing headers and span exporters."""
+
+import io
+import json
+from unittest.mock import patch
+
+import pytest
+
+from vcon_mac_wtf import tracing
+from vcon_mac_wtf.tracing import FileSpanExporter, InMemorySpanExporter, create_exporter
+
+
+@pytest.fixture
+def memory_exporter():
+    exporter = InMemorySpanExporter()
+    tracing.set_exporter(exporter)
+    yield exporter
+    tracing.set_exporter(None)
+
+
+def _server_timing(header: str) -> dict[str, float]:
+    timings = {}
+    for part in header.split(","):
+        name, dur = part.strip().split(";dur=")
+        timings[name] = float(dur)
+    return timings
+
+
+def test_request_id_generated_and_echoed(client):
+    resp = client.get("/health")
+    assert len(resp.headers["X-Request-ID"]) == 32
+
+    resp = client.get("/health", headers={"X-Request-ID": "abc-123"})
+    assert resp.headers["X-Request-ID"] == "abc-123"
+
+
+def test_server_timing_openai(client, sample_wav_bytes):
+    resp = client.post(
+        "/v1/audio/transcriptions",
+        files={"file": ("test.wav", io.BytesIO(sample_wav_bytes), "audio/wav")},
+        data={"model": "turbo", "response_format": "wtf"},
+    )
+    assert resp.status_code == 200
+    timings = _server_timing(resp.headers["Server-Timing"])
+    for name in ("parse", "upload_read", "wtf_conversion", "serialization", "total"):
+        assert name in timings
+
+
+def test_server_timing_vcon(client, sample_vcon):
+    resp = client.post("/transcribe", json=sample_vcon)
+    timings = _server_timing(resp.headers["Server-Timing"])
+    for name in ("parse", "decode", "wtf_conversion", "serialization", "total"):
+        assert name in timings
+
+
+def test_structured_log_line(client, sample_vcon, caplog):
+    with caplog.at_level("INFO", logger="vcon_mac_wtf.tracing"):
+        resp = client.post("/transcribe", json=sample_vcon, headers={"X-Request-ID": "req-1"})
+    records = [
+        json.loads(r.getMessage()) for r in caplog.records if r.name == "vcon_mac_wtf.tracing"
+    ]
+    assert records[-1]["request_id"] == "req-1"
+    assert records[-1]["endpoint"] == "/transcribe"
+    assert records[-1]["status"] == resp.status_code
+    assert "decode" in records[-1]["stages_ms"]
+
+
+def test_dialog_spans(client, sample_vcon, memory_exporter):
+    sample_vcon["dialog"].append(dict(sample_vcon["dialog"][0]))
+    client.post("/transcribe", json=sample_vcon)
+
+    spans = memory_exporter.get_finished_spans()
+    by_id = {s.span_id: s for s in spans}
+    root = next(s for s in spans if s.name == "http.request")
+    dialogs = [s for s in spans if s.name == "dialog"]
+    assert [d.attributes["index"] for d in dialogs] == [0, 1]
+    assert all(d.parent_id == root.span_id for d in dialogs)
+
+    decodes = [s for s in spans if s.name == "decode"]
+    assert len(decodes) == 2
+    assert {by_id[d.parent_id].name for d in decodes} == {"dialog"}
+    assert all(s.trace_id == root.trace_id for s in spans)
+    assert all(s.end_ns >= s.start_ns for s in spans)
+
+
+def test_no_spans_without_exporter(client, sample_vcon):
+    assert tracing.get_exporter() is None
+    resp = client.post("/transcribe", json=sample_vcon)
+    assert "Server-Timing" in resp.headers
+
+
+def test_file_exporter(tmp_path, client, sample_vcon):
+    path = tmp_path / "spans.jsonl"
+    exporter = FileSpanExporter(str(path))
+    tracing.set_exporter(exporter)
+    try:
+        with patch.object(exporter, "_start"):  # hold the writer back
+            client.post("/transcribe", json=sample_vcon)
+        # The request path only queued its spans; nothing was written inline
+        assert exporter._queue.qsize() == 1 and not path.exists()
+        exporter._start()
+        exporter.flush()
+    finally:
+        tracing.set_exporter(None)
+        exporter.shutdown()
+    names = [json.loads(line)["name"] for line in path.read_text().splitlines()]
+    assert "dialog" in names
+    assert "http.request" in names
+
+
+def test_create_exporter():
+    assert create_exporter("none") is None
+    assert isinstance(create_exporter("memory"), InMemorySpanExporter)
+    with pytest.raises(ValueError):
+        create_exporter("zipkin")
@@ -0,0 +1,85 @@
+"""Tests for the columnar transcript and the formats serialized from it."""
+
+import copy
+
+import pytest
+from fastapi.responses import JSONResponse
+
+from vcon_mac_wtf.engine.decode import fallback_stats
+from vcon_mac_wtf.engine.simulated_engine import synthetic_result
+from vcon_mac_wtf.engine.transcript import Transcript
+from vcon_mac_wtf.routes.openai_compat import render_json, verbose_json
+from vcon_mac_wtf.services.wtf_converter import convert_result_to_wtf
+
+
+def _without_timestamps(doc: dict) -> dict:
+    doc = copy.deepcopy(doc)
+    del doc["metadata"]["created_at"], doc["metadata"]["processed_at"]
+    return doc
+
+
+def test_keeps_mlx_whisper_shapes(sample_whisper_result):
+    transcript = Transcript.from_result(sample_whisper_result)
+    assert Transcript.from_result(transcript) is transcript
+    assert len(transcript) == 2 and transcript.word_count == 6
+    assert list(transcript.segment_dicts()) == sample_whisper_result["segments"]
+    assert [w["word"] for w in transcript.word_dicts()] == [
+        w["word"] for s in sample_whisper_result["segments"] for w in s["words"]
+    ]
+
+    segment = transcript[-1]
+    assert (segment.text, segment.start, segment.end) == (" transcription.", 2.5, 4.0)
+    assert segment.score("avg_logprob") == -0.189
+    assert [w.probability for w in segment.words] == [0.94]
+    assert transcript.covered_seconds == 4.0
+    assert fallback_stats(transcript, (0.0, 0.2)) == fallback_stats(
+        sample_whisper_result, (0.0, 0.2)
+    )
+
+
+@pytest.mark.parametrize(
+    "result",
+    [
+        pytest.param("sample", id="sample"),
+        pytest.param(synthetic_result(65.0), id="words"),
+        pytest.param(synthetic_result(65.0, word_timestamps=False), id="no-words"),
+    ],
+)
+def test_wtf_matches_whisper_converter(result, sample_whisper_result):
+    if result == "sample":
+        result = sample_whisper_result
+    extensions = {"decode": {"profile": "fast"}}
+    expected = convert_result_to_wtf(result, "turbo", 1.5, extensions)
+    actual = convert_result_to_wtf(Transcript.from_result(result), "turbo", 1.5, extensions)
+    assert _without_timestamps(actual) == _without_timestamps(expected)
+    assert list(actual) == list(expected)
+
+
+def test_wtf_rejects_what_the_converter_rejects(sample_whisper_result):
+    zero_length = copy.deepcopy(sample_whisper_result)
+    zero_length["segments"][0]["words"][1]["end"] = 0.5
+    empty = {**sample_whisper_result, "text": " "}
+    for result in (zero_length, empty):
+        with pytest.raises(ValueError):
+            convert_result_to_wtf(result, "turbo", 1.0)
+        with pytest.raises(ValueError):
+            convert_result_to_wtf(Transcript.from_result(result), "turbo", 1.0)
+
+
+def test_verbose_json_renders_like_json_response(sample_whisper_result):
+    transcript = Transcript.from_result(sample_whisper_result)
+    body = verbose_json(transcript, segments=True, words=True)
+    expected = {
+        "task": "transcribe",
+        "language": "en",
+        "duration": 0.0,
+        "text": sample_whisper_result["text"],
+        "segments": sample_whisper_result["segments"],
+        "words": [
+            {"word": w["word"], "start": w["start"], "end": w["end"]}
+            for s in sample_whisper_result["segments"]
+            for w in s["words"]
+        ],
+    }
+    assert render_json(body) == JSONResponse(expected).body
+    assert "words" not in verbose_json(transcript, segments=True, words=False)
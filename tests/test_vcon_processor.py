@@ -51,3 +51,95 @@ def test_transcribe_vcon_stats_headers(client, sample_vcon):
     assert resp.headers.get("X-Dialogs-Skipped") == "0"
     assert resp.headers.get("X-Dialogs-Failed") == "0"
     assert resp.headers.get("X-Provider") == "mlx-whisper"
+
+
+def test_repost_skips_transcribed_dialog(client, mock_mlx_engine, sample_vcon):
+    first = client.post("/transcribe", json=sample_vcon).json()
+    resp = client.post("/transcribe", json=first)
+    assert resp.status_code == 200
+    assert resp.headers["X-Dialogs-Processed"] == "0"
+    assert resp.headers["X-Dialogs-Skipped"] == "1"
+    assert resp.json()["analysis"] == first["analysis"]
+    assert mock_mlx_engine.transcribe_bytes.call_count == 1
+
+    # An alias of the same model matches; a different model does not
+    resp = client.post("/transcribe?model=turbo", json=first)
+    assert resp.headers["X-Dialogs-Skipped"] == "1"
+    resp = client.post("/transcribe?model=large-v3", json=first)
+    assert resp.headers["X-Dialogs-Processed"] == "1"
+    assert len(resp.json()["analysis"]) == 2
+
+
+def test_repost_replace_and_append(client, mock_mlx_engine, sample_vcon):
+    first = client.post("/transcribe", json=sample_vcon).json()
+    first["analysis"].insert(0, {"type": "summary", "dialog": 0, "body": "keep me"})
+
+    replaced = client.post("/transcribe?on_existing=replace", json=first)
+    assert replaced.headers["X-Dialogs-Processed"] == "1"
+    assert [a["type"] for a in replaced.json()["analysis"]] == ["summary", "wtf_transcription"]
+
+    appended = client.post("/transcribe?on_existing=append", json=first).json()
+    assert [a["type"] for a in appended["analysis"]].count("wtf_transcription") == 2
+
+    assert client.post("/transcribe?on_existing=bogus", json=first).status_code == 422
+
+
+def test_replace_narrows_multi_dialog_entry(client, sample_vcon):
+    first = client.post("/transcribe", json=sample_vcon).json()
+    first["dialog"].append({"type": "text", "body": "hello"})
+    first["analysis"][0]["dialog"] = [0, 1]  # also covers the text dialog
+
+    resp = client.post("/transcribe?on_existing=replace", json=first)
+    assert resp.headers["X-Dialogs-Processed"] == "1"
+    old, new = resp.json()["analysis"]
+    assert (old["dialog"], old["body"]) == ([1], first["analysis"][0]["body"])
+    assert new["dialog"] == 0
+
+
+def test_invalid_vcon_rejected_by_schema(client, sample_vcon):
+    sample_vcon["dialog"][0]["duration"] = "long"
+    resp = client.post("/transcribe", json=sample_vcon)
+    assert resp.status_code == 422
+    assert resp.json()["detail"][0]["loc"][:3] == ["dialog", 0, "duration"]
+
+    resp = client.post(
+        "/transcribe", content=b'{"dialog": [', headers={"Content-Type": "application/json"}
+    )
+    assert resp.status_code == 422
+    assert "input" not in resp.json()["detail"][0]
+
+
+def test_vcon_round_trips_unknown_and_unset_fields(client, sample_vcon):
+    sample_vcon["dialog"][0]["duration"] = 30
+    sample_vcon["dialog"][0]["meta"] = {"queue": "support"}
+    sample_vcon["redacted"] = {"reason": "pii"}
+    del sample_vcon["uuid"]
+
+    data = client.post("/transcribe", json=sample_vcon).json()
+    assert data["redacted"] == {"reason": "pii"}
+    assert data["dialog"][0]["meta"] == {"queue": "support"}
+    assert data["dialog"][0]["duration"] == 30
+    assert "uuid" not in data
+    assert "created_at" not in data
+    assert set(data["analysis"][0]) == {
+        "type",
+        "dialog",
+        "mediatype",
+        "vendor",
+        "product",
+        "schema",
+        "body",
+        "encoding",
+    }
+
+
+def test_vcon_model_selects_audio_dialogs():
+    from vcon_mac_wtf.models.vcon import Vcon
+
+    vcon = Vcon.model_validate_json(
+        b'{"dialog": [{"type": "text", "body": "hi"},'
+        b' {"type": "recording", "mediatype": "audio/wav", "parties": [[0, 2], 1]}],'
+        b' "analysis": [{"type": "wtf_transcription", "schema": "wtf-1.0"}]}'
+    )
+    assert vcon.audio_dialogs == [1]
+    assert vcon.analysis[0].schema_ == "wtf-1.0"